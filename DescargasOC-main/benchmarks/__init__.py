@@ -0,0 +1 @@
+"""Benchmarks de rendimiento de DescargasOC (no forman parte de las pruebas)."""
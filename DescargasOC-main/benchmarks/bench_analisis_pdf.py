@@ -0,0 +1,87 @@
+"""Análisis de PDF de OC en serie contra la etapa en procesos.
+
+Genera PDF sintéticos de órdenes de compra (``tests/pdf_generador.py``) y
+mide ``organizador_bienes.analizar_pdfs`` — extracción de texto, búsqueda
+de números de OC y campos — para distintas cantidades de procesos. Cada
+corrida usa una caché de texto vacía, así que mide la extracción completa
+(el caso de una carpeta de descargas con PDF nuevos); al final se repite la
+primera sobre la caché ya llena.
+
+Uso (desde ``DescargasOC-main``)::
+
+    python -m benchmarks.bench_analisis_pdf --pdfs 300 --workers 1 2 4
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'tests'))
+from descargas_oc import organizador_bienes  # noqa: E402
+from pdf_generador import pdf_oc  # noqa: E402
+
+_CAMPOS = ('tarea', 'proveedor')
+
+
+def _generar(carpeta: Path, total: int, items: int) -> tuple[list[Path], list[str]]:
+    rutas, numeros = [], []
+    for n in range(total):
+        numero = str(140000000 + n)
+        ruta = carpeta / f'descarga ({n}).pdf'
+        tarea = str(1000000 + n) if n % 3 else None
+        ruta.write_bytes(pdf_oc(numero, f'00{n % 9000:04d} - PROVEEDOR {n}', tarea, items=items))
+        rutas.append(ruta)
+        numeros.append(numero)
+    return rutas, numeros
+
+
+def _medir(rutas, numeros, workers: int, cache: Path):
+    organizador_bienes.pdf_text.CACHE_PATH = str(cache)
+    inicio = time.perf_counter()
+    resultados = organizador_bienes.analizar_pdfs(
+        rutas, campos=_CAMPOS, numeros=numeros, workers=workers
+    )
+    transcurrido = time.perf_counter() - inicio
+    resumen = [(r.info.tarea, r.info.proveedor, r.numeros, r.error) for r in resultados]
+    return transcurrido, resumen
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdfs', type=int, default=300)
+    parser.add_argument('--items', type=int, default=40, help='renglones de detalle por página')
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, organizador_bienes.parse_pool.PARSE_WORKERS}))
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='bench_pdf_') as tmp:
+        tmp = Path(tmp)
+        rutas, numeros = _generar(tmp, args.pdfs, args.items)
+        # Solo la mitad de las OC se busca por texto, como en ``mover_oc``.
+        buscados = numeros[::2]
+        megas = sum(r.stat().st_size for r in rutas) / 1e6
+        print(f'{args.pdfs} PDF, {megas:.1f} MB')
+        print(f"{'procesos':<10}{'seg':>8}{'pdf/s':>10}{'speedup':>10}")
+        base = referencia = None
+        for workers in args.workers:
+            cache = tmp / f'cache_{workers}.sqlite3'
+            transcurrido, resumen = _medir(rutas, buscados, workers, cache)
+            if referencia is None:
+                referencia = resumen
+            elif resumen != referencia:
+                raise SystemExit(f'Resultados distintos con {workers} procesos')
+            base = base or transcurrido
+            print(f'{workers:<10}{transcurrido:>8.2f}{args.pdfs / transcurrido:>10.0f}'
+                  f'{base / transcurrido:>10.2f}')
+
+        workers = args.workers[0]
+        transcurrido, _ = _medir(rutas, buscados, workers, tmp / f'cache_{workers}.sqlite3')
+        print(f'{workers:<10}{transcurrido:>8.2f}{args.pdfs / transcurrido:>10.0f}'
+              f'{base / transcurrido:>10.2f}  (caché llena)')
+
+
+if __name__ == '__main__':
+    main()
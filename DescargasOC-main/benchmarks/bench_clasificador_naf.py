@@ -0,0 +1,96 @@
+"""Costo por mensaje de la clasificación de notificaciones NAF.
+
+Compara la extracción anterior (``tests/escuchador_referencia.py``: patrones sin
+compilar sobre todo el cuerpo, para cada mensaje) con
+``ClasificadorNAF.clasificar``, que revisa primero el asunto y solo convierte
+el cuerpo de las autorizaciones. El corpus mezcla notificaciones NAF con
+boletines HTML de otros remitentes en la proporción indicada.
+
+Uso (desde ``DescargasOC-main``)::
+
+    python -m benchmarks.bench_clasificador_naf --mensajes 500 --proporcion-naf 0.3
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'tests'))
+from descargas_oc import escuchador  # noqa: E402
+from escuchador_referencia import extraer_datos_secuencial  # noqa: E402
+
+
+def _naf(n: int) -> tuple[str, str]:
+    asunto = f'SISTEMA NAF: Notificacion AUTORIZACION ORDEN COMPRA No {140000000 + n}'
+    cuerpo = (
+        '<p>Se ha autorizado la orden de compra de No. '
+        f'{140000000 + n}</p><p>Fecha Autorizacion: 05/06/2024</p>'
+        '<p>Fecha Orden: 04/06/2024</p>'
+        '<p><strong>Proveedor:</strong> <strong>004465 - SALAZAR RUIZ MARCELO</strong> '
+        'con <strong>Fecha de Vencimiento:</strong> 16/10/2025</p>'
+        f'<br><p><strong>Observacion:</strong> TAREA #{n}//PEDIDO:S/N//DETALLE</p>'
+    )
+    return asunto, cuerpo
+
+
+def _boletin(n: int) -> tuple[str, str]:
+    fila = (
+        "<tr><td style='padding:4px'><img src='cid:logo'></td>"
+        "<td>Oferta de repuestos &amp; servicios para su flota</td></tr>"
+    )
+    cuerpo = '<style>td { font-family: Arial }</style><table>' + fila * 300 + '</table>'
+    return f'Boletín semanal {n}', cuerpo
+
+
+def _anterior(asunto: str, cuerpo: str):
+    # El asunto se revisaba aparte (``_evaluar_encabezados``) y el cuerpo se
+    # procesaba igual.
+    re.search(r'SISTEMA\s+NAF:.*AUTORIZACI', asunto or '', re.IGNORECASE)
+    return extraer_datos_secuencial(asunto, cuerpo)
+
+
+def _clasificador(asunto: str, cuerpo: str):
+    return escuchador.ClasificadorNAF().clasificar(asunto, lambda: cuerpo)
+
+
+def _medir(func, corpus, repeticiones: int) -> float:
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for asunto, cuerpo in corpus:
+            func(asunto, cuerpo)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / len(corpus) * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mensajes', type=int, default=500)
+    parser.add_argument('--proporcion-naf', type=float, default=0.3)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(0)
+    corpus = [
+        _naf(n) if rnd.random() < args.proporcion_naf else _boletin(n)
+        for n in range(args.mensajes)
+    ]
+    for asunto, cuerpo in corpus:
+        datos = _clasificador(asunto, cuerpo)
+        if datos is not None and datos.como_tupla() != _anterior(asunto, cuerpo):
+            raise SystemExit(f'Resultados distintos para "{asunto}"')
+
+    print(f"{'corpus':<10}{'antes µs':>10}{'ahora µs':>10}{'speedup':>10}")
+    solo_naf = [m for m in corpus if escuchador.ClasificadorNAF.es_autorizacion(m[0])]
+    for nombre, mensajes in (('mixto', corpus), ('solo NAF', solo_naf)):
+        antes = _medir(_anterior, mensajes, args.repeticiones)
+        ahora = _medir(_clasificador, mensajes, args.repeticiones)
+        print(f'{nombre:<10}{antes:>10.1f}{ahora:>10.1f}{antes / ahora:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
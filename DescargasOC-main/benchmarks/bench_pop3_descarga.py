@@ -0,0 +1,81 @@
+"""Compara la descarga POP3 por mensaje contra el conjunto de sesiones.
+
+Reproduce la descarga anterior de ``buscar_ocs`` (una conexión, login,
+UIDL y RETR por mensaje en ``max_threads`` hilos) y la compara con
+el conjunto de sesiones de ``escuchador`` (``_PoolPOP3``) sobre un POP3 local con latencia
+artificial por round-trip y por conexión (handshake TLS + login).
+
+Uso (desde ``DescargasOC-main``)::
+
+    python -m benchmarks.bench_pop3_descarga --mensajes 50 --latencia-ms 5
+"""
+from __future__ import annotations
+
+import argparse
+import poplib
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'tests'))
+from descargas_oc import escuchador  # noqa: E402
+from pop3_standin import POP3StandIn  # noqa: E402
+
+
+def _por_mensaje(cfg, nums: list[int]) -> None:
+    def _uno(num: int) -> bytes:
+        conn = poplib.POP3_SSL(cfg.pop_server, cfg.pop_port)
+        conn.user(cfg.usuario)
+        conn.pass_(cfg.password)
+        conn.uidl(num)
+        raw = b"\n".join(conn.retr(num)[1])
+        conn.quit()
+        return raw
+
+    with ThreadPoolExecutor(max_workers=cfg.max_threads) as ex:
+        list(ex.map(_uno, nums))
+
+
+def _con_sesiones(cfg, nums: list[int]) -> None:
+    conn = escuchador._abrir_sesion(cfg)
+    conn.uidl()
+    pool = escuchador._PoolPOP3(conn, cfg, len(nums))
+    pool.pedir('RETR', nums)
+    pool.cerrar()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mensajes', type=int, default=50)
+    parser.add_argument('--latencia-ms', type=float, default=5.0)
+    parser.add_argument('--hilos', type=int, default=5, help='max_threads de la configuración')
+    args = parser.parse_args(argv)
+
+    relleno = 'Detalle de la orden de compra autorizada.\r\n' * 60
+    with POP3StandIn(latency=args.latencia_ms / 1000.0) as server:
+        for n in range(args.mensajes):
+            server.add_message(f'UID{n}', (
+                f'Subject: SISTEMA NAF: AUTORIZACION ORDEN COMPRA No {n}\r\n'
+                f'From: naf@telconet.ec\r\n\r\n{relleno}'
+            ).encode('utf-8'))
+        poplib.POP3_SSL = server.connect
+        cfg = SimpleNamespace(pop_server='bench', pop_port=995, usuario='bench',
+                              password='bench', max_threads=args.hilos)
+        nums = list(range(args.mensajes, 0, -1))
+
+        print(f"{args.mensajes} mensajes, latencia {args.latencia_ms} ms/round-trip, "
+              f"{args.hilos} hilos")
+        print(f"{'modo':<22}{'conexiones':>12}{'comandos':>10}{'seg':>8}")
+        for nombre, ejecutar in (('por mensaje', _por_mensaje), ('sesiones + pipelining', _con_sesiones)):
+            server.reset_stats()
+            inicio = time.perf_counter()
+            ejecutar(cfg, nums)
+            transcurrido = time.perf_counter() - inicio
+            print(f"{nombre:<22}{server.stats['connections']:>12}"
+                  f"{server.stats['commands']:>10}{transcurrido:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
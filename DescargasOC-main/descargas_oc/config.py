@@ -89,6 +89,21 @@ class Config:
             abas_headless_raw,
             headless_val,
         )
+        # aviso inmediato por IMAP IDLE; el escaneo sigue siendo por POP3
+        self.data['imap_idle'] = _parse_bool(
+            os.getenv('IMAP_IDLE', self.data.get('imap_idle')), False
+        )
+        self.data['imap_server'] = os.getenv(
+            'IMAP_SERVER',
+            self.data.get('imap_server') or self.data.get('pop_server') or 'pop.telconet.ec',
+        )
+        self.data['imap_port'] = _parse_int(
+            os.getenv('IMAP_PORT', self.data.get('imap_port', 993)), 993
+        )
+        # procesos para leer PDF en mover_pdf/organizador_bienes (0 = automático)
+        self.data['pdf_workers'] = _parse_int(
+            os.getenv('PDF_WORKERS', self.data.get('pdf_workers', 0)), 0
+        )
         self.data.setdefault('max_threads', 5)
         self.data.setdefault('batch_size', 50)
 
@@ -5,19 +5,36 @@ from email.utils import getaddresses
 import json
 import re
 import html
+import queue
+import time
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Iterable, Iterator
 
 try:  # permite ejecutar como script sin el paquete instalado
     from .config import Config
     from .logger import get_logger
+    from .procesados import ProcesadosStore
 except ImportError:  # pragma: no cover
     from config import Config
     from logger import get_logger
+    from procesados import ProcesadosStore
+
+# El convertidor de HTML a texto se comparte con GestorCompras; sin él se
+# usa la limpieza por expresiones regulares de ``_limpiar_html_basico``.
+try:
+    from .gestor import html_to_text
+except ImportError:  # pragma: no cover
+    try:
+        from gestor import html_to_text
+    except ImportError:
+        html_to_text = None
 
 logger = get_logger(__name__)
 
 DATA_DIR = Path(__file__).resolve().parents[1] / 'data'
+PROCESADOS_DB = DATA_DIR / 'procesados.sqlite3'
+# Registro anterior en texto plano; se migra a ``PROCESADOS_DB`` al abrirlo.
 PROCESADOS_FILE = DATA_DIR / 'procesados.txt'
 LAST_UIDL_FILE = DATA_DIR / 'last_uidl.txt'
 ORDENES_TMP = DATA_DIR / 'ordenes_tmp.json'
@@ -25,6 +42,20 @@ REMITENTES_BASE = {
     'jotoapanta@telconet.ec',
     'naf@telconet.ec',
 }
+# Sesiones POP3 autenticadas como máximo por escaneo (además de ``max_threads``);
+# evita que el servidor limite los inicios de sesión.
+POP3_MAX_SESIONES = 3
+# Mensajes que toma cada sesión por vez. Si el servidor anuncia PIPELINING
+# los RETR de un lote se envían juntos, sin esperar cada respuesta.
+POP3_LOTE = 10
+# Segundos entre depuraciones de UIDL procesados que ya no están en el servidor.
+PRUNE_INTERVALO = 24 * 3600
+# Modo de drenaje: tope de lotes encadenados por escaneo (lo que quede
+# pendiente se retoma en el siguiente intervalo).
+DRENAJE_MAX_LOTES = 40
+# Caracteres de texto que se extraen del cuerpo; los datos de la OC están al
+# inicio y los boletines HTML grandes no se convierten completos.
+LIMITE_TEXTO_HTML = 20_000
 
 
 def _normalizar_remitentes(valor: str | None) -> set[str]:
@@ -59,30 +90,36 @@ def _conjunto_remitentes(valor) -> set[str]:
     return remitentes
 
 
-def _limpiar_html(valor: str) -> str:
-    """Convierte HTML básico en texto plano preservando saltos de línea."""
-
+def _limpiar_html_basico(valor: str) -> str:
     if not valor:
         return ""
     texto = re.sub(r"(?i)<br\s*/?>", "\n", valor)
     texto = re.sub(r"(?i)</p>", "\n", texto)
     texto = re.sub(r"<[^>]+>", "", texto)
-    texto = html.unescape(texto)
+    return html.unescape(texto)
+
+
+def _limpiar_html(valor: str, limite: int | None = None) -> str:
+    """Convierte HTML básico en texto plano preservando saltos de línea."""
+
+    if html_to_text is None:
+        texto = _limpiar_html_basico(valor)
+    else:
+        texto = html_to_text(valor, LIMITE_TEXTO_HTML if limite is None else limite)
     return texto.replace("\xa0", " ")
 
 
+def _procesados() -> ProcesadosStore:
+    return ProcesadosStore(PROCESADOS_DB, legado=PROCESADOS_FILE)
+
+
 def cargar_procesados() -> set[str]:
-    try:
-        with open(PROCESADOS_FILE, 'r') as f:
-            return set(line.strip() for line in f)
-    except FileNotFoundError:
-        return set()
+    """Todos los UIDL procesados (para consultas puntuales usar ``_procesados()``)."""
+    return _procesados().todos()
 
 
 def guardar_procesado(uidl: str):
-    PROCESADOS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(PROCESADOS_FILE, 'a') as f:
-        f.write(uidl + '\n')
+    _procesados().mark_processed([uidl])
 
 
 def cargar_ultimo_uidl() -> str:
@@ -101,64 +138,280 @@ def guardar_ultimo_uidl(uidl: str):
 
 def registrar_procesados(uidls: list[str], ultimo: str | None):
     """Marca los mensajes como procesados y actualiza el último UIDL."""
-    for uidl in uidls:
-        guardar_procesado(uidl)
+    _procesados().mark_processed(uidls)
     if ultimo:
         guardar_ultimo_uidl(ultimo)
 
 
-def extraer_datos(asunto: str, cuerpo: str):
-    """Extrae número de OC, fechas, proveedor y tarea del asunto/cuerpo."""
-    numero = None
-    fecha_aut = None
-    fecha_orden = None
-    proveedor = None
-    tarea = None
-
-    if asunto:
-        patt = r"SISTEMA\s+NAF:.*?ORDEN\s+COMPRA\s+(?:NO|N[°º])\.?\s*(\d+)"
-        m = re.search(patt, asunto, re.IGNORECASE)
-        if m:
-            numero = m.group(1)
-
-    cuerpo_texto = _limpiar_html(cuerpo or "")
+_RX_ASUNTO_NAF = re.compile(r'SISTEMA\s+NAF:.*AUTORIZACI', re.IGNORECASE)
+_RX_NUMERO_ASUNTO = re.compile(
+    r"SISTEMA\s+NAF:.*?ORDEN\s+COMPRA\s+(?:NO|N[°º])\.?\s*(\d+)", re.IGNORECASE
+)
+_RX_NUMERO_CUERPO = re.compile(
+    r"orden\s+de\s+compra\s+de\s+(?:No|N[°º])\.?\s*(\d+)", re.IGNORECASE
+)
+_RX_FECHA_AUT = re.compile(
+    r"Fecha\s+Autorizaci(?:o|\xc3\xb3)n[:\s]*([0-9]{2}/[0-9]{2}/[0-9]{4})", re.IGNORECASE
+)
+_RX_FECHA_ORDEN = re.compile(r"Fecha\s+Orden[:\s]*([0-9]{2}/[0-9]{2}/[0-9]{4})", re.IGNORECASE)
+_RX_PROVEEDOR = re.compile(
+    r"proveedor\s*:?[\s\xa0]+([^\n]+?)(?:\s+con\s+Fecha|\n|$)", re.IGNORECASE
+)
+_RX_TAREA = re.compile(r"#(\d+)\s*//")
+_RX_ESPACIOS = re.compile(r"\s+")
+
+
+class DatosOC:
+    """Datos de una notificación de autorización de OC.
+
+    Se puede desempaquetar como la tupla ``(numero, fecha_aut, fecha_orden,
+    proveedor, tarea)`` que retorna :func:`extraer_datos`.
+    """
+
+    __slots__ = ('numero', 'fecha_aut', 'fecha_orden', 'proveedor', 'tarea')
+
+    numero: str | None
+    fecha_aut: str | None
+    fecha_orden: str | None
+    proveedor: str | None
+    tarea: str | None
+
+    def __init__(self, numero=None, fecha_aut=None, fecha_orden=None, proveedor=None, tarea=None):
+        self.numero = numero
+        self.fecha_aut = fecha_aut
+        self.fecha_orden = fecha_orden
+        self.proveedor = proveedor
+        self.tarea = tarea
+
+    def como_tupla(self) -> tuple:
+        return (self.numero, self.fecha_aut, self.fecha_orden, self.proveedor, self.tarea)
+
+    def __iter__(self):
+        return iter(self.como_tupla())
+
+    def __eq__(self, otro) -> bool:
+        if not isinstance(otro, DatosOC):
+            return NotImplemented
+        return self.como_tupla() == otro.como_tupla()
+
+    def __repr__(self) -> str:
+        campos = ', '.join(f'{c}={getattr(self, c)!r}' for c in self.__slots__)
+        return f'DatosOC({campos})'
+
+
+class ClasificadorNAF:
+    """Reconoce las notificaciones de autorización de OC del sistema NAF.
+
+    Los patrones se compilan una sola vez. :meth:`clasificar` revisa primero
+    el asunto y solo si corresponde convierte el cuerpo, limitado a
+    ``ventana`` caracteres de texto: los datos de la OC están al inicio.
+    """
+
+    def __init__(self, ventana: int | None = None):
+        self.ventana = LIMITE_TEXTO_HTML if ventana is None else ventana
+
+    @staticmethod
+    def es_autorizacion(asunto: str | None) -> bool:
+        return bool(asunto and _RX_ASUNTO_NAF.search(asunto))
+
+    def clasificar(self, asunto: str, cuerpo: str | Callable[[], str]) -> DatosOC | None:
+        """``None`` si el asunto no es de autorización NAF; el cuerpo (o la
+        función que lo obtiene) no se toca en ese caso."""
+        if not self.es_autorizacion(asunto):
+            return None
+        return self.extraer(asunto, cuerpo() if callable(cuerpo) else cuerpo)
+
+    def extraer(self, asunto: str, cuerpo: str) -> DatosOC:
+        datos = DatosOC()
+        if asunto:
+            m = _RX_NUMERO_ASUNTO.search(asunto)
+            if m:
+                datos.numero = m.group(1)
 
-    if cuerpo_texto:
-        if not numero:
-            m = re.search(r"orden\s+de\s+compra\s+de\s+(?:No|N[°º])\.?\s*(\d+)", cuerpo_texto, re.IGNORECASE)
+        texto = _limpiar_html(cuerpo, self.ventana) if cuerpo else ""
+        if not texto:
+            return datos
+        if not datos.numero:
+            m = _RX_NUMERO_CUERPO.search(texto)
             if m:
-                numero = m.group(1)
-        m = re.search(r"Fecha\s+Autorizaci(?:o|\xc3\xb3)n[:\s]*([0-9]{2}/[0-9]{2}/[0-9]{4})", cuerpo_texto, re.IGNORECASE)
+                datos.numero = m.group(1)
+        m = _RX_FECHA_AUT.search(texto)
         if m:
-            fecha_aut = m.group(1)
-        m = re.search(r"Fecha\s+Orden[:\s]*([0-9]{2}/[0-9]{2}/[0-9]{4})", cuerpo_texto, re.IGNORECASE)
+            datos.fecha_aut = m.group(1)
+        m = _RX_FECHA_ORDEN.search(texto)
         if m:
-            fecha_orden = m.group(1)
-        m = re.search(r"proveedor\s*:?[\s\xa0]+([^\n]+?)(?:\s+con\s+Fecha|\n|$)", cuerpo_texto, re.IGNORECASE)
+            datos.fecha_orden = m.group(1)
+        m = _RX_PROVEEDOR.search(texto)
         if m:
-            proveedor = re.sub(r"\s+", " ", m.group(1)).strip()
-        m = re.search(r"#(\d+)\s*//", cuerpo_texto)
+            datos.proveedor = _RX_ESPACIOS.sub(" ", m.group(1)).strip()
+        m = _RX_TAREA.search(texto)
         if m:
-            tarea = m.group(1)
+            datos.tarea = m.group(1)
+        return datos
 
-    return numero, fecha_aut, fecha_orden, proveedor, tarea
+
+def extraer_datos(asunto: str, cuerpo: str):
+    """Extrae número de OC, fechas, proveedor y tarea del asunto/cuerpo."""
+    return ClasificadorNAF().extraer(asunto, cuerpo).como_tupla()
+
+
+def _cuerpo_texto(mensaje) -> str:
+    """Partes ``text/plain`` del mensaje (o el cuerpo si no es multipart)."""
+    cuerpo = ''
+    if mensaje.is_multipart():
+        for parte in mensaje.walk():
+            if parte.get_content_type() == 'text/plain':
+                try:
+                    charset = parte.get_content_charset() or 'utf-8'
+                    cuerpo += parte.get_payload(decode=True).decode(charset, errors='replace')
+                except Exception:
+                    pass
+    else:
+        charset = mensaje.get_content_charset() or 'utf-8'
+        cuerpo = mensaje.get_payload(decode=True).decode(charset, errors='replace')
+    return cuerpo
+
+
+def _evaluar_encabezados(mensaje, remitentes_validos: set[str]) -> tuple[str, bool, bool]:
+    """Retorna ``(asunto, remitente_ok, asunto_ok)`` a partir de los encabezados."""
+    asunto = str(make_header(decode_header(mensaje.get('Subject', ''))))
+    asunto_ok = ClasificadorNAF.es_autorizacion(asunto)
+    remitentes_mensaje: set[str] = set()
+    for header_name in ('From', 'Reply-To', 'Sender', 'Return-Path'):
+        raw_header = mensaje.get(header_name)
+        if not raw_header:
+            continue
+        decoded_header = str(make_header(decode_header(raw_header)))
+        remitentes_mensaje.update(_normalizar_remitentes(decoded_header))
+    if not remitentes_mensaje:
+        remitente = str(make_header(decode_header(mensaje.get('From', ''))))
+        remitentes_mensaje = _normalizar_remitentes(remitente)
+    return asunto, bool(remitentes_mensaje & remitentes_validos), asunto_ok
 
 
-def _descargar_mensaje(num: int, cfg: Config) -> tuple[str, bytes]:
+def _abrir_sesion(cfg: Config) -> poplib.POP3:
     conn = poplib.POP3_SSL(cfg.pop_server, cfg.pop_port)
     conn.user(cfg.usuario)
     conn.pass_(cfg.password)
-    resp_uidl = conn.uidl(num)
-    line = resp_uidl.decode() if isinstance(resp_uidl, bytes) else resp_uidl
-    uidl = line.split()[-1]
-    resp = conn.retr(num)
-    conn.quit()
-    raw = b"\n".join(resp[1])
-    return uidl, raw
+    return conn
 
 
-def buscar_ocs(cfg: Config) -> tuple[list[dict], str | None]:
-    procesados = cargar_procesados()
+def _soporta_pipelining(conn: poplib.POP3) -> bool:
+    try:
+        return 'PIPELINING' in conn.capa()
+    except poplib.error_proto:
+        return False
+
+
+# Comandos de :func:`_pedir_lote`: la llamada pública de poplib y la línea
+# que se envía al servidor con PIPELINING.
+_COMANDOS_POP3 = {
+    'RETR': (lambda conn, num: conn.retr(num), 'RETR {}'),
+    'TOP': (lambda conn, num: conn.top(num, 0), 'TOP {} 0'),
+}
+
+
+def _pedir_lote(
+    conn: poplib.POP3, comando: str, nums: list[int], pipelining: bool
+) -> Iterator[tuple[int, bytes | Exception]]:
+    """Ejecuta ``comando`` (``'RETR'`` o ``'TOP'``, solo encabezados) para
+    cada número por ``conn``.
+
+    Un ``-ERR`` del servidor se entrega como excepción para ese mensaje.
+    """
+    llamar, linea = _COMANDOS_POP3[comando]
+    if not pipelining:
+        for num in nums:
+            try:
+                yield num, b"\n".join(llamar(conn, num)[1])
+            except poplib.error_proto as exc:
+                yield num, exc
+        return
+    # poplib no tiene API pública para PIPELINING (RFC 2449): se usan sus
+    # métodos internos para enviar todos los comandos y luego leer las
+    # respuestas en el mismo orden.
+    for num in nums:
+        conn._putcmd(linea.format(num))
+    for num in nums:
+        try:
+            yield num, b"\n".join(conn._getlongresp()[1])
+        except poplib.error_proto as exc:
+            yield num, exc
+
+
+class _PoolPOP3:
+    """Conjunto fijo de sesiones POP3 autenticadas, reutilizado entre fases.
+
+    La primera sesión es la que obtuvo el listado UIDL; las demás (hasta
+    ``POP3_MAX_SESIONES``, limitadas por ``cfg.max_threads``) se abren en la
+    primera fase que las necesite. En cada fase las sesiones toman lotes de
+    ``POP3_LOTE`` mensajes de una cola común; si una sesión falla se
+    descarta y sus lotes pendientes los atienden las demás.
+    """
+
+    def __init__(self, conn: poplib.POP3, cfg: Config, mensajes: int):
+        lotes = max(1, -(-mensajes // POP3_LOTE))
+        sesiones = max(1, min(int(getattr(cfg, 'max_threads', 1) or 1), POP3_MAX_SESIONES, lotes))
+        self._cfg = cfg
+        self._sesiones: list[poplib.POP3 | None] = [conn] + [None] * (sesiones - 1)
+        self._pipelining: dict[int, bool] = {}
+        self._descartadas: set[int] = set()
+
+    def pedir(self, comando: str, nums: list[int]) -> dict[int, bytes | Exception]:
+        lotes: queue.Queue[list[int]] = queue.Queue()
+        for i in range(0, len(nums), POP3_LOTE):
+            lotes.put(nums[i:i + POP3_LOTE])
+        resultados: dict[int, bytes | Exception] = {}
+
+        def _trabajar(i: int) -> None:
+            try:
+                sesion = self._sesiones[i]
+                if sesion is None:
+                    sesion = self._sesiones[i] = _abrir_sesion(self._cfg)
+                if i not in self._pipelining:
+                    self._pipelining[i] = _soporta_pipelining(sesion)
+                while True:
+                    try:
+                        lote = lotes.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        for num, resultado in _pedir_lote(sesion, comando, lote, self._pipelining[i]):
+                            resultados[num] = resultado
+                    except Exception as exc:
+                        for num in lote:
+                            resultados.setdefault(num, exc)
+                        raise
+            except Exception as exc:
+                logger.warning('Sesión POP3 de descarga interrumpida: %s', exc)
+                self._descartadas.add(i)
+
+        activas = [i for i in range(len(self._sesiones)) if i not in self._descartadas]
+        if nums and activas:
+            with ThreadPoolExecutor(max_workers=len(activas)) as ex:
+                list(ex.map(_trabajar, activas))
+        return resultados
+
+    def cerrar(self) -> None:
+        for sesion in self._sesiones:
+            if sesion is None:
+                continue
+            try:
+                sesion.quit()
+            except Exception:
+                pass
+
+
+def escanear_lote(cfg: Config, excluir: Iterable[str] = ()) -> dict:
+    """Revisa un lote de hasta ``cfg.batch_size`` mensajes pendientes.
+
+    ``excluir`` son UIDL ya revisados en este mismo drenaje (p. ej. correos
+    cuya OC falló), que no deben volver a tomarse. Retorna un diccionario con
+    ``ordenes``, ``ultimo`` (UIDL más nuevo del buzón), ``revisados`` (UIDL
+    tomados en este lote) y ``restantes`` (pendientes que no entraron).
+    """
+    procesados = _procesados()
+    excluir = set(excluir)
     last_uidl = cargar_ultimo_uidl()
 
     remitentes_validos = {r.lower() for r in REMITENTES_BASE}
@@ -166,80 +419,98 @@ def buscar_ocs(cfg: Config) -> tuple[list[dict], str | None]:
     remitentes_validos.update(_conjunto_remitentes(getattr(cfg, 'remitente_adicional', None)))
     remitentes_validos.discard('')
 
-    conn = poplib.POP3_SSL(cfg.pop_server, cfg.pop_port)
-    conn.user(cfg.usuario)
-    conn.pass_(cfg.password)
-
-    resp, uidl_lines, _ = conn.uidl()
-    entries = [line.decode().split() for line in uidl_lines]
-    mensajes = [(int(num), uidl) for num, uidl in entries]
-    conn.quit()
-
-    indices: list[tuple[int, str]] = []
-    nuevo_ultimo = None
+    conn = _abrir_sesion(cfg)
+    try:
+        # El mapa UIDL se pide una sola vez y se reutiliza para toda la descarga.
+        resp, uidl_lines, _ = conn.uidl()
+        entries = [line.decode().split() for line in uidl_lines]
+        mensajes = [(int(num), uidl) for num, uidl in entries]
+    except Exception:
+        conn.quit()
+        raise
+
+    if mensajes and procesados.segundos_desde_prune() > PRUNE_INTERVALO:
+        borrados = procesados.prune(uidl for _, uidl in mensajes)
+        logger.info('UIDL procesados depurados (ya no están en el servidor): %d', borrados)
+
+    recientes: list[tuple[int, str]] = []
     for num, uidl in reversed(mensajes):
         if uidl == last_uidl:
             break
-        if nuevo_ultimo is None:
-            nuevo_ultimo = uidl
-        if uidl in procesados:
-            continue
-        indices.append((num, uidl))
-        if len(indices) >= cfg.batch_size:
-            break
+        recientes.append((num, uidl))
+    nuevo_ultimo = recientes[0][1] if recientes else None
+    ya_procesados = procesados.filtrar(uidl for _, uidl in recientes if uidl not in excluir)
+    pendientes = [
+        (num, uidl) for num, uidl in recientes
+        if uidl not in ya_procesados and uidl not in excluir
+    ]
+    indices = pendientes[:cfg.batch_size]
+    lote = {
+        'ordenes': [],
+        'ultimo': nuevo_ultimo,
+        'revisados': [uidl for _, uidl in indices],
+        'restantes': len(pendientes) - len(indices),
+    }
 
-    ordenes: list[dict] = []
+    ordenes: list[dict] = lote['ordenes']
     if not indices:
-        return ordenes, nuevo_ultimo
+        conn.quit()
+        return lote
 
-    with ThreadPoolExecutor(max_workers=cfg.max_threads) as ex:
-        futures = {ex.submit(_descargar_mensaje, num, cfg): (num, uidl) for num, uidl in indices}
-        for fut in futures:
-            num, uidl = futures[fut]
-            try:
-                uidl_res, raw = fut.result()
-                logger.debug("Procesado UIDL %s", uidl_res)
-                mensaje = email_parser.BytesParser().parsebytes(raw)
-                raw_sub = mensaje.get('Subject', '')
-                raw_from = mensaje.get('From', '')
-                asunto = str(make_header(decode_header(raw_sub)))
-                remitente = str(make_header(decode_header(raw_from)))
-                cuerpo = ''
-                if mensaje.is_multipart():
-                    for parte in mensaje.walk():
-                        if parte.get_content_type() == 'text/plain':
-                            try:
-                                charset = parte.get_content_charset() or 'utf-8'
-                                cuerpo += parte.get_payload(decode=True).decode(charset, errors='replace')
-                            except Exception:
-                                pass
-                else:
-                    charset = mensaje.get_content_charset() or 'utf-8'
-                    cuerpo = mensaje.get_payload(decode=True).decode(charset, errors='replace')
-                numero, fecha_aut, fecha_orden, proveedor, tarea = extraer_datos(asunto, cuerpo)
-                asunto_ok = re.search(r'SISTEMA\s+NAF:.*AUTORIZACI', asunto or '', re.IGNORECASE)
-                remitentes_mensaje: set[str] = set()
-                for header_name in ('From', 'Reply-To', 'Sender', 'Return-Path'):
-                    raw_header = mensaje.get(header_name)
-                    if not raw_header:
-                        continue
-                    decoded_header = str(make_header(decode_header(raw_header)))
-                    remitentes_mensaje.update(_normalizar_remitentes(decoded_header))
-                if not remitentes_mensaje:
-                    remitentes_mensaje = _normalizar_remitentes(remitente)
-                remitente_ok = bool(remitentes_mensaje & remitentes_validos)
-                if remitente_ok and asunto_ok and numero:
-                    ordenes.append({'uidl': uidl_res, 'numero': numero, 'fecha_aut': fecha_aut, 'fecha_orden': fecha_orden, 'proveedor': proveedor, 'tarea': tarea})
-                elif remitente_ok:
-                    logger.warning(
-                        'Mensaje UIDL %s de remitente válido sin datos de OC. Asunto="%s"',
-                        uidl_res,
-                        asunto,
-                    )
-                else:
-                    guardar_procesado(uidl_res)
-            except Exception as e:
-                logger.error('Error procesando mensaje %s: %s', num, e)
+    pool = _PoolPOP3(conn, cfg, len(indices))
+    try:
+        # Fase 1: solo encabezados (TOP n 0). Lo que no viene de un remitente
+        # válido con asunto de autorización NAF se descarta sin bajar el cuerpo.
+        encabezados = pool.pedir('TOP', [num for num, _ in indices])
+        candidatos: list[tuple[int, str]] = []
+        descartados: list[str] = []
+        for num, uidl in indices:
+            cabecera = encabezados.get(num)
+            if isinstance(cabecera, bytes):
+                mensaje = email_parser.BytesParser().parsebytes(cabecera, headersonly=True)
+                asunto, remitente_ok, asunto_ok = _evaluar_encabezados(mensaje, remitentes_validos)
+                if not (remitente_ok and asunto_ok):
+                    if remitente_ok:
+                        logger.info('Mensaje UIDL %s descartado por asunto: "%s"', uidl, asunto)
+                    descartados.append(uidl)
+                    continue
+            # Sin encabezados (p. ej. TOP no soportado) se decide con el mensaje completo.
+            candidatos.append((num, uidl))
+
+        # Fase 2: mensaje completo solo para las notificaciones candidatas.
+        descargados = pool.pedir('RETR', [num for num, _ in candidatos])
+    finally:
+        pool.cerrar()
+
+    clasificador = ClasificadorNAF()
+    for num, uidl_res in candidatos:
+        try:
+            raw = descargados.get(num)
+            if raw is None:
+                raise RuntimeError('mensaje no descargado')
+            if isinstance(raw, Exception):
+                raise raw
+            logger.debug("Procesado UIDL %s", uidl_res)
+            mensaje = email_parser.BytesParser().parsebytes(raw)
+            asunto, remitente_ok, _asunto_ok = _evaluar_encabezados(mensaje, remitentes_validos)
+            datos = None
+            if remitente_ok:
+                # El cuerpo solo se decodifica si el asunto es de autorización NAF.
+                datos = clasificador.clasificar(asunto, lambda: _cuerpo_texto(mensaje))
+            if datos is not None and datos.numero:
+                ordenes.append({'uidl': uidl_res, 'numero': datos.numero, 'fecha_aut': datos.fecha_aut, 'fecha_orden': datos.fecha_orden, 'proveedor': datos.proveedor, 'tarea': datos.tarea})
+            elif remitente_ok:
+                logger.warning(
+                    'Mensaje UIDL %s de remitente válido sin datos de OC. Asunto="%s"',
+                    uidl_res,
+                    asunto,
+                )
+            else:
+                descartados.append(uidl_res)
+        except Exception as e:
+            logger.error('Error procesando mensaje %s: %s', num, e)
+
+    procesados.mark_processed(descartados)
 
     logger.info('Órdenes encontradas: %d', len(ordenes))
     try:
@@ -248,5 +519,77 @@ def buscar_ocs(cfg: Config) -> tuple[list[dict], str | None]:
             json.dump(ordenes, f, ensure_ascii=False)
     except Exception as exc:  # pragma: no cover
         logger.warning('No se pudo guardar ordenes_tmp: %s', exc)
-    return ordenes, nuevo_ultimo
+    return lote
+
+
+def buscar_ocs(cfg: Config) -> tuple[list[dict], str | None]:
+    """Un solo lote: retorna ``(ordenes, ultimo_uidl)``."""
+    lote = escanear_lote(cfg)
+    return lote['ordenes'], lote['ultimo']
+
+
+def drenar_ocs(
+    cfg: Config,
+    procesar: Callable[[list[dict]], bool],
+    progreso: Callable[[dict], None] | None = None,
+) -> dict:
+    """Procesa lotes seguidos hasta vaciar los pendientes del buzón.
+
+    Con pocos pendientes equivale a un escaneo normal. Si hay más que
+    ``cfg.batch_size`` (p. ej. tras un feriado o una caída) los lotes se
+    encadenan sin esperar ``scan_interval``: mientras ``procesar`` atiende
+    un lote se descarga el siguiente (uno solo por adelantado, con las
+    sesiones POP3 limitadas por ``POP3_MAX_SESIONES``), hasta
+    ``DRENAJE_MAX_LOTES`` lotes por escaneo.
+
+    ``procesar(ordenes)`` retorna ``True`` si todas las OC del lote quedaron
+    registradas. ``progreso`` recibe tras cada lote un diccionario con
+    ``pendientes``, ``revisados``, ``ordenes``, ``lotes`` y ``por_minuto``.
+    Retorna ese mismo resumen más ``ultimo`` y ``completo`` (todos los lotes
+    se procesaron sin fallas); el último UIDL solo debe guardarse si
+    ``completo`` es verdadero.
+    """
+    inicio = time.monotonic()
+    resumen = {
+        'pendientes': 0, 'revisados': 0, 'ordenes': 0, 'lotes': 0,
+        'por_minuto': 0.0, 'ultimo': None, 'completo': True,
+    }
+    vistos: set[str] = set()
+    # Un solo hilo: el lote siguiente excluye lo ya revisado, por lo que no
+    # puede pedirse antes de conocer el lote actual.
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        siguiente = ex.submit(escanear_lote, cfg)
+        while siguiente is not None:
+            lote = siguiente.result()
+            siguiente = None
+            if resumen['ultimo'] is None:
+                resumen['ultimo'] = lote['ultimo']
+            vistos.update(lote['revisados'])
+            restantes = lote['restantes']
+            if restantes and lote['revisados'] and resumen['lotes'] + 1 < DRENAJE_MAX_LOTES:
+                siguiente = ex.submit(escanear_lote, cfg, set(vistos))
+            if restantes and resumen['lotes'] == 0:
+                logger.info(
+                    'Modo de drenaje: %d correos pendientes (lotes de %d)',
+                    restantes + len(lote['revisados']), len(lote['revisados']),
+                )
+            if lote['ordenes'] and not procesar(lote['ordenes']):
+                resumen['completo'] = False
+            minutos = max(time.monotonic() - inicio, 1e-6) / 60
+            resumen['lotes'] += 1
+            resumen['revisados'] += len(lote['revisados'])
+            resumen['ordenes'] += len(lote['ordenes'])
+            resumen['pendientes'] = restantes
+            resumen['por_minuto'] = resumen['revisados'] / minutos
+            if progreso is not None:
+                progreso(dict(resumen))
+    if resumen['pendientes']:
+        resumen['completo'] = False
+    if resumen['lotes'] > 1:
+        logger.info(
+            'Drenaje terminado: %d correos en %d lotes (%.1f/min), %d pendientes',
+            resumen['revisados'], resumen['lotes'], resumen['por_minuto'],
+            resumen['pendientes'],
+        )
+    return resumen
 
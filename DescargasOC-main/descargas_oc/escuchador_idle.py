@@ -0,0 +1,255 @@
+"""Aviso inmediato de correo nuevo con IMAP IDLE (RFC 2177).
+
+El escuchador de ``ui.main`` revisa el buzón por POP3 cada ``scan_interval``
+segundos (300 como mínimo), así que una autorización de NAF espera en
+promedio minutos antes de descargarse. :class:`EscuchadorIDLE` mantiene una
+conexión IMAP al mismo buzón en IDLE y llama a ``al_llegar`` apenas el
+servidor informa un mensaje nuevo; la descarga sigue siendo la de siempre
+(``realizar_escaneo`` por POP3).
+
+Si el servidor no anuncia ``IDLE`` el escuchador se detiene con
+``soportado = False`` y queda solo el escaneo periódico. Si la conexión se
+cae, se reintenta cada ``RECONEXION_SEGUNDOS``.
+"""
+import imaplib
+import queue
+import socket
+import threading
+import time
+from typing import Callable
+
+try:  # permite ejecutar como script sin el paquete instalado
+    from .config import Config
+    from .logger import get_logger
+except ImportError:  # pragma: no cover
+    from config import Config
+    from logger import get_logger
+
+logger = get_logger(__name__)
+
+# El servidor puede cerrar un IDLE a los 30 minutos; se renueva antes.
+IDLE_RENOVAR_SEGUNDOS = 25 * 60
+# Espera por la respuesta a IDLE/DONE antes de dar la conexión por perdida.
+RESPUESTA_SEGUNDOS = 30
+# Espera entre reconexiones cuando el servidor no responde.
+RECONEXION_SEGUNDOS = 30
+# Los avisos que llegan dentro de esta ventana se agrupan en una sola llamada.
+AGRUPAR_SEGUNDOS = 2.0
+
+
+class _SinIdle(Exception):
+    """El servidor no soporta IDLE."""
+
+
+class EscuchadorIDLE:
+    """Conexión IMAP en IDLE que avisa cuando llega correo al buzón.
+
+    ``al_llegar`` se llama desde el hilo del escuchador (no desde el de la
+    interfaz), una vez por cada grupo de mensajes que llegan dentro de
+    ``agrupar`` segundos.
+    """
+
+    def __init__(
+        self,
+        cfg: Config,
+        al_llegar: Callable[[], None],
+        *,
+        mailbox: str = 'INBOX',
+        renovar: float = IDLE_RENOVAR_SEGUNDOS,
+        reconexion: float = RECONEXION_SEGUNDOS,
+        agrupar: float = AGRUPAR_SEGUNDOS,
+    ):
+        self.cfg = cfg
+        self.al_llegar = al_llegar
+        self.mailbox = mailbox
+        self.renovar = renovar
+        self.reconexion = reconexion
+        self.agrupar = agrupar
+        self.soportado: bool | None = None
+        self.conectado = threading.Event()
+        self._parar = threading.Event()
+        self._hilo: threading.Thread | None = None
+        self._conexion: imaplib.IMAP4 | None = None
+        self._tags = 0
+        self._en_idle = False
+
+    # -- ciclo de vida --------------------------------------------------------
+    def start(self) -> 'EscuchadorIDLE':
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name='imap-idle', daemon=True)
+        self._hilo.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._parar.set()
+        self._cerrar()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+            self._hilo = None
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def _ejecutar(self) -> None:
+        while not self._parar.is_set():
+            try:
+                self._sesion()
+            except _SinIdle:
+                self.soportado = False
+                logger.warning(
+                    'El servidor IMAP no soporta IDLE; se mantiene el escaneo periódico'
+                )
+                return
+            except Exception as exc:
+                if self._parar.is_set():
+                    return
+                logger.warning(
+                    'Conexión IMAP IDLE interrumpida (%s); reintento en %s s',
+                    exc, self.reconexion,
+                )
+            finally:
+                self.conectado.clear()
+                self._cerrar()
+            self._parar.wait(self.reconexion)
+
+    # -- protocolo ------------------------------------------------------------
+    def _conectar(self) -> imaplib.IMAP4:
+        conexion = imaplib.IMAP4_SSL(self.cfg.imap_server, self.cfg.imap_port)
+        self._conexion = conexion
+        conexion.login(self.cfg.usuario, self.cfg.password)
+        if 'IDLE' not in self._capacidades(conexion):
+            raise _SinIdle()
+        conexion.select(self.mailbox, readonly=True)
+        return conexion
+
+    @staticmethod
+    def _capacidades(conexion: imaplib.IMAP4) -> set[str]:
+        """Capacidades tras el login; el saludo puede omitir las de la sesión."""
+        try:
+            typ, datos = conexion.capability()
+        except imaplib.IMAP4.error:
+            return set(conexion.capabilities)
+        if typ != 'OK':
+            return set(conexion.capabilities)
+        texto = b' '.join(d for d in datos if isinstance(d, bytes))
+        return set(texto.decode('ascii', 'replace').upper().split())
+
+    def _cerrar(self) -> None:
+        conexion, self._conexion = self._conexion, None
+        if conexion is None:
+            return
+        try:
+            conexion.send((b'DONE\r\n' if self._en_idle else b'') + b'Z LOGOUT\r\n')
+        except Exception:
+            pass
+        self._en_idle = False
+        # cerrar primero el socket despierta al hilo lector, que retiene el
+        # archivo de la conexión mientras espera en ``readline``
+        for cerrar in (lambda: conexion.sock.shutdown(socket.SHUT_RDWR), conexion.shutdown):
+            try:
+                cerrar()
+            except Exception:
+                pass
+
+    def _sesion(self) -> None:
+        conexion = self._conectar()
+        # imaplib no implementa IDLE: un hilo lee las líneas del servidor y
+        # este hilo envía IDLE/DONE, sin ``timeout`` en el socket.
+        lineas: queue.Queue = queue.Queue()
+        threading.Thread(
+            target=self._leer, args=(conexion, lineas), name='imap-idle-lector', daemon=True
+        ).start()
+        self.soportado = True
+        while not self._parar.is_set():
+            self._tags += 1
+            tag = f'IDLE{self._tags}'.encode()
+            conexion.send(tag + b' IDLE\r\n')
+            self._esperar_continuacion(lineas, tag)
+            self._en_idle = True
+            self.conectado.set()
+            fin = time.monotonic() + self.renovar
+            avisar_en: float | None = None
+            while not self._parar.is_set():
+                ahora = time.monotonic()
+                if avisar_en is not None and ahora >= avisar_en:
+                    avisar_en = None
+                    self._avisar()
+                if ahora >= fin:
+                    break
+                limite = fin if avisar_en is None else min(fin, avisar_en)
+                try:
+                    linea = lineas.get(timeout=max(0.01, min(1.0, limite - ahora)))
+                except queue.Empty:
+                    continue
+                if self._es_aviso(linea) and avisar_en is None:
+                    avisar_en = time.monotonic() + self.agrupar
+            if self._parar.is_set():
+                return
+            conexion.send(b'DONE\r\n')
+            self._en_idle = False
+            # los mensajes que llegan mientras se cierra el IDLE se informan
+            # antes de la respuesta etiquetada
+            if self._esperar_fin(lineas, tag) or avisar_en is not None:
+                self._avisar()
+
+    @staticmethod
+    def _leer(conexion: imaplib.IMAP4, lineas: queue.Queue) -> None:
+        try:
+            while True:
+                linea = conexion.readline()
+                if not linea:
+                    break
+                lineas.put(linea)
+        except Exception:
+            pass
+        lineas.put(None)
+
+    @staticmethod
+    def _siguiente(lineas: queue.Queue) -> bytes:
+        try:
+            linea = lineas.get(timeout=RESPUESTA_SEGUNDOS)
+        except queue.Empty:
+            raise ConnectionError('el servidor IMAP no respondió') from None
+        if linea is None:
+            raise ConnectionError('el servidor IMAP cerró la conexión')
+        return linea
+
+    def _esperar_continuacion(self, lineas: queue.Queue, tag: bytes) -> None:
+        while True:
+            linea = self._siguiente(lineas)
+            if linea.startswith(b'+'):
+                return
+            if linea.startswith(tag + b' '):
+                raise _SinIdle()
+            if self._es_aviso(linea):
+                self._avisar()
+
+    def _esperar_fin(self, lineas: queue.Queue, tag: bytes) -> bool:
+        """Espera el fin del IDLE; ``True`` si entretanto llegó correo."""
+        aviso = False
+        while True:
+            linea = self._siguiente(lineas)
+            if linea.startswith(tag + b' '):
+                return aviso
+            if self._es_aviso(linea):
+                aviso = True
+
+    @staticmethod
+    def _es_aviso(linea: bytes | None) -> bool:
+        if linea is None:
+            raise ConnectionError('el servidor IMAP cerró la conexión')
+        partes = linea.split()
+        if len(partes) >= 2 and partes[0] == b'*' and partes[1].upper() == b'BYE':
+            raise ConnectionError('el servidor IMAP cerró la sesión')
+        return len(partes) >= 3 and partes[0] == b'*' and partes[2].upper() in (b'EXISTS', b'RECENT')
+
+    def _avisar(self) -> None:
+        logger.info('Correo nuevo informado por IMAP IDLE')
+        try:
+            self.al_llegar()
+        except Exception:
+            logger.exception('Error al atender el aviso de correo nuevo')
+
+
+__all__ = ['EscuchadorIDLE', 'IDLE_RENOVAR_SEGUNDOS']
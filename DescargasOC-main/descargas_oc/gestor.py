@@ -0,0 +1,48 @@
+"""Acceso a los módulos compartidos con GestorCompras.
+
+La lectura de PDF de OC (caché de texto, campos y números) y el conversor
+de HTML a texto viven en el paquete ``gestorcompras``. Cada módulo de
+Descargas OC que los usa los importa desde aquí, de modo que la dependencia
+queda declarada en un solo lugar y no depende del orden de importación.
+
+Si ``gestorcompras`` no está instalado se busca la carpeta hermana
+``GestorCompras_``; si tampoco existe, importar este módulo lanza
+``ImportError`` con un mensaje claro.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+CARPETA_GESTOR = Path(__file__).resolve().parents[2] / 'GestorCompras_'
+
+
+def _agregar_carpeta_gestor() -> None:
+    if CARPETA_GESTOR.is_dir() and str(CARPETA_GESTOR) not in sys.path:
+        sys.path.append(str(CARPETA_GESTOR))
+
+
+try:
+    import gestorcompras  # noqa: F401
+except ImportError:
+    _agregar_carpeta_gestor()
+
+try:
+    from gestorcompras.core import oc_document, pdf_text
+    from gestorcompras.core.html_text import html_to_text
+    from gestorcompras.core.oc_numeros import BuscadorNumerosOC
+    from gestorcompras.services import parse_pool
+except ImportError as exc:
+    raise ImportError(
+        'Descargas OC necesita el paquete gestorcompras (carpeta '
+        f'{CARPETA_GESTOR}) para leer los PDF de las órdenes.'
+    ) from exc
+
+__all__ = [
+    'BuscadorNumerosOC',
+    'html_to_text',
+    'oc_document',
+    'parse_pool',
+    'pdf_text',
+]
@@ -5,20 +5,22 @@ import time
 from pathlib import Path
 from typing import Any, Mapping
 
-import PyPDF2
-
 try:  # permite ejecutar el módulo directamente
     from .config import Config
+    from .gestor import BuscadorNumerosOC
     from .logger import get_logger
     from .organizador_bienes import (
+        analizar_pdfs,
         extraer_numero_tarea_desde_pdf,
         extraer_proveedor_desde_pdf,
     )
     from .pdf_info import nombre_archivo_orden
 except ImportError:  # pragma: no cover
     from config import Config
+    from gestor import BuscadorNumerosOC
     from logger import get_logger
     from organizador_bienes import (
+        analizar_pdfs,
         extraer_numero_tarea_desde_pdf,
         extraer_proveedor_desde_pdf,
     )
@@ -44,13 +46,6 @@ def normalizar_nombre_archivo(nombre: str | None, longitud_maxima: int = LONGITU
     return texto.lower()
 
 
-def _nombre_contiene_numero(nombre: str, numero: str | None) -> bool:
-    if not nombre or not numero:
-        return False
-    patron = rf"(?<!\\d){re.escape(numero)}(?!\\d)"
-    return re.search(patron, nombre) is not None
-
-
 def _resolver_conflicto(destino_dir: Path, nombre: str) -> Path:
     destino_dir.mkdir(parents=True, exist_ok=True)
     destino = destino_dir / nombre
@@ -228,37 +223,46 @@ def mover_oc(config: Config, ordenes=None, incluir_ubicaciones: bool = False):
         archivos.extend(p for p in carpeta.glob("*.pdf"))
 
     encontrados: dict[str, Path] = {}
+    buscador = BuscadorNumerosOC(numeros_oc)
 
     for ruta_path in archivos:
-        archivo = ruta_path.name
-        for numero in numeros_oc:
-            if not numero or numero in encontrados:
-                continue
-            if _nombre_contiene_numero(archivo, numero):
+        for numero in buscador.encontrar(ruta_path.name):
+            if numero not in encontrados:
                 encontrados[numero] = ruta_path
                 break
 
-    restantes = [ruta for ruta in archivos if ruta not in set(encontrados.values())]
-    for ruta_path in restantes:
-        ruta = str(ruta_path)
-        try:
-            with open(ruta, "rb") as archivo_pdf:
-                lector = PyPDF2.PdfReader(archivo_pdf)
-                texto = "".join(pagina.extract_text() or "" for pagina in lector.pages)
-        except Exception as exc:
-            logger.warning("Error leyendo %s: %s", ruta_path.name, exc)
+    es_bienes = bool(getattr(config, "compra_bienes", False))
+    sin_archivo = [n for n in numeros_oc if n and n not in encontrados]
+    ya_encontrados = set(encontrados.values())
+    restantes = (
+        [ruta for ruta in archivos if ruta not in ya_encontrados] if sin_archivo else []
+    )
+    # Los PDF ya identificados por nombre también pasan por la etapa paralela
+    # cuando hace falta su proveedor o tarea: así salen de la caché de texto.
+    por_leer = [
+        ruta for numero, ruta in encontrados.items()
+        if es_bienes or not proveedores.get(numero)
+    ]
+    analisis = analizar_pdfs(
+        restantes + por_leer,
+        numeros=sin_archivo,
+        workers=getattr(config, "pdf_workers", None),
+    )
+    # Asignación en serie y en el orden de ``archivos``: el resultado no
+    # depende de qué proceso terminó primero.
+    for ruta_path, resultado in zip(restantes, analisis):
+        if resultado.error:
+            logger.warning("Error leyendo %s: %s", ruta_path.name, resultado.error)
             continue
-        for numero in numeros_oc:
+        for numero in resultado.numeros:
             if numero in encontrados:
                 continue
-            if numero and numero in texto:
-                encontrados[numero] = ruta_path
-                break
+            encontrados[numero] = ruta_path
+            break
 
     faltantes: list[str] = []
     subidos: list[str] = []
     ubicaciones: dict[str, str] = {}
-    es_bienes = bool(getattr(config, "compra_bienes", False))
 
     for numero in numeros_oc:
         ruta_path = encontrados.get(numero)
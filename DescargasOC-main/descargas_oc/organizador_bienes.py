@@ -1,66 +1,94 @@
 import os
 import re
 import shutil
+from functools import lru_cache
 
 try:
-    from pypdf import PdfReader  # type: ignore
-except ImportError:  # pragma: no cover
-    try:
-        from PyPDF2 import PdfReader  # type: ignore
-    except ImportError as exc:  # pragma: no cover
-        raise SystemExit("Falta 'pypdf' o 'PyPDF2'. Instálalo con: py -m pip install --user pypdf") from exc
-
-try:
+    from .gestor import BuscadorNumerosOC, oc_document, parse_pool, pdf_text
     from .logger import get_logger
 except ImportError:  # pragma: no cover
+    from gestor import BuscadorNumerosOC, oc_document, parse_pool, pdf_text
     from logger import get_logger
 
 logger = get_logger(__name__)
 
-PATRON_TAREA = re.compile(r"#\s*([0-9]{6,11})\s*//")
-PATRON_PROVEEDOR = re.compile(
-    r"(?:Proveedor|Nombre)\s*[:\-]?\s*(.+)", re.IGNORECASE
-)
+# Con menos PDF que esto, crear los procesos cuesta más de lo que ahorra.
+MIN_PDF_POOL = 8
 
 
-def extraer_numero_tarea_desde_pdf(ruta_pdf: str) -> str | None:
+def leer_info_pdf(ruta_pdf: str, campos=oc_document.CAMPOS) -> oc_document.OCDocumentInfo:
+    """Campos de la OC en ``ruta_pdf`` en una sola pasada (vacío si no se puede leer)."""
     try:
-        reader = PdfReader(ruta_pdf)
+        return oc_document.desde_pdf(ruta_pdf, campos)
     except Exception as e:
         logger.error("No se pudo abrir '%s': %s", ruta_pdf, e)
-        return None
-    for page in getattr(reader, "pages", []):
-        try:
-            texto = page.extract_text() or ""
-        except Exception:
-            texto = ""
-        if not texto:
-            continue
-        m = PATRON_TAREA.search(texto)
-        if m:
-            return m.group(1)
-    return None
+        return oc_document.OCDocumentInfo()
+
+
+def extraer_numero_tarea_desde_pdf(ruta_pdf: str) -> str | None:
+    return leer_info_pdf(ruta_pdf, ("tarea",)).tarea
 
 
 def extraer_proveedor_desde_pdf(ruta_pdf: str) -> str | None:
+    return leer_info_pdf(ruta_pdf, ("proveedor",)).proveedor
+
+
+class AnalisisPDF:
+    """Resultado de :func:`analizar_pdfs` para un archivo."""
+
+    __slots__ = ('ruta', 'info', 'numeros', 'error')
+
+    def __init__(self, ruta: str, info: oc_document.OCDocumentInfo,
+                 numeros: tuple[str, ...] = (), error: str | None = None):
+        self.ruta = ruta
+        self.info = info
+        self.numeros = numeros
+        self.error = error
+
+
+@lru_cache(maxsize=4)
+def _buscador(numeros: tuple) -> BuscadorNumerosOC:
+    # Un buscador por lote y proceso, no uno por archivo.
+    return BuscadorNumerosOC(numeros)
+
+
+def _analizar_pdf(ruta: str, campos: tuple, numeros: tuple, cache_path: str) -> AnalisisPDF:
+    """Lee un PDF y busca sus campos; se ejecuta en :mod:`parse_pool`."""
+    # Un proceso nuevo no ve la ruta de caché fijada en tiempo de ejecución.
+    pdf_text.CACHE_PATH = cache_path
     try:
-        reader = PdfReader(ruta_pdf)
+        paginas = pdf_text.paginas(ruta)
     except Exception as e:
-        logger.error("No se pudo abrir '%s': %s", ruta_pdf, e)
-        return None
-    for page in getattr(reader, "pages", []):
-        try:
-            texto = page.extract_text() or ""
-        except Exception:
-            texto = ""
-        if not texto:
-            continue
-        m = PATRON_PROVEEDOR.search(texto)
-        if m:
-            valor = m.group(1).strip().split("\n")[0]
-            valor = re.sub(r"(?i)^nombre\s*[:\-]?\s*", "", valor).strip()
-            return valor
-    return None
+        return AnalisisPDF(ruta, oc_document.OCDocumentInfo(), error=str(e))
+    return AnalisisPDF(
+        ruta,
+        oc_document.desde_texto(paginas, campos),
+        tuple(_buscador(numeros).encontrar("\n".join(paginas))) if numeros else (),
+    )
+
+
+def workers_pdf(cantidad: int, workers: int | None = None) -> int:
+    """Procesos para analizar ``cantidad`` PDF (0 = en este proceso)."""
+    workers = workers or parse_pool.PARSE_WORKERS
+    if workers <= 1 or cantidad < MIN_PDF_POOL:
+        return 0
+    return min(workers, cantidad)
+
+
+def analizar_pdfs(rutas, *, campos=(), numeros=(), workers: int | None = None) -> list[AnalisisPDF]:
+    """Extrae el texto de ``rutas`` y lo clasifica, en varios procesos si son muchas.
+
+    Por archivo devuelve los ``campos`` de la OC y cuáles de ``numeros``
+    aparecen en su texto (como número completo, ver ``BuscadorNumerosOC``),
+    en el mismo orden de ``rutas``. No mueve ni
+    renombra nada: eso queda para quien llama, en serie. ``workers`` vacío o
+    0 usa ``parse_pool.PARSE_WORKERS``; 1 analiza en este proceso.
+    """
+    rutas = [str(r) for r in rutas]
+    argumentos = ((r, tuple(campos), tuple(numeros), pdf_text.CACHE_PATH) for r in rutas)
+    return list(parse_pool.map_ordered(
+        _analizar_pdf, argumentos, workers=workers_pdf(len(rutas), workers)
+    ))
 
 
 def indexar_carpetas_destino(raiz: str) -> list[tuple[str, str]]:
@@ -109,7 +137,7 @@ def mover_sin_sobrescribir(ruta_archivo_origen: str, carpeta_destino: str) -> st
         return None
 
 
-def organizar(origen: str, raiz_destino: str):
+def organizar(origen: str, raiz_destino: str, workers: int | None = None):
     try:
         archivos_pdf = [a for a in os.listdir(origen) if a.lower().endswith('.pdf')]
     except FileNotFoundError:
@@ -118,9 +146,12 @@ def organizar(origen: str, raiz_destino: str):
     if not archivos_pdf:
         return
     indice = indexar_carpetas_destino(raiz_destino)
-    for nombre_pdf in archivos_pdf:
-        ruta_pdf = os.path.join(origen, nombre_pdf)
-        numero_tarea = extraer_numero_tarea_desde_pdf(ruta_pdf)
+    rutas = [os.path.join(origen, nombre) for nombre in archivos_pdf]
+    analisis = analizar_pdfs(rutas, campos=("tarea",), workers=workers)
+    for nombre_pdf, ruta_pdf, resultado in zip(archivos_pdf, rutas, analisis):
+        if resultado.error:
+            logger.error("No se pudo abrir '%s': %s", ruta_pdf, resultado.error)
+        numero_tarea = resultado.info.tarea
         if not numero_tarea:
             logger.info("No se encontró número en '%s'", nombre_pdf)
             continue
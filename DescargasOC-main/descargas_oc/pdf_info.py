@@ -6,8 +6,10 @@ from pathlib import Path
 from typing import Iterable, Mapping
 
 try:  # pragma: no cover - soporte ejecución directa
+    from .gestor import BuscadorNumerosOC
     from .logger import get_logger
 except ImportError:  # pragma: no cover
+    from gestor import BuscadorNumerosOC
     from logger import get_logger
 
 try:  # pragma: no cover - ejecución directa
@@ -15,7 +17,6 @@ try:  # pragma: no cover - ejecución directa
 except ImportError:  # pragma: no cover
     from organizador_bienes import extraer_proveedor_desde_pdf
 
-
 logger = get_logger(__name__)
 
 MAX_NOMBRE_ARCHIVO = 180
@@ -96,15 +97,6 @@ def proveedor_desde_pdf(ruta_pdf: str | Path | None) -> str:
     return limpiar_proveedor(proveedor)
 
 
-def _buscar_numero_en_nombre(nombre: str, numeros: Iterable[str]) -> str | None:
-    for numero in numeros:
-        if not numero:
-            continue
-        if re.search(rf"(?<!\\d){re.escape(numero)}(?!\\d)", nombre):
-            return numero
-    return None
-
-
 def actualizar_proveedores_desde_pdfs(
     ordenes: Iterable[Mapping[str, object]] | None,
     carpeta_descargas: str | Path | None,
@@ -136,9 +128,10 @@ def actualizar_proveedores_desde_pdfs(
         logger.debug("No se encontraron PDFs en %s", carpeta)
         return {}
 
+    buscador = BuscadorNumerosOC(ordenes_dict)
     actualizados: dict[str, str] = {}
     for pdf in pdfs:
-        numero = _buscar_numero_en_nombre(pdf.name, ordenes_dict.keys())
+        numero = buscador.primero(pdf.name)
         if not numero:
             continue
         proveedor = limpiar_proveedor(extraer_proveedor_desde_pdf(str(pdf)))
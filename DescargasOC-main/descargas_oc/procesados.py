@@ -0,0 +1,119 @@
+"""Registro de mensajes POP3 ya procesados (por UIDL) en SQLite.
+
+Reemplaza ``procesados.txt``: la tabla tiene el UIDL como clave primaria,
+por lo que la consulta de pertenencia no requiere cargar todo el historial.
+Las altas se hacen en bloque en una sola transacción y ``prune`` elimina
+los UIDL que ya no existen en el servidor para que el registro no crezca
+indefinidamente.
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+# SQLite limita la cantidad de parámetros por sentencia.
+_LOTE_IN = 500
+
+
+class ProcesadosStore:
+    """UIDL procesados guardados en ``path``; ``legado`` es el ``.txt`` a migrar."""
+
+    def __init__(self, path: Path, legado: Path | None = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS procesados ('
+                ' uidl TEXT PRIMARY KEY,'
+                ' marcado REAL NOT NULL'
+                ') WITHOUT ROWID'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)'
+            )
+        if legado is not None:
+            self._migrar(Path(legado))
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        """Conexión que confirma la transacción al salir y siempre se cierra."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _migrar(self, legado: Path) -> None:
+        """Importa una sola vez el ``procesados.txt`` anterior y lo renombra."""
+        if not legado.exists():
+            return
+        with open(legado, 'r') as f:
+            self.mark_processed(line.strip() for line in f)
+        legado.replace(legado.with_name(legado.name + '.migrado'))
+
+    def __contains__(self, uidl: str) -> bool:
+        with self._conectar() as conn:
+            row = conn.execute('SELECT 1 FROM procesados WHERE uidl=?', (uidl,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        with self._conectar() as conn:
+            return conn.execute('SELECT COUNT(*) FROM procesados').fetchone()[0]
+
+    def filtrar(self, uidls: Iterable[str]) -> set[str]:
+        """Retorna cuáles de ``uidls`` ya están procesados."""
+        pendientes = list(dict.fromkeys(uidls))
+        encontrados: set[str] = set()
+        with self._conectar() as conn:
+            for i in range(0, len(pendientes), _LOTE_IN):
+                lote = pendientes[i:i + _LOTE_IN]
+                marcas = ','.join('?' for _ in lote)
+                cur = conn.execute(f'SELECT uidl FROM procesados WHERE uidl IN ({marcas})', lote)
+                encontrados.update(row[0] for row in cur)
+        return encontrados
+
+    def todos(self) -> set[str]:
+        with self._conectar() as conn:
+            return {row[0] for row in conn.execute('SELECT uidl FROM procesados')}
+
+    def mark_processed(self, uidls: Iterable[str]) -> int:
+        """Marca varios UIDL en una sola transacción; ignora los ya marcados."""
+        ahora = time.time()
+        filas = [(u, ahora) for u in dict.fromkeys(uidls) if u]
+        if not filas:
+            return 0
+        with self._conectar() as conn:
+            cur = conn.executemany(
+                'INSERT OR IGNORE INTO procesados (uidl, marcado) VALUES (?, ?)', filas
+            )
+            return cur.rowcount
+
+    def prune(self, vigentes: Iterable[str]) -> int:
+        """Elimina los UIDL que no están en ``vigentes`` (listado actual del servidor).
+
+        Un listado vacío no borra nada: puede deberse a un error del servidor.
+        """
+        vigentes = [(u,) for u in dict.fromkeys(vigentes) if u]
+        if not vigentes:
+            return 0
+        with self._conectar() as conn:
+            conn.execute('CREATE TEMP TABLE vigentes (uidl TEXT PRIMARY KEY) WITHOUT ROWID')
+            conn.executemany('INSERT OR IGNORE INTO vigentes (uidl) VALUES (?)', vigentes)
+            cur = conn.execute(
+                'DELETE FROM procesados WHERE uidl NOT IN (SELECT uidl FROM vigentes)'
+            )
+            borrados = cur.rowcount
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (clave, valor) VALUES ('ultimo_prune', ?)",
+                (str(time.time()),),
+            )
+            conn.execute('DROP TABLE vigentes')
+            return borrados
+
+    def segundos_desde_prune(self) -> float:
+        with self._conectar() as conn:
+            row = conn.execute("SELECT valor FROM meta WHERE clave='ultimo_prune'").fetchone()
+        return time.time() - float(row[0]) if row else float('inf')
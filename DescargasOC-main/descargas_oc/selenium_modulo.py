@@ -434,7 +434,9 @@ def descargar_oc(
             if str(orden.get("numero")) == str(numero):
                 orden["ruta"] = ruta
     if getattr(cfg, "compra_bienes", False):
-        organizar_bienes(cfg.carpeta_analizar, cfg.carpeta_analizar)
+        organizar_bienes(
+            cfg.carpeta_analizar, cfg.carpeta_analizar, workers=getattr(cfg, "pdf_workers", None)
+        )
     errores.extend(errores_mov)
     faltantes = [n for n in faltantes if n not in ubicaciones_descarga]
     return subidos, faltantes, errores
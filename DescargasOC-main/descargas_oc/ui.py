@@ -8,13 +8,15 @@ from tkinter import messagebox
 from pathlib import Path
 
 try:  # permite ejecutar como script
-    from .escuchador import buscar_ocs, cargar_ultimo_uidl, registrar_procesados
+    from .escuchador import cargar_ultimo_uidl, drenar_ocs, registrar_procesados
+    from .escuchador_idle import EscuchadorIDLE
     from .selenium_modulo import descargar_oc
     from .reporter import enviar_reporte
     from .config import Config
     from .logger import get_logger
 except ImportError:  # pragma: no cover
-    from escuchador import buscar_ocs, cargar_ultimo_uidl, registrar_procesados
+    from escuchador import cargar_ultimo_uidl, drenar_ocs, registrar_procesados
+    from escuchador_idle import EscuchadorIDLE
     from selenium_modulo import descargar_oc
     from reporter import enviar_reporte
     from config import Config
@@ -64,7 +66,9 @@ class TextHandler(logging.Handler):
         self.widget.after(0, lambda m=msg: (self.widget.insert(tk.END, m), self.widget.see(tk.END)))
 
 
-def realizar_escaneo(text_widget: tk.Text, lbl_last: tk.Label):
+def realizar_escaneo(
+    text_widget: tk.Text, lbl_last: tk.Label, lbl_backlog: tk.Label | None = None
+):
     if not scanning_lock.acquire(blocking=False):
         text_widget.insert(tk.END, "Escaneo en progreso...\n")
         text_widget.see(tk.END)
@@ -81,35 +85,40 @@ def realizar_escaneo(text_widget: tk.Text, lbl_last: tk.Label):
             text_widget.after(0, lambda m=msg: (text_widget.insert(tk.END, m), text_widget.see(tk.END)))
 
         append("Buscando órdenes...\n")
-        ordenes, ultimo = buscar_ocs(cfg)
-        uidl_por_numero = {
-            o.get("numero"): o.get("uidl")
-            for o in ordenes
-            if o.get("numero") and o.get("uidl")
-        }
-        uidl_a_numeros: dict[str, set[str]] = {}
-        for numero, uidl in uidl_por_numero.items():
-            if not uidl:
-                continue
-            uidl_a_numeros.setdefault(uidl, set()).add(numero)
-        pendientes_uidls = set(uidl_a_numeros)
+        ordenes: list[dict] = []
         exitosas: list[str] = []
         faltantes: list[str] = []
         errores: list[str] = []
-        if ordenes:
-            append(f"Procesando {len(ordenes)} OC(s)\n")
+        registrados: list[str] = []
+
+        def procesar(lote: list[dict]) -> bool:
+            """Descarga las OC de un lote; retorna ``True`` si no quedó ninguna pendiente."""
+            ordenes.extend(lote)
+            uidl_por_numero = {
+                o.get("numero"): o.get("uidl")
+                for o in lote
+                if o.get("numero") and o.get("uidl")
+            }
+            uidl_a_numeros: dict[str, set[str]] = {}
+            for numero, uidl in uidl_por_numero.items():
+                if not uidl:
+                    continue
+                uidl_a_numeros.setdefault(uidl, set()).add(numero)
+            pendientes_uidls = set(uidl_a_numeros)
+            append(f"Procesando {len(lote)} OC(s)\n")
             try:
-                subidos, no_encontrados, errores = descargar_oc(
-                    ordenes, headless=cfg.headless
+                subidos, no_encontrados, errores_lote = descargar_oc(
+                    lote, headless=cfg.headless
                 )
             except Exception as exc:  # pragma: no cover - seguridad en ejecución
                 logger.exception("Fallo al descargar OC")
-                errores = [str(exc)]
-                subidos, no_encontrados = [], [o.get("numero") for o in ordenes]
+                errores_lote = [str(exc)]
+                subidos, no_encontrados = [], [o.get("numero") for o in lote]
             exitosas.extend(subidos)
             faltantes.extend(no_encontrados)
+            errores.extend(errores_lote)
             numeros_con_problemas = {str(n) for n in no_encontrados}
-            for error in errores:
+            for error in errores_lote:
                 m = re.search(r"OC\s*(\d+)", error)
                 if m:
                     numeros_con_problemas.add(m.group(1))
@@ -120,7 +129,7 @@ def realizar_escaneo(text_widget: tk.Text, lbl_last: tk.Label):
             }
             subidos_set = set(subidos)
             uidls_exitosos: list[str] = []
-            for orden in ordenes:
+            for orden in lote:
                 uidl = orden.get("uidl")
                 if not uidl or uidl in uidls_con_problemas:
                     continue
@@ -133,10 +142,28 @@ def realizar_escaneo(text_widget: tk.Text, lbl_last: tk.Label):
             for num in no_encontrados:
                 append(f"❌ OC {num} faltante\n")
             if uidls_exitosos:
+                # El último UIDL se guarda al final, cuando no quedan pendientes.
                 uidls_sin_duplicados = list(dict.fromkeys(uidls_exitosos))
-                ultimo_guardar = ultimo if not pendientes_uidls else None
-                registrar_procesados(uidls_sin_duplicados, ultimo_guardar)
-        else:
+                registrar_procesados(uidls_sin_duplicados, None)
+                registrados.extend(uidls_sin_duplicados)
+            return not pendientes_uidls
+
+        def progreso(estado: dict):
+            if estado["pendientes"]:
+                append(
+                    f"Modo de drenaje: lote {estado['lotes']}, "
+                    f"{estado['pendientes']} correo(s) pendientes\n"
+                )
+            if lbl_backlog is not None:
+                texto = "Pendientes: {} | {:.0f} correos/min".format(
+                    estado["pendientes"], estado["por_minuto"]
+                )
+                lbl_backlog.after(0, lambda t=texto: lbl_backlog.config(text=t))
+
+        resumen = drenar_ocs(cfg, procesar, progreso)
+        if registrados and resumen["completo"] and resumen["ultimo"]:
+            registrar_procesados([], resumen["ultimo"])
+        if not ordenes:
             append("No se encontraron nuevas órdenes\n")
         enviado = enviar_reporte(exitosas, faltantes, ordenes, cfg, errores=errores)
         try:
@@ -239,7 +266,7 @@ def main():
     ctrl_frame.grid(row=1, column=0, sticky="ew", pady=(0, 8))
 
     cfg = Config()
-    estado = {"activo": False, "contador": 0}
+    estado = {"activo": False, "contador": 0, "pendiente": False, "idle": None}
     manual_mode = {"active": False}
 
     row_auto = tk.Frame(ctrl_frame, bg="#FFFFFF")
@@ -255,6 +282,10 @@ def main():
                             bg="#FFFFFF", fg="#374151", font=("Segoe UI", 10))
     lbl_contador.pack(side="left", padx=(8, 0))
 
+    lbl_backlog = tk.Label(row_auto, text="Pendientes: -",
+                           bg="#FFFFFF", fg="#6B7280", font=("Segoe UI", 9))
+    lbl_backlog.pack(side="left", padx=(12, 0))
+
     lbl_last = tk.Label(row_auto, text="Ultimo UIDL: " + (cargar_ultimo_uidl() or '-'),
                         bg="#FFFFFF", fg="#6B7280", font=("Segoe UI", 9))
     lbl_last.pack(side="right")
@@ -264,6 +295,7 @@ def main():
 
     var_bienes = tk.BooleanVar(value=bool(cfg.compra_bienes))
     var_visible = tk.BooleanVar(value=not bool(cfg.headless))
+    var_idle = tk.BooleanVar(value=bool(cfg.imap_idle))
 
     def actualizar_bienes():
         cfg.load()
@@ -275,10 +307,34 @@ def main():
         cfg.data['headless'] = not var_visible.get()
         cfg.save()
 
+    def avisar_correo():
+        # llamado desde el hilo IDLE: el escaneo lo lanza actualizar_contador
+        estado["pendiente"] = True
+
+    def iniciar_idle():
+        if estado["idle"] is None and cfg.imap_idle:
+            estado["idle"] = EscuchadorIDLE(cfg, avisar_correo).start()
+
+    def detener_idle():
+        escucha, estado["idle"] = estado["idle"], None
+        if escucha is not None:
+            threading.Thread(target=escucha.stop, daemon=True).start()
+
+    def actualizar_idle():
+        cfg.load()
+        cfg.data['imap_idle'] = var_idle.get()
+        cfg.save()
+        if estado["activo"] and var_idle.get():
+            iniciar_idle()
+        else:
+            detener_idle()
+
     tk.Checkbutton(row_opts, text="Compra Bienes", variable=var_bienes,
                    command=actualizar_bienes, bg="#FFFFFF", selectcolor="#059669").pack(side="left", padx=(0, 12))
     tk.Checkbutton(row_opts, text="Mostrar navegador", variable=var_visible,
-                   command=actualizar_visible, bg="#FFFFFF", selectcolor="#059669").pack(side="left", padx=(0, 16))
+                   command=actualizar_visible, bg="#FFFFFF", selectcolor="#059669").pack(side="left", padx=(0, 12))
+    tk.Checkbutton(row_opts, text="Aviso inmediato (IMAP IDLE)", variable=var_idle,
+                   command=actualizar_idle, bg="#FFFFFF", selectcolor="#059669").pack(side="left", padx=(0, 16))
 
     tk.Label(row_opts, text="Intervalo (seg):", bg="#FFFFFF").pack(side="left", padx=(8, 4))
     entry_interval = tk.Entry(row_opts, width=6)
@@ -325,8 +381,11 @@ def main():
 
     def actualizar_contador():
         if estado["activo"]:
-            if estado["contador"] <= 0:
-                threading.Thread(target=realizar_escaneo, args=(text, lbl_last), daemon=True).start()
+            # un aviso que llega durante un escaneo se atiende al terminar éste
+            aviso = estado["pendiente"] and not scanning_lock.locked()
+            if estado["contador"] <= 0 or aviso:
+                estado["pendiente"] = False
+                threading.Thread(target=realizar_escaneo, args=(text, lbl_last, lbl_backlog), daemon=True).start()
                 estado["contador"] = cfg.scan_interval
             lbl_contador.config(text=f"Siguiente escaneo en {estado['contador']} s")
             estado["contador"] -= 1
@@ -337,6 +396,7 @@ def main():
     def toggle():
         if estado["activo"]:
             estado["activo"] = False
+            detener_idle()
             btn_toggle.config(text="Activar escuchador")
         else:
             if not config_completa(cfg):
@@ -344,12 +404,14 @@ def main():
                 return
             estado["activo"] = True
             estado["contador"] = cfg.scan_interval
+            estado["pendiente"] = False
+            iniciar_idle()
             btn_toggle.config(text="Detener escuchador")
             actualizar_contador()
 
     def escanear_ahora():
         estado["contador"] = cfg.scan_interval
-        threading.Thread(target=realizar_escaneo, args=(text, lbl_last), daemon=True).start()
+        threading.Thread(target=realizar_escaneo, args=(text, lbl_last, lbl_backlog), daemon=True).start()
 
     def activar_manual():
         manual_mode["active"] = True
@@ -0,0 +1,46 @@
+"""Extracción de datos NAF anterior a ``ClasificadorNAF``.
+
+Patrones sin compilar sobre todo el cuerpo, para cada mensaje. Se conserva
+como referencia para las pruebas de equivalencia y el benchmark.
+"""
+from __future__ import annotations
+
+import re
+
+from descargas_oc.escuchador import _limpiar_html
+
+
+def extraer_datos_secuencial(asunto: str, cuerpo: str):
+    numero = None
+    fecha_aut = None
+    fecha_orden = None
+    proveedor = None
+    tarea = None
+
+    if asunto:
+        patt = r"SISTEMA\s+NAF:.*?ORDEN\s+COMPRA\s+(?:NO|N[°º])\.?\s*(\d+)"
+        m = re.search(patt, asunto, re.IGNORECASE)
+        if m:
+            numero = m.group(1)
+
+    cuerpo_texto = _limpiar_html(cuerpo or "")
+
+    if cuerpo_texto:
+        if not numero:
+            m = re.search(r"orden\s+de\s+compra\s+de\s+(?:No|N[°º])\.?\s*(\d+)", cuerpo_texto, re.IGNORECASE)
+            if m:
+                numero = m.group(1)
+        m = re.search(r"Fecha\s+Autorizaci(?:o|\xc3\xb3)n[:\s]*([0-9]{2}/[0-9]{2}/[0-9]{4})", cuerpo_texto, re.IGNORECASE)
+        if m:
+            fecha_aut = m.group(1)
+        m = re.search(r"Fecha\s+Orden[:\s]*([0-9]{2}/[0-9]{2}/[0-9]{4})", cuerpo_texto, re.IGNORECASE)
+        if m:
+            fecha_orden = m.group(1)
+        m = re.search(r"proveedor\s*:?[\s\xa0]+([^\n]+?)(?:\s+con\s+Fecha|\n|$)", cuerpo_texto, re.IGNORECASE)
+        if m:
+            proveedor = re.sub(r"\s+", " ", m.group(1)).strip()
+        m = re.search(r"#(\d+)\s*//", cuerpo_texto)
+        if m:
+            tarea = m.group(1)
+
+    return numero, fecha_aut, fecha_orden, proveedor, tarea
@@ -0,0 +1,214 @@
+"""Servidor IMAP mínimo en proceso para probar el aviso por IDLE.
+
+Implementa lo que usa ``escuchador_idle`` (CAPABILITY, LOGIN, SELECT/EXAMINE,
+IDLE/DONE, NOOP, LOGOUT) sobre un socket local. Mientras un cliente está en
+IDLE, :meth:`IMAPStandIn.add_message` le envía ``* n EXISTS`` de inmediato,
+como hace el servidor real al recibir correo. Lo que llega sin informarse se
+envía al recibir ``DONE``, antes de la respuesta etiquetada.
+"""
+from __future__ import annotations
+
+import imaplib
+import select
+import socket
+import socketserver
+import threading
+from collections import Counter
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "_TCPServer"
+
+    def setup(self) -> None:
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._entrada = b""
+        self._autenticado = False
+        with self.server.owner._lock:
+            self.server.owner._clientes.add(self.request)
+
+    def finish(self) -> None:
+        with self.server.owner._lock:
+            self.server.owner._clientes.discard(self.request)
+
+    # -- E/S ----------------------------------------------------------------
+    def _line(self, text: str) -> None:
+        self.request.sendall(text.encode("utf-8") + b"\r\n")
+
+    def _hay_linea(self, espera: float) -> bool:
+        if b"\n" in self._entrada:
+            return True
+        listos, _, _ = select.select([self.request], [], [], espera)
+        return bool(listos)
+
+    def _readline(self) -> bytes | None:
+        while b"\n" not in self._entrada:
+            try:
+                data = self.request.recv(65536)
+            except OSError:
+                return None
+            if not data:
+                return None
+            self._entrada += data
+        linea, _, self._entrada = self._entrada.partition(b"\n")
+        return linea.rstrip(b"\r")
+
+    def handle(self) -> None:
+        owner = self.server.owner
+        owner.stats["connections"] += 1
+        self._line("* OK IMAP4rev1 stand-in listo")
+        while True:
+            raw = self._readline()
+            if raw is None:
+                return
+            tag, _, rest = raw.decode("utf-8", "replace").partition(" ")
+            cmd, _, args = rest.partition(" ")
+            cmd = cmd.upper()
+            owner.stats["commands"] += 1
+            owner.stats["by_command"][cmd] += 1
+            handler = getattr(self, f"_cmd_{cmd.lower()}", None)
+            if handler is None:
+                self._line(f"{tag} BAD comando no soportado")
+                continue
+            if handler(tag, args) is False:
+                return
+
+    # -- comandos -----------------------------------------------------------
+    def _cmd_capability(self, tag, _args):
+        owner = self.server.owner
+        idle = owner.idle_supported and (self._autenticado or not owner.idle_tras_login)
+        caps = "IMAP4rev1" + (" IDLE" if idle else "")
+        self._line(f"* CAPABILITY {caps}")
+        self._line(f"{tag} OK CAPABILITY completado")
+
+    def _cmd_login(self, tag, args):
+        owner = self.server.owner
+        password = args.rpartition(" ")[2].strip('"')
+        if owner.password is not None and password != owner.password:
+            self._line(f"{tag} NO [AUTHENTICATIONFAILED] credenciales inválidas")
+            return
+        owner.stats["logins"] += 1
+        self._autenticado = True
+        self._line(f"{tag} OK LOGIN completado")
+
+    def _cmd_select(self, tag, _args):
+        self._line(f"* {self.server.owner.total} EXISTS")
+        self._line("* OK [UIDVALIDITY 1] UIDs válidos")
+        self._line(f"{tag} OK SELECT completado")
+
+    _cmd_examine = _cmd_select
+
+    def _cmd_noop(self, tag, _args):
+        self._line(f"{tag} OK NOOP completado")
+
+    def _cmd_idle(self, tag, _args):
+        owner = self.server.owner
+        if not owner.idle_supported:
+            self._line(f"{tag} BAD IDLE no soportado")
+            return
+        visto = owner.total
+        self._line("+ idling")
+        while True:
+            if self._hay_linea(0.02):
+                linea = self._readline()
+                if linea is None:
+                    return False
+                if linea.strip().upper() == b"DONE":
+                    if owner.total != visto:
+                        self._line(f"* {owner.total} EXISTS")
+                    self._line(f"{tag} OK IDLE terminado")
+                    return
+                self._line(f"{tag} BAD se esperaba DONE")
+                return
+            actual = owner.total
+            if actual != visto and owner.avisar_en_idle:
+                visto = actual
+                self._line(f"* {actual} EXISTS")
+
+    def _cmd_logout(self, tag, _args):
+        self._line("* BYE cerrando sesión")
+        self._line(f"{tag} OK LOGOUT completado")
+        return False
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    owner: "IMAPStandIn"
+
+
+class IMAPStandIn:
+    """Servidor IMAP local. Úsese como context manager.
+
+    Solo lleva la cantidad de mensajes del buzón: el contenido se descarga
+    por POP3 (ver ``pop3_standin``). Con ``idle_tras_login`` la capacidad
+    IDLE solo se anuncia después de LOGIN; con ``avisar_en_idle=False`` los
+    mensajes nuevos se informan únicamente al terminar el IDLE.
+    """
+
+    def __init__(
+        self,
+        *,
+        password: str | None = None,
+        idle_supported: bool = True,
+        idle_tras_login: bool = False,
+        avisar_en_idle: bool = True,
+    ):
+        self.password = password
+        self.idle_supported = idle_supported
+        self.idle_tras_login = idle_tras_login
+        self.avisar_en_idle = avisar_en_idle
+        self.total = 0
+        self.stats: Counter = Counter()
+        self.stats["by_command"] = Counter()
+        self._lock = threading.Lock()
+        self._clientes: set[socket.socket] = set()
+        self._server: _TCPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        assert self._server is not None
+        return self._server.server_address[1]
+
+    def add_message(self) -> int:
+        self.total += 1
+        return self.total
+
+    def drop_connections(self) -> None:
+        """Cierra las conexiones abiertas, como un servidor que las expira."""
+        with self._lock:
+            clientes = list(self._clientes)
+        for cliente in clientes:
+            try:
+                cliente.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def connect(self, *_args, **_kwargs) -> imaplib.IMAP4:
+        """Fábrica compatible con ``imaplib.IMAP4_SSL(host, port)``."""
+        return imaplib.IMAP4("127.0.0.1", self.port)
+
+    def start(self) -> "IMAPStandIn":
+        self._server = _TCPServer(("127.0.0.1", 0), _Handler)
+        self._server.owner = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self.drop_connections()
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "IMAPStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+__all__ = ["IMAPStandIn"]
@@ -0,0 +1,59 @@
+"""PDF de OC sintéticos para pruebas y benchmarks.
+
+Arma a mano un PDF válido (sin dependencias) con texto Helvetica, una
+página por entrada de ``paginas`` y una línea por renglón, que PyPDF2 y
+pdfplumber pueden leer.
+"""
+from __future__ import annotations
+
+
+def _escapar(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def pdf_minimo(*paginas: str) -> bytes:
+    """PDF con una página por argumento; los saltos de línea son renglones."""
+    n = len(paginas)
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(n))
+    objetos = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {n} >>",
+    ]
+    fuente = 3 + 2 * n
+    for i, texto in enumerate(paginas):
+        renglones = " T* ".join(f"({_escapar(r)}) Tj" for r in texto.split("\n"))
+        contenido = f"BT /F1 9 Tf 11 TL 40 760 Td {renglones} ET"
+        objetos.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {fuente} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        objetos.append(f"<< /Length {len(contenido.encode('latin-1'))} >>\nstream\n{contenido}\nendstream")
+    objetos.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    salida = bytearray(b"%PDF-1.4\n")
+    posiciones = []
+    for numero, cuerpo in enumerate(objetos, start=1):
+        posiciones.append(len(salida))
+        salida += f"{numero} 0 obj\n{cuerpo}\nendobj\n".encode("latin-1")
+    xref = len(salida)
+    salida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    for posicion in posiciones:
+        salida += f"{posicion:010d} 00000 n \n".encode()
+    salida += (
+        f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(salida)
+
+
+def pdf_oc(numero: str, proveedor: str, tarea: str | None, items: int = 40) -> bytes:
+    """Orden de compra con cabecera, ``items`` renglones de detalle y observación."""
+    cabecera = (
+        f"ORDEN DE COMPRA No. {numero}\nFecha Orden: 04/06/2024\n"
+        f"Proveedor: {proveedor}\nRUC: 1790016919001\n"
+    )
+    detalle = "\n".join(
+        f"{i:03d} REPUESTO VEHICULAR CODIGO {numero[-4:]}-{i:04d} UND 2 {i * 3.5:10.2f}"
+        for i in range(items)
+    )
+    observacion = f"Observacion: TAREA #{tarea}//PEDIDO:S/N" if tarea else "Observacion: S/N"
+    return pdf_minimo(cabecera + detalle, detalle + "\n" + observacion)
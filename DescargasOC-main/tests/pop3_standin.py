@@ -0,0 +1,248 @@
+"""Servidor POP3 mínimo en proceso para pruebas y benchmarks.
+
+Implementa lo que usa ``escuchador`` (USER/PASS, CAPA, STAT, LIST, UIDL,
+RETR, TOP, NOOP, QUIT) sobre un socket local. Los comandos enviados en
+bloque (PIPELINING, RFC 2449) se atienden en orden sin esperar al cliente.
+
+La latencia se modela por *round-trip*: ``latency`` se aplica cada vez que
+el servidor tiene que esperar un comando nuevo del cliente (no entre
+comandos que ya llegaron juntos) y ``handshake_latency`` una vez por
+conexión, en lugar del handshake TLS + autenticación del servidor real.
+"""
+from __future__ import annotations
+
+import poplib
+import socket
+import socketserver
+import threading
+import time
+from collections import Counter
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: "_TCPServer"
+
+    def setup(self) -> None:
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._entrada = b""
+        self._salida: list[bytes] = []
+
+    # -- E/S ----------------------------------------------------------------
+    def _send(self, data: bytes) -> None:
+        self.server.owner.stats["bytes_sent"] += len(data)
+        self._salida.append(data)
+
+    def _line(self, text: str) -> None:
+        self._send(text.encode("utf-8") + b"\r\n")
+
+    def _flush(self) -> None:
+        if self._salida:
+            self.request.sendall(b"".join(self._salida))
+            self._salida = []
+
+    def _readline(self) -> bytes | None:
+        while b"\n" not in self._entrada:
+            # Sin comandos pendientes: se responde y se espera al cliente.
+            self._flush()
+            data = self.request.recv(65536)
+            if not data:
+                return None
+            if self.server.owner.latency:
+                time.sleep(self.server.owner.latency)
+            self._entrada += data
+        linea, _, self._entrada = self._entrada.partition(b"\n")
+        return linea
+
+    def handle(self) -> None:
+        owner = self.server.owner
+        owner.stats["connections"] += 1
+        if owner.handshake_latency:
+            time.sleep(owner.handshake_latency)
+        self._usuario = None
+        self._autenticado = False
+        self._line("+OK POP3 stand-in listo")
+        while True:
+            raw = self._readline()
+            if raw is None:
+                return
+            cmd, _, args = raw.decode("utf-8", "replace").strip().partition(" ")
+            cmd = cmd.upper()
+            owner.stats["commands"] += 1
+            owner.stats["by_command"][cmd] += 1
+            handler = getattr(self, f"_cmd_{cmd.lower()}", None)
+            if handler is None:
+                self._line("-ERR comando no soportado")
+                continue
+            if not self._autenticado and cmd not in ("USER", "PASS", "CAPA", "QUIT"):
+                self._line("-ERR no autenticado")
+                continue
+            if handler(args.split()) is False:
+                self._flush()
+                return
+
+    # -- comandos -------------------------------------------------------------
+    def _cmd_capa(self, _args):
+        self._line("+OK capacidades")
+        caps = ["USER", "UIDL", "TOP"]
+        if self.server.owner.pipelining:
+            caps.append("PIPELINING")
+        for cap in caps:
+            self._line(cap)
+        self._line(".")
+
+    def _cmd_user(self, args):
+        self._usuario = args[0] if args else ""
+        self._line("+OK")
+
+    def _cmd_pass(self, args):
+        owner = self.server.owner
+        if owner.password is not None and (args[0] if args else "") != owner.password:
+            self._line("-ERR credenciales inválidas")
+            return
+        owner.stats["logins"] += 1
+        self._autenticado = True
+        self._line("+OK sesión iniciada")
+
+    def _mensaje(self, args):
+        mensajes = self.server.owner.messages
+        try:
+            num = int(args[0])
+        except (IndexError, ValueError):
+            num = 0
+        if not 1 <= num <= len(mensajes):
+            self._line("-ERR no existe el mensaje")
+            return None, None
+        return num, mensajes[num - 1]
+
+    def _cmd_stat(self, _args):
+        mensajes = self.server.owner.messages
+        self._line(f"+OK {len(mensajes)} {sum(len(raw) for _, raw in mensajes)}")
+
+    def _cmd_list(self, args):
+        mensajes = self.server.owner.messages
+        if args:
+            num, mensaje = self._mensaje(args)
+            if num:
+                self._line(f"+OK {num} {len(mensaje[1])}")
+            return
+        self._line(f"+OK {len(mensajes)} mensajes")
+        for num, (_uidl, raw) in enumerate(mensajes, 1):
+            self._line(f"{num} {len(raw)}")
+        self._line(".")
+
+    def _cmd_uidl(self, args):
+        mensajes = self.server.owner.messages
+        if args:
+            num, mensaje = self._mensaje(args)
+            if num:
+                self._line(f"+OK {num} {mensaje[0]}")
+            return
+        self._line("+OK")
+        for num, (uidl, _raw) in enumerate(mensajes, 1):
+            self._line(f"{num} {uidl}")
+        self._line(".")
+
+    def _multilinea(self, lineas: list[bytes]) -> None:
+        for linea in lineas:
+            self._send((b"." + linea if linea.startswith(b".") else linea) + b"\r\n")
+        self._send(b".\r\n")
+
+    def _cmd_retr(self, args):
+        num, mensaje = self._mensaje(args)
+        if not num:
+            return
+        self.server.owner.stats["retr_bytes"] += len(mensaje[1])
+        self._line(f"+OK {len(mensaje[1])} octetos")
+        self._multilinea(mensaje[1].splitlines())
+
+    def _cmd_top(self, args):
+        num, mensaje = self._mensaje(args)
+        if not num:
+            return
+        lineas_cuerpo = int(args[1]) if len(args) > 1 else 0
+        lineas = mensaje[1].splitlines()
+        try:
+            fin = lineas.index(b"")
+        except ValueError:
+            fin = len(lineas)
+        self._line("+OK")
+        self._multilinea(lineas[: fin + 1 + lineas_cuerpo])
+
+    def _cmd_noop(self, _args):
+        self._line("+OK")
+
+    def _cmd_quit(self, _args):
+        self._line("+OK adiós")
+        return False
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    owner: "POP3StandIn"
+
+
+class POP3StandIn:
+    """Servidor POP3 local. Úsese como context manager.
+
+    ``messages`` es una lista de ``(uidl, raw)`` en el orden del buzón.
+    """
+
+    def __init__(
+        self,
+        *,
+        password: str | None = None,
+        latency: float = 0.0,
+        handshake_latency: float | None = None,
+        pipelining: bool = True,
+    ):
+        self.messages: list[tuple[str, bytes]] = []
+        self.password = password
+        self.latency = latency
+        self.handshake_latency = 3 * latency if handshake_latency is None else handshake_latency
+        self.pipelining = pipelining
+        self.stats: Counter = Counter()
+        self.stats["by_command"] = Counter()
+        self._server: _TCPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        assert self._server is not None
+        return self._server.server_address[1]
+
+    def add_message(self, uidl: str, raw: bytes) -> int:
+        self.messages.append((uidl, raw))
+        return len(self.messages)
+
+    def reset_stats(self) -> None:
+        self.stats.clear()
+        self.stats["by_command"] = Counter()
+
+    def connect(self, *_args, **_kwargs) -> poplib.POP3:
+        """Fábrica compatible con ``poplib.POP3_SSL(host, port)``."""
+        return poplib.POP3("127.0.0.1", self.port)
+
+    def start(self) -> "POP3StandIn":
+        self._server = _TCPServer(("127.0.0.1", 0), _Handler)
+        self._server.owner = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "POP3StandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+__all__ = ["POP3StandIn"]
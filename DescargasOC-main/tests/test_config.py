@@ -54,3 +54,25 @@ def test_abastecimiento_headless_default(tmp_path):
     assert saved['abastecimiento_headless'] is False
 
 
+
+
+def test_imap_idle_defaults_to_pop_server(tmp_path, monkeypatch):
+    cfg_file = tmp_path / 'config.json'
+    cfg_file.write_text(json.dumps({'pop_server': 'mail.example.com'}))
+    monkeypatch.delenv('POP_SERVER', raising=False)
+    monkeypatch.setenv('IMAP_IDLE', 'si')
+
+    cfg = Config(path=str(cfg_file))
+
+    assert cfg.imap_idle is True
+    assert cfg.imap_server == 'mail.example.com'
+    assert cfg.imap_port == 993
+
+
+def test_pdf_workers_from_env(tmp_path, monkeypatch):
+    cfg_file = tmp_path / 'config.json'
+    cfg_file.write_text(json.dumps({'pdf_workers': 'x'}))
+    assert Config(path=str(cfg_file)).pdf_workers == 0
+
+    monkeypatch.setenv('PDF_WORKERS', '3')
+    assert Config(path=str(cfg_file)).pdf_workers == 3
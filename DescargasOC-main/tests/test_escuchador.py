@@ -6,30 +6,23 @@ import pytest
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 from descargas_oc import escuchador  # noqa: E402
+from escuchador_referencia import extraer_datos_secuencial  # noqa: E402
+from pop3_standin import POP3StandIn  # noqa: E402
 
 
 def _setup_temp_paths(tmp_path, monkeypatch):
     monkeypatch.setattr(escuchador, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(escuchador, 'PROCESADOS_DB', tmp_path / 'procesados.sqlite3')
     monkeypatch.setattr(escuchador, 'PROCESADOS_FILE', tmp_path / 'procesados.txt')
     monkeypatch.setattr(escuchador, 'LAST_UIDL_FILE', tmp_path / 'last_uidl.txt')
     monkeypatch.setattr(escuchador, 'ORDENES_TMP', tmp_path / 'ordenes_tmp.json')
 
 
-class DummyPOP:
-    def __init__(self, uidl_value: str):
-        self.uidl_value = uidl_value
-
-    def user(self, _):
-        return b'+OK'
-
-    def pass_(self, _):
-        return b'+OK'
-
-    def uidl(self):
-        return b'+OK', [f'1 {self.uidl_value}'.encode()], None
-
-    def quit(self):
-        return b'+OK'
+@pytest.fixture
+def pop_server(monkeypatch):
+    with POP3StandIn() as server:
+        monkeypatch.setattr(escuchador.poplib, 'POP3_SSL', server.connect)
+        yield server
 
 
 @pytest.fixture
@@ -44,7 +37,7 @@ def cfg():
     )
 
 
-def test_valid_sender_without_data_not_marked_processed(tmp_path, monkeypatch, cfg):
+def test_valid_sender_non_naf_subject_marked_processed_without_body(tmp_path, monkeypatch, cfg, pop_server):
     _setup_temp_paths(tmp_path, monkeypatch)
     uidl_value = 'UID123'
 
@@ -55,21 +48,37 @@ def test_valid_sender_without_data_not_marked_processed(tmp_path, monkeypatch, c
         'Mensaje sin información de orden\r\n'
     ).encode('utf-8')
 
-    monkeypatch.setattr(escuchador, '_descargar_mensaje', lambda num, c: (uidl_value, raw_email))
+    pop_server.add_message(uidl_value, raw_email)
 
-    def fake_pop(server, port):  # noqa: ARG001 - firmas compatibles
-        return DummyPOP(uidl_value)
+    ordenes, ultimo = escuchador.buscar_ocs(cfg)
 
-    monkeypatch.setattr(escuchador.poplib, 'POP3_SSL', fake_pop)
+    assert ordenes == []
+    assert ultimo == uidl_value
+    assert escuchador.cargar_procesados() == {uidl_value}
+    assert pop_server.stats['by_command']['RETR'] == 0
+
+
+def test_valid_sender_without_data_not_marked_processed(tmp_path, monkeypatch, cfg, pop_server):
+    _setup_temp_paths(tmp_path, monkeypatch)
+    uidl_value = 'UID124'
+
+    raw_email = (
+        'Subject: SISTEMA NAF: Notificacion AUTORIZACION\r\n'
+        'From: "NAF" <naf@telconet.ec>\r\n'
+        '\r\n'
+        'Mensaje sin información de orden\r\n'
+    ).encode('utf-8')
+
+    pop_server.add_message(uidl_value, raw_email)
 
     ordenes, ultimo = escuchador.buscar_ocs(cfg)
 
     assert ordenes == []
     assert ultimo == uidl_value
-    assert not escuchador.PROCESADOS_FILE.exists()
+    assert escuchador.cargar_procesados() == set()
 
 
-def test_valid_order_detected_from_default_sender(tmp_path, monkeypatch, cfg):
+def test_valid_order_detected_from_default_sender(tmp_path, monkeypatch, cfg, pop_server):
     _setup_temp_paths(tmp_path, monkeypatch)
     uidl_value = 'UID456'
 
@@ -82,12 +91,7 @@ def test_valid_order_detected_from_default_sender(tmp_path, monkeypatch, cfg):
         'Proveedor Ejemplo\r\n'
     ).encode('utf-8')
 
-    monkeypatch.setattr(escuchador, '_descargar_mensaje', lambda num, c: (uidl_value, raw_email))
-
-    def fake_pop(server, port):  # noqa: ARG001 - firmas compatibles
-        return DummyPOP(uidl_value)
-
-    monkeypatch.setattr(escuchador.poplib, 'POP3_SSL', fake_pop)
+    pop_server.add_message(uidl_value, raw_email)
 
     ordenes, ultimo = escuchador.buscar_ocs(cfg)
 
@@ -97,7 +101,7 @@ def test_valid_order_detected_from_default_sender(tmp_path, monkeypatch, cfg):
     assert escuchador.ORDENES_TMP.exists()
 
 
-def test_invalid_sender_is_marked_processed(tmp_path, monkeypatch, cfg):
+def test_invalid_sender_is_marked_processed(tmp_path, monkeypatch, cfg, pop_server):
     _setup_temp_paths(tmp_path, monkeypatch)
     uidl_value = 'UID789'
 
@@ -108,21 +112,15 @@ def test_invalid_sender_is_marked_processed(tmp_path, monkeypatch, cfg):
         'Fecha Autorizacion: 01/02/2024\r\n'
     ).encode('utf-8')
 
-    monkeypatch.setattr(escuchador, '_descargar_mensaje', lambda num, c: (uidl_value, raw_email))
-
-    def fake_pop(server, port):  # noqa: ARG001 - firmas compatibles
-        return DummyPOP(uidl_value)
-
-    monkeypatch.setattr(escuchador.poplib, 'POP3_SSL', fake_pop)
+    pop_server.add_message(uidl_value, raw_email)
 
     ordenes, _ = escuchador.buscar_ocs(cfg)
 
     assert ordenes == []
-    assert escuchador.PROCESADOS_FILE.exists()
-    assert escuchador.PROCESADOS_FILE.read_text().strip() == uidl_value
+    assert escuchador.cargar_procesados() == {uidl_value}
 
 
-def test_additional_sender_from_config(tmp_path, monkeypatch, cfg):
+def test_additional_sender_from_config(tmp_path, monkeypatch, cfg, pop_server):
     _setup_temp_paths(tmp_path, monkeypatch)
     cfg.remitente_adicional = 'otro@dominio.com;extra@dominio.com'
     uidl_value = 'UID999'
@@ -134,21 +132,16 @@ def test_additional_sender_from_config(tmp_path, monkeypatch, cfg):
         'Fecha Autorizacion: 10/11/2024\r\n'
     ).encode('utf-8')
 
-    monkeypatch.setattr(escuchador, '_descargar_mensaje', lambda num, c: (uidl_value, raw_email))
-
-    def fake_pop(server, port):  # noqa: ARG001 - firmas compatibles
-        return DummyPOP(uidl_value)
-
-    monkeypatch.setattr(escuchador.poplib, 'POP3_SSL', fake_pop)
+    pop_server.add_message(uidl_value, raw_email)
 
     ordenes, _ = escuchador.buscar_ocs(cfg)
 
     assert len(ordenes) == 1
     assert ordenes[0]['numero'] == '55555'
-    assert not escuchador.PROCESADOS_FILE.exists()
+    assert escuchador.cargar_procesados() == set()
 
 
-def test_reply_to_header_counts_as_valid_sender(tmp_path, monkeypatch, cfg):
+def test_reply_to_header_counts_as_valid_sender(tmp_path, monkeypatch, cfg, pop_server):
     _setup_temp_paths(tmp_path, monkeypatch)
     uidl_value = 'UID444'
 
@@ -160,18 +153,13 @@ def test_reply_to_header_counts_as_valid_sender(tmp_path, monkeypatch, cfg):
         'Fecha Autorizacion: 03/04/2024\r\n'
     ).encode('utf-8')
 
-    monkeypatch.setattr(escuchador, '_descargar_mensaje', lambda num, c: (uidl_value, raw_email))
-
-    def fake_pop(server, port):  # noqa: ARG001
-        return DummyPOP(uidl_value)
-
-    monkeypatch.setattr(escuchador.poplib, 'POP3_SSL', fake_pop)
+    pop_server.add_message(uidl_value, raw_email)
 
     ordenes, _ = escuchador.buscar_ocs(cfg)
 
     assert len(ordenes) == 1
     assert ordenes[0]['numero'] == '77777'
-    assert not escuchador.PROCESADOS_FILE.exists()
+    assert escuchador.cargar_procesados() == set()
 
 
 def test_extracts_provider_from_html_body():
@@ -189,3 +177,196 @@ def test_extracts_provider_from_html_body():
     assert numero == '140144463'
     assert proveedor == '004465 - SALAZAR RUIZ MARCELO VLADIMIR'
     assert tarea == '140144463'
+
+
+
+def test_html_body_ignores_style_and_stops_at_limit(monkeypatch):
+    monkeypatch.setattr(escuchador, 'LIMITE_TEXTO_HTML', 2_000)
+    asunto = 'SISTEMA NAF: Notificacion AUTORIZACION ORDEN COMPRA No 140144463'
+    cuerpo = (
+        '<style>.proveedor: { color: red }</style>'
+        '<p>Fecha Autorizacion: 03/04/2024</p>'
+        '<p>Proveedor: ACME S.A.</p>'
+        + '<div><span>relleno</span></div>' * 50_000
+        + '<p>Fecha Orden: 01/01/2030</p>'
+    )
+
+    _, fecha_aut, fecha_orden, proveedor, _ = escuchador.extraer_datos(asunto, cuerpo)
+
+    assert (fecha_aut, proveedor) == ('03/04/2024', 'ACME S.A.')
+    assert fecha_orden is None
+
+
+
+_ASUNTOS_NAF = [
+    'SISTEMA NAF: Notificacion AUTORIZACION',
+    'SISTEMA NAF: Notificacion AUTORIZACION ORDEN COMPRA No 12345',
+    'SISTEMA NAF: AUTORIZACION ORDEN COMPRA N° 1',
+    'Sistema Naf: autorizacion orden compra no. 77777',
+    'RE: boletín semanal',
+    '',
+]
+_CUERPOS_NAF = [
+    'Mensaje sin información de orden\r\n',
+    'Fecha Autorizacion: 05/06/2024\r\nFecha Orden: 06/06/2024\r\nProveedor Ejemplo\r\n',
+    'Fecha AutorizaciÃ³n: 01/02/2024\r\nFecha Autorización: 02/02/2024\r\n',
+    '<p><strong>Proveedor:</strong> <strong>004465 - SALAZAR RUIZ MARCELO VLADIMIR</strong> '
+    'con <strong>Fecha de Vencimiento:</strong> 16/10/2025</p>'
+    '<br><p><strong>Observacion:</strong> TAREA #140144463//PEDIDO:S/N//DETALLE</p>',
+    'Se generó la orden de compra de No. 4455 &nbsp;\nproveedor:\xa0 ACME  S.A.\n#12 //',
+    '<style>p{}</style>Proveedor: X con Fecha 1\nFecha Orden:10/10/2010',
+    '',
+]
+
+
+@pytest.mark.parametrize('asunto', _ASUNTOS_NAF)
+@pytest.mark.parametrize('cuerpo', _CUERPOS_NAF)
+def test_clasificador_equivale_a_extraccion_anterior(asunto, cuerpo):
+    esperado = extraer_datos_secuencial(asunto, cuerpo)
+    clasificador = escuchador.ClasificadorNAF()
+
+    assert escuchador.extraer_datos(asunto, cuerpo) == esperado
+    assert clasificador.extraer(asunto, cuerpo).como_tupla() == esperado
+    datos = clasificador.clasificar(asunto, cuerpo)
+    if escuchador.ClasificadorNAF.es_autorizacion(asunto):
+        assert datos.como_tupla() == esperado
+    else:
+        assert datos is None
+
+
+def test_clasificador_no_lee_cuerpo_de_otros_asuntos():
+    clasificador = escuchador.ClasificadorNAF()
+
+    assert clasificador.clasificar('Boletín de ofertas', pytest.fail) is None
+    datos = clasificador.clasificar(
+        'SISTEMA NAF: AUTORIZACION ORDEN COMPRA No 9', lambda: 'Fecha Orden: 01/02/2024'
+    )
+    numero, _, fecha_orden, _, _ = datos
+    assert (numero, fecha_orden) == ('9', '01/02/2024')
+    assert not hasattr(datos, '__dict__')
+
+
+def _orden(num: int) -> bytes:
+    return (
+        f'Subject: SISTEMA NAF: Notificacion AUTORIZACION ORDEN COMPRA No {num}\r\n'
+        'From: Notificaciones NAF <naf@telconet.ec>\r\n'
+        '\r\n'
+        'Fecha Autorizacion: 05/06/2024\r\n'
+        '.linea con punto inicial\r\n'
+    ).encode('utf-8')
+
+
+@pytest.mark.parametrize('pipelining', [True, False])
+def test_batch_uses_few_pooled_sessions(tmp_path, monkeypatch, cfg, pop_server, pipelining):
+    _setup_temp_paths(tmp_path, monkeypatch)
+    pop_server.pipelining = pipelining
+    for n in range(60):
+        pop_server.add_message(f'UID{n:03d}', _orden(10000 + n))
+    cfg.batch_size = 50
+    cfg.max_threads = 5
+
+    ordenes, ultimo = escuchador.buscar_ocs(cfg)
+
+    # Respeta batch_size y el orden (del más nuevo al más antiguo).
+    assert [o['numero'] for o in ordenes] == [str(10000 + n) for n in range(59, 9, -1)]
+    assert ordenes[0]['uidl'] == 'UID059'
+    assert ultimo == 'UID059'
+    # Un solo listado UIDL y a lo sumo POP3_MAX_SESIONES inicios de sesión.
+    assert pop_server.stats['by_command']['UIDL'] == 1
+    assert pop_server.stats['logins'] <= escuchador.POP3_MAX_SESIONES
+    assert pop_server.stats['by_command']['RETR'] == 50
+
+
+def test_failed_retr_does_not_stop_batch(tmp_path, monkeypatch, cfg, pop_server):
+    _setup_temp_paths(tmp_path, monkeypatch)
+    for n in range(3):
+        pop_server.add_message(f'UID{n}', _orden(20000 + n))
+    real_uidl = escuchador.poplib.POP3.uidl
+
+    def uidl_con_fantasma(self, which=None):
+        resp, lineas, octetos = real_uidl(self, which)
+        return resp, lineas + [b'9 UIDFANTASMA'], octetos
+
+    monkeypatch.setattr(escuchador.poplib.POP3, 'uidl', uidl_con_fantasma)
+
+    ordenes, _ = escuchador.buscar_ocs(cfg)
+
+    assert sorted(o['numero'] for o in ordenes) == ['20000', '20001', '20002']
+
+
+def test_header_screening_skips_bodies_of_other_mail(tmp_path, monkeypatch, cfg, pop_server):
+    _setup_temp_paths(tmp_path, monkeypatch)
+    adjunto = 'QUJD' * 50_000
+    pop_server.add_message('UID1', (
+        'Subject: Boletin semanal\r\nFrom: rrhh@telconet.ec\r\n\r\n' + adjunto
+    ).encode('utf-8'))
+    pop_server.add_message('UID2', _orden(30000))
+    pop_server.add_message('UID3', (
+        'Subject: SISTEMA NAF: AUTORIZACION ORDEN COMPRA No 1\r\n'
+        'From: externo@dominio.com\r\n\r\n' + adjunto
+    ).encode('utf-8'))
+
+    ordenes, _ = escuchador.buscar_ocs(cfg)
+
+    assert [o['numero'] for o in ordenes] == ['30000']
+    assert pop_server.stats['by_command']['TOP'] == 3
+    assert pop_server.stats['by_command']['RETR'] == 1
+    assert pop_server.stats['bytes_sent'] < 5_000
+    assert escuchador.cargar_procesados() == {'UID1', 'UID3'}
+
+
+def test_processed_uidls_skipped_and_pruned(tmp_path, monkeypatch, cfg, pop_server):
+    _setup_temp_paths(tmp_path, monkeypatch)
+    # Registro heredado en texto: se migra y los UIDL borrados del servidor se depuran.
+    escuchador.PROCESADOS_FILE.write_text('UID1\nUID-BORRADO\n')
+    for n in range(1, 4):
+        pop_server.add_message(f'UID{n}', _orden(40000 + n))
+
+    ordenes, _ = escuchador.buscar_ocs(cfg)
+
+    assert sorted(o['numero'] for o in ordenes) == ['40002', '40003']
+    assert escuchador.cargar_procesados() == {'UID1'}
+    assert not escuchador.PROCESADOS_FILE.exists()
+    escuchador.registrar_procesados(['UID2', 'UID3'], 'UID3')
+    assert escuchador.cargar_procesados() == {'UID1', 'UID2', 'UID3'}
+    assert escuchador.cargar_ultimo_uidl() == 'UID3'
+
+
+def test_drain_processes_backlog_batch_after_batch(tmp_path, monkeypatch, cfg, pop_server):
+    _setup_temp_paths(tmp_path, monkeypatch)
+    for n in range(12):
+        pop_server.add_message(f'UID{n:03d}', _orden(50000 + n))
+    vistos: list[list[str]] = []
+    avances: list[int] = []
+
+    def procesar(ordenes):
+        vistos.append([o['numero'] for o in ordenes])
+        # La OC más antigua falla y no se registra: no debe volver a tomarse.
+        exitosas = [o['uidl'] for o in ordenes if o['numero'] != '50000']
+        escuchador.registrar_procesados(exitosas, None)
+        return len(exitosas) == len(ordenes)
+
+    resumen = escuchador.drenar_ocs(cfg, procesar, lambda e: avances.append(e['pendientes']))
+
+    assert vistos == [
+        [str(50000 + n) for n in range(11, 6, -1)],
+        [str(50000 + n) for n in range(6, 1, -1)],
+        ['50001', '50000'],
+    ]
+    assert avances == [7, 2, 0]
+    assert resumen['revisados'] == 12 and resumen['lotes'] == 3
+    assert resumen['ultimo'] == 'UID011'
+    assert resumen['completo'] is False
+    assert pop_server.stats['by_command']['UIDL'] == 3
+
+
+def test_drain_is_single_batch_without_backlog(tmp_path, monkeypatch, cfg, pop_server):
+    _setup_temp_paths(tmp_path, monkeypatch)
+    for n in range(3):
+        pop_server.add_message(f'UID{n}', _orden(60000 + n))
+
+    resumen = escuchador.drenar_ocs(cfg, lambda ordenes: True)
+
+    assert resumen['lotes'] == 1 and resumen['pendientes'] == 0
+    assert resumen['completo'] is True
+    assert pop_server.stats['by_command']['UIDL'] == 1
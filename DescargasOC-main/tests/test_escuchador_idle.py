@@ -0,0 +1,133 @@
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from descargas_oc import escuchador_idle  # noqa: E402
+from descargas_oc.escuchador_idle import EscuchadorIDLE  # noqa: E402
+from imap_standin import IMAPStandIn  # noqa: E402
+
+
+@pytest.fixture
+def cfg():
+    return SimpleNamespace(
+        imap_server='server', imap_port=993, usuario='user', password='pass'
+    )
+
+
+def _servidor(monkeypatch, **kwargs):
+    server = IMAPStandIn(**kwargs).start()
+    monkeypatch.setattr(escuchador_idle.imaplib, 'IMAP4_SSL', server.connect)
+    return server
+
+
+def _escuchador(cfg, avisos, **kwargs):
+    def al_llegar():
+        avisos.append(time.monotonic())
+        llegada.set()
+
+    llegada = threading.Event()
+    kwargs.setdefault('agrupar', 0.05)
+    kwargs.setdefault('reconexion', 0.05)
+    return EscuchadorIDLE(cfg, al_llegar, **kwargs), llegada
+
+
+def test_new_message_triggers_callback_within_seconds(cfg, monkeypatch):
+    server = _servidor(monkeypatch, password='pass')
+    avisos: list[float] = []
+    escucha, llegada = _escuchador(cfg, avisos)
+    try:
+        escucha.start()
+        assert escucha.conectado.wait(2)
+        inicio = time.monotonic()
+        server.add_message()
+        server.add_message()
+        assert llegada.wait(2)
+        time.sleep(0.2)
+    finally:
+        escucha.stop()
+        server.stop()
+
+    assert escucha.soportado is True
+    assert len(avisos) == 1  # los dos mensajes se agrupan en un aviso
+    assert avisos[0] - inicio < 1
+    assert server.stats['by_command']['IDLE'] == 1
+    assert server.stats['by_command']['LOGOUT'] == 1
+
+
+def test_server_without_idle_falls_back_to_polling(cfg, monkeypatch):
+    server = _servidor(monkeypatch, idle_supported=False)
+    escucha, _ = _escuchador(cfg, [])
+    try:
+        escucha.start()
+        escucha._hilo.join(2)
+        assert not escucha.activo
+    finally:
+        escucha.stop()
+        server.stop()
+
+    assert escucha.soportado is False
+    assert server.stats['by_command']['IDLE'] == 0
+
+
+def test_reconnects_after_server_drop_and_renews_idle(cfg, monkeypatch):
+    server = _servidor(monkeypatch)
+    avisos: list[float] = []
+    escucha, llegada = _escuchador(cfg, avisos, renovar=0.2)
+    try:
+        escucha.start()
+        assert escucha.conectado.wait(2)
+        time.sleep(0.5)
+        renovaciones = server.stats['by_command']['IDLE']
+        escucha.conectado.clear()
+        server.drop_connections()
+        assert escucha.conectado.wait(2)
+        server.add_message()
+        assert llegada.wait(2)
+    finally:
+        escucha.stop()
+        server.stop()
+
+    assert renovaciones >= 2
+    assert server.stats['logins'] == 2
+    assert len(avisos) == 1
+
+
+def test_idle_announced_only_after_login_is_used(cfg, monkeypatch):
+    server = _servidor(monkeypatch, idle_tras_login=True)
+    avisos: list[float] = []
+    escucha, llegada = _escuchador(cfg, avisos)
+    try:
+        escucha.start()
+        assert escucha.conectado.wait(2)
+        server.add_message()
+        assert llegada.wait(2)
+    finally:
+        escucha.stop()
+        server.stop()
+
+    assert escucha.soportado is True
+    assert server.stats['by_command']['CAPABILITY'] == 2
+    assert server.stats['by_command']['IDLE'] == 1
+
+
+def test_exists_between_done_and_tagged_ok_triggers_callback(cfg, monkeypatch):
+    server = _servidor(monkeypatch, avisar_en_idle=False)
+    avisos: list[float] = []
+    escucha, llegada = _escuchador(cfg, avisos, renovar=0.3)
+    try:
+        escucha.start()
+        assert escucha.conectado.wait(2)
+        server.add_message()
+        assert llegada.wait(2)
+        time.sleep(0.5)
+    finally:
+        escucha.stop()
+        server.stop()
+
+    assert len(avisos) == 1
+    assert server.stats['by_command']['IDLE'] >= 2
@@ -0,0 +1,63 @@
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+
+def _ejecutar_sin_gestorcompras(codigo: str) -> subprocess.CompletedProcess:
+    """Ejecuta ``codigo`` en un intérprete donde ``gestorcompras`` no se puede importar."""
+    preambulo = textwrap.dedent(
+        f"""
+        import sys
+        sys.modules['gestorcompras'] = None
+        sys.path.insert(0, {str(RAIZ)!r})
+        """
+    )
+    return subprocess.run(
+        [sys.executable, '-c', preambulo + textwrap.dedent(codigo)],
+        capture_output=True,
+        text=True,
+        cwd=RAIZ,
+        timeout=60,
+    )
+
+
+def test_escuchador_funciona_sin_gestorcompras():
+    resultado = _ejecutar_sin_gestorcompras(
+        """
+        from descargas_oc import escuchador
+        assert escuchador.html_to_text is None
+        print(repr(escuchador._limpiar_html('<p>OC&nbsp;123</p>Tarea<br>9')))
+        print(escuchador.ClasificadorNAF().clasificar(
+            'SISTEMA NAF: AUTORIZACION ORDEN COMPRA No 55',
+            '<p>Fecha Orden: 04/06/2024</p><p>TAREA #140144463//PEDIDO</p>',
+        ).como_tupla())
+        """
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout.splitlines() == [
+        repr('OC 123\nTarea\n9'),
+        str(('55', None, '04/06/2024', None, '140144463')),
+    ]
+
+
+def test_modulos_pdf_sin_gestorcompras_avisan_la_dependencia():
+    for modulo in ('organizador_bienes', 'pdf_info', 'mover_pdf'):
+        resultado = _ejecutar_sin_gestorcompras(f'import descargas_oc.{modulo}')
+        assert resultado.returncode != 0
+        assert 'necesita el paquete gestorcompras' in resultado.stderr, modulo
+
+
+def test_cada_modulo_importa_gestor_por_separado():
+    # Cada módulo se importa solo, en un intérprete nuevo.
+    for modulo in ('pdf_info', 'mover_pdf', 'organizador_bienes', 'escuchador'):
+        resultado = subprocess.run(
+            [sys.executable, '-c', f'import descargas_oc.{modulo}'],
+            capture_output=True,
+            text=True,
+            cwd=RAIZ,
+            timeout=60,
+        )
+        assert resultado.returncode == 0, resultado.stderr
@@ -13,7 +13,14 @@ class DummyReader:
 fake_pdf.PdfReader = DummyReader
 sys.modules.setdefault("PyPDF2", fake_pdf)
 
-from descargas_oc import mover_pdf
+import pytest
+
+from descargas_oc import mover_pdf, organizador_bienes
+
+
+@pytest.fixture(autouse=True)
+def _cache_pdf_tmp(tmp_path, monkeypatch):
+    monkeypatch.setattr(organizador_bienes.pdf_text, "CACHE_PATH", str(tmp_path / "pdf_text.sqlite3"))
 
 
 def _config(tmp_path, bienes=True):
@@ -318,3 +325,24 @@ def test_mover_oc_no_bienes_identifica_numero_en_nombre(tmp_path, monkeypatch):
     assert subidos == ["123456"]
     assert faltantes == []
     assert errores == []
+
+
+def test_mover_oc_no_confunde_numero_contenido_en_otro(tmp_path):
+    cfg, origen, destino = _config(tmp_path, bienes=False)
+    (origen / "ORDEN 1234567.pdf").write_bytes(b"%PDF-1.4")
+    (origen / "ORDEN 123456.pdf").write_bytes(b"%PDF-1.4")
+
+    subidos, faltantes, errores = mover_pdf.mover_oc(
+        cfg,
+        [
+            {"numero": "123456", "proveedor": "UNO"},
+            {"numero": "1234567", "proveedor": "DOS"},
+        ],
+    )
+
+    assert subidos == ["123456", "1234567"]
+    assert faltantes == [] and errores == []
+    assert sorted(p.name for p in destino.iterdir()) == [
+        "ORDEN 123456 - UNO.pdf",
+        "ORDEN 1234567 - DOS.pdf",
+    ]
@@ -0,0 +1,106 @@
+import logging
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from descargas_oc import mover_pdf, organizador_bienes  # noqa: E402
+from pdf_generador import pdf_minimo, pdf_oc  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _pdf_real(tmp_path, monkeypatch):
+    # ``test_mover_pdf`` reemplaza PyPDF2 por un lector vacío.
+    monkeypatch.delitem(sys.modules, 'PyPDF2', raising=False)
+    monkeypatch.setattr(organizador_bienes.pdf_text, 'CACHE_PATH', str(tmp_path / 'pdf_text.sqlite3'))
+    monkeypatch.setattr(organizador_bienes, 'MIN_PDF_POOL', 2)
+
+
+def _escribir(carpeta: Path, nombre: str, *args) -> Path:
+    ruta = carpeta / nombre
+    ruta.write_bytes(pdf_oc(*args, items=5))
+    return ruta
+
+
+def test_analysis_in_processes_matches_serial(tmp_path):
+    rutas = [
+        _escribir(tmp_path, f'oc{n}.pdf', f'14000000{n}', f'00{n} - PROVEEDOR {n}', f'{n}234567')
+        for n in range(4)
+    ]
+    roto = tmp_path / 'roto.pdf'
+    roto.write_bytes(b'no es un pdf')
+    rutas.insert(2, roto)
+    numeros = ('140000003', '140000001')
+
+    serie = organizador_bienes.analizar_pdfs(rutas, campos=('tarea',), numeros=numeros, workers=1)
+    paralelo = organizador_bienes.analizar_pdfs(rutas, campos=('tarea',), numeros=numeros, workers=2)
+
+    def resumen(resultados):
+        return [(r.ruta, r.info.tarea, r.numeros, bool(r.error)) for r in resultados]
+
+    assert resumen(paralelo) == resumen(serie)
+    assert resumen(serie)[1] == (str(rutas[1]), '1234567', ('140000001',), False)
+    assert resumen(serie)[2] == (str(roto), None, (), True)
+    assert organizador_bienes.workers_pdf(1, 4) == 0
+    assert organizador_bienes.workers_pdf(3, 8) == 3
+
+
+def test_task_only_accepts_naf_observation(tmp_path):
+    ruta = tmp_path / 'oc.pdf'
+    ruta.write_bytes(pdf_minimo('Tarea 12 de la ruta', 'OBS: TAREA #1234567// PEDIDO'))
+    solo_texto = tmp_path / 'texto.pdf'
+    solo_texto.write_bytes(pdf_minimo('Tarea 654321'))
+
+    assert organizador_bienes.extraer_numero_tarea_desde_pdf(str(ruta)) == '1234567'
+    assert organizador_bienes.extraer_numero_tarea_desde_pdf(str(solo_texto)) is None
+    analisis = organizador_bienes.analizar_pdfs([ruta, solo_texto], campos=('tarea',), workers=1)
+    assert [r.info.tarea for r in analisis] == ['1234567', None]
+
+
+def test_organizar_moves_by_task_after_parallel_analysis(tmp_path, caplog):
+    origen = tmp_path / 'origen'
+    raiz = tmp_path / 'destino'
+    origen.mkdir()
+    (raiz / '1234567 - CAMION').mkdir(parents=True)
+    (raiz / '2234567 - BUS').mkdir()
+    _escribir(origen, 'ORDEN 140000001.pdf', '140000001', 'A', '1234567')
+    _escribir(origen, 'ORDEN 140000002.pdf', '140000002', 'B', '2234567')
+    _escribir(origen, 'ORDEN 140000003.pdf', '140000003', 'C', None)
+    (origen / 'roto.pdf').write_bytes(b'no es un pdf')
+
+    with caplog.at_level(logging.ERROR):
+        organizador_bienes.organizar(str(origen), str(raiz), workers=2)
+
+    assert (raiz / '1234567 - CAMION' / 'ORDEN 140000001.PDF').exists()
+    assert (raiz / '2234567 - BUS' / 'ORDEN 140000002.PDF').exists()
+    assert sorted(p.name for p in origen.iterdir()) == ['ORDEN 140000003.pdf', 'roto.pdf']
+    assert 'roto.pdf' in caplog.text
+
+
+def test_mover_oc_finds_unnamed_pdfs_by_text_with_workers(tmp_path):
+    origen = tmp_path / 'descargas'
+    destino = tmp_path / 'destino'
+    origen.mkdir()
+    destino.mkdir()
+    for n in range(1, 4):
+        _escribir(origen, f'descarga ({n}).pdf', f'14000000{n}', f'PROVEEDOR {n}', None)
+    config = SimpleNamespace(
+        compra_bienes=False,
+        carpeta_destino_local=str(origen),
+        carpeta_analizar=str(destino),
+        abastecimiento_carpeta_descarga=None,
+        pdf_workers=2,
+    )
+    ordenes = [{'numero': f'14000000{n}'} for n in (3, 1, 2)]
+
+    subidos, faltantes, errores = mover_pdf.mover_oc(config, ordenes)
+
+    assert subidos == ['140000003', '140000001', '140000002']
+    assert faltantes == [] and errores == []
+    assert sorted(p.name for p in destino.iterdir()) == [
+        'ORDEN 140000001 - PROVEEDOR_1.pdf',
+        'ORDEN 140000002 - PROVEEDOR_2.pdf',
+        'ORDEN 140000003 - PROVEEDOR_3.pdf',
+    ]
@@ -47,3 +47,23 @@ def test_proveedor_desde_pdf_normaliza(monkeypatch):
 
     proveedor = modulo.proveedor_desde_pdf("dummy.pdf")
     assert proveedor == "001 - TEST"
+
+
+def test_proveedor_y_tarea_leen_el_pdf_una_sola_vez(tmp_path, monkeypatch):
+    organizador = importlib.import_module("descargas_oc.organizador_bienes")
+    pdf_text = organizador.oc_document.pdf_text
+    monkeypatch.setattr(pdf_text, "CACHE_PATH", str(tmp_path / "pdf_text.sqlite3"))
+    lecturas = []
+
+    def _extraer(ruta):
+        lecturas.append(ruta)
+        return ["ORDEN DE COMPRA\nProveedor: 004465 - PROVEEDOR", "Obs: TAREA #1234567 // PEDIDO"]
+
+    monkeypatch.setitem(pdf_text.EXTRACTORES, "pypdf", _extraer)
+    pdf = tmp_path / "ORDEN 123456.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+
+    assert organizador.extraer_proveedor_desde_pdf(str(pdf)) == "004465 - PROVEEDOR"
+    assert organizador.extraer_numero_tarea_desde_pdf(str(pdf)) == "1234567"
+    assert importlib.import_module("descargas_oc.pdf_info").proveedor_desde_pdf(pdf) == "004465 - PROVEEDOR"
+    assert len(lecturas) == 1
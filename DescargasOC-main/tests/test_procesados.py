@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from descargas_oc.procesados import ProcesadosStore  # noqa: E402
+
+
+def test_bulk_mark_membership_and_prune(tmp_path):
+    store = ProcesadosStore(tmp_path / 'procesados.sqlite3')
+
+    assert store.mark_processed(['A', 'B', 'C', 'A', '']) == 3
+    assert store.mark_processed(['C', 'D']) == 1
+    assert 'B' in store
+    assert 'Z' not in store
+    assert store.filtrar(['A', 'Z', 'D']) == {'A', 'D'}
+    assert len(store) == 4
+
+    assert store.prune([]) == 0
+    assert store.prune(['B', 'D', 'NUEVO']) == 2
+    assert store.todos() == {'B', 'D'}
+    assert store.segundos_desde_prune() < 60
+
+
+def test_migrates_legacy_text_file_once(tmp_path):
+    legado = tmp_path / 'procesados.txt'
+    legado.write_text('U1\nU2\n\nU1\n')
+
+    store = ProcesadosStore(tmp_path / 'procesados.sqlite3', legado=legado)
+
+    assert store.todos() == {'U1', 'U2'}
+    assert not legado.exists()
+    assert (tmp_path / 'procesados.txt.migrado').exists()
+    assert ProcesadosStore(tmp_path / 'procesados.sqlite3', legado=legado).todos() == {'U1', 'U2'}
+
+
+def test_filter_handles_more_uidls_than_sqlite_parameters(tmp_path):
+    store = ProcesadosStore(tmp_path / 'procesados.sqlite3')
+    uidls = [f'UID{n}' for n in range(5000)]
+    store.mark_processed(uidls[::2])
+
+    assert store.filtrar(uidls) == set(uidls[::2])
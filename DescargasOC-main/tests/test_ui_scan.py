@@ -4,6 +4,8 @@ import types
 
 import pytest
 
+from descargas_oc import escuchador
+
 
 class DummyText:
     def __init__(self):
@@ -43,6 +45,15 @@ class DummyConfig:
         return True
 
 
+def _lote(ordenes, ultimo, restantes=0):
+    return {
+        "ordenes": ordenes,
+        "ultimo": ultimo,
+        "revisados": [o["uidl"] for o in ordenes],
+        "restantes": restantes,
+    }
+
+
 @pytest.fixture
 def ui_module(monkeypatch):
     fake_pdf = types.ModuleType("PyPDF2")
@@ -71,9 +82,9 @@ def reset_lock(ui_module):
 def test_uidl_kept_pending_when_some_orders_fail(monkeypatch, ui_module):
     monkeypatch.setattr(ui_module, "Config", DummyConfig)
     monkeypatch.setattr(
-        ui_module,
-        "buscar_ocs",
-        lambda cfg: (
+        escuchador,
+        "escanear_lote",
+        lambda cfg, excluir=(): _lote(
             [
                 {"uidl": "UID1", "numero": "1001"},
                 {"uidl": "UID1", "numero": "1002"},
@@ -106,3 +117,39 @@ def test_uidl_kept_pending_when_some_orders_fail(monkeypatch, ui_module):
 
     assert calls == [(["UID2"], None)]
     assert "PREV" in label.text
+
+
+def test_backlog_drained_in_successive_batches(monkeypatch, ui_module):
+    monkeypatch.setattr(ui_module, "Config", DummyConfig)
+    buzon = [{"uidl": f"UID{n}", "numero": str(3000 + n)} for n in range(5, 0, -1)]
+
+    def fake_lote(cfg, excluir=()):
+        pendientes = [o for o in buzon if o["uidl"] not in excluir]
+        return _lote(pendientes[:2], "UID5", restantes=max(len(pendientes) - 2, 0))
+
+    monkeypatch.setattr(escuchador, "escanear_lote", fake_lote)
+    lotes = []
+
+    def fake_descargar(ordenes, headless):
+        lotes.append([o["numero"] for o in ordenes])
+        return [o["numero"] for o in ordenes], [], []
+
+    monkeypatch.setattr(ui_module, "descargar_oc", fake_descargar)
+    reportes = []
+    monkeypatch.setattr(
+        ui_module, "enviar_reporte", lambda exitosas, *a, **k: reportes.append(exitosas)
+    )
+    calls = []
+    monkeypatch.setattr(ui_module, "registrar_procesados", lambda u, ultimo: calls.append((u, ultimo)))
+    monkeypatch.setattr(ui_module, "cargar_ultimo_uidl", lambda: "UID5")
+    monkeypatch.setattr(ui_module.messagebox, "showinfo", lambda *a, **k: None)
+
+    backlog = DummyLabel()
+    backlog.after = lambda delay, callback: callback()
+    ui_module.realizar_escaneo(DummyText(), DummyLabel(), backlog)
+
+    assert lotes == [["3005", "3004"], ["3003", "3002"], ["3001"]]
+    assert reportes == [["3005", "3004", "3003", "3002", "3001"]]
+    # El último UIDL se guarda una sola vez, después de vaciar la cola.
+    assert [ultimo for _, ultimo in calls] == [None, None, None, "UID5"]
+    assert backlog.text.startswith("Pendientes: 0 |")
@@ -0,0 +1 @@
+"""Benchmarks de rendimiento de GestorCompras (no forman parte de las pruebas)."""
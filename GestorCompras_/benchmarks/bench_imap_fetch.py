@@ -0,0 +1,90 @@
+"""Compara FETCH por mensaje contra FETCH por lotes sobre un IMAP local.
+
+Simula un escaneo de dos fases (encabezados de todos los mensajes y
+mensaje completo de una fracción) y reporta round-trips y tiempo por cada
+1.000 mensajes. La latencia artificial por comando aproxima el costo de
+red hacia el servidor real.
+
+Uso (desde ``GestorCompras_``)::
+
+    python -m benchmarks.bench_imap_fetch --mensajes 1000 --latencia-ms 2
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from gestorcompras.services import imap_fetch
+from gestorcompras.services.email_task_scanner import FETCH_ENCABEZADOS
+from tests.imap_standin import IMAPStandIn
+
+
+def _poblar(server: IMAPStandIn, total: int) -> None:
+    fecha = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S %z")
+    relleno = "Linea de detalle de la notificacion de proveedor.\r\n" * 40
+    for n in range(total):
+        server.add_message((
+            f"From: notificaciones@telconet.ec\r\n"
+            f'Subject: NOTIFICACION A PROVEEDOR: TAREA: "{100000 + n}"\r\n'
+            f"Date: {fecha}\r\nTo: usuario@telconet.ec\r\n\r\n"
+            f"Estimados TALLER {n}\r\n{relleno}"
+        ).encode("utf-8"))
+
+
+def _por_mensaje(conexion, ids: list[int], seleccion: list[int]) -> None:
+    for msg_id in ids:
+        conexion.fetch(str(msg_id), FETCH_ENCABEZADOS)
+    for msg_id in seleccion:
+        conexion.fetch(str(msg_id), "(RFC822)")
+
+
+def _por_lotes(conexion, ids: list[int], seleccion: list[int], chunk_size: int) -> None:
+    for _ in imap_fetch.fetch_all(conexion, ids, FETCH_ENCABEZADOS, chunk_size=chunk_size):
+        pass
+    for _ in imap_fetch.fetch_all(
+        conexion, seleccion, "(RFC822)", chunk_size=min(chunk_size, imap_fetch.BODY_CHUNK_SIZE)
+    ):
+        pass
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mensajes", type=int, default=1000)
+    parser.add_argument("--latencia-ms", type=float, default=2.0)
+    parser.add_argument("--chunk-size", type=int, default=imap_fetch.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--fraccion-cuerpos", type=float, default=0.1,
+                        help="fracción de mensajes que pasan a la fase de cuerpo")
+    args = parser.parse_args(argv)
+
+    with IMAPStandIn(latency=args.latencia_ms / 1000.0) as server:
+        _poblar(server, args.mensajes)
+        ids = list(range(args.mensajes, 0, -1))
+        paso = max(1, round(1 / args.fraccion_cuerpos)) if args.fraccion_cuerpos else 0
+        seleccion = ids[::paso] if paso else []
+
+        escenarios = (
+            ("por mensaje", lambda c: _por_mensaje(c, ids, seleccion)),
+            (f"por lotes ({args.chunk_size})",
+             lambda c: _por_lotes(c, ids, seleccion, args.chunk_size)),
+        )
+        escala = 1000.0 / args.mensajes
+        print(f"{args.mensajes} mensajes, {len(seleccion)} cuerpos, "
+              f"latencia {args.latencia_ms} ms/comando")
+        print(f"{'modo':<20}{'FETCH/1000':>12}{'seg/1000':>12}{'MB':>8}")
+        for nombre, ejecutar in escenarios:
+            conexion = server.connect()
+            conexion.login("bench", "bench")
+            conexion.select("INBOX")
+            server.reset_stats()
+            inicio = time.perf_counter()
+            ejecutar(conexion)
+            transcurrido = time.perf_counter() - inicio
+            fetches = server.stats["by_command"]["FETCH"]
+            conexion.logout()
+            print(f"{nombre:<20}{fetches * escala:>12.1f}{transcurrido * escala:>12.3f}"
+                  f"{server.stats['bytes_sent'] / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Rendimiento de la ingesta de correo por etapa, con salida JSON.
+
+Genera un corpus sintético (``benchmarks.corpus``) y ejecuta las funciones
+reales de ambos módulos sobre servidores locales en proceso, sin red:
+
+* ``parse_body``: extracción de campos de las notificaciones de proveedor.
+* ``extraer_datos``: extracción de datos de las autorizaciones NAF.
+* ``scan_inbox``: escaneo IMAP completo de GestorCompras sobre el buzón
+  mezclado (``tests.imap_standin``).
+* ``buscar_ocs``: lote POP3 de ``descargas_oc.escuchador`` sobre el mismo
+  buzón (``pop3_standin`` de DescargasOC-main).
+
+Por etapa reporta mensajes por segundo, bytes transferidos por el servidor
+(o bytes de texto procesados en las etapas sin red) y el pico de memoria
+residente. Cada etapa corre en un proceso nuevo para que el pico de una no
+contamine a la siguiente. Con ``--salida`` el resultado se guarda en JSON
+junto con el commit, y ``--comparar`` lo contrasta con una corrida anterior.
+
+Uso (desde ``GestorCompras_``)::
+
+    python -m benchmarks.bench_ingesta --mensajes 1000 --salida ingesta.json
+    python -m benchmarks.bench_ingesta --mensajes 1000 --comparar ingesta.json
+"""
+from __future__ import annotations
+
+import argparse
+import email
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from types import SimpleNamespace
+
+from benchmarks import corpus
+
+_RAIZ = Path(__file__).resolve().parents[2]
+_DESCARGAS = _RAIZ / "DescargasOC-main"
+for _ruta in (_DESCARGAS, _DESCARGAS / "tests"):
+    if _ruta.is_dir() and str(_ruta) not in sys.path:
+        sys.path.append(str(_ruta))
+
+ETAPAS = ("parse_body", "extraer_datos", "scan_inbox", "buscar_ocs")
+_SESION = {"address": corpus.USUARIO, "password": "bench"}
+
+
+def _rss_pico_mb() -> float | None:
+    """Pico de memoria residente del proceso actual en MB."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        import psutil
+
+        return getattr(psutil.Process().memory_info(), "peak_wset", 0) / 1e6 or None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo reporta en KiB y macOS en bytes.
+    return pico / 1e6 if sys.platform == "darwin" else pico * 1024 / 1e6
+
+
+def _parse_body(mensajes, _args):
+    from gestorcompras.core.mail_parse import parse_body
+    from gestorcompras.services.email_task_scanner import extract_text
+
+    textos = [
+        extract_text(email.message_from_bytes(m.raw))
+        for m in mensajes if m.familia == "notificacion"
+    ]
+    bytes_texto = sum(len(t.encode("utf-8")) for t in textos)
+
+    def ejecutar():
+        for texto in textos:
+            parse_body(texto, corpus.USUARIO)
+        return {"mensajes": len(textos), "bytes": bytes_texto}
+
+    return ejecutar
+
+
+def _extraer_datos(mensajes, _args):
+    from descargas_oc.escuchador import extraer_datos
+
+    pares = []
+    for m in mensajes:
+        if m.familia != "naf":
+            continue
+        msg = email.message_from_bytes(m.raw)
+        parte = next(p for p in msg.walk() if p.get_content_type() == "text/html")
+        html = parte.get_payload(decode=True).decode(parte.get_content_charset() or "utf-8")
+        pares.append((str(msg["Subject"]), html))
+    bytes_texto = sum(len(c.encode("utf-8")) for _a, c in pares)
+
+    def ejecutar():
+        for asunto, cuerpo in pares:
+            extraer_datos(asunto, cuerpo)
+        return {"mensajes": len(pares), "bytes": bytes_texto}
+
+    return ejecutar
+
+
+def _scan_inbox(mensajes, args):
+    from gestorcompras.services import db, mail_ingest
+    from gestorcompras.services.email_task_scanner import scan_inbox
+    from tests.imap_standin import IMAPStandIn
+
+    tmp = tempfile.mkdtemp(prefix="bench_ingesta_")
+    db.DB_PATH = str(Path(tmp) / "bench.db")
+    db.init_db()
+    mail_ingest.cache.clear()
+    server = IMAPStandIn(latency=args.latencia_ms / 1000.0).start()
+    for m in mensajes:
+        server.add_message(m.raw, internaldate=m.fecha)
+    mail_ingest.imaplib.IMAP4_SSL = server.connect
+    desde = mensajes[0].fecha - timedelta(minutes=1)
+    hasta = mensajes[-1].fecha + timedelta(minutes=1)
+    server.reset_stats()
+
+    def ejecutar():
+        try:
+            # Mismos filtros que el escaneo de Servicios (``reasignacion_gui``).
+            registros = scan_inbox(
+                _SESION, desde, hasta,
+                asunto_contiene="NOTIFICACION A PROVEEDOR:", require_user_email=True,
+            )
+        finally:
+            server.stop()
+        return {
+            "mensajes": len(mensajes),
+            "bytes": server.stats["bytes_sent"],
+            "resultados": len(registros),
+        }
+
+    return ejecutar
+
+
+def _buscar_ocs(mensajes, args):
+    from descargas_oc import escuchador
+    from pop3_standin import POP3StandIn
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench_ingesta_"))
+    escuchador.DATA_DIR = tmp
+    escuchador.PROCESADOS_DB = tmp / "procesados.sqlite3"
+    escuchador.PROCESADOS_FILE = tmp / "procesados.txt"
+    escuchador.LAST_UIDL_FILE = tmp / "last_uidl.txt"
+    escuchador.ORDENES_TMP = tmp / "ordenes_tmp.json"
+    server = POP3StandIn(latency=args.latencia_ms / 1000.0).start()
+    for n, m in enumerate(mensajes):
+        server.add_message(f"UID{n}", m.raw)
+    escuchador.poplib.POP3_SSL = server.connect
+    cfg = SimpleNamespace(
+        pop_server="bench", pop_port=995, usuario=corpus.USUARIO, password="bench",
+        batch_size=len(mensajes), max_threads=5,
+    )
+    server.reset_stats()
+
+    def ejecutar():
+        try:
+            ordenes, _ultimo = escuchador.buscar_ocs(cfg)
+        finally:
+            server.stop()
+        return {
+            "mensajes": len(mensajes),
+            "bytes": server.stats["bytes_sent"],
+            "resultados": len(ordenes),
+        }
+
+    return ejecutar
+
+
+_PREPARAR = {
+    "parse_body": _parse_body,
+    "extraer_datos": _extraer_datos,
+    "scan_inbox": _scan_inbox,
+    "buscar_ocs": _buscar_ocs,
+}
+
+
+def _ejecutar_etapa(etapa: str, args: argparse.Namespace) -> dict:
+    """Corre una etapa en el proceso actual (uno nuevo por etapa)."""
+    fin = datetime.now(timezone.utc).replace(microsecond=0)
+    mensajes = corpus.generar(args.mensajes, semilla=args.semilla, fin=fin)
+    ejecutar = _PREPARAR[etapa](mensajes, args)
+    # Después de preparar: el logger de DescargasOC reconfigura la raíz al importarse.
+    logging.getLogger().setLevel(logging.WARNING)
+    rss_base = _rss_pico_mb()
+    inicio = time.perf_counter()
+    resultado = ejecutar()
+    segundos = time.perf_counter() - inicio
+    rss_pico = _rss_pico_mb()
+    return {
+        "etapa": etapa,
+        **resultado,
+        "segundos": round(segundos, 4),
+        "mensajes_por_segundo": round(resultado["mensajes"] / segundos, 1) if segundos else None,
+        "rss_base_mb": rss_base and round(rss_base, 1),
+        "rss_pico_mb": rss_pico and round(rss_pico, 1),
+    }
+
+
+def _commit() -> dict:
+    def _git(*argumentos: str) -> str:
+        try:
+            return subprocess.run(
+                ["git", *argumentos], cwd=_RAIZ, capture_output=True, text=True, timeout=30
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or None,
+        "modificado": bool(_git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def _comparar(anterior: dict, actual: dict) -> None:
+    previas = {e["etapa"]: e for e in anterior.get("etapas", [])}
+    print(f"\nComparación con {anterior.get('commit') or 'corrida anterior'}")
+    print(f"{'etapa':<16}{'antes msg/s':>13}{'ahora msg/s':>13}{'cambio':>9}")
+    for etapa in actual["etapas"]:
+        previa = previas.get(etapa["etapa"])
+        if not previa or not previa.get("mensajes_por_segundo"):
+            continue
+        antes, ahora = previa["mensajes_por_segundo"], etapa["mensajes_por_segundo"]
+        print(f"{etapa['etapa']:<16}{antes:>13.1f}{ahora:>13.1f}{ahora / antes:>8.2f}x")
+
+
+def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mensajes", type=int, default=1000, help="tamaño del buzón sintético")
+    parser.add_argument("--latencia-ms", type=float, default=0.0,
+                        help="latencia artificial por comando de los servidores locales")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--etapas", nargs="+", choices=ETAPAS, default=list(ETAPAS))
+    parser.add_argument("--salida", type=Path, help="archivo JSON donde guardar el resultado")
+    parser.add_argument("--comparar", type=Path, help="JSON de una corrida anterior")
+    args = parser.parse_args(argv)
+
+    resultado = {
+        **_commit(),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "parametros": {
+            "mensajes": args.mensajes,
+            "latencia_ms": args.latencia_ms,
+            "semilla": args.semilla,
+            "proporciones": corpus.PROPORCIONES,
+        },
+        "etapas": [],
+    }
+    print(f"{args.mensajes} mensajes, latencia {args.latencia_ms} ms/comando")
+    print(f"{'etapa':<16}{'mensajes':>9}{'msg/s':>11}{'MB':>9}{'RSS pico MB':>13}")
+    contexto = get_context("spawn")
+    for etapa in args.etapas:
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as ex:
+            medida = ex.submit(_ejecutar_etapa, etapa, args).result()
+        resultado["etapas"].append(medida)
+        print(f"{etapa:<16}{medida['mensajes']:>9}{medida['mensajes_por_segundo']:>11.1f}"
+              f"{medida['bytes'] / 1e6:>9.2f}{medida['rss_pico_mb'] or 0:>13.1f}")
+
+    if args.comparar:
+        _comparar(json.loads(args.comparar.read_text(encoding="utf-8")), resultado)
+    if args.salida:
+        args.salida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nResultado guardado en {args.salida}")
+    return resultado
+
+
+if __name__ == "__main__":
+    main()
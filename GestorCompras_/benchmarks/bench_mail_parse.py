@@ -0,0 +1,74 @@
+"""Costo por mensaje de ``core.mail_parse.parse_body``.
+
+Compara el extractor de un solo recorrido con la implementación anterior
+(una búsqueda por campo, ``benchmarks.mail_parse_referencia``) sobre
+cuerpos típicos de notificaciones de Servicios y sobre cuerpos largos sin
+los campos (el caso en que antes se recorría el texto completo una vez por
+expresión). Verifica además que ambos devuelvan lo mismo.
+
+Uso (desde ``GestorCompras_``)::
+
+    python -m benchmarks.bench_mail_parse --mensajes 2000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from benchmarks.mail_parse_referencia import parse_body_secuencial
+from gestorcompras.core.mail_parse import parse_body
+
+_CORREO = "acardenas@telconet.ec"
+
+
+def _servicios(n: int) -> str:
+    return (
+        "Estimados MAVESA QUITO\n"
+        f"Su ayuda coordinando el mantenimiento con Miguel García (093-558-{n:04d})\n"
+        f"[GTI-1566] [107082] OT MG-{n} MANT, GREAT WALL 335 GTI-1566 KM 107082\n"
+        f"Se recibe FACTURA: 001-045-{n:06d} OC: {30000 + n}\n"
+        f"INGRESO: ING-2025-{n}\nRUC: 1790016919001\nFECHA DE ORDEN: 10/02/2025\n"
+        "Agradezco su atención\n"
+        "Sistema Compras - Alex Cárdenas\n"
+        f"AVISO IMPORTANTE: Dirija cualquier consulta a {_CORREO}\n"
+    )
+
+
+def _largo(n: int) -> str:
+    parrafo = (
+        "Por medio del presente se informa el detalle de los repuestos "
+        "entregados en el taller durante la semana, con sus cantidades y "
+        "valores unitarios según la cotización aprobada por el área.\n"
+    )
+    return f"Estimados proveedor {n}\n" + parrafo * 40
+
+
+def _medir(func, cuerpos: list[str], repeticiones: int) -> float:
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for cuerpo in cuerpos:
+            func(cuerpo, _CORREO)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / len(cuerpos) * 1e6
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mensajes", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'corpus':<12}{'antes µs':>10}{'ahora µs':>10}{'speedup':>10}")
+    for nombre, generador in (("servicios", _servicios), ("largo", _largo)):
+        cuerpos = [generador(n) for n in range(args.mensajes)]
+        for cuerpo in cuerpos:
+            if parse_body(cuerpo, _CORREO) != parse_body_secuencial(cuerpo, _CORREO):
+                raise SystemExit(f"Resultados distintos en el corpus {nombre}")
+        antes = _medir(parse_body_secuencial, cuerpos, args.repeticiones)
+        ahora = _medir(parse_body, cuerpos, args.repeticiones)
+        print(f"{nombre:<12}{antes:>10.1f}{ahora:>10.1f}{antes / ahora:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compara el parseo de correos en serie contra la etapa en procesos.
+
+Genera un corpus sintético de notificaciones (HTML con tablas y texto
+alternativo, como las de proveedores) y mide cuánto tarda
+``email_task_scanner._parse_descarga`` sobre todo el corpus con
+``parse_pool.map_ordered`` para distintas cantidades de procesos. Solo mide
+la etapa de CPU; la red no interviene.
+
+Uso (desde ``GestorCompras_``)::
+
+    python -m benchmarks.bench_parse_pool --mensajes 5000 --workers 1 2 4
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from gestorcompras.services import parse_pool
+from gestorcompras.services.email_task_scanner import _parse_descarga
+
+_ADDRESS = "usuario@telconet.ec"
+
+
+def _corpus(total: int) -> list[bytes]:
+    fecha = datetime.now(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S %z")
+    filas = "".join(
+        f"<tr><td style='padding:4px'>Item {i}</td><td>Repuesto &amp; servicio</td>"
+        f"<td>{i * 3}.50</td></tr>"
+        for i in range(25)
+    )
+    mensajes = []
+    for n in range(total):
+        html = (
+            "<html><head><style>td {font-family: Arial}</style></head><body>"
+            f"<p>Estimados TALLER MECANICO {n}</p>"
+            f"<p>Mecanico: Juan Perez {n} Telefono: 09{n:08d}</p>"
+            f"<p>OT: \"VEHICULO PLACA ABC-{n:04d}\"</p>"
+            f"<table>{filas}</table>"
+            f"<p>Factura: 001-002-{n:09d}<br>OC: {50000 + n}<br>"
+            f"Ingreso: {n}<br>RUC: 1790016919001</p>"
+            f"<p>Responsable: {_ADDRESS}</p></body></html>"
+        )
+        texto = f"Estimados TALLER MECANICO {n}\nOC: {50000 + n}\n"
+        mensajes.append((
+            f"From: notificaciones@telconet.ec\r\n"
+            f'Subject: NOTIFICACION A PROVEEDOR: TAREA: "{100000 + n}"\r\n'
+            f"Date: {fecha}\r\nTo: {_ADDRESS}\r\nMIME-Version: 1.0\r\n"
+            f'Content-Type: multipart/alternative; boundary="b{n}"\r\n\r\n'
+            f"--b{n}\r\nContent-Type: text/plain; charset=utf-8\r\n\r\n{texto}\r\n"
+            f"--b{n}\r\nContent-Type: text/html; charset=utf-8\r\n\r\n{html}\r\n"
+            f"--b{n}--\r\n"
+        ).encode("utf-8"))
+    return mensajes
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mensajes", type=int, default=5000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, parse_pool.PARSE_WORKERS}))
+    args = parser.parse_args(argv)
+
+    corpus = _corpus(args.mensajes)
+    print(f"{args.mensajes} mensajes, {sum(map(len, corpus)) / 1e6:.1f} MB")
+    print(f"{'procesos':<10}{'seg':>8}{'msg/s':>10}{'speedup':>10}")
+    base = None
+    referencia = None
+    for workers in args.workers:
+        inicio = time.perf_counter()
+        resultados = list(parse_pool.map_ordered(
+            _parse_descarga,
+            ((n, raw, _ADDRESS) for n, raw in enumerate(corpus)),
+            workers=workers,
+        ))
+        transcurrido = time.perf_counter() - inicio
+        if referencia is None:
+            referencia = resultados
+        elif resultados != referencia:
+            raise SystemExit(f"Resultados distintos con {workers} procesos")
+        base = base or transcurrido
+        print(f"{workers:<10}{transcurrido:>8.2f}{args.mensajes / transcurrido:>10.0f}"
+              f"{base / transcurrido:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Corpus sintético de correo para los benchmarks de ingesta.
+
+Genera tres familias de mensajes RFC 822 con la forma de los que llegan a
+los buzones de compras:
+
+* ``naf``: autorizaciones de OC de ``naf@telconet.ec`` (las que procesa
+  ``descargas_oc.escuchador``).
+* ``notificacion``: ``NOTIFICACION A PROVEEDOR: TAREA: "n"`` (las que
+  procesa ``email_task_scanner.scan_inbox``).
+* ``ruido``: boletines, respuestas y avisos de otros remitentes.
+
+Cada familia rota entre variantes de estructura (texto plano, multipart
+con HTML, adjuntos PDF, HTML solo) y de codificación (UTF-8 8bit,
+quoted-printable, base64, ISO-8859-1, Windows-1252, KOI8-R) para que el
+costo de decodificación sea el del buzón real y no el de un caso ideal.
+La mezcla de familias y variantes es determinista para una misma semilla.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.header import Header
+from email.message import EmailMessage
+from email.policy import SMTP
+from email.utils import format_datetime
+
+FAMILIAS = ("naf", "notificacion", "ruido")
+PROPORCIONES = {"naf": 0.3, "notificacion": 0.3, "ruido": 0.4}
+USUARIO = "acardenas@telconet.ec"
+
+_PROVEEDORES = ("MAVESA QUITO", "TALLERES ÑUÑOA", "SALAZAR RUIZ MARCELO", "AUTOMOTORES PEÑA")
+_PDF = b"%PDF-1.4\n" + bytes(range(256)) * 64 + b"\n%%EOF\n"
+
+
+@dataclass(frozen=True)
+class Mensaje:
+    familia: str
+    variante: str
+    raw: bytes
+    fecha: datetime
+
+
+def _base(remitente: str, asunto: str, fecha: datetime, n: int, charset: str = "utf-8") -> EmailMessage:
+    msg = EmailMessage(policy=SMTP)
+    msg["From"] = remitente
+    msg["To"] = USUARIO
+    msg["Date"] = format_datetime(fecha)
+    msg["Message-ID"] = f"<bench-{n}@telconet.ec>"
+    msg["Subject"] = asunto
+    # La política moderna recodifica el asunto en UTF-8; se guarda el
+    # charset original para escribirlo en ``_serializar``.
+    msg.charset_asunto = charset
+    return msg
+
+
+def _serializar(msg: EmailMessage) -> bytes:
+    asunto = msg["Subject"]
+    if msg.charset_asunto == "utf-8" or asunto.isascii():
+        return msg.as_bytes()
+    del msg["Subject"]
+    codificado = Header(asunto, msg.charset_asunto).encode(linesep="\r\n")
+    return b"Subject: " + codificado.encode("ascii") + b"\r\n" + msg.as_bytes()
+
+
+def _naf(n: int, variante: str, fecha: datetime) -> EmailMessage:
+    numero = 140000000 + n
+    proveedor = _PROVEEDORES[n % len(_PROVEEDORES)]
+    html = (
+        f"<p>Se ha autorizado la orden de compra de No. {numero}</p>"
+        "<p>Fecha Autorización: 05/06/2024</p><p>Fecha Orden: 04/06/2024</p>"
+        f"<p><strong>Proveedor:</strong>&nbsp;<strong>00{n % 9000:04d} - {proveedor}</strong> "
+        "con <strong>Fecha de Vencimiento:</strong> 16/10/2025</p>"
+        f"<br><p><strong>Observación:</strong> TAREA #{n}//PEDIDO:S/N//DETALLE</p>"
+    )
+    asunto = f"SISTEMA NAF: Notificacion AUTORIZACION ORDEN COMPRA No {numero}"
+    if variante == "win1252":
+        msg = _base("NAF <naf@telconet.ec>", asunto, fecha, n, "windows-1252")
+        msg.set_content(html, subtype="html", charset="windows-1252", cte="quoted-printable")
+    elif variante == "adjunto":
+        msg = _base("naf@telconet.ec", asunto, fecha, n)
+        msg.set_content(html, subtype="html", cte="base64")
+        msg.add_attachment(_PDF, maintype="application", subtype="pdf", filename=f"OC_{numero}.pdf")
+    else:
+        msg = _base("naf@telconet.ec", asunto, fecha, n)
+        msg.set_content(html, subtype="html", cte="8bit")
+    return msg
+
+
+def _notificacion(n: int, variante: str, fecha: datetime) -> EmailMessage:
+    tarea = 100000 + n
+    texto = (
+        f"Estimados {_PROVEEDORES[n % len(_PROVEEDORES)]}\n"
+        f"Su ayuda coordinando el mantenimiento con Miguel García (093-558-{n % 10000:04d})\n"
+        f"[GTI-1566] [107082] OT MG-{n} MANT, GREAT WALL 335 GTI-1566 KM 107082\n"
+        f"Se recibe FACTURA: 001-045-{n:06d} OC: {30000 + n}\n"
+        f"INGRESO: ING-2025-{n}\nRUC: 1790016919001\nFECHA DE ORDEN: 10/02/2025\n"
+        "Agradezco su atención\nSistema Compras - Alex Cárdenas\n"
+        f"AVISO IMPORTANTE: Dirija cualquier consulta a {USUARIO}\n"
+    )
+    asunto = f'NOTIFICACION A PROVEEDOR: TAREA: "{tarea}"'
+    remitente = "notificaciones@telconet.ec"
+    if variante == "latin1":
+        msg = _base(remitente, asunto + " - Revisión", fecha, n, "iso-8859-1")
+        msg.set_content(texto, charset="iso-8859-1", cte="quoted-printable")
+    elif variante == "html":
+        msg = _base(remitente, asunto, fecha, n)
+        msg.set_content(texto, cte="quoted-printable")
+        filas = "".join(f"<p>{linea}</p>" for linea in texto.splitlines())
+        msg.add_alternative(f"<html><body>{filas}</body></html>", subtype="html")
+    elif variante == "adjunto":
+        msg = _base(remitente, asunto, fecha, n)
+        msg.set_content(texto, cte="8bit")
+        msg.add_attachment(_PDF, maintype="application", subtype="pdf", filename=f"FAC_{n}.pdf")
+    else:
+        msg = _base(remitente, asunto, fecha, n)
+        msg.set_content(texto, cte="8bit")
+    return msg
+
+
+def _ruido(n: int, variante: str, fecha: datetime) -> EmailMessage:
+    if variante == "boletin":
+        fila = (
+            "<tr><td style='padding:4px'><img src='cid:logo'></td>"
+            "<td>Oferta de repuestos &amp; servicios para su flota</td></tr>"
+        )
+        msg = _base("boletin@proveedor.com", f"Boletín semanal {n}", fecha, n)
+        msg.set_content("Versión de texto del boletín.")
+        msg.add_alternative(f"<table>{fila * 200}</table>", subtype="html")
+    elif variante == "koi8":
+        msg = _base("info@example.ru", f"Счёт на оплату N {n}", fecha, n, "koi8-r")
+        msg.set_content("Здравствуйте! Счёт во вложении.\n" * 20, charset="koi8-r", cte="base64")
+        msg.add_attachment(_PDF, maintype="application", subtype="pdf", filename=f"schet_{n}.pdf")
+    else:
+        msg = _base("compras@telconet.ec", f"RE: Consulta cotización {n}", fecha, n, "iso-8859-1")
+        msg.set_content(
+            "Buenos días, adjunto la cotización solicitada.\n> mensaje anterior\n" * 10,
+            charset="iso-8859-1",
+            cte="quoted-printable",
+        )
+    return msg
+
+
+_GENERADORES = {
+    "naf": (_naf, ("html", "win1252", "adjunto")),
+    "notificacion": (_notificacion, ("texto", "html", "latin1", "adjunto")),
+    "ruido": (_ruido, ("boletin", "respuesta", "koi8")),
+}
+
+
+def generar(
+    total: int,
+    *,
+    proporciones: dict[str, float] | None = None,
+    semilla: int = 0,
+    fin: datetime | None = None,
+) -> list[Mensaje]:
+    """``total`` mensajes mezclados según ``proporciones``, del más antiguo
+    al más reciente (un minuto entre cada uno, terminando en ``fin``)."""
+    proporciones = proporciones or PROPORCIONES
+    azar = random.Random(semilla)
+    familias = azar.choices(
+        list(proporciones), weights=list(proporciones.values()), k=total
+    )
+    fin = fin or datetime.now(timezone.utc)
+    contadores = dict.fromkeys(FAMILIAS, 0)
+    mensajes: list[Mensaje] = []
+    for n, familia in enumerate(familias):
+        generador, variantes = _GENERADORES[familia]
+        variante = variantes[contadores[familia] % len(variantes)]
+        contadores[familia] += 1
+        fecha = fin - timedelta(minutes=total - n)
+        raw = _serializar(generador(n, variante, fecha))
+        mensajes.append(Mensaje(familia, variante, raw, fecha))
+    return mensajes
+
+
+__all__ = ["FAMILIAS", "PROPORCIONES", "USUARIO", "Mensaje", "generar"]
@@ -0,0 +1,84 @@
+"""Extracción anterior de ``core.mail_parse.parse_body`` (una búsqueda por campo).
+
+Referencia para ``benchmarks.bench_mail_parse`` y para las pruebas de
+equivalencia de ``tests.test_mail_parse``; no se usa en la aplicación.
+"""
+from __future__ import annotations
+
+from gestorcompras.core.mail_parse import (
+    RX_FACTURA,
+    RX_FECHA_ORDEN,
+    RX_INGRESO,
+    RX_MECANICO,
+    RX_OC,
+    RX_OT_LINE,
+    RX_PROVEEDOR,
+    RX_RUC,
+    RX_USERMAIL,
+    _digits_only,
+    _norm,
+)
+
+
+def parse_body_secuencial(body_text: str | None, correo_usuario: str) -> dict[str, object]:
+    body = _norm(body_text)
+    proveedor = "N/D"
+    proveedor_match = RX_PROVEEDOR.search(body)
+    if proveedor_match:
+        proveedor = next((g for g in proveedor_match.groups() if g), "N/D").strip()
+
+    mecanico_nombre = "N/D"
+    mecanico_telefono = "N/D"
+    mecanico_match = RX_MECANICO.search(body)
+    if mecanico_match:
+        mecanico_nombre = mecanico_match.group(1).strip() or "N/D"
+        mecanico_telefono = _digits_only(mecanico_match.group(2)) or "N/D"
+
+    inf_vehiculo = "N/D"
+    ot_match = RX_OT_LINE.search(body)
+    if ot_match:
+        inf_vehiculo = ot_match.group(1).strip().strip('"')
+
+    correo_usuario_encontrado = False
+    if correo_usuario:
+        correo_usuario_encontrado = correo_usuario.lower() in body.lower()
+    else:
+        correo_usuario_encontrado = bool(RX_USERMAIL.search(body))
+
+    factura = ""
+    m = RX_FACTURA.search(body)
+    if m:
+        factura = m.group(1).strip()
+
+    oc = ""
+    m = RX_OC.search(body)
+    if m:
+        oc = m.group(1).strip()
+
+    ingreso = ""
+    m = RX_INGRESO.search(body)
+    if m:
+        ingreso = m.group(1).strip()
+
+    ruc = ""
+    m = RX_RUC.search(body)
+    if m:
+        ruc = m.group(1).strip()
+
+    fecha_orden = ""
+    m = RX_FECHA_ORDEN.search(body)
+    if m:
+        fecha_orden = m.group(1).strip()
+
+    return {
+        "proveedor": proveedor or "N/D",
+        "mecanico_nombre": mecanico_nombre or "N/D",
+        "mecanico_telefono": mecanico_telefono or "N/D",
+        "inf_vehiculo": inf_vehiculo or "N/D",
+        "correo_usuario_encontrado": correo_usuario_encontrado,
+        "factura": factura,
+        "oc": oc,
+        "ingreso": ingreso,
+        "ruc": ruc,
+        "fecha_orden": fecha_orden,
+    }
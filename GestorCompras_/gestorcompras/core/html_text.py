@@ -0,0 +1,96 @@
+"""Conversión de cuerpos HTML de correo a texto plano.
+
+El convertidor recorre el documento con ``html.parser`` por bloques, descarta
+el contenido de ``<script>``/``<style>``, convierte las etiquetas de bloque
+en saltos de línea y se detiene al alcanzar ``max_chars`` caracteres de
+texto: los extractores solo miran los primeros KB del cuerpo, así que un
+boletín de varios MB no se procesa completo. Lo usan
+``services.email_task_scanner`` y el escuchador de DescargasOC.
+"""
+from __future__ import annotations
+
+from html.parser import HTMLParser
+
+# Caracteres de texto que se extraen por defecto.
+DEFAULT_MAX_CHARS = 20_000
+# Tamaño de cada bloque entregado al parser.
+_BLOQUE = 8_192
+
+_OMITIR = frozenset({"script", "style"})
+_BLOQUES = frozenset({
+    "address", "article", "blockquote", "div", "dl", "dt", "dd", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "ol",
+    "p", "pre", "section", "table", "tbody", "thead", "tfoot", "title", "tr",
+    "ul",
+})
+_CELDAS = frozenset({"td", "th"})
+
+
+class _Completo(Exception):
+    """Se alcanzó el límite de caracteres."""
+
+
+class _ConversorTexto(HTMLParser):
+    def __init__(self, max_chars: int | None):
+        super().__init__(convert_charrefs=True)
+        self.partes: list[str] = []
+        self._restante = max_chars
+        self._omitir = 0
+
+    def _agregar(self, texto: str) -> None:
+        if self._restante is not None:
+            if len(texto) >= self._restante:
+                self.partes.append(texto[:self._restante])
+                raise _Completo
+            self._restante -= len(texto)
+        self.partes.append(texto)
+
+    def _salto(self) -> None:
+        if self.partes and not self.partes[-1].endswith("\n"):
+            self._agregar("\n")
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _OMITIR:
+            self._omitir += 1
+        elif tag == "br":
+            self._agregar("\n")
+        elif tag in _BLOQUES:
+            self._salto()
+        elif tag in _CELDAS:
+            self._agregar(" ")
+
+    def handle_endtag(self, tag):
+        if tag in _OMITIR:
+            self._omitir = max(0, self._omitir - 1)
+        elif tag in _BLOQUES:
+            self._salto()
+
+    def handle_data(self, data):
+        if not self._omitir:
+            self._agregar(data)
+
+
+def html_to_text(markup: str | None, max_chars: int | None = DEFAULT_MAX_CHARS) -> str:
+    """Texto de ``markup`` con saltos de línea por bloque; ``max_chars=None``
+    convierte el documento completo.
+
+    El texto fuera de etiquetas se conserva tal cual (incluidos los saltos de
+    línea de un cuerpo que en realidad es texto plano) y las entidades se
+    decodifican.
+    """
+    if not markup:
+        return ""
+    if "<" not in markup and "&" not in markup:
+        # Texto plano: el parser lo devolvería igual.
+        return markup if max_chars is None else markup[:max_chars]
+    conversor = _ConversorTexto(max_chars)
+    try:
+        for inicio in range(0, len(markup), _BLOQUE):
+            conversor.feed(markup[inicio:inicio + _BLOQUE])
+        conversor.close()
+    except _Completo:
+        pass
+    return "".join(conversor.partes)
+
+
+__all__ = ["DEFAULT_MAX_CHARS", "html_to_text"]
@@ -20,6 +20,13 @@ RX_OC = re.compile(r'\bOC\s*[:#]?\s*(\d+)', re.I)
 RX_INGRESO = re.compile(r'INGR(?:ESO)?\.?\s*[:#]?\s*(\S+)', re.I)
 RX_RUC = re.compile(r'\bRUC\s*[:#]?\s*(\d{10,13})', re.I)
 RX_FECHA_ORDEN = re.compile(r'FECHA\s*(?:DE\s*)?ORDEN\s*[:#]?\s*([\d/\-]+)', re.I)
+# Correos de reasignación: un bloque por tarea con sus OCs relacionadas; el
+# último bloque puede terminar sin salto de línea (texto ya recortado).
+RX_REASIGNACION = re.compile(
+    r'Tarea:\s+(\d+)\s+Reasignación a:\s+(.*?)\s+Datos relacionados:(.*?)(?:\n(?=Tarea:)|\s*\Z)',
+    re.S,
+)
+RX_REASIGNACION_DETALLE = re.compile(r'- OC (\d+) \| (.*?) \| FAC\. (\S+) \| INGR\. (\S+)')
 
 _MOJI = {
     "Ã¡": "á",
@@ -45,7 +52,10 @@ def _fix_mojibake(s: str) -> str:
 def _norm(s: str | None) -> str:
     if not s:
         return ""
-    return unicodedata.normalize("NFC", _fix_mojibake(_norm_quotes(s)))
+    s = _norm_quotes(s)
+    if "Ã" in s:
+        s = _fix_mojibake(s)
+    return unicodedata.normalize("NFC", s)
 
 
 def _digits_only(s: str) -> str:
@@ -59,55 +69,111 @@ def parse_subject(subject: str | None) -> dict[str, str]:
     return {"task_number": task}
 
 
+# Extracción con anclas --------------------------------------------------
+#
+# Cada expresión de campo empieza con un literal fijo ("Estimados", "FAC",
+# "OC", ...). Con ``re.I`` el motor de ``re`` no puede saltar hasta ese
+# literal y prueba posición por posición, una vez por expresión. En su lugar
+# se pasa el cuerpo a minúsculas una sola vez (esa copia sirve también para
+# buscar el correo del usuario), se ubican los literales con ``str.find`` y la
+# expresión completa del campo solo se prueba (``match``) en esas posiciones.
+# El resultado es el mismo que buscar cada expresión sobre todo el cuerpo.
+
+_ANCLAS = {
+    "proveedor": ("estimados", RX_PROVEEDOR),
+    "mecanico": ("coordinando", RX_MECANICO),
+    "factura": ("fac", RX_FACTURA),
+    "oc": ("oc", RX_OC),
+    "ingreso": ("ingr", RX_INGRESO),
+    "ruc": ("ruc", RX_RUC),
+    "fecha_orden": ("fecha", RX_FECHA_ORDEN),
+}
+# RX_USERMAIL coincide si y solo si alguna "@" tiene este contexto.
+_RX_ARROBA = re.compile(r"(?<=[A-Z0-9._%+-])@[A-Z0-9.-]+\.[A-Z]{2,}", re.I)
+# Con estos caracteres ``re.I`` y ``str.lower`` no coinciden en las posiciones
+# (İ pasa a dos caracteres; ı y ſ solo equivalen a "i" y "s" con re.I); en
+# esos cuerpos (raros) cada expresión se busca sobre el texto completo.
+_ESPECIALES = ("\u0130", "\u0131", "\u017f")
+
+
+def _anclar(body: str, bajo: str, literal: str, rx: re.Pattern) -> re.Match | None:
+    """Primera coincidencia de ``rx`` probando solo donde aparece ``literal``."""
+    pos = bajo.find(literal)
+    while pos != -1:
+        m = rx.match(body, pos)
+        if m:
+            return m
+        pos = bajo.find(literal, pos + 1)
+    return None
+
+
+def _buscar_ot(body: str, bajo: str) -> re.Match | None:
+    """Primera coincidencia de RX_OT_LINE.
+
+    Toda coincidencia contiene un "OT" seguido de algo distinto de salto de
+    línea o comillas, y empieza en el inicio de esa línea o, si hay corchetes
+    antes (``[GTI-1566] OT ...``), en uno anterior desde el que solo hay
+    espacios hasta el primer "[". Buscar desde el menor de esos inicios da el
+    mismo grupo que buscar desde el principio del cuerpo.
+    """
+    pos = bajo.find("ot")
+    while pos != -1 and bajo[pos + 2:pos + 3] in ("", "\n", '"'):
+        pos = bajo.find("ot", pos + 1)
+    if pos == -1:
+        return None
+    corchete = body.find("[", 0, pos)
+    desde = corchete if corchete != -1 else pos
+    return RX_OT_LINE.search(body, body.rfind("\n", 0, desde) + 1)
+
+
+def _hay_usermail(body: str) -> bool:
+    pos = body.find("@")
+    while pos != -1:
+        if _RX_ARROBA.match(body, pos):
+            return True
+        pos = body.find("@", pos + 1)
+    return False
+
+
 def parse_body(body_text: str | None, correo_usuario: str) -> dict[str, object]:
     body = _norm(body_text)
+    bajo = body.lower()
+    if any(ch in body for ch in _ESPECIALES):
+        campos = {campo: rx.search(body) for campo, (_literal, rx) in _ANCLAS.items()}
+        ot = RX_OT_LINE.search(body)
+        buscar_usermail = RX_USERMAIL.search
+    else:
+        campos = {
+            campo: _anclar(body, bajo, literal, rx)
+            for campo, (literal, rx) in _ANCLAS.items()
+        }
+        ot = _buscar_ot(body, bajo)
+        buscar_usermail = _hay_usermail
+
     proveedor = "N/D"
-    proveedor_match = RX_PROVEEDOR.search(body)
-    if proveedor_match:
-        proveedor = next((g for g in proveedor_match.groups() if g), "N/D").strip()
+    m = campos["proveedor"]
+    if m:
+        proveedor = next((g for g in m.groups() if g), "N/D").strip()
 
     mecanico_nombre = "N/D"
     mecanico_telefono = "N/D"
-    mecanico_match = RX_MECANICO.search(body)
-    if mecanico_match:
-        mecanico_nombre = mecanico_match.group(1).strip() or "N/D"
-        mecanico_telefono = _digits_only(mecanico_match.group(2)) or "N/D"
+    m = campos["mecanico"]
+    if m:
+        mecanico_nombre = m.group(1).strip() or "N/D"
+        mecanico_telefono = _digits_only(m.group(2)) or "N/D"
 
     inf_vehiculo = "N/D"
-    ot_match = RX_OT_LINE.search(body)
-    if ot_match:
-        inf_vehiculo = ot_match.group(1).strip().strip('"')
+    if ot:
+        inf_vehiculo = ot.group(1).strip().strip('"')
 
-    correo_usuario_encontrado = False
     if correo_usuario:
-        correo_usuario_encontrado = correo_usuario.lower() in body.lower()
+        correo_usuario_encontrado = correo_usuario.lower() in bajo
     else:
-        correo_usuario_encontrado = bool(RX_USERMAIL.search(body))
+        correo_usuario_encontrado = bool(buscar_usermail(body))
 
-    factura = ""
-    m = RX_FACTURA.search(body)
-    if m:
-        factura = m.group(1).strip()
-
-    oc = ""
-    m = RX_OC.search(body)
-    if m:
-        oc = m.group(1).strip()
-
-    ingreso = ""
-    m = RX_INGRESO.search(body)
-    if m:
-        ingreso = m.group(1).strip()
-
-    ruc = ""
-    m = RX_RUC.search(body)
-    if m:
-        ruc = m.group(1).strip()
-
-    fecha_orden = ""
-    m = RX_FECHA_ORDEN.search(body)
-    if m:
-        fecha_orden = m.group(1).strip()
+    def _grupo(campo: str) -> str:
+        m = campos[campo]
+        return m.group(1).strip() if m else ""
 
     return {
         "proveedor": proveedor or "N/D",
@@ -115,17 +181,33 @@ def parse_body(body_text: str | None, correo_usuario: str) -> dict[str, object]:
         "mecanico_telefono": mecanico_telefono or "N/D",
         "inf_vehiculo": inf_vehiculo or "N/D",
         "correo_usuario_encontrado": correo_usuario_encontrado,
-        "factura": factura,
-        "oc": oc,
-        "ingreso": ingreso,
-        "ruc": ruc,
-        "fecha_orden": fecha_orden,
+        "factura": _grupo("factura"),
+        "oc": _grupo("oc"),
+        "ingreso": _grupo("ingreso"),
+        "ruc": _grupo("ruc"),
+        "fecha_orden": _grupo("fecha_orden"),
     }
 
 
+def parse_reassignments(body: str | None) -> list[dict]:
+    """Tareas de un correo de reasignación con el detalle de sus OCs."""
+    return [
+        {
+            "task_number": task_number,
+            "reasignacion": reasignacion,
+            "details": [
+                {"OC": oc, "Proveedor": proveedor, "Factura": factura, "Ingreso": ingreso}
+                for oc, proveedor, factura, ingreso in RX_REASIGNACION_DETALLE.findall(detalles)
+            ],
+        }
+        for task_number, reasignacion, detalles in RX_REASIGNACION.findall(body or "")
+    ]
+
+
 __all__ = [
     "parse_subject",
     "parse_body",
+    "parse_reassignments",
     "RX_TAREA_SUBJECT",
     "RX_PROVEEDOR",
     "RX_MECANICO",
@@ -136,4 +218,6 @@ __all__ = [
     "RX_INGRESO",
     "RX_RUC",
     "RX_FECHA_ORDEN",
+    "RX_REASIGNACION",
+    "RX_REASIGNACION_DETALLE",
 ]
@@ -0,0 +1,140 @@
+"""Datos de una OC leídos de su PDF en una sola pasada.
+
+``organizador_bienes`` (tarea y proveedor) y ``logic.despacho_logic`` (RUC
+y tarea) recorrían el texto del PDF cada uno con sus propios patrones.
+:func:`desde_pdf` toma el texto de ``core.pdf_text`` (un solo acceso al
+archivo), busca todos los campos pedidos en el mismo recorrido de páginas
+y se detiene en cuanto los tiene todos.
+
+Tarea: cada llamador elige su regla. Por omisión (:data:`TAREA_NAF`, la
+de ``organizador_bienes``) solo vale la observación NAF (``#1234567//``);
+con :data:`TAREA_NAF_O_TEXTO` (la de ``despacho_logic``) en cada página se
+prueba primero esa forma y luego ``Tarea 1234567``. Para los demás campos
+vale la primera coincidencia en orden de páginas.
+"""
+from __future__ import annotations
+
+import os
+import re
+from typing import Iterable
+
+from gestorcompras.core import pdf_text
+
+CAMPOS = ("numero", "tarea", "proveedor", "ruc", "fecha_orden", "fecha_aut")
+
+TAREA_NAF: tuple[re.Pattern, ...] = (re.compile(r"#\s*([0-9]{6,11})\s*//"),)
+TAREA_NAF_O_TEXTO: tuple[re.Pattern, ...] = TAREA_NAF + (
+    re.compile(r"Tarea\s+(\d+)", re.IGNORECASE),
+)
+
+_PATRONES: dict[str, tuple[re.Pattern, ...]] = {
+    "numero": (re.compile(r"ORDEN\s+DE\s+COMPRA[^\d\n]{0,20}?(\d{6,})", re.IGNORECASE),),
+    "tarea": TAREA_NAF,
+    "proveedor": (re.compile(r"(?:Proveedor|Nombre)\s*[:\-]?\s*(.+)", re.IGNORECASE),),
+    "ruc": (re.compile(r"\b(\d{13})\b"),),
+    "fecha_orden": (
+        re.compile(r"Fecha\s+(?:de\s+)?Orden[:\s]*([0-9]{2}/[0-9]{2}/[0-9]{4})", re.IGNORECASE),
+    ),
+    "fecha_aut": (
+        re.compile(
+            r"Fecha\s+(?:de\s+)?Autorizaci[oó]n[:\s]*([0-9]{2}/[0-9]{2}/[0-9]{4})", re.IGNORECASE
+        ),
+    ),
+}
+_RX_PREFIJO_NOMBRE = re.compile(r"(?i)^nombre\s*[:\-]?\s*")
+
+
+class OCDocumentInfo:
+    """Campos encontrados en el PDF de una OC (``None`` si no aparecen)."""
+
+    __slots__ = CAMPOS
+
+    numero: str | None
+    tarea: str | None
+    proveedor: str | None
+    ruc: str | None
+    fecha_orden: str | None
+    fecha_aut: str | None
+
+    def __init__(self, numero=None, tarea=None, proveedor=None, ruc=None,
+                 fecha_orden=None, fecha_aut=None):
+        self.numero = numero
+        self.tarea = tarea
+        self.proveedor = proveedor
+        self.ruc = ruc
+        self.fecha_orden = fecha_orden
+        self.fecha_aut = fecha_aut
+
+    def __eq__(self, otro) -> bool:
+        if not isinstance(otro, OCDocumentInfo):
+            return NotImplemented
+        return all(getattr(self, c) == getattr(otro, c) for c in CAMPOS)
+
+    def __repr__(self) -> str:
+        campos = ", ".join(f"{c}={getattr(self, c)!r}" for c in CAMPOS)
+        return f"OCDocumentInfo({campos})"
+
+
+def _limpiar_proveedor(valor: str) -> str:
+    valor = valor.strip().split("\n")[0]
+    return _RX_PREFIJO_NOMBRE.sub("", valor).strip()
+
+
+def desde_texto(
+    paginas: Iterable[str],
+    campos: Iterable[str] = CAMPOS,
+    tarea: tuple[re.Pattern, ...] = TAREA_NAF,
+) -> OCDocumentInfo:
+    """Busca ``campos`` en ``paginas`` y deja de leer al encontrarlos todos.
+
+    ``paginas`` puede ser un generador: las páginas posteriores a la que
+    completa los campos no se consumen. ``tarea`` son los patrones de la
+    tarea, en orden de preferencia dentro de cada página.
+    """
+    pendientes = list(dict.fromkeys(campos))
+    desconocidos = set(pendientes) - set(CAMPOS)
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos: {', '.join(sorted(desconocidos))}")
+    info = OCDocumentInfo()
+    if not pendientes:
+        return info
+    patrones = {**_PATRONES, "tarea": tarea}
+    for texto in paginas:
+        if not texto:
+            continue
+        for campo in list(pendientes):
+            for patron in patrones[campo]:
+                m = patron.search(texto)
+                if m:
+                    valor = m.group(1)
+                    if campo == "proveedor":
+                        valor = _limpiar_proveedor(valor)
+                    setattr(info, campo, valor)
+                    pendientes.remove(campo)
+                    break
+        if not pendientes:
+            break
+    return info
+
+
+def desde_pdf(
+    ruta: str | os.PathLike,
+    campos: Iterable[str] = CAMPOS,
+    motor: str = "pypdf",
+    tarea: tuple[re.Pattern, ...] = TAREA_NAF,
+) -> OCDocumentInfo:
+    """Campos de la OC en ``ruta`` (texto desde la caché de ``pdf_text``).
+
+    Propaga la excepción si el archivo no existe o no es un PDF legible.
+    """
+    return desde_texto(pdf_text.paginas(ruta, motor), campos, tarea)
+
+
+__all__ = [
+    "CAMPOS",
+    "OCDocumentInfo",
+    "TAREA_NAF",
+    "TAREA_NAF_O_TEXTO",
+    "desde_pdf",
+    "desde_texto",
+]
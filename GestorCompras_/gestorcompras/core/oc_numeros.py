@@ -0,0 +1,68 @@
+"""Búsqueda de varios números de OC a la vez en nombres de archivo o texto.
+
+``mover_pdf.mover_oc``, ``pdf_info`` y ``logic.despacho_logic`` comparaban
+cada archivo con cada número (una expresión regular o un ``in`` por par).
+:class:`BuscadorNumerosOC` se arma una vez por lote y encuentra todos los
+números en una sola pasada: recorre las secuencias de dígitos del texto y
+las busca en un diccionario, así que el costo depende del largo del texto y
+no de cuántas órdenes haya.
+
+Un número solo coincide si no está pegado a otros dígitos: ``1234567`` no
+aparece dentro de ``12345678`` ni dentro de un RUC.
+"""
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+_RX_DIGITOS = re.compile(r"[0-9]+")
+
+
+class BuscadorNumerosOC:
+    """Números de un lote, listos para buscarse juntos."""
+
+    __slots__ = ("_numeros", "_indice", "_otros")
+
+    def __init__(self, numeros: Iterable[str | None]):
+        self._numeros: list[str] = []
+        self._indice: dict[str, int] = {}
+        otros: list[str] = []
+        for numero in numeros:
+            if not numero:
+                continue
+            numero = str(numero)
+            if numero in self._indice:
+                continue
+            self._indice[numero] = len(self._numeros)
+            self._numeros.append(numero)
+            if not _RX_DIGITOS.fullmatch(numero):
+                otros.append(numero)
+        # Los valores que no son solo dígitos (raros) van en una alternancia.
+        self._otros = None
+        if otros:
+            alternativas = "|".join(re.escape(o) for o in sorted(otros, key=len, reverse=True))
+            self._otros = re.compile(rf"(?<![0-9])(?:{alternativas})(?![0-9])")
+
+    def __len__(self) -> int:
+        return len(self._numeros)
+
+    def encontrar(self, texto: str | None) -> list[str]:
+        """Números presentes en ``texto``, en el orden en que se dieron al crear el buscador."""
+        if not texto or not self._numeros:
+            return []
+        encontrados: set[int] = set()
+        for m in _RX_DIGITOS.finditer(texto):
+            posicion = self._indice.get(m.group())
+            if posicion is not None:
+                encontrados.add(posicion)
+        if self._otros is not None:
+            encontrados.update(self._indice[m.group()] for m in self._otros.finditer(texto))
+        return [self._numeros[i] for i in sorted(encontrados)]
+
+    def primero(self, texto: str | None) -> str | None:
+        """El primer número (según el orden del lote) presente en ``texto``."""
+        encontrados = self.encontrar(texto)
+        return encontrados[0] if encontrados else None
+
+
+__all__ = ["BuscadorNumerosOC"]
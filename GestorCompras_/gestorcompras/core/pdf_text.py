@@ -0,0 +1,185 @@
+"""Caché persistente del texto de los PDF de OC, por página.
+
+Un mismo PDF se extraía completo varias veces en una corrida: búsqueda del
+número en ``mover_pdf``, proveedor y tarea en ``organizador_bienes`` (que
+usan ``pdf_info`` y ``reporter``) y, al despachar, RUC y tarea en
+``logic.despacho_logic``. :func:`paginas` extrae el texto una sola vez por
+versión del archivo y lo guarda en SQLite con clave (ruta absoluta, tamaño,
+``mtime_ns``, motor): si el archivo cambia, la entrada se reemplaza. Al
+superar ``MAX_ARCHIVOS`` se descartan los PDF usados hace más tiempo.
+
+Motores: ``"pypdf"`` (pypdf o, si no está instalado, PyPDF2; el de
+DescargasOC) y ``"pdfplumber"`` (el de despacho). El texto de uno no se
+reutiliza para el otro porque el orden y los espacios difieren.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv("PDF_TEXT_CACHE") or str(
+    Path(__file__).resolve().parents[1] / "services" / "data" / "pdf_text.sqlite3"
+)
+MAX_ARCHIVOS = 5_000
+
+
+def _texto_pagina(pagina) -> str:
+    try:
+        return pagina.extract_text() or ""
+    except Exception:
+        return ""
+
+
+def _extraer_pypdf(ruta: str) -> list[str]:
+    try:
+        from pypdf import PdfReader  # type: ignore
+    except ImportError:
+        try:
+            from PyPDF2 import PdfReader  # type: ignore
+        except ImportError as exc:  # pragma: no cover
+            raise ImportError(
+                "Falta 'pypdf' o 'PyPDF2'. Instálalo con: py -m pip install --user pypdf"
+            ) from exc
+    reader = PdfReader(ruta)
+    return [_texto_pagina(pagina) for pagina in getattr(reader, "pages", [])]
+
+
+def _extraer_pdfplumber(ruta: str) -> list[str]:
+    import pdfplumber
+
+    with pdfplumber.open(ruta) as pdf:
+        return [_texto_pagina(pagina) for pagina in pdf.pages]
+
+
+EXTRACTORES: dict[str, Callable[[str], list[str]]] = {
+    "pypdf": _extraer_pypdf,
+    "pdfplumber": _extraer_pdfplumber,
+}
+
+
+class PdfTextCache:
+    """Texto por página de los PDF ya leídos, guardado en ``path``."""
+
+    def __init__(self, path: str | Path, max_archivos: int = MAX_ARCHIVOS):
+        self.path = Path(path)
+        self.max_archivos = max_archivos
+        self._creada = False
+
+    @contextmanager
+    def _conectar(self) -> Iterator[sqlite3.Connection]:
+        """Conexión que confirma la transacción al salir y siempre se cierra."""
+        if not self._creada:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                if not self._creada:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS pdf_texto ("
+                        " ruta TEXT NOT NULL,"
+                        " motor TEXT NOT NULL,"
+                        " tamano INTEGER NOT NULL,"
+                        " mtime_ns INTEGER NOT NULL,"
+                        " paginas TEXT NOT NULL,"
+                        " usado REAL NOT NULL,"
+                        " PRIMARY KEY (ruta, motor)"
+                        ") WITHOUT ROWID"
+                    )
+                    conn.execute(
+                        "CREATE INDEX IF NOT EXISTS pdf_texto_usado ON pdf_texto (usado)"
+                    )
+                    self._creada = True
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, ruta: str, tamano: int, mtime_ns: int, motor: str) -> list[str] | None:
+        with self._conectar() as conn:
+            fila = conn.execute(
+                "SELECT paginas FROM pdf_texto"
+                " WHERE ruta=? AND motor=? AND tamano=? AND mtime_ns=?",
+                (ruta, motor, tamano, mtime_ns),
+            ).fetchone()
+            if fila is None:
+                return None
+            conn.execute(
+                "UPDATE pdf_texto SET usado=? WHERE ruta=? AND motor=?",
+                (time.time(), ruta, motor),
+            )
+        return json.loads(fila[0])
+
+    def put(self, ruta: str, tamano: int, mtime_ns: int, motor: str, paginas: list[str]) -> None:
+        with self._conectar() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pdf_texto"
+                " (ruta, motor, tamano, mtime_ns, paginas, usado) VALUES (?, ?, ?, ?, ?, ?)",
+                (ruta, motor, tamano, mtime_ns, json.dumps(paginas, ensure_ascii=False), time.time()),
+            )
+            (total,) = conn.execute("SELECT COUNT(*) FROM pdf_texto").fetchone()
+            if total > self.max_archivos:
+                conn.execute(
+                    "DELETE FROM pdf_texto WHERE (ruta, motor) IN ("
+                    " SELECT ruta, motor FROM pdf_texto ORDER BY usado LIMIT ?)",
+                    (total - self.max_archivos,),
+                )
+
+    def clear(self) -> None:
+        with self._conectar() as conn:
+            conn.execute("DELETE FROM pdf_texto")
+
+    def __len__(self) -> int:
+        with self._conectar() as conn:
+            return conn.execute("SELECT COUNT(*) FROM pdf_texto").fetchone()[0]
+
+
+_cache: PdfTextCache | None = None
+_cache_lock = threading.Lock()
+
+
+def cache() -> PdfTextCache:
+    """Caché compartida en ``CACHE_PATH`` (se crea al primer uso)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None or _cache.path != Path(CACHE_PATH):
+            _cache = PdfTextCache(CACHE_PATH)
+        return _cache
+
+
+def paginas(ruta: str | os.PathLike, motor: str = "pypdf") -> list[str]:
+    """Texto de cada página de ``ruta`` extraído con ``motor``.
+
+    Las páginas que no se pueden leer quedan como ``""``. Si el archivo no
+    existe o no se puede abrir como PDF se propaga la excepción (y no se
+    guarda nada). Si la caché falla, el texto se extrae igual.
+    """
+    extraer = EXTRACTORES[motor]
+    ruta_abs = os.path.abspath(ruta)
+    estado = os.stat(ruta_abs)
+    clave = (ruta_abs, estado.st_size, estado.st_mtime_ns, motor)
+    almacen = cache()
+    try:
+        guardado = almacen.get(*clave)
+    except (sqlite3.Error, OSError) as exc:
+        logger.warning("Caché de texto PDF no disponible (%s): %s", almacen.path, exc)
+        return extraer(ruta_abs)
+    if guardado is not None:
+        return guardado
+    resultado = extraer(ruta_abs)
+    try:
+        almacen.put(*clave, resultado)
+    except (sqlite3.Error, OSError) as exc:
+        logger.warning("No se pudo guardar el texto de %s en caché: %s", ruta_abs, exc)
+    return resultado
+
+
+__all__ = ["CACHE_PATH", "EXTRACTORES", "MAX_ARCHIVOS", "PdfTextCache", "cache", "paginas"]
@@ -0,0 +1,364 @@
+"""Persistencia del espejo local del buzón IMAP.
+
+Cada fila guarda, por cuenta y buzón, un mensaje identificado por UID (y su
+``Message-ID`` si lo tiene): columnas indexadas para filtrar (fecha,
+remitente, número de tarea, asunto normalizado) y los datos extraídos como
+JSON. Al sincronizar solo se guardan los encabezados; los datos del cuerpo,
+el ``raw_hash`` y el mensaje crudo comprimido con ``zlib`` se agregan cuando
+una búsqueda encuentra el mensaje (:func:`save_bodies`).
+
+Las fechas se guardan en UTC como ``AAAA-MM-DD HH:MM:SS`` para que la
+comparación de texto de SQLite respete el orden cronológico.
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from gestorcompras.services import db
+
+_ESTADO = "correo_espejo_estado"
+_MENSAJES = "correo_espejo"
+
+_FMT_FECHA = "%Y-%m-%d %H:%M:%S"
+
+
+def fecha_db(valor: datetime) -> str:
+    """Convierte un ``datetime`` con zona horaria al formato guardado (UTC)."""
+    return valor.astimezone(timezone.utc).strftime(_FMT_FECHA)
+
+
+def _fecha_py(valor: str) -> datetime:
+    return datetime.strptime(valor, _FMT_FECHA).replace(tzinfo=timezone.utc)
+
+
+def _like(texto: str) -> str:
+    escapado = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escapado}%"
+
+
+def get_state(cuenta: str, mailbox: str) -> Dict[str, Any] | None:
+    """Retorna ``uidvalidity``, ``last_uid`` y ``cubierto_desde`` del espejo."""
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT uidvalidity, last_uid, cubierto_desde FROM {_ESTADO} "
+            f"WHERE cuenta=? AND mailbox=?",
+            (cuenta, mailbox),
+        )
+        row = cur.fetchone()
+        if not row:
+            return None
+        return {
+            "uidvalidity": int(row[0]),
+            "last_uid": int(row[1]),
+            "cubierto_desde": date.fromisoformat(row[2]) if row[2] else None,
+        }
+    finally:
+        conn.close()
+
+
+def save_state(
+    cuenta: str, mailbox: str, uidvalidity: int, last_uid: int, cubierto_desde: date | None
+) -> None:
+    conn = db.get_connection()
+    try:
+        conn.execute(
+            f"INSERT OR REPLACE INTO {_ESTADO} "
+            f"(cuenta, mailbox, uidvalidity, last_uid, cubierto_desde, updated_at) "
+            f"VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+            (cuenta, mailbox, uidvalidity, last_uid,
+             cubierto_desde.isoformat() if cubierto_desde else None),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def reset(cuenta: str, mailbox: str) -> int:
+    """Vacía el espejo de la cuenta/buzón (p. ej. al cambiar UIDVALIDITY)."""
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(f"DELETE FROM {_MENSAJES} WHERE cuenta=? AND mailbox=?", (cuenta, mailbox))
+        borrados = cur.rowcount
+        cur.execute(f"DELETE FROM {_ESTADO} WHERE cuenta=? AND mailbox=?", (cuenta, mailbox))
+        conn.commit()
+        return borrados
+    finally:
+        conn.close()
+
+
+def known_uids(cuenta: str, mailbox: str) -> set[int]:
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(f"SELECT uid FROM {_MENSAJES} WHERE cuenta=? AND mailbox=?", (cuenta, mailbox))
+        return {int(row[0]) for row in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def save_headers(cuenta: str, mailbox: str, mensajes: Iterable[Dict[str, Any]]) -> int:
+    """Guarda en una transacción los encabezados de mensajes aún no sincronizados.
+
+    Cada elemento trae ``uid``, ``message_id``, ``fecha`` (``datetime`` o
+    ``None``), ``remitente_email``, ``asunto_norm`` y ``datos`` (dict con los
+    campos de los encabezados). Los UIDs ya guardados se dejan como están.
+    """
+    filas = []
+    for item in mensajes:
+        datos = dict(item["datos"])
+        datos.pop("fecha", None)
+        datos_json = json.dumps(datos, default=str, ensure_ascii=False)
+        fecha = item.get("fecha")
+        filas.append((
+            cuenta, mailbox, int(item["uid"]), item.get("message_id") or None,
+            fecha_db(fecha) if fecha else None,
+            (datos.get("from") or "").lower(), item.get("remitente_email") or None,
+            item.get("asunto_norm") or "", datos.get("task_number"),
+            datos_json, len(datos_json),
+        ))
+    if not filas:
+        return 0
+    conn = db.get_connection()
+    try:
+        cur = conn.executemany(
+            f"INSERT OR IGNORE INTO {_MENSAJES} "
+            f"(cuenta, mailbox, uid, message_id, fecha, remitente, remitente_email, "
+            f"asunto_norm, task_number, datos_json, tamano) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            filas,
+        )
+        conn.commit()
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def save_bodies(
+    cuenta: str, mailbox: str, mensajes: Iterable[Tuple[int, bytes, Dict[str, Any]]]
+) -> None:
+    """Completa filas ya sincronizadas con ``(uid, raw, datos)`` del mensaje entero.
+
+    ``datos`` reemplaza a los datos de los encabezados y debe traer
+    ``raw_hash``. Si otra fila del mismo buzón tiene el mismo ``raw_hash``
+    (el mismo mensaje con otro UID), esa otra fila se elimina.
+    """
+    filas = []
+    for uid, raw, datos in mensajes:
+        datos = dict(datos)
+        datos.pop("fecha", None)
+        datos_json = json.dumps(datos, default=str, ensure_ascii=False)
+        raw_zlib = zlib.compress(raw, 6)
+        filas.append((
+            datos["raw_hash"], datos_json, raw_zlib, len(raw_zlib) + len(datos_json),
+            cuenta, mailbox, int(uid),
+        ))
+    if not filas:
+        return
+    conn = db.get_connection()
+    try:
+        conn.executemany(
+            f"UPDATE OR REPLACE {_MENSAJES} SET raw_hash=?, datos_json=?, raw_zlib=?, tamano=? "
+            f"WHERE cuenta=? AND mailbox=? AND uid=?",
+            filas,
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def delete(cuenta: str, mailbox: str, uids: Iterable[int]) -> None:
+    """Elimina mensajes que ya no están en el servidor."""
+    conn = db.get_connection()
+    try:
+        conn.executemany(
+            f"DELETE FROM {_MENSAJES} WHERE cuenta=? AND mailbox=? AND uid=?",
+            [(cuenta, mailbox, int(uid)) for uid in uids],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def iter_search(
+    cuenta: str,
+    mailbox: str,
+    desde: datetime,
+    hasta: datetime,
+    *,
+    task_numbers: Iterable[str] | None = None,
+    remitente_email: str = "",
+    remitente_contiene: str = "",
+    asunto_norm: str = "",
+    lote: int = 200,
+) -> Iterator[Tuple[int, datetime, Dict[str, Any]]]:
+    """Consulta local; produce ``(uid, fecha_utc, datos)`` del más nuevo al más antiguo.
+
+    ``datos`` no trae ``body`` si del mensaje solo se guardaron encabezados.
+
+    ``remitente_email`` compara por igualdad con la dirección del remitente
+    (usa el índice); ``remitente_contiene`` y ``asunto_norm`` buscan
+    subcadenas en el encabezado ``From`` y en el asunto normalizado. Las
+    filas se leen de a ``lote`` para no cargar todo el resultado a la vez.
+    """
+    sql = (
+        f"SELECT uid, fecha, datos_json FROM {_MENSAJES} "
+        f"WHERE cuenta=? AND mailbox=? AND fecha >= ? AND fecha <= ?"
+    )
+    params: list[Any] = [cuenta, mailbox, fecha_db(desde), fecha_db(hasta)]
+    tareas = list(dict.fromkeys(task_numbers or ()))
+    if tareas:
+        sql += f" AND task_number IN ({','.join('?' for _ in tareas)})"
+        params.extend(tareas)
+    if remitente_email:
+        sql += " AND remitente_email = ?"
+        params.append(remitente_email.lower())
+    if remitente_contiene:
+        sql += " AND remitente LIKE ? ESCAPE '\\'"
+        params.append(_like(remitente_contiene.lower()))
+    if asunto_norm:
+        sql += " AND asunto_norm LIKE ? ESCAPE '\\'"
+        params.append(_like(asunto_norm))
+    sql += " ORDER BY fecha DESC, uid DESC"
+
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        while True:
+            filas = cur.fetchmany(lote)
+            if not filas:
+                return
+            for uid, fecha, datos_json in filas:
+                yield int(uid), _fecha_py(fecha), json.loads(datos_json)
+    finally:
+        conn.close()
+
+
+def search(
+    cuenta: str,
+    mailbox: str,
+    desde: datetime,
+    hasta: datetime,
+    **filtros: Any,
+) -> List[Tuple[int, datetime, Dict[str, Any]]]:
+    """Como :func:`iter_search`, pero retorna la lista completa."""
+    return list(iter_search(cuenta, mailbox, desde, hasta, **filtros))
+
+
+def get_body(cuenta: str, mailbox: str, uid: int) -> str | None:
+    """Texto del cuerpo ya extraído de un mensaje, sin descomprimir el crudo."""
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT json_extract(datos_json, '$.body') FROM {_MENSAJES} "
+            f"WHERE cuenta=? AND mailbox=? AND uid=?",
+            (cuenta, mailbox, int(uid)),
+        )
+        row = cur.fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+def get_raw(cuenta: str, *, raw_hash: str = "", message_id: str = "") -> bytes | None:
+    """Mensaje crudo descomprimido, buscado por ``raw_hash`` o ``Message-ID``."""
+    if raw_hash:
+        sql, clave = f"SELECT raw_zlib FROM {_MENSAJES} WHERE cuenta=? AND raw_hash=?", raw_hash
+    elif message_id:
+        sql, clave = f"SELECT raw_zlib FROM {_MENSAJES} WHERE cuenta=? AND message_id=?", message_id
+    else:
+        raise ValueError("Se requiere raw_hash o message_id")
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(sql + " LIMIT 1", (cuenta, clave))
+        row = cur.fetchone()
+        return zlib.decompress(row[0]) if row and row[0] is not None else None
+    finally:
+        conn.close()
+
+
+def total_size(cuenta: str, mailbox: str) -> Tuple[int, int]:
+    """Retorna ``(mensajes, bytes)`` guardados para la cuenta/buzón."""
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM {_MENSAJES} "
+            f"WHERE cuenta=? AND mailbox=?",
+            (cuenta, mailbox),
+        )
+        cantidad, total = cur.fetchone()
+        return int(cantidad), int(total)
+    finally:
+        conn.close()
+
+
+def evict(
+    cuenta: str, mailbox: str, antes_de: datetime, max_bytes: int
+) -> Tuple[int, datetime | None]:
+    """Elimina mensajes anteriores a ``antes_de`` y luego los más antiguos
+    hasta que el espejo ocupe como máximo ``max_bytes``.
+
+    Retorna ``(borrados, fecha_del_mas_nuevo_borrado_por_tamano)``.
+    """
+    conn = db.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            f"DELETE FROM {_MENSAJES} WHERE cuenta=? AND mailbox=? AND "
+            f"(fecha < ? OR (fecha IS NULL AND created_at < ?))",
+            (cuenta, mailbox, fecha_db(antes_de), fecha_db(antes_de)),
+        )
+        borrados = cur.rowcount
+        cur.execute(
+            f"SELECT COALESCE(SUM(tamano), 0) FROM {_MENSAJES} WHERE cuenta=? AND mailbox=?",
+            (cuenta, mailbox),
+        )
+        exceso = int(cur.fetchone()[0]) - max_bytes
+        corte: datetime | None = None
+        if exceso > 0:
+            cur.execute(
+                f"SELECT id, tamano, fecha FROM {_MENSAJES} WHERE cuenta=? AND mailbox=? "
+                f"ORDER BY fecha ASC, uid ASC",
+                (cuenta, mailbox),
+            )
+            ids: list[int] = []
+            for id_, tamano, fecha in cur.fetchall():
+                if exceso <= 0:
+                    break
+                ids.append(id_)
+                exceso -= int(tamano)
+                if fecha:
+                    corte = _fecha_py(fecha)
+            cur.executemany(f"DELETE FROM {_MENSAJES} WHERE id=?", [(i,) for i in ids])
+            borrados += len(ids)
+        conn.commit()
+        return borrados, corte
+    finally:
+        conn.close()
+
+
+__all__ = [
+    "fecha_db",
+    "get_state",
+    "save_state",
+    "reset",
+    "known_uids",
+    "save_headers",
+    "save_bodies",
+    "delete",
+    "iter_search",
+    "search",
+    "get_body",
+    "get_raw",
+    "total_size",
+    "evict",
+]
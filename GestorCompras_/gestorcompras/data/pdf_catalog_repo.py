@@ -0,0 +1,153 @@
+"""Persistencia del catálogo de PDF de OC (ver ``services.pdf_catalog``).
+
+Tres tablas: ``catalogo_pdf_carpetas`` (cada carpeta bajo la base, con su
+padre y su ``mtime_ns`` al listarla), ``catalogo_pdf`` (cada PDF con su
+carpeta y ``ctime``) y ``catalogo_pdf_numeros`` (secuencias de dígitos del
+nombre del PDF, para buscar por número de OC con el índice). Al borrar una
+carpeta se borran en cascada sus subcarpetas, sus PDF y sus números.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from gestorcompras.services import db
+
+# Límite de parámetros por consulta ``IN (...)`` (SQLite admite 999 en versiones viejas).
+_LOTE = 500
+
+
+def carpetas(base: str) -> Dict[str, Tuple[str | None, int]]:
+    """``{ruta: (padre, mtime_ns)}`` de las carpetas catalogadas bajo ``base``."""
+    conn = db.get_connection()
+    try:
+        cur = conn.execute(
+            "SELECT ruta, padre, mtime_ns FROM catalogo_pdf_carpetas WHERE base=?", (base,)
+        )
+        return {ruta: (padre, int(mtime)) for ruta, padre, mtime in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def mtimes(rutas: Iterable[str]) -> Dict[str, int]:
+    """``{ruta: mtime_ns}`` guardado de las carpetas ``rutas`` que estén catalogadas."""
+    rutas = sorted(set(rutas))
+    resultado: Dict[str, int] = {}
+    conn = db.get_connection()
+    try:
+        for i in range(0, len(rutas), _LOTE):
+            lote = rutas[i:i + _LOTE]
+            marcas = ",".join("?" * len(lote))
+            cur = conn.execute(
+                f"SELECT ruta, mtime_ns FROM catalogo_pdf_carpetas WHERE ruta IN ({marcas})", lote
+            )
+            resultado.update((ruta, int(mtime)) for ruta, mtime in cur.fetchall())
+        return resultado
+    finally:
+        conn.close()
+
+
+def archivos_en(carpeta: str) -> set[str]:
+    """Rutas de los PDF catalogados directamente en ``carpeta``."""
+    conn = db.get_connection()
+    try:
+        cur = conn.execute("SELECT ruta FROM catalogo_pdf WHERE carpeta=?", (carpeta,))
+        return {row[0] for row in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def aplicar(
+    base: str,
+    carpetas_vistas: Sequence[Tuple[str, str | None, int]],
+    nuevos: Iterable[Tuple[str, str, float, Iterable[str]]],
+    borrados: Iterable[str],
+    carpetas_borradas: Iterable[str],
+) -> None:
+    """Guarda el resultado de un refresco en una transacción.
+
+    ``carpetas_vistas`` son ``(ruta, padre, mtime_ns)`` de las carpetas
+    listadas, padres antes que hijas; ``nuevos`` son ``(ruta, carpeta, ctime,
+    numeros)``.
+    """
+    conn = db.get_connection()
+    try:
+        # Sin ``INSERT OR REPLACE``: reemplazar la fila borraría en cascada
+        # el contenido ya catalogado de la carpeta.
+        conn.executemany(
+            "INSERT INTO catalogo_pdf_carpetas (ruta, base, padre, mtime_ns) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(ruta) DO UPDATE SET base=excluded.base, padre=excluded.padre, "
+            "mtime_ns=excluded.mtime_ns",
+            [(ruta, base, padre, mtime) for ruta, padre, mtime in carpetas_vistas],
+        )
+        conn.executemany("DELETE FROM catalogo_pdf WHERE ruta=?", [(r,) for r in borrados])
+        for ruta, carpeta, ctime, numeros in nuevos:
+            conn.execute(
+                "INSERT OR REPLACE INTO catalogo_pdf (ruta, carpeta, ctime) VALUES (?, ?, ?)",
+                (ruta, carpeta, ctime),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO catalogo_pdf_numeros (numero, ruta) VALUES (?, ?)",
+                [(numero, ruta) for numero in numeros],
+            )
+        conn.executemany(
+            "DELETE FROM catalogo_pdf_carpetas WHERE ruta=?", [(r,) for r in carpetas_borradas]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def borrar_base(base: str) -> None:
+    """Vacía el catálogo de ``base`` (carpetas, PDF y números)."""
+    conn = db.get_connection()
+    try:
+        conn.execute("DELETE FROM catalogo_pdf_carpetas WHERE base=?", (base,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def contar(base: str) -> Tuple[int, int]:
+    """Cantidad de carpetas y de PDF catalogados bajo ``base``."""
+    conn = db.get_connection()
+    try:
+        (n_carpetas,) = conn.execute(
+            "SELECT COUNT(*) FROM catalogo_pdf_carpetas WHERE base=?", (base,)
+        ).fetchone()
+        (n_pdf,) = conn.execute(
+            "SELECT COUNT(*) FROM catalogo_pdf p "
+            "JOIN catalogo_pdf_carpetas c ON c.ruta = p.carpeta WHERE c.base=?",
+            (base,),
+        ).fetchone()
+        return int(n_carpetas), int(n_pdf)
+    finally:
+        conn.close()
+
+
+def buscar(base: str, numeros: Iterable[str]) -> Dict[str, List[Tuple[str, str, float]]]:
+    """``{numero: [(ruta, carpeta, ctime), ...]}``, del más reciente al más antiguo."""
+    numeros = sorted(set(numeros))
+    resultado: Dict[str, List[Tuple[str, str, float]]] = {}
+    conn = db.get_connection()
+    try:
+        for i in range(0, len(numeros), _LOTE):
+            lote = numeros[i:i + _LOTE]
+            marcas = ",".join("?" * len(lote))
+            # ``CROSS JOIN`` fija el orden: partir de los números (pocas filas
+            # por índice) y no de la base, que abarca todo el catálogo.
+            cur = conn.execute(
+                "SELECT n.numero, p.ruta, p.carpeta, p.ctime FROM catalogo_pdf_numeros n "
+                "CROSS JOIN catalogo_pdf p ON p.ruta = n.ruta "
+                "CROSS JOIN catalogo_pdf_carpetas c ON c.ruta = p.carpeta "
+                f"WHERE c.base=? AND n.numero IN ({marcas}) "
+                "ORDER BY p.ctime DESC, p.ruta",
+                (base, *lote),
+            )
+            for numero, ruta, carpeta, ctime in cur.fetchall():
+                resultado.setdefault(numero, []).append((ruta, carpeta, float(ctime)))
+        return resultado
+    finally:
+        conn.close()
+
+
+__all__ = ["aplicar", "archivos_en", "borrar_base", "buscar", "carpetas", "contar", "mtimes"]
@@ -33,11 +33,12 @@ if _DESCARGAS_ROOT is not None:
     if _path not in sys.path:
         sys.path.insert(0, _path)
 
-from gestorcompras.services import db
+from gestorcompras.services import db, pdf_catalog
 from gestorcompras.gui.html_editor import HtmlEditor
 from gestorcompras.services.email_sender import send_email_custom
 from descargas_oc.config import Config as DescargasConfig
-from descargas_oc.escuchador import PROCESADOS_FILE
+from descargas_oc.escuchador import PROCESADOS_DB, PROCESADOS_FILE
+from descargas_oc.procesados import ProcesadosStore
 
 
 def _format_ruc(value: str | int) -> str:
@@ -74,7 +75,7 @@ class ConfigGUI(tk.Toplevel):
         self.descargas_cfg = DescargasConfig()
         self._oc_entries: dict[str, tk.Widget] = {}
         self._oc_vars: dict[str, tk.Variable] = {}
-        self._procesados_status = tk.StringVar(value="Generado" if PROCESADOS_FILE.exists() else "Pendiente")
+        self._procesados_status = tk.StringVar(value=self._estado_procesados())
         self._procesados_button: ttk.Button | None = None
         self._abastecimiento_focus: tk.Widget | None = None
         self._oc_focus: tk.Widget | None = None
@@ -443,6 +444,11 @@ class ConfigGUI(tk.Toplevel):
                    style="MyButton.TButton",
                    command=self.select_pdf_folder).pack(pady=5)
 
+        self._catalogo_button = ttk.Button(frame, text="Reconstruir catálogo de PDFs",
+                                           style="MyButton.TButton",
+                                           command=self.rebuild_pdf_catalog)
+        self._catalogo_button.pack(pady=5)
+
         ttk.Label(frame, text="Correos CC Despachos:",
                   style="MyLabel.TLabel").pack(pady=5)
         ttk.Label(frame, text="Hasta 9 direcciones separadas por punto y coma (;).",
@@ -463,6 +469,34 @@ class ConfigGUI(tk.Toplevel):
         if folder_selected:
             self.pdf_path_var.set(folder_selected)
 
+    def rebuild_pdf_catalog(self):
+        pdf_folder = self.pdf_path_var.get().strip()
+        if not pdf_folder or not os.path.isdir(pdf_folder):
+            messagebox.showwarning(
+                "Advertencia", "Seleccione una carpeta de PDFs existente.")
+            return
+        self._catalogo_button.config(state=tk.DISABLED)
+
+        def tarea():
+            try:
+                stats = pdf_catalog.rebuild(pdf_folder)
+                mensaje = f"Catálogo reconstruido: {stats['nuevos']} PDF(s) en {stats['listadas']} carpeta(s)."
+                ok = True
+            except Exception as exc:  # pragma: no cover - depende del disco
+                mensaje = f"No se pudo reconstruir el catálogo: {exc}"
+                ok = False
+
+            def finalizar():
+                self._catalogo_button.config(state=tk.NORMAL)
+                if ok:
+                    messagebox.showinfo("Catálogo de PDFs", mensaje)
+                else:
+                    messagebox.showerror("Catálogo de PDFs", mensaje)
+
+            self.after(0, finalizar)
+
+        threading.Thread(target=tarea, daemon=True).start()
+
     def select_google_creds(self):
         path = filedialog.askopenfilename(title="Seleccionar archivo de credenciales", filetypes=[("JSON", "*.json")])
         if path:
@@ -932,8 +966,19 @@ class ConfigGUI(tk.Toplevel):
             messagebox.showerror("Error", f"Configuración inválida: {exc}")
             return
         self.descargas_cfg.save()
-        self._procesados_status.set("Generado" if PROCESADOS_FILE.exists() else "Pendiente")
+        self._procesados_status.set(self._estado_procesados())
         messagebox.showinfo("Información", "Configuración guardada correctamente.")
+
+    @staticmethod
+    def _procesados_store() -> ProcesadosStore:
+        return ProcesadosStore(PROCESADOS_DB, legado=PROCESADOS_FILE)
+
+    def _estado_procesados(self) -> str:
+        try:
+            return "Generado" if len(self._procesados_store()) else "Pendiente"
+        except Exception:  # pragma: no cover - base de procesados ilegible
+            return "Pendiente"
+
     def generate_processed_file(self):
         datos = self._collect_descargas_form()
         servidor = datos["pop_server"]
@@ -973,14 +1018,17 @@ class ConfigGUI(tk.Toplevel):
                 conn.user(usuario)
                 conn.pass_(contrasena)
                 total = len(conn.list()[1])
-                PROCESADOS_FILE.parent.mkdir(parents=True, exist_ok=True)
-                with open(PROCESADOS_FILE, "w", encoding="utf-8") as archivo:
-                    for indice in range(total):
-                        respuesta = conn.uidl(indice + 1)
-                        linea = respuesta.decode() if isinstance(respuesta, bytes) else respuesta
-                        uidl = linea.split()[2]
-                        archivo.write(uidl + "\n")
+                uidls = []
+                for indice in range(total):
+                    respuesta = conn.uidl(indice + 1)
+                    linea = respuesta.decode() if isinstance(respuesta, bytes) else respuesta
+                    uidls.append(linea.split()[2])
                 conn.quit()
+                # Todo lo que hay hoy en el servidor queda como procesado; los
+                # UIDL que ya no están se descartan.
+                store = self._procesados_store()
+                store.mark_processed(uidls)
+                store.prune(uidls)
                 mensaje = f"Se generaron {total} UIDL(s)."
                 estado = "Generado"
             except Exception as exc:  # pragma: no cover - interacción con servidor
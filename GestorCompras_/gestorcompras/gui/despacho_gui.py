@@ -117,8 +117,9 @@ def open_despacho(master, email_session):
         status_var.set("Verificando ordenes...")
         window.update()
 
+        ubicaciones = despacho_logic.buscar_archivos_mas_recientes(orders)
         for oc in orders:
-            info, error = despacho_logic.obtener_resumen_orden(oc)
+            info, error = despacho_logic.obtener_resumen_orden(oc, ubicaciones[oc])
             if info:
                 emails = ", ".join(info["emails"]) if info["emails"] else "sin correo"
                 summaries.append(f"OC {oc}  →  {emails}")
@@ -1,12 +1,11 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from gestorcompras.services import db
+from gestorcompras.core.mail_parse import parse_reassignments
+from gestorcompras.services.email_task_scanner import scan_reassignments
 import threading
 import time
 import datetime
-import imaplib
-import email
-import re
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -41,24 +40,8 @@ def center_window(win: tk.Tk | tk.Toplevel):
     y = (win.winfo_screenheight() // 2) - (h // 2)
     win.geometry(f"{w}x{h}+{x}+{y}")
 
-def process_body(body):
-    task_pattern = r'Tarea:\s+(\d+)\s+Reasignación a:\s+(.*?)\s+Datos relacionados:(.*?)\n(?=Tarea:|\Z)'
-    tasks = re.findall(task_pattern, body, re.DOTALL)
-    tasks_data = []
-    for task_number, reasignacion, details in tasks:
-        detail_pattern = r'- OC (\d+) \| (.*?) \| FAC\. (\S+) \| INGR\. (\S+)'
-        details_list = re.findall(detail_pattern, details)
-        task_info = {
-            "task_number": task_number,
-            "reasignacion": reasignacion,
-            "details": [
-                {"OC": oc, "Proveedor": supplier, "Factura": invoice, "Ingreso": ingreso}
-                for oc, supplier, invoice, ingreso in details_list
-            ]
-        }
-        tasks_data.append(task_info)
-    return tasks_data
-
+# Compatibilidad: el parseo vive en ``core.mail_parse``.
+process_body = parse_reassignments
 
 class DateDialog(simpledialog.Dialog):
     """Ventana para seleccionar una fecha con flechas."""
@@ -107,51 +90,34 @@ def cargar_tareas_correo(email_address, email_password, window, *, date_override
         messagebox.showwarning("Advertencia", "No se ingreso una fecha.", parent=window)
         return
     try:
-        date_since = datetime.datetime.strptime(date_input, "%d/%m/%Y").strftime("%d-%b-%Y")
+        desde = datetime.datetime.strptime(date_input, "%d/%m/%Y").date()
     except Exception:
         messagebox.showerror("Error", "El formato de fecha debe ser DD/MM/AAAA.", parent=window)
         return
 
     task_filters = []
 
-    imap_url = 'pop.telconet.ec'
     try:
-        mail = imaplib.IMAP4_SSL(imap_url, 993)
-        mail.login(email_address, email_password)
-        mail.select("inbox")
+        tasks_data = scan_reassignments(
+            {"address": email_address, "password": email_password}, desde
+        )
     except Exception as e:
-        messagebox.showerror("Error", f"Error de autenticación en correo: {e}", parent=window)
+        messagebox.showerror("Error", f"Error al leer el correo: {e}", parent=window)
         return
-
-    query = f'(FROM "omar777j@gmail.com" SINCE "{date_since}")'
-    status, messages = mail.search(None, query)
-    messages = messages[0].split()
-    if not messages:
-        messagebox.showinfo("Información", f"No se encontraron correos desde {date_input}.", parent=window)
-        mail.logout()
+    if not tasks_data:
+        messagebox.showinfo("Información", f"No se encontraron tareas en correos desde {date_input}.", parent=window)
         return
 
     loaded_count = 0
-    for mail_id in messages:
-        status, data = mail.fetch(mail_id, '(RFC822)')
-        for response_part in data:
-            if isinstance(response_part, tuple):
-                try:
-                    msg = email.message_from_bytes(response_part[1])
-                    body = msg.get_payload(decode=True).decode()
-                except Exception:
-                    continue
-                tasks_data = process_body(body)
-                for task_info in tasks_data:
-                    if task_filters and task_info["task_number"] not in task_filters:
-                        continue
-                    inserted = db.insert_task_temp(task_info["task_number"],
-                                                   task_info["reasignacion"],
-                                                   task_info["details"])
-                    if inserted:
-                        loaded_count += 1
-                        logger.debug("Tasks after insert: %s", db.get_tasks_temp())
-    mail.logout()
+    for task_info in tasks_data:
+        if task_filters and task_info["task_number"] not in task_filters:
+            continue
+        inserted = db.insert_task_temp(task_info["task_number"],
+                                       task_info["reasignacion"],
+                                       task_info["details"])
+        if inserted:
+            loaded_count += 1
+            logger.debug("Tasks after insert: %s", db.get_tasks_temp())
     messagebox.showinfo("Información", f"Se cargaron {loaded_count} tareas (sin duplicados).", parent=window)
 
 def process_task(driver, task, parent_window):
@@ -181,9 +181,12 @@ def open_seguimientos(master, email_session):
             return
 
         summaries = []
+        ubicaciones = despacho_logic.buscar_archivos_mas_recientes(
+            [str(r["Orden de Compra"]) for r in selected]
+        )
         for r in selected:
             oc = str(r["Orden de Compra"])
-            info, error = despacho_logic.obtener_resumen_orden(oc)
+            info, error = despacho_logic.obtener_resumen_orden(oc, ubicaciones[oc])
             if info:
                 emails = ", ".join(info["emails"]) if info["emails"] else "sin correo"
                 summaries.append(f"OC {oc}  →  {emails}")
@@ -1,6 +1,5 @@
 import os
-import re
-import pdfplumber
+from gestorcompras.core import oc_document
 from gestorcompras.services.db import (
     get_config,
     get_suppliers as db_get_suppliers,
@@ -8,66 +7,53 @@ from gestorcompras.services.db import (
     get_email_template_by_name,
 )
 from gestorcompras.services.email_sender import send_email_custom
+from gestorcompras.services import pdf_catalog
 
 
 def get_suppliers():
     """Compatibilidad retroactiva para pruebas y código legado."""
     return db_get_suppliers()
 
+def buscar_archivos_mas_recientes(ordenes):
+    """
+    Para cada orden, el PDF más reciente cuyo nombre contiene su número.
+
+    Consulta el catálogo de ``PDF_FOLDER`` (``services.pdf_catalog``), que
+    se refresca de forma incremental, en lugar de recorrer la carpeta.
+    Devuelve ``{orden: (pdf_path, folder_name)}``, con ``(None, None)`` si
+    no hay archivo.
+    """
+    base_dir = get_config("PDF_FOLDER", os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdfs"))
+    return pdf_catalog.buscar(base_dir, ordenes)
+
 def buscar_archivo_mas_reciente(orden):
     """
     Busca y retorna el PDF más reciente que contenga el número de orden.
     """
-    base_dir = get_config("PDF_FOLDER", os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdfs"))
-    archivos_encontrados = []
-    orden_normalized = orden.strip()
-    orden_digits = re.sub(r"\D", "", orden_normalized)
-    search_terms = {orden_normalized}
-    if orden_digits:
-        search_terms.add(orden_digits)
-    for root, _, files in os.walk(base_dir):
-        for file in files:
-            if not file.lower().endswith(".pdf"):
-                continue
-            if any(term and term in file for term in search_terms):
-                archivos_encontrados.append(os.path.join(root, file))
-    if archivos_encontrados:
-        pdf_path = max(archivos_encontrados, key=os.path.getctime)
-        folder_name = os.path.basename(os.path.dirname(pdf_path))
-        return pdf_path, folder_name
-    return None, None
+    return buscar_archivos_mas_recientes([orden])[orden]
 
 def extraer_info_de_pdf(pdf_path):
     """
     Extrae el RUC y la tarea del contenido del PDF usando pdfplumber.
+
+    Los campos salen de ``core.oc_document`` (una pasada sobre el texto
+    guardado en ``core.pdf_text``). La tarea acepta también ``Tarea N``.
     """
-    ruc_pattern = re.compile(r"\b(\d{13})\b")
-    tarea_pattern = re.compile(r"Tarea\s+(\d+)", re.IGNORECASE)
-    ruc = None
-    tarea = None
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text = page.extract_text()
-                if not text:
-                    continue
-                if not ruc:
-                    match_ruc = ruc_pattern.search(text)
-                    if match_ruc:
-                        ruc = match_ruc.group(1)
-                if not tarea:
-                    match_tarea = tarea_pattern.search(text)
-                    if match_tarea:
-                        tarea = match_tarea.group(1)
-                if ruc and tarea:
-                    break
+        info = oc_document.desde_pdf(
+            pdf_path, ("ruc", "tarea"), "pdfplumber", oc_document.TAREA_NAF_O_TEXTO
+        )
     except Exception:
-        pass
-    return ruc, tarea
+        return None, None
+    return info.ruc, info.tarea
 
-def obtener_resumen_orden(orden):
-    """Obtiene la información necesaria para previsualizar el envío."""
-    pdf_path, folder_name = buscar_archivo_mas_reciente(orden)
+def obtener_resumen_orden(orden, ubicacion=None):
+    """Obtiene la información necesaria para previsualizar el envío.
+
+    ``ubicacion`` es el ``(pdf_path, folder_name)`` ya buscado con
+    :func:`buscar_archivos_mas_recientes`; si falta, se busca aquí.
+    """
+    pdf_path, folder_name = ubicacion or buscar_archivo_mas_reciente(orden)
     if not pdf_path:
         return None, f"No se encontró archivo para la OC {orden}."
     ruc, tarea = extraer_info_de_pdf(pdf_path)
@@ -142,8 +128,9 @@ def process_order(email_session, orden, include_pdf=True, template_name=None, cc
 def process_orders_grouped(email_session, orders, include_pdf=True, template_name=None, cc_key="EMAIL_CC_DESPACHO"):
     grouped: dict[str, list[dict]] = {}
     results: list[str] = []
+    ubicaciones = buscar_archivos_mas_recientes(orders)
     for orden in orders:
-        info, error = obtener_resumen_orden(orden)
+        info, error = obtener_resumen_orden(orden, ubicaciones[orden])
         if info:
             grouped.setdefault(info["ruc"], []).append(info)
         else:
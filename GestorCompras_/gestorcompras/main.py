@@ -7,7 +7,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 
 from gestorcompras.core import config as core_config
-from gestorcompras.services import db
+from gestorcompras.services import db, mail_ingest, mail_mirror
 from gestorcompras import theme
 from gestorcompras.ui import router
 from gestorcompras.ui.common import center_window, add_hover_effect
@@ -212,6 +212,8 @@ class LoginScreen(tk.Frame):
             email_session["email"] = email_address
             email_session["password"] = password
             core_config.set_user_email(email_address)
+            # Las búsquedas de correo reutilizan una conexión IMAP de la sesión.
+            mail_ingest.start_session(email_session)
             messagebox.showinfo("Bienvenido", "Inicio de sesion correcto.", parent=self)
             self.on_success()
         else:
@@ -269,6 +271,8 @@ def main() -> None:
     LoginScreen(login_container, on_success=show_main_layout).pack(fill="both", expand=True)
 
     root.mainloop()
+    mail_mirror.stop_background_refresh()
+    mail_ingest.close_sessions()
 
 
 if __name__ == "__main__":
@@ -1,28 +1,22 @@
 """Punto de entrada unificado para la reasignación de tareas."""
 from __future__ import annotations
 
-import email
 import hashlib
-import html
-import imaplib
 import logging
-import re
-import unicodedata
-from email.header import decode_header, make_header
-from email.message import Message
-from email.utils import parsedate_to_datetime
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Iterator
 from zoneinfo import ZoneInfo
 import tkinter as tk
 from tkinter import ttk, messagebox
 
 from gestorcompras import theme
 from gestorcompras.core import config as core_config
-from gestorcompras.core.mail_parse import parse_body, parse_subject
 from gestorcompras.data import reasignaciones_repo
 from gestorcompras.services import reassign_bridge, db
 from gestorcompras.services.credentials import resolve_telcos_credentials
+from gestorcompras.services.email_task_scanner import iter_scan_inbox, load_body
 from gestorcompras.ui.common import add_hover_effect, center_window
 from gestorcompras.gui import reasignacion_gui as legacy_gui
 
@@ -38,6 +32,8 @@ if not logger.handlers:
 
 
 SERVICIOS_REMITENTE_KEY = "SERVICIOS_REMITENTE"
+# Caracteres del cuerpo que se guardan por correo para la vista previa.
+_PREVIEW_CHARS = 3000
 
 
 class ServiciosReasignacion(tk.Toplevel):
@@ -57,6 +53,7 @@ class ServiciosReasignacion(tk.Toplevel):
         self.grab_set()
         self.email_session = email_session
         self.records: dict[str, dict[str, object]] = {}
+        self._busqueda = 0
         self._correo_usuario = core_config.get_user_email() or email_session.get("address", "")
         self.servicios_cfg = core_config.get_servicios_config()
         self.departamento_var = tk.StringVar(value=db.get_config("SERVICIOS_DEPARTAMENTO", ""))
@@ -319,30 +316,47 @@ class ServiciosReasignacion(tk.Toplevel):
         tz = ZoneInfo(cfg.get("zona_horaria", "America/Guayaquil"))
         return datetime.strptime(value.strip(), "%Y-%m-%d %H:%M").replace(tzinfo=tz)
 
-    @staticmethod
-    def _decode_header_value(raw: str) -> str:
-        from gestorcompras.services.email_task_scanner import decode_header_value
-        return decode_header_value(raw)
-
-    @classmethod
-    def _decode_subject(cls, msg: Message) -> str:
-        from gestorcompras.services.email_task_scanner import decode_subject
-        return decode_subject(msg)
-
-    @staticmethod
-    def _clean_html(text: str) -> str:
-        from gestorcompras.services.email_task_scanner import clean_html
-        return clean_html(text)
-
-    @classmethod
-    def _extract_text(cls, msg: Message) -> str:
-        from gestorcompras.services.email_task_scanner import extract_text
-        return extract_text(msg)
-
-    @staticmethod
-    def _parse_header_date(msg: Message, tz: ZoneInfo) -> datetime | None:
-        from gestorcompras.services.email_task_scanner import parse_header_date
-        return parse_header_date(msg, tz)
+    def _iter_correos(
+        self,
+        usuario: str,
+        password: str,
+        cadena_asunto: str,
+        dt_desde: datetime,
+        dt_hasta: datetime,
+        remitente: str = "",
+        on_progress=None,
+    ) -> Iterator[dict[str, object]]:
+        """Produce los correos de servicio a medida que se descargan.
+
+        Solo se conservan los primeros ``_PREVIEW_CHARS`` caracteres del
+        cuerpo; el texto completo se vuelve a pedir al abrir la vista previa.
+        """
+        for item in iter_scan_inbox(
+            {"address": usuario, "password": password},
+            dt_desde,
+            dt_hasta,
+            remitente=remitente,
+            asunto_contiene=cadena_asunto,
+            require_user_email=True,
+            # El UID sigue siendo válido cuando se abre la vista previa.
+            uid=True,
+            on_progress=on_progress,
+        ):
+            cuerpo = item["body"] or ""
+            yield {
+                "message_id": item["message_id"],
+                "date": item["fecha"],
+                "subject": item["asunto"],
+                "from": item["from"],
+                "task_number": item.get("task_number", "N/D"),
+                "body": cuerpo[:_PREVIEW_CHARS],
+                "body_truncado": len(cuerpo) > _PREVIEW_CHARS,
+                "body_hash": hashlib.sha256(cuerpo.encode("utf-8", "ignore")).hexdigest(),
+                "proveedor": item.get("proveedor", "N/D"),
+                "mecanico_nombre": item.get("mecanico", "N/D"),
+                "mecanico_telefono": item.get("telefono", "N/D"),
+                "inf_vehiculo": item.get("inf_vehiculo", "N/D"),
+            }
 
     def _buscar_correos(
         self,
@@ -353,85 +367,9 @@ class ServiciosReasignacion(tk.Toplevel):
         dt_hasta: datetime,
         remitente: str = "",
     ) -> list[dict[str, object]]:
-        tz = dt_desde.tzinfo or ZoneInfo("America/Guayaquil")
-        cadena_normalizada = self._normalize_for_search(cadena_asunto)
-        host = "pop.telconet.ec"
-        puerto = 993
-        remitente_busqueda = remitente.strip()
-        remitente_normalizado = remitente_busqueda.lower()
-
-        conexion = imaplib.IMAP4_SSL(host, puerto)
-        try:
-            conexion.login(usuario, password)
-            conexion.select("INBOX")
-            since = dt_desde.strftime("%d-%b-%Y")
-            criterios: list[str] = ["SINCE", since]
-            if remitente_busqueda:
-                criterios.extend(["FROM", remitente_busqueda])
-            status, data = conexion.search(None, *criterios)
-            if status != "OK":
-                raise RuntimeError("No se pudo obtener el listado de correos")
-            ids = data[0].split()
-            resultados: list[dict[str, object]] = []
-            for msg_id in reversed(ids):
-                status, fetch_data = conexion.fetch(msg_id, "(RFC822)")
-                if status != "OK":
-                    continue
-                for response in fetch_data:
-                    if not isinstance(response, tuple):
-                        continue
-                    msg = email.message_from_bytes(response[1])
-                    subject = self._decode_subject(msg)
-                    subject_normalized = self._normalize_for_search(subject)
-                    if cadena_normalizada not in subject_normalized:
-                        continue
-                    from_header = self._decode_header_value(msg.get("From", ""))
-                    if remitente_normalizado and remitente_normalizado not in from_header.lower():
-                        continue
-                    fecha = self._parse_header_date(msg, tz)
-                    if not fecha or not (dt_desde <= fecha <= dt_hasta):
-                        continue
-                    cuerpo = self._extract_text(msg)
-                    parsed = parse_body(cuerpo, usuario)
-                    if not parsed.get("correo_usuario_encontrado"):
-                        mensaje_id = msg_id.decode() if isinstance(msg_id, bytes) else str(msg_id)
-                        logger.info(
-                            "Correo ignorado por no contener al usuario: id=%s",
-                            mensaje_id,
-                        )
-                        continue
-                    info_tarea = parse_subject(subject)
-                    mensaje_id = msg_id.decode() if isinstance(msg_id, bytes) else str(msg_id)
-                    registros = {
-                        "message_id": mensaje_id,
-                        "date": fecha,
-                        "subject": subject,
-                        "from": from_header,
-                        "task_number": info_tarea.get("task_number", "N/D"),
-                        "body": cuerpo,
-                        "proveedor": parsed.get("proveedor", "N/D"),
-                        "mecanico_nombre": parsed.get("mecanico_nombre", "N/D"),
-                        "mecanico_telefono": parsed.get("mecanico_telefono", "N/D"),
-                        "inf_vehiculo": parsed.get("inf_vehiculo", "N/D"),
-                    }
-                    resultados.append(registros)
-                    logger.info(
-                        "Correo válido encontrado: id=%s tarea=%s remitente=%s",
-                        registros["message_id"],
-                        registros["task_number"],
-                        from_header or "(sin remitente)",
-                    )
-            return resultados
-        finally:
-            try:
-                conexion.logout()
-            except Exception:
-                pass
-
-    @staticmethod
-    def _normalize_for_search(value: str | None) -> str:
-        from gestorcompras.services.email_task_scanner import normalize_for_search
-        return normalize_for_search(value)
+        return list(self._iter_correos(
+            usuario, password, cadena_asunto, dt_desde, dt_hasta, remitente
+        ))
 
     @staticmethod
     def _normalize_email(address: str | None) -> str:
@@ -474,77 +412,100 @@ class ServiciosReasignacion(tk.Toplevel):
             dt_hasta,
         )
 
-        try:
-            registros = self._buscar_correos(
-            correo_usuario,
-            password,
-            cadena,
-            dt_desde,
-            dt_hasta,
-            remitente,
-        )
-        except Exception as exc:
-            logger.exception("Error durante la lectura de correos")
-            messagebox.showerror("Correo", f"No se pudo realizar la búsqueda: {exc}", parent=self)
-            return
-
         self.tree.delete(*self.tree.get_children())
         self.records.clear()
         self.select_all_var.set(False)
         db.set_config(SERVICIOS_REMITENTE_KEY, remitente)
-        for item in registros:
-            message_id = item["message_id"]
-            estado = "Listo"
-            raw_hash = hashlib.sha256(item["body"].encode("utf-8", "ignore")).hexdigest()
-            registro = {
-                "message_id": message_id,
-                "fecha": item["date"],
-                "asunto": item["subject"],
-                "task_number": item.get("task_number", "N/D"),
-                "taller": item.get("proveedor", "N/D"),
-                "proveedor": item.get("proveedor", "N/D"),
-                "mecanico": item.get("mecanico_nombre", "N/D"),
-                "telefono": item.get("mecanico_telefono", "N/D"),
-                "inf_vehiculo": item.get("inf_vehiculo", "N/D"),
-                "correo_usuario": correo_usuario,
-                "raw_hash": raw_hash,
-                "body": item["body"],
-                "estado": estado,
-                "checked": False,
-                "error": "",
-            }
-            self.records[message_id] = registro
-            reasignaciones_repo.upsert({
-                key: registro.get(key)
-                for key in (
-                    "message_id",
-                    "fecha",
-                    "asunto",
-                    "task_number",
-                    "proveedor",
-                    "mecanico",
-                    "telefono",
-                    "inf_vehiculo",
-                    "correo_usuario",
-                    "raw_hash",
-                )
-            })
-            self.tree.insert(
-                "",
-                "end",
-                iid=message_id,
-                values=(
-                    self._checkbox_symbol(False),
-                    item["date"].strftime("%Y-%m-%d %H:%M"),
-                    registro["task_number"],
-                    registro["taller"],
-                    item["subject"],
-                ),
-            )
-            logger.info(
-                "Correo procesado: id=%s task=%s taller=%s", message_id, registro["task_number"], registro["taller"]
+        self._busqueda += 1
+        busqueda = self._busqueda
+        self.estado_label.configure(text="Buscando correos...")
+
+        def _progreso(revisados: int, encontrados: int, total: int) -> None:
+            texto = f"Revisados {revisados}/{total} - {encontrados} correo(s) válido(s)"
+            self.after(0, lambda t=texto: self._mostrar_progreso(busqueda, t))
+
+        def _worker() -> None:
+            encontrados = 0
+            try:
+                for item in self._iter_correos(
+                    correo_usuario, password, cadena, dt_desde, dt_hasta, remitente,
+                    on_progress=_progreso,
+                ):
+                    encontrados += 1
+                    self.after(0, lambda i=item: self._agregar_registro(busqueda, correo_usuario, i))
+            except Exception as exc:
+                logger.exception("Error durante la lectura de correos")
+                self.after(0, lambda e=exc: messagebox.showerror(
+                    "Correo", f"No se pudo realizar la búsqueda: {e}", parent=self))
+                return
+            self.after(0, lambda n=encontrados: self._fin_busqueda(busqueda, n))
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _mostrar_progreso(self, busqueda: int, texto: str) -> None:
+        if busqueda == self._busqueda:
+            self.estado_label.configure(text=texto)
+
+    def _agregar_registro(self, busqueda: int, correo_usuario: str, item: dict[str, object]) -> None:
+        """Inserta una fila apenas llega el correo; ignora búsquedas anteriores."""
+        if busqueda != self._busqueda:
+            return
+        message_id = item["message_id"]
+        registro = {
+            "message_id": message_id,
+            "fecha": item["date"],
+            "asunto": item["subject"],
+            "task_number": item.get("task_number", "N/D"),
+            "taller": item.get("proveedor", "N/D"),
+            "proveedor": item.get("proveedor", "N/D"),
+            "mecanico": item.get("mecanico_nombre", "N/D"),
+            "telefono": item.get("mecanico_telefono", "N/D"),
+            "inf_vehiculo": item.get("inf_vehiculo", "N/D"),
+            "correo_usuario": correo_usuario,
+            "raw_hash": item["body_hash"],
+            "body": item["body"],
+            "body_truncado": item["body_truncado"],
+            "estado": "Listo",
+            "checked": False,
+            "error": "",
+        }
+        self.records[message_id] = registro
+        reasignaciones_repo.upsert({
+            key: registro.get(key)
+            for key in (
+                "message_id",
+                "fecha",
+                "asunto",
+                "task_number",
+                "proveedor",
+                "mecanico",
+                "telefono",
+                "inf_vehiculo",
+                "correo_usuario",
+                "raw_hash",
             )
-        if not registros:
+        })
+        self.tree.insert(
+            "",
+            "end",
+            iid=message_id,
+            values=(
+                self._checkbox_symbol(False),
+                item["date"].strftime("%Y-%m-%d %H:%M"),
+                registro["task_number"],
+                registro["taller"],
+                item["subject"],
+            ),
+        )
+        logger.info(
+            "Correo procesado: id=%s task=%s taller=%s", message_id, registro["task_number"], registro["taller"]
+        )
+
+    def _fin_busqueda(self, busqueda: int, encontrados: int) -> None:
+        if busqueda != self._busqueda:
+            return
+        self.estado_label.configure(text=f"{encontrados} correo(s) encontrado(s).")
+        if not encontrados:
             messagebox.showinfo("Sin resultados", "No se encontraron correos en el rango especificado.", parent=self)
 
     def _selected_record(self) -> dict[str, object] | None:
@@ -558,11 +519,36 @@ class ServiciosReasignacion(tk.Toplevel):
         record = self._selected_record()
         if not record:
             return
+        self._mostrar_cuerpo(record.get("body", ""))
+        self.estado_label.configure(text=f"Estado seleccionado: {record.get('estado', 'N/D')}")
+        if record.get("body_truncado"):
+            # El cuerpo completo se pide solo cuando se abre la vista previa.
+            record["body_truncado"] = False
+
+            def _cargar(rec=record) -> None:
+                try:
+                    rec["body"] = load_body(
+                        {"address": rec["correo_usuario"], "password": self.email_session.get("password", "")},
+                        str(rec["message_id"]),
+                        uid=True,
+                    ) or rec["body"]
+                except Exception:
+                    logger.exception("No se pudo cargar el cuerpo completo: id=%s", rec["message_id"])
+                    return
+                self.after(0, lambda: self._refrescar_vista_previa(rec))
+
+            threading.Thread(target=_cargar, daemon=True).start()
+
+    def _mostrar_cuerpo(self, body: object) -> None:
         self.preview.config(state="normal")
         self.preview.delete("1.0", tk.END)
-        self.preview.insert(tk.END, record.get("body", ""))
+        self.preview.insert(tk.END, body)
         self.preview.config(state="disabled")
-        self.estado_label.configure(text=f"Estado seleccionado: {record.get('estado', 'N/D')}")
+
+    def _refrescar_vista_previa(self, record: dict[str, object]) -> None:
+        sel = self.tree.selection()
+        if sel and self.records.get(sel[0]) is record:
+            self._mostrar_cuerpo(record.get("body", ""))
 
     def _reasignar(self) -> None:
         seleccionados = [r for r in self.records.values() if r.get("checked")]
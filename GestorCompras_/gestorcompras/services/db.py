@@ -174,6 +174,92 @@ def init_db():
             "ON actua_correos_escaneados(task_number)"
         )
 
+        # Espejo local del buzón: encabezados de todos los mensajes y, de los
+        # que alguna búsqueda encontró, datos del cuerpo y mensaje crudo
+        # comprimido.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS correo_espejo_estado (
+                cuenta TEXT NOT NULL,
+                mailbox TEXT NOT NULL,
+                uidvalidity INTEGER NOT NULL,
+                last_uid INTEGER NOT NULL DEFAULT 0,
+                cubierto_desde TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (cuenta, mailbox)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS correo_espejo (
+                id INTEGER PRIMARY KEY,
+                cuenta TEXT NOT NULL,
+                mailbox TEXT NOT NULL,
+                uid INTEGER NOT NULL,
+                message_id TEXT,
+                raw_hash TEXT,
+                fecha TEXT,
+                remitente TEXT,
+                remitente_email TEXT,
+                asunto_norm TEXT,
+                task_number TEXT,
+                datos_json TEXT NOT NULL,
+                raw_zlib BLOB,
+                tamano INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (cuenta, mailbox, uid),
+                UNIQUE (cuenta, mailbox, raw_hash)
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_espejo_fecha ON correo_espejo(cuenta, fecha)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_espejo_remitente "
+            "ON correo_espejo(cuenta, remitente_email, fecha)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_espejo_task ON correo_espejo(cuenta, task_number)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_espejo_message_id ON correo_espejo(message_id)"
+        )
+        # Catálogo de los PDF de OC en PDF_FOLDER: carpetas con su mtime (para
+        # refrescar solo las que cambiaron), archivos y números en el nombre.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS catalogo_pdf_carpetas (
+                ruta TEXT PRIMARY KEY,
+                base TEXT NOT NULL,
+                padre TEXT REFERENCES catalogo_pdf_carpetas(ruta) ON DELETE CASCADE,
+                mtime_ns INTEGER NOT NULL
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_catalogo_carpetas_base ON catalogo_pdf_carpetas(base)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_catalogo_carpetas_padre ON catalogo_pdf_carpetas(padre)"
+        )
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS catalogo_pdf (
+                ruta TEXT PRIMARY KEY,
+                carpeta TEXT NOT NULL
+                    REFERENCES catalogo_pdf_carpetas(ruta) ON DELETE CASCADE,
+                ctime REAL NOT NULL
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_catalogo_pdf_carpeta ON catalogo_pdf(carpeta)"
+        )
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS catalogo_pdf_numeros (
+                numero TEXT NOT NULL,
+                ruta TEXT NOT NULL REFERENCES catalogo_pdf(ruta) ON DELETE CASCADE,
+                PRIMARY KEY (numero, ruta)
+            )
+        """)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_catalogo_numeros_ruta ON catalogo_pdf_numeros(ruta)"
+        )
+
         conn.commit()
     finally:
         conn.close()
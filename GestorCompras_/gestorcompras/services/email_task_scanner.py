@@ -9,25 +9,77 @@ from __future__ import annotations
 
 import email
 import hashlib
-import html
-import imaplib
 import logging
 import re
 import unicodedata
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from email.header import decode_header, make_header
 from email.message import Message
 from email.utils import parsedate_to_datetime
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterable, Iterator, List
 from zoneinfo import ZoneInfo
 
-from gestorcompras.core.mail_parse import parse_body, parse_subject, RX_USERMAIL
+from gestorcompras.core.html_text import html_to_text
+from gestorcompras.core.mail_parse import (
+    RX_USERMAIL,
+    parse_body,
+    parse_reassignments,
+    parse_subject,
+)
+from gestorcompras.services import imap_fetch, mail_ingest
 
 logger = logging.getLogger(__name__)
 
-IMAP_HOST = "pop.telconet.ec"
-IMAP_PORT = 993
 DEFAULT_TZ = ZoneInfo("America/Guayaquil")
+# Encabezados descargados en la primera fase, antes de decidir si se
+# necesita el mensaje completo. ``Message-ID`` permite reutilizar lo que ya
+# está en ``mail_ingest.cache``.
+HEADER_FIELDS = ("SUBJECT", "FROM", "DATE", "TO", "CC", "MESSAGE-ID")
+FETCH_ENCABEZADOS = f"(BODY.PEEK[HEADER.FIELDS ({' '.join(HEADER_FIELDS)})])"
+# SINCE/BEFORE comparan la fecha interna del servidor sin hora ni zona
+# horaria; se deja un día de margen para no perder correos de la noche de
+# ``hasta`` que el servidor registra en UTC con fecha del día siguiente.
+_MARGEN_BEFORE = timedelta(days=2)
+# Más números de tarea que esto no se envían como cadena OR (consultas muy
+# largas o profundas que algunos servidores rechazan); se filtran en cliente.
+MAX_OR_TAREAS = 50
+# Enviar también el texto libre del asunto como criterio SUBJECT. Solo sirve
+# si el servidor compara sin distinguir acentos (``NOTIFICACION`` vs
+# ``NOTIFICACIÓN``); si no lo hace se pierden correos, por eso va apagado y
+# solo se envían los números de tarea (dígitos), el rango y el remitente.
+# Se lee en cada llamada.
+SUBJECT_PUSHDOWN = False
+# Caracteres de texto que se extraen de cada parte HTML; ``None`` sin límite.
+HTML_TEXT_MAX_CHARS = 20_000
+# Partes de texto más grandes que esto no se decodifican (firmas con imágenes
+# embebidas, boletines, volcados de registros).
+MAX_PART_BYTES = 1024 * 1024
+# Si la parte text/plain ya trae estos campos (y la mención del usuario), la
+# parte HTML del mismo mensaje no se decodifica.
+PLAIN_REQUIRED_FIELDS = ("proveedor", "inf_vehiculo")
+# Remitente de los correos con tareas a reasignar (ver :func:`scan_reassignments`).
+REASIGNACION_REMITENTE = "omar777j@gmail.com"
+
+# Claves de datos del cuerpo que se copian a cada registro de
+# :func:`scan_inbox` (y del espejo del buzón).
+CAMPOS_REGISTRO = (
+    "raw_hash",
+    "fecha",
+    "asunto",
+    "from",
+    "task_number",
+    "body",
+    "proveedor",
+    "mecanico",
+    "telefono",
+    "inf_vehiculo",
+    "factura",
+    "oc",
+    "ingreso",
+    "ruc",
+    "fecha_orden",
+    "emails",
+)
 
 
 def decode_header_value(raw: str) -> str:
@@ -51,46 +103,67 @@ def decode_subject(msg: Message) -> str:
     return decode_header_value(msg.get("Subject", ""))
 
 
-def clean_html(text: str) -> str:
-    cleaned = re.sub(r"(?is)<(script|style).*?>.*?</\\1>", " ", text)
-    cleaned = re.sub(r"(?is)<br\\s*/?>", "\n", cleaned)
-    cleaned = re.sub(r"(?is)</p>", "\n", cleaned)
-    cleaned = re.sub(r"(?is)<[^>]+>", " ", cleaned)
-    cleaned = html.unescape(cleaned)
-    return re.sub(r"\s+", " ", cleaned).strip()
+def clean_html(text: str, max_chars: int | None = HTML_TEXT_MAX_CHARS) -> str:
+    return re.sub(r"\s+", " ", html_to_text(text, max_chars)).strip()
 
 
-def extract_text(msg: Message) -> str:
-    partes: list[str] = []
-    if msg.is_multipart():
-        for part in msg.walk():
-            if part.get_content_disposition() == "attachment":
-                continue
-            payload = part.get_payload(decode=True)
-            if payload is None:
-                continue
-            charset = part.get_content_charset() or "utf-8"
-            try:
-                texto = payload.decode(charset, errors="ignore")
-            except Exception:
-                texto = payload.decode("utf-8", errors="ignore")
-            if part.get_content_type() == "text/html":
-                texto = clean_html(texto)
-            partes.append(texto)
-    else:
-        payload = msg.get_payload(decode=True)
-        if payload:
-            charset = msg.get_content_charset() or "utf-8"
-            try:
-                texto = payload.decode(charset, errors="ignore")
-            except Exception:
-                texto = payload.decode("utf-8", errors="ignore")
-            if msg.get_content_type() == "text/html":
-                texto = clean_html(texto)
-            partes.append(texto)
+def _text_parts(msg: Message) -> tuple[list[Message], list[Message]]:
+    """Partes ``text/plain`` y ``text/html`` del cuerpo, aún sin decodificar.
+
+    Se omiten adjuntos, imágenes en línea y cualquier otra parte que no sea
+    texto, además de las que superan :data:`MAX_PART_BYTES`.
+    """
+    plain: list[Message] = []
+    html: list[Message] = []
+    for part in msg.walk():
+        if part.is_multipart() or part.get_content_disposition() == "attachment":
+            continue
+        tipo = part.get_content_type()
+        if tipo not in ("text/plain", "text/html"):
+            continue
+        if _part_size(part) > MAX_PART_BYTES:
+            logger.debug("Parte %s de %s omitida por tamaño", tipo, msg.get("Message-ID", ""))
+            continue
+        (plain if tipo == "text/plain" else html).append(part)
+    return plain, html
+
+
+def _part_size(part: Message) -> int:
+    """Tamaño según ``Content-Length`` o, si falta, el del contenido codificado."""
+    try:
+        return int(part.get("Content-Length", ""))
+    except ValueError:
+        payload = part.get_payload()
+        return len(payload) if isinstance(payload, (str, bytes)) else 0
+
+
+def _decode_part(part: Message) -> str:
+    payload = part.get_payload(decode=True)
+    if not payload:
+        return ""
+    charset = part.get_content_charset() or "utf-8"
+    try:
+        texto = payload.decode(charset, errors="ignore")
+    except Exception:
+        texto = payload.decode("utf-8", errors="ignore")
+    if part.get_content_type() == "text/html":
+        texto = clean_html(texto)
+    return texto
+
+
+def _join_text(partes: Iterable[str]) -> str:
     return "\n".join(filter(None, partes)).strip()
 
 
+def extract_text(msg: Message) -> str:
+    """Texto del cuerpo: las partes ``text/plain`` o, si no hay, las HTML."""
+    plain, html = _text_parts(msg)
+    texto = _join_text(_decode_part(part) for part in plain)
+    if not texto:
+        texto = _join_text(_decode_part(part) for part in html)
+    return texto
+
+
 def parse_header_date(msg: Message, tz: ZoneInfo | None = None) -> datetime | None:
     tz = tz or DEFAULT_TZ
     header = msg.get("Date")
@@ -129,7 +202,141 @@ def _extract_emails_from_header(msg: Message) -> list[str]:
     return list(dict.fromkeys(found))
 
 
-def scan_inbox(
+def header_info(msg: Message, tz: ZoneInfo) -> Dict[str, Any]:
+    """Datos del mensaje que solo dependen de sus encabezados.
+
+    ``fecha`` (en ``tz``), ``asunto``, ``from``, ``task_number`` del asunto,
+    ``emails`` de To/Cc y ``msgid``. Basta con descargar
+    :data:`FETCH_ENCABEZADOS`.
+    """
+    subject = decode_subject(msg)
+    info_tarea = parse_subject(subject)
+    return {
+        "fecha": parse_header_date(msg, tz),
+        "asunto": subject,
+        "from": decode_header_value(msg.get("From", "")),
+        "task_number": info_tarea.get("task_number", "N/D"),
+        "emails": _extract_emails_from_header(msg),
+        "msgid": mail_ingest.message_id(msg),
+    }
+
+
+def _body_complete(parsed: Dict[str, Any] | None) -> bool:
+    return bool(
+        parsed
+        and parsed.get("correo_usuario_encontrado")
+        and all(parsed.get(campo) != "N/D" for campo in PLAIN_REQUIRED_FIELDS)
+    )
+
+
+def _body_info(msg: Message, address: str) -> Dict[str, Any]:
+    """Datos extraídos del cuerpo del mensaje (costosos de calcular)."""
+    plain, html = _text_parts(msg)
+    cuerpo = _join_text(_decode_part(part) for part in plain)
+    parsed = parse_body(cuerpo, address) if cuerpo else None
+    if html and not _body_complete(parsed):
+        # La parte HTML solo se decodifica si el texto plano no alcanzó.
+        cuerpo = _join_text([cuerpo, *(_decode_part(part) for part in html)])
+        parsed = None
+    if parsed is None:
+        parsed = parse_body(cuerpo, address)
+    return {
+        "body": cuerpo,
+        "proveedor": parsed.get("proveedor", "N/D"),
+        "mecanico": parsed.get("mecanico_nombre", "N/D"),
+        "telefono": parsed.get("mecanico_telefono", "N/D"),
+        "inf_vehiculo": parsed.get("inf_vehiculo", "N/D"),
+        "factura": parsed.get("factura", ""),
+        "oc": parsed.get("oc", ""),
+        "ingreso": parsed.get("ingreso", ""),
+        "ruc": parsed.get("ruc", ""),
+        "fecha_orden": parsed.get("fecha_orden", ""),
+        "correo_usuario_encontrado": bool(parsed.get("correo_usuario_encontrado")),
+    }
+
+
+def _parse_descarga(
+    msg_id: int, raw: bytes | None, address: str
+) -> tuple[int, Dict[str, Any] | None]:
+    """Parsea un mensaje completo; se ejecuta en :mod:`parse_pool`."""
+    if raw is None:
+        return msg_id, None
+    datos = _body_info(email.message_from_bytes(raw), address)
+    datos["raw_hash"] = raw_hash(raw)
+    return msg_id, datos
+
+
+def _parse_reasignaciones(
+    msg_id: int, raw: bytes | None, address: str
+) -> tuple[int, list[dict] | None]:
+    """Tareas de un correo de reasignación; se ejecuta en :mod:`parse_pool`."""
+    if raw is None:
+        return msg_id, None
+    return msg_id, parse_reassignments(extract_text(email.message_from_bytes(raw)))
+
+
+# Datos de ``scan_inbox``/espejo y de la carga de reasignaciones; comparten
+# ``mail_ingest.cache`` entre ventanas.
+EXTRACTOR_TAREA = mail_ingest.Extractor("tarea", _parse_descarga)
+EXTRACTOR_REASIGNACION = mail_ingest.Extractor("reasignacion", _parse_reasignaciones)
+
+
+def _imap_quote(valor: str) -> str | None:
+    """Cadena IMAP entre comillas; ``None`` si no es ASCII (imaplib no la envía)."""
+    valor = " ".join(valor.split())
+    if not valor or not valor.isascii():
+        return None
+    return '"' + valor.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def build_search_criteria(
+    desde: datetime,
+    hasta: datetime | None = None,
+    *,
+    remitente: str = "",
+    asunto_contiene: str = "",
+    task_numbers: Iterable[str] | None = None,
+    subject_pushdown: bool | None = None,
+) -> list[str]:
+    """Compila los filtros del escaneo en criterios IMAP ``SEARCH``.
+
+    Produce ``SINCE``/``BEFORE`` para el rango, ``FROM`` para el remitente
+    y una cadena ``OR`` de ``SUBJECT`` con los números de tarea (solo si
+    todos son dígitos). El texto del asunto se envía únicamente con
+    ``subject_pushdown`` (por defecto, :data:`SUBJECT_PUSHDOWN`). Los
+    criterios solo reducen el conjunto de IDs devuelto; el llamador debe
+    volver a aplicar los filtros en cliente (hora exacta, acentos, número de
+    tarea exacto). Los valores que no se pueden enviar (texto no ASCII)
+    simplemente se omiten.
+    """
+    if subject_pushdown is None:
+        subject_pushdown = SUBJECT_PUSHDOWN
+    criterios: list[str] = ["SINCE", desde.strftime("%d-%b-%Y")]
+    if hasta is not None:
+        tope = hasta.astimezone(desde.tzinfo or DEFAULT_TZ).date() + _MARGEN_BEFORE
+        criterios.extend(["BEFORE", tope.strftime("%d-%b-%Y")])
+
+    remitente_q = _imap_quote(remitente)
+    if remitente_q:
+        criterios.extend(["FROM", remitente_q])
+
+    if subject_pushdown:
+        asunto_q = _imap_quote(asunto_contiene)
+        if asunto_q:
+            criterios.extend(["SUBJECT", asunto_q])
+
+    tareas = [t for t in dict.fromkeys((t or "").strip() for t in (task_numbers or ())) if t]
+    # Si algún valor no es solo dígitos, la cadena lo excluiría del servidor.
+    solo_digitos = all(t.isascii() and t.isdigit() for t in tareas)
+    if solo_digitos and 0 < len(tareas) <= MAX_OR_TAREAS:
+        # OR es binario y prefijo: OR OR a b c == (a OR b) OR c.
+        criterios.extend(["OR"] * (len(tareas) - 1))
+        for tarea in tareas:
+            criterios.extend(["SUBJECT", f'"{tarea}"'])
+    return criterios
+
+
+def iter_scan_inbox(
     email_session: Dict[str, str],
     desde: datetime,
     hasta: datetime,
@@ -138,26 +345,37 @@ def scan_inbox(
     remitente: str = "",
     asunto_contiene: str = "",
     require_user_email: bool = False,
-) -> List[Dict[str, Any]]:
-    """Escanea la bandeja IMAP y devuelve correos que coinciden con los filtros.
-
-    Parameters
-    ----------
-    email_session : dict con ``address`` y ``password``.
-    desde, hasta : rango de fechas (con tzinfo).
-    task_numbers : si se proporcionan, filtra por asuntos que contengan
-        alguno de estos números de tarea.
-    remitente : filtro opcional por dirección del remitente.
-    asunto_contiene : texto libre a buscar en el asunto.
-    require_user_email : si True, descarta correos cuyo cuerpo no contenga
-        la dirección del usuario logueado (comportamiento original de Servicios).
+    mailbox: str = "INBOX",
+    uid: bool = False,
+    chunk_size: int = imap_fetch.DEFAULT_CHUNK_SIZE,
+    body_chars: int | None = None,
+    on_progress: Callable[[int, int, int], None] | None = None,
+    parse_workers: int | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """Como :func:`scan_inbox`, pero produce cada registro apenas se parsea.
+
+    Los registros salen en el mismo orden que la lista de ``scan_inbox``
+    (del más nuevo al más antiguo); los mensajes completos se descargan por
+    lotes a medida que el consumidor avanza.
+
+    body_chars : si se indica, ``body`` se recorta a esa cantidad de
+        caracteres (``body_truncado`` indica si se recortó) y el texto
+        completo no se retiene; usar :func:`load_body` cuando se necesite.
+    on_progress : se llama con ``(revisados, coincidencias, total)`` tras
+        cada lote de encabezados y antes de producir cada registro; ``total``
+        es la cantidad de mensajes devuelta por ``SEARCH``.
+    parse_workers : procesos para parsear los mensajes completos (por
+        defecto ``parse_pool.PARSE_WORKERS``; 0 o 1 = en este proceso). Con
+        menos de ``parse_pool.MIN_MENSAJES_POOL`` mensajes siempre se parsea
+        en serie.
+
+    La conexión IMAP se libera siempre al terminar o al cerrar el iterador.
     """
     address = email_session.get("address", "")
     password = email_session.get("password", "")
     if not address or not password:
         raise ValueError("Credenciales de correo incompletas.")
 
-    usuario = address.split("@")[0]
     tz = desde.tzinfo or DEFAULT_TZ
 
     task_set = set()
@@ -168,94 +386,212 @@ def scan_inbox(
     remitente_normalizado = remitente_busqueda.lower()
     asunto_norm = normalize_for_search(asunto_contiene)
 
-    conexion = imaplib.IMAP4_SSL(IMAP_HOST, IMAP_PORT)
-    try:
-        conexion.login(address, password)
-        conexion.select("INBOX")
-
-        since = desde.strftime("%d-%b-%Y")
-        criterios: list[str] = ["SINCE", since]
-        if remitente_busqueda:
-            criterios.extend(["FROM", remitente_busqueda])
-
-        status, data = conexion.search(None, *criterios)
-        if status != "OK":
-            raise RuntimeError("No se pudo obtener el listado de correos")
-
-        ids = data[0].split()
-        resultados: List[Dict[str, Any]] = []
-
-        for msg_id in reversed(ids):
-            status, fetch_data = conexion.fetch(msg_id, "(RFC822)")
-            if status != "OK":
-                continue
-            for response in fetch_data:
-                if not isinstance(response, tuple):
-                    continue
-                raw = response[1]
-                msg = email.message_from_bytes(raw)
-                subject = decode_subject(msg)
-                subject_normalized = normalize_for_search(subject)
-
-                if asunto_norm and asunto_norm not in subject_normalized:
+    def _pasa_encabezados(info: Dict[str, Any]) -> bool:
+        if asunto_norm and asunto_norm not in normalize_for_search(info["asunto"]):
+            return False
+        if task_set and info["task_number"] not in task_set:
+            return False
+        if remitente_normalizado and remitente_normalizado not in info["from"].lower():
+            return False
+        fecha = info["fecha"]
+        return bool(fecha) and desde <= fecha <= hasta
+
+    with mail_ingest.open_mailbox(email_session, mailbox) as conexion:
+        criterios = build_search_criteria(
+            desde,
+            hasta,
+            remitente=remitente_busqueda,
+            asunto_contiene=asunto_contiene,
+            task_numbers=sorted(task_set),
+        )
+
+        ids = mail_ingest.search(conexion, criterios, uid=uid)
+        orden = list(reversed(ids))
+        total = len(orden)
+        revisados = 0
+        coincidencias = 0
+
+        def _avisar() -> None:
+            if on_progress is not None:
+                on_progress(revisados, coincidencias, total)
+
+        _avisar()
+
+        # Fase 1: solo encabezados, por lotes y sin tocar cuerpo ni adjuntos.
+        encabezados: Dict[int, Dict[str, Any]] = {}
+        for lote in mail_ingest.iter_headers(
+            conexion, orden, HEADER_FIELDS, uid=uid, chunk_size=chunk_size
+        ):
+            for msg_id, msg in lote:
+                encabezados[msg_id] = header_info(msg, tz)
+            revisados += len(lote)
+            _avisar()
+
+        candidatos: list[tuple[int, Dict[str, Any]]] = []
+        for msg_id in orden:
+            datos = encabezados.get(msg_id)
+            if datos is not None and _pasa_encabezados(datos):
+                candidatos.append((msg_id, datos))
+        del encabezados
+
+        # Fase 2: mensaje completo solo para los que pasaron los filtros y no
+        # están en la caché de la sesión. Las descargas avanzan junto con el
+        # consumidor, en el orden de salida.
+        por_id = dict(candidatos)
+        pedidos = [(msg_id, datos.get("msgid", "")) for msg_id, datos in candidatos]
+        posicion = {msg_id: i for i, (msg_id, _mid) in enumerate(pedidos)}
+        cuerpos = mail_ingest.iter_extract(
+            conexion,
+            pedidos,
+            EXTRACTOR_TAREA,
+            address,
+            uid=uid,
+            chunk_size=min(chunk_size, imap_fetch.BODY_CHUNK_SIZE),
+            parse_workers=parse_workers,
+        )
+
+        for msg_id, datos in candidatos:
+            if "body" not in datos:
+                for descargado, cuerpo in cuerpos:
+                    otro = por_id[descargado]
+                    otro.update(cuerpo)
+                    if posicion[descargado] >= posicion[msg_id]:
+                        break
+                if "body" not in datos:
                     continue
+            if require_user_email and not datos.get("correo_usuario_encontrado"):
+                logger.debug("Correo descartado (sin email usuario): %s", msg_id)
+                continue
 
-                info_tarea = parse_subject(subject)
-                task_num = info_tarea.get("task_number", "N/D")
+            registro: Dict[str, Any] = {"message_id": str(msg_id)}
+            registro.update((clave, datos.get(clave)) for clave in CAMPOS_REGISTRO)
+            # El registro ya tiene el texto; no se retiene hasta el final.
+            datos.pop("body", None)
+            if body_chars is not None:
+                cuerpo = registro["body"] or ""
+                registro["body"] = cuerpo[:body_chars]
+                registro["body_truncado"] = len(cuerpo) > body_chars
+            logger.info(
+                "Correo encontrado: id=%s tarea=%s remitente=%s",
+                msg_id,
+                registro["task_number"],
+                registro["from"] or "(sin remitente)",
+            )
+            coincidencias += 1
+            _avisar()
+            yield registro
 
-                if task_set and task_num not in task_set:
-                    continue
 
-                from_header = decode_header_value(msg.get("From", ""))
-                if remitente_normalizado and remitente_normalizado not in from_header.lower():
-                    continue
+def scan_inbox(
+    email_session: Dict[str, str],
+    desde: datetime,
+    hasta: datetime,
+    *,
+    task_numbers: list[str] | None = None,
+    remitente: str = "",
+    asunto_contiene: str = "",
+    require_user_email: bool = False,
+    mailbox: str = "INBOX",
+    uid: bool = False,
+    chunk_size: int = imap_fetch.DEFAULT_CHUNK_SIZE,
+    parse_workers: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Escanea la bandeja IMAP y devuelve correos que coinciden con los filtros.
 
-                fecha = parse_header_date(msg, tz)
-                if not fecha or not (desde <= fecha <= hasta):
-                    continue
+    Parameters
+    ----------
+    email_session : dict con ``address`` y ``password``.
+    desde, hasta : rango de fechas (con tzinfo).
+    task_numbers : si se proporcionan, filtra por asuntos que contengan
+        alguno de estos números de tarea.
+    remitente : filtro opcional por dirección del remitente.
+    asunto_contiene : texto libre a buscar en el asunto.
+    require_user_email : si True, descarta correos cuyo cuerpo no contenga
+        la dirección del usuario logueado (comportamiento original de Servicios).
+    uid : si True, ``message_id`` es el UID del mensaje en lugar del número
+        de secuencia; usarlo cuando el registro se vuelve a pedir más tarde
+        (p. ej. con :func:`load_body`), porque los números de secuencia
+        cambian al borrarse mensajes del buzón.
+    mailbox : buzón IMAP a escanear.
+    chunk_size : mensajes por FETCH en la fase de encabezados; los mensajes
+        completos se piden en lotes de hasta ``imap_fetch.BODY_CHUNK_SIZE``.
+    parse_workers : procesos de parseo (ver :func:`iter_scan_inbox`).
+
+    Los filtros se envían al servidor con :func:`build_search_criteria` y se
+    vuelven a comprobar en cliente sobre los encabezados descargados. Para
+    mostrar resultados a medida que llegan usar :func:`iter_scan_inbox`.
+    """
+    return list(iter_scan_inbox(
+        email_session,
+        desde,
+        hasta,
+        task_numbers=task_numbers,
+        remitente=remitente,
+        asunto_contiene=asunto_contiene,
+        require_user_email=require_user_email,
+        mailbox=mailbox,
+        uid=uid,
+        chunk_size=chunk_size,
+        parse_workers=parse_workers,
+    ))
+
+
+def load_body(
+    email_session: Dict[str, str],
+    message_id: str,
+    *,
+    mailbox: str = "INBOX",
+    uid: bool = False,
+) -> str:
+    """Descarga un solo mensaje y retorna su texto completo.
+
+    Pensado para el panel de vista previa cuando el registro se obtuvo con
+    ``body_chars``. ``message_id`` es el número de secuencia del escaneo (o
+    el UID si ``uid`` es True). Usa ``BODY.PEEK[]`` para no marcarlo leído.
+    """
+    with mail_ingest.open_mailbox(email_session, mailbox, readonly=True) as conexion:
+        for _msg_id, item in imap_fetch.fetch_all(
+            conexion, [message_id], "(BODY.PEEK[])", uid=uid
+        ):
+            raw = item.get("RFC822")
+            if raw is not None:
+                return extract_text(email.message_from_bytes(raw))
+        return ""
 
-                cuerpo = extract_text(msg)
-                parsed = parse_body(cuerpo, address)
 
-                if require_user_email and not parsed.get("correo_usuario_encontrado"):
-                    logger.debug("Correo descartado (sin email usuario): %s", msg_id)
-                    continue
+def scan_reassignments(
+    email_session: Dict[str, str],
+    desde: date,
+    *,
+    remitente: str = REASIGNACION_REMITENTE,
+    mailbox: str = "INBOX",
+    parse_workers: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Tareas de los correos de reasignación recibidos desde ``desde``.
 
-                mensaje_id_str = msg_id.decode() if isinstance(msg_id, bytes) else str(msg_id)
-                emails_header = _extract_emails_from_header(msg)
-
-                registro: Dict[str, Any] = {
-                    "message_id": mensaje_id_str,
-                    "raw_hash": raw_hash(raw),
-                    "fecha": fecha,
-                    "asunto": subject,
-                    "from": from_header,
-                    "task_number": task_num,
-                    "body": cuerpo,
-                    "proveedor": parsed.get("proveedor", "N/D"),
-                    "mecanico": parsed.get("mecanico_nombre", "N/D"),
-                    "telefono": parsed.get("mecanico_telefono", "N/D"),
-                    "inf_vehiculo": parsed.get("inf_vehiculo", "N/D"),
-                    "factura": parsed.get("factura", ""),
-                    "oc": parsed.get("oc", ""),
-                    "ingreso": parsed.get("ingreso", ""),
-                    "ruc": parsed.get("ruc", ""),
-                    "fecha_orden": parsed.get("fecha_orden", ""),
-                    "emails": emails_header,
-                }
-                resultados.append(registro)
-                logger.info(
-                    "Correo encontrado: id=%s tarea=%s remitente=%s",
-                    mensaje_id_str,
-                    task_num,
-                    from_header or "(sin remitente)",
-                )
-        return resultados
-    finally:
-        try:
-            conexion.logout()
-        except Exception:
-            pass
+    Cada tarea tiene la forma de :func:`core.mail_parse.parse_reassignments`
+    y salen en el orden de llegada de los correos. Los correos ya parseados
+    en la sesión se toman de ``mail_ingest.cache``; del resto se descarga
+    primero el ``Message-ID`` y después el mensaje completo.
+    """
+    address = email_session.get("address", "")
+    criterios = ["SINCE", desde.strftime("%d-%b-%Y")]
+    remitente_q = _imap_quote(remitente)
+    if remitente_q:
+        criterios[:0] = ["FROM", remitente_q]
+    with mail_ingest.open_mailbox(email_session, mailbox) as conexion:
+        ids = mail_ingest.search(conexion, criterios)
+        pedidos = [
+            (msg_id, mail_ingest.message_id(msg))
+            for lote in mail_ingest.iter_headers(conexion, ids, ("MESSAGE-ID",))
+            for msg_id, msg in lote
+        ]
+        tareas: List[Dict[str, Any]] = []
+        for _msg_id, encontradas in mail_ingest.iter_extract(
+            conexion, pedidos, EXTRACTOR_REASIGNACION, address, parse_workers=parse_workers
+        ):
+            tareas.extend(encontradas)
+        return tareas
 
 
 __all__ = [
@@ -266,5 +602,13 @@ __all__ = [
     "parse_header_date",
     "normalize_for_search",
     "raw_hash",
+    "header_info",
+    "CAMPOS_REGISTRO",
+    "build_search_criteria",
+    "iter_scan_inbox",
     "scan_inbox",
+    "load_body",
+    "scan_reassignments",
+    "EXTRACTOR_TAREA",
+    "EXTRACTOR_REASIGNACION",
 ]
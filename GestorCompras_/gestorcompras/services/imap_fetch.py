@@ -0,0 +1,168 @@
+"""FETCH IMAP por lotes usando conjuntos de mensajes con rangos.
+
+En lugar de un ``FETCH`` (y un round-trip de red) por mensaje, agrupa los
+IDs en conjuntos compactos (``1:40,42,45:60``) de tamaño configurable y
+separa la respuesta multi-parte de ``imaplib`` en un registro por mensaje.
+
+Cada registro es un ``dict`` con los ítems devueltos por el servidor. Se
+normalizan los nombres más usados:
+
+* ``UID`` y ``RFC822.SIZE`` como ``int``.
+* ``HEADER``: literal de ``BODY[HEADER...]`` / ``RFC822.HEADER``.
+* ``RFC822``: literal de ``RFC822`` / ``BODY[]``.
+"""
+from __future__ import annotations
+
+import imaplib
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+# Mensajes por FETCH cuando solo se piden encabezados.
+DEFAULT_CHUNK_SIZE = 200
+# Mensajes por FETCH al descargar mensajes completos (pueden traer adjuntos).
+BODY_CHUNK_SIZE = 25
+
+_RX_INICIO = re.compile(rb"^\s*(\d+)\s+\(")
+_RX_ITEM = re.compile(
+    rb"""([A-Za-z0-9.]+(?:\[[^\]]*\](?:<\d+>)?)?)\s+   # nombre del item
+        ("(?:[^"\\]|\\.)*"|\([^()]*(?:\([^()]*\)[^()]*)*\)|\{\d+\}|[^\s()]+)""",
+    re.X,
+)
+_RX_LITERAL = re.compile(rb"\{(\d+)\}\s*$")
+
+
+def _as_int(value: Any) -> int:
+    if isinstance(value, bytes):
+        value = value.decode()
+    return int(value)
+
+
+def compress_message_set(ids: Iterable[Any]) -> str:
+    """Convierte IDs en un conjunto IMAP con rangos: ``[1,2,3,7]`` -> ``1:3,7``."""
+    numeros = sorted({_as_int(i) for i in ids})
+    partes: list[str] = []
+    inicio = previo = None
+    for numero in numeros:
+        if previo is not None and numero == previo + 1:
+            previo = numero
+            continue
+        if inicio is not None:
+            partes.append(str(inicio) if inicio == previo else f"{inicio}:{previo}")
+        inicio = previo = numero
+    if inicio is not None:
+        partes.append(str(inicio) if inicio == previo else f"{inicio}:{previo}")
+    return ",".join(partes)
+
+
+def _normalizar_nombre(nombre: str) -> str:
+    nombre = nombre.upper()
+    if nombre == "RFC822.HEADER" or nombre.startswith("BODY[HEADER"):
+        return "HEADER"
+    if nombre in ("RFC822", "BODY[]"):
+        return "RFC822"
+    return nombre
+
+
+def _leer_items(texto: bytes, registro: Dict[str, Any], literal: bytes | None) -> None:
+    for match in _RX_ITEM.finditer(texto):
+        nombre = _normalizar_nombre(match.group(1).decode("ascii", "ignore"))
+        valor = match.group(2)
+        if valor.startswith(b"{"):
+            if literal is not None:
+                registro[nombre] = literal
+            continue
+        if nombre in ("UID", "RFC822.SIZE"):
+            registro[nombre] = int(valor)
+        elif valor.upper() == b"NIL":
+            registro[nombre] = None
+        else:
+            registro[nombre] = valor.decode("utf-8", "replace").strip('"')
+
+
+def parse_fetch_response(fetch_data: List[Any]) -> List[Tuple[int, Dict[str, Any]]]:
+    """Separa la respuesta de ``IMAP4.fetch``/``uid('FETCH')`` por mensaje.
+
+    Retorna pares ``(numero_de_secuencia, registro)`` en el orden recibido.
+    Soporta varios literales por mensaje y ítems posteriores al literal
+    (``... RFC822 {n}`` seguido de ``UID 5)``).
+    """
+    mensajes: List[Tuple[int, Dict[str, Any]]] = []
+    actual: Dict[str, Any] | None = None
+    for parte in fetch_data:
+        if parte is None:
+            continue
+        if isinstance(parte, tuple):
+            texto, literal = parte[0], parte[1]
+        else:
+            texto, literal = parte, None
+        inicio = _RX_INICIO.match(texto)
+        if inicio:
+            actual = {}
+            mensajes.append((int(inicio.group(1)), actual))
+            texto = texto[inicio.end():]
+        if actual is None:
+            continue
+        if literal is not None and not _RX_LITERAL.search(texto):
+            literal = None
+        _leer_items(texto, actual, literal)
+    return mensajes
+
+
+def fetch_chunks(
+    conexion: imaplib.IMAP4,
+    ids: Iterable[Any],
+    items: str,
+    *,
+    uid: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    """Descarga ``items`` para ``ids`` con un FETCH por lote.
+
+    ``ids`` son números de secuencia o UIDs (según ``uid``; en ese modo el
+    servidor siempre incluye el ítem ``UID`` en la respuesta). Por cada lote
+    se produce una lista ``(id, registro)`` respetando el orden de ``ids``;
+    los mensajes que el servidor no devuelve (p. ej. ya eliminados) se
+    omiten.
+    """
+    orden = [_as_int(i) for i in ids]
+    chunk_size = max(1, int(chunk_size))
+    for inicio in range(0, len(orden), chunk_size):
+        lote = orden[inicio:inicio + chunk_size]
+        conjunto = compress_message_set(lote)
+        if uid:
+            status, data = conexion.uid("FETCH", conjunto, items)
+        else:
+            status, data = conexion.fetch(conjunto, items)
+        if status != "OK":
+            raise RuntimeError(f"FETCH falló para el conjunto {conjunto}: {status}")
+        recibidos: Dict[int, Dict[str, Any]] = {}
+        for secuencia, registro in parse_fetch_response(data):
+            clave = registro.get("UID") if uid else secuencia
+            if clave is None:
+                continue
+            # Respuestas FETCH no solicitadas (p. ej. cambios de FLAGS) se fusionan.
+            recibidos.setdefault(clave, {}).update(registro)
+        yield [(i, recibidos[i]) for i in lote if i in recibidos]
+
+
+def fetch_all(
+    conexion: imaplib.IMAP4,
+    ids: Iterable[Any],
+    items: str,
+    *,
+    uid: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Como :func:`fetch_chunks` pero produce los mensajes uno a uno."""
+    for lote in fetch_chunks(conexion, ids, items, uid=uid, chunk_size=chunk_size):
+        yield from lote
+
+
+__all__ = [
+    "DEFAULT_CHUNK_SIZE",
+    "BODY_CHUNK_SIZE",
+    "compress_message_set",
+    "parse_fetch_response",
+    "fetch_chunks",
+    "fetch_all",
+]
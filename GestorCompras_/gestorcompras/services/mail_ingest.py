@@ -0,0 +1,530 @@
+"""Ingesta de correo IMAP compartida por los escaneos.
+
+Actua. Tareas, Reasignación de Servicios y la carga de reasignaciones por
+correo siguen los mismos pasos: conectarse, ``SEARCH``, descargar los
+encabezados, pedir el mensaje completo solo de los que interesan y extraer
+sus datos. Este módulo implementa esos pasos una vez; cada caso de uso aporta
+sus criterios de búsqueda, su filtro de encabezados y un :class:`Extractor`.
+
+Los datos que produce cada extractor quedan en :data:`cache`, en memoria y
+por ``Message-ID``: un mensaje que otra ventana ya descargó y parseó durante
+la sesión (p. ej. el escaneo de Actua. Tareas antes de abrir Reasignación)
+no se vuelve a pedir al servidor.
+
+Tras :func:`start_session` (al iniciar sesión en la aplicación) la conexión
+autenticada de la cuenta se conserva entre búsquedas (ver
+:class:`ImapSession`); cada búsqueda paga solo el ``SELECT`` en lugar de
+TLS, ``LOGIN`` y ``LOGOUT``.
+"""
+from __future__ import annotations
+
+import email
+import imaplib
+import logging
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from email.message import Message
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+
+from gestorcompras.services import imap_fetch, parse_pool
+
+logger = logging.getLogger(__name__)
+
+IMAP_HOST = "pop.telconet.ec"
+IMAP_PORT = 993
+# Mensajes parseados que se conservan en memoria entre escaneos.
+CACHE_MAX_MENSAJES = 1000
+# Segundos entre ``NOOP`` mientras la conexión de la sesión está libre.
+KEEPALIVE_SEGUNDOS = 120
+# Sin búsquedas durante este tiempo la conexión se cierra; la siguiente
+# búsqueda vuelve a conectarse.
+SESION_MAX_INACTIVA = 20 * 60
+# Conexiones simultáneas para descargas grandes (ver :func:`fetch_parallel`)
+# y tope que no se supera aunque se pidan más, para no saturar el servidor.
+BACKFILL_CONEXIONES = 3
+MAX_CONEXIONES = 4
+# Lotes descargados por conexión que pueden esperar al consumidor.
+_ADELANTO_LOTES = 2
+
+# Errores que indican que una conexión reutilizada ya no sirve (el servidor
+# la cerró por inactividad, se cayó la red, etc.).
+_ERRORES_CONEXION = (imaplib.IMAP4.abort, OSError, EOFError)
+
+
+class Extractor(NamedTuple):
+    """Datos que un caso de uso extrae de cada mensaje completo.
+
+    ``parse(msg_id, raw, address)`` retorna ``(msg_id, datos)``, con
+    ``datos`` en ``None`` si el mensaje no sirve. Debe ser una función de
+    nivel de módulo (se envía a :mod:`parse_pool`). ``nombre`` separa sus
+    resultados en la caché.
+    """
+
+    nombre: str
+    parse: Callable[[int, bytes | None, str], Tuple[int, Any]]
+
+
+class MessageCache:
+    """Caché LRU de datos extraídos por cuenta, extractor y ``Message-ID``.
+
+    Es segura entre hilos. Los valores se comparten entre quienes los leen,
+    que no deben modificarlos.
+    """
+
+    def __init__(self, max_mensajes: int = CACHE_MAX_MENSAJES):
+        self.max_mensajes = max_mensajes
+        self._datos: OrderedDict[Tuple[str, str, str], Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clave(cuenta: str, extractor: str, message_id: str) -> Tuple[str, str, str]:
+        return cuenta.strip().lower(), extractor, message_id.strip()
+
+    def get(self, cuenta: str, extractor: str, message_id: str | None) -> Any | None:
+        if not message_id or not message_id.strip():
+            return None
+        clave = self._clave(cuenta, extractor, message_id)
+        with self._lock:
+            datos = self._datos.get(clave)
+            if datos is not None:
+                self._datos.move_to_end(clave)
+            return datos
+
+    def put(self, cuenta: str, extractor: str, message_id: str | None, datos: Any) -> None:
+        """Guarda ``datos``; sin ``message_id`` (o sin datos) no hace nada."""
+        if not message_id or not message_id.strip() or datos is None:
+            return
+        clave = self._clave(cuenta, extractor, message_id)
+        with self._lock:
+            self._datos[clave] = datos
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_mensajes:
+                self._datos.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+
+cache = MessageCache()
+
+
+def _logout(conexion: imaplib.IMAP4) -> None:
+    try:
+        conexion.logout()
+    except Exception:
+        pass
+
+
+class ImapSession:
+    """Conexión IMAP autenticada de una cuenta, reutilizada entre búsquedas.
+
+    La usa un solo hilo a la vez: :func:`open_mailbox` la toma si está libre
+    y, si otra búsqueda la ocupa, abre una conexión aparte en lugar de
+    esperar. Un hilo en segundo plano envía ``NOOP`` cada ``keepalive``
+    segundos mientras está libre y la cierra tras ``max_inactiva`` segundos
+    sin uso. Si el servidor la cerró, la siguiente búsqueda se reconecta sin
+    que el llamador lo note.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        password: str,
+        *,
+        keepalive: float = KEEPALIVE_SEGUNDOS,
+        max_inactiva: float = SESION_MAX_INACTIVA,
+    ):
+        self.address = address
+        self.password = password
+        self.keepalive = keepalive
+        self.max_inactiva = max_inactiva
+        self._lock = threading.Lock()
+        self._conexion: imaplib.IMAP4 | None = None
+        self._ultimo_uso = time.monotonic()
+        self._cerrada = threading.Event()
+        self._hilo = threading.Thread(
+            target=self._mantener, name=f"imap-keepalive-{address}", daemon=True
+        )
+        self._hilo.start()
+
+    def _conectar(self) -> imaplib.IMAP4:
+        conexion = imaplib.IMAP4_SSL(IMAP_HOST, IMAP_PORT)
+        try:
+            conexion.login(self.address, self.password)
+        except BaseException:
+            _logout(conexion)
+            raise
+        return conexion
+
+    def _descartar(self) -> None:
+        if self._conexion is not None:
+            _logout(self._conexion)
+            self._conexion = None
+
+    def acquire(self, mailbox: str = "INBOX", *, readonly: bool = False) -> imaplib.IMAP4 | None:
+        """Toma la conexión con ``mailbox`` seleccionado; ``None`` si está ocupada.
+
+        Devolverla con :meth:`release`.
+        """
+        if self._cerrada.is_set() or not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if self._conexion is not None:
+                try:
+                    self._conexion.select(mailbox, readonly=readonly)
+                    return self._conexion
+                except _ERRORES_CONEXION:
+                    logger.info("Conexión IMAP de %s cerrada; se reconecta", self.address)
+                    self._descartar()
+            self._conexion = self._conectar()
+            self._conexion.select(mailbox, readonly=readonly)
+            return self._conexion
+        except BaseException:
+            self._descartar()
+            self._lock.release()
+            raise
+
+    def release(self, *, descartar: bool = False) -> None:
+        """Libera la conexión; con ``descartar`` se cierra (quedó en un estado dudoso)."""
+        if descartar:
+            self._descartar()
+        self._ultimo_uso = time.monotonic()
+        self._lock.release()
+
+    def _mantener(self) -> None:
+        while not self._cerrada.wait(self.keepalive):
+            if not self._lock.acquire(blocking=False):
+                continue
+            try:
+                if self._conexion is None:
+                    continue
+                if time.monotonic() - self._ultimo_uso >= self.max_inactiva:
+                    logger.info("Conexión IMAP de %s inactiva; se cierra", self.address)
+                    self._descartar()
+                    continue
+                try:
+                    self._conexion.noop()
+                except (*_ERRORES_CONEXION, imaplib.IMAP4.error):
+                    self._descartar()
+            finally:
+                self._lock.release()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Detiene el *keep-alive* y cierra la conexión si está libre."""
+        self._cerrada.set()
+        if self._lock.acquire(timeout=timeout):
+            try:
+                self._descartar()
+            finally:
+                self._lock.release()
+
+
+_sesiones: Dict[str, ImapSession] = {}
+_sesiones_lock = threading.Lock()
+
+
+def _credenciales(email_session: Dict[str, str]) -> Tuple[str, str]:
+    address = email_session.get("address", "")
+    password = email_session.get("password", "")
+    if not address or not password:
+        raise ValueError("Credenciales de correo incompletas.")
+    return address, password
+
+
+def start_session(email_session: Dict[str, str]) -> ImapSession:
+    """Reutiliza una conexión para la cuenta de ``email_session``.
+
+    No se conecta hasta la primera búsqueda. Si la cuenta ya tenía sesión
+    con otra contraseña, la anterior se cierra.
+    """
+    address, password = _credenciales(email_session)
+    with _sesiones_lock:
+        actual = _sesiones.get(address.lower())
+        if actual is not None and actual.password == password:
+            return actual
+        if actual is not None:
+            actual.close()
+        sesion = _sesiones[address.lower()] = ImapSession(address, password)
+        return sesion
+
+
+def close_sessions() -> None:
+    """Cierra las conexiones abiertas con :func:`start_session`."""
+    with _sesiones_lock:
+        sesiones = list(_sesiones.values())
+        _sesiones.clear()
+    for sesion in sesiones:
+        sesion.close()
+
+
+def _sesion(address: str, password: str) -> ImapSession | None:
+    with _sesiones_lock:
+        sesion = _sesiones.get(address.lower())
+    if sesion is not None and sesion.password == password:
+        return sesion
+    return None
+
+
+@contextmanager
+def open_mailbox(
+    email_session: Dict[str, str],
+    mailbox: str = "INBOX",
+    *,
+    readonly: bool = False,
+) -> Iterator[imaplib.IMAP4]:
+    """Conexión autenticada con ``mailbox`` seleccionado.
+
+    Usa la conexión de la sesión de la cuenta (:func:`start_session`) si
+    existe y está libre; si no, abre una que se cierra al salir. Con
+    ``readonly`` el buzón se abre con ``EXAMINE`` y nada se marca como
+    leído. Lanza ``ValueError`` si faltan credenciales.
+    """
+    address, password = _credenciales(email_session)
+    sesion = _sesion(address, password)
+    conexion = sesion.acquire(mailbox, readonly=readonly) if sesion is not None else None
+    if conexion is not None:
+        descartar = True
+        try:
+            yield conexion
+            descartar = False
+        except GeneratorExit:
+            # El consumidor dejó de iterar entre comandos: la conexión sirve.
+            descartar = False
+            raise
+        finally:
+            sesion.release(descartar=descartar)
+        return
+
+    conexion = imaplib.IMAP4_SSL(IMAP_HOST, IMAP_PORT)
+    try:
+        conexion.login(address, password)
+        conexion.select(mailbox, readonly=readonly)
+        yield conexion
+    finally:
+        _logout(conexion)
+
+
+def uidvalidity(conexion: imaplib.IMAP4, mailbox: str) -> int:
+    """``UIDVALIDITY`` de ``mailbox``, ya seleccionado en ``conexion``.
+
+    Se toma de la respuesta al ``SELECT`` o, si no vino, se pide con
+    ``STATUS``. Lanza ``RuntimeError`` si el servidor no lo informa.
+    """
+    _typ, data = conexion.response("UIDVALIDITY")
+    if data and data[0]:
+        return int(data[0])
+    status, data = conexion.status(mailbox, "(UIDVALIDITY)")
+    if status == "OK" and data and data[0]:
+        texto = data[0].decode() if isinstance(data[0], bytes) else str(data[0])
+        match = re.search(r"UIDVALIDITY\s+(\d+)", texto)
+        if match:
+            return int(match.group(1))
+    raise RuntimeError("El servidor no informó UIDVALIDITY para el buzón")
+
+
+def search(conexion: imaplib.IMAP4, criterios: Sequence[str], *, uid: bool = False) -> List[int]:
+    """IDs (o UIDs) que cumplen ``criterios``, en el orden del servidor."""
+    if uid:
+        status, data = conexion.uid("SEARCH", None, *criterios)
+    else:
+        status, data = conexion.search(None, *criterios)
+    if status != "OK":
+        raise RuntimeError("No se pudo obtener el listado de correos")
+    return [int(i) for i in data[0].split()]
+
+
+def iter_headers(
+    conexion: imaplib.IMAP4,
+    ids: Iterable[int],
+    campos: Sequence[str],
+    *,
+    uid: bool = False,
+    chunk_size: int = imap_fetch.DEFAULT_CHUNK_SIZE,
+) -> Iterator[List[Tuple[int, Message]]]:
+    """Lotes ``[(id, encabezados)]`` con solo los ``campos`` pedidos.
+
+    Usa ``BODY.PEEK``, así que no marca mensajes como leídos. Los mensajes
+    que el servidor no devuelve se omiten.
+    """
+    items = f"(BODY.PEEK[HEADER.FIELDS ({' '.join(campos)})])"
+    for lote in imap_fetch.fetch_chunks(conexion, ids, items, uid=uid, chunk_size=chunk_size):
+        yield [
+            (msg_id, email.message_from_bytes(item["HEADER"]))
+            for msg_id, item in lote
+            if item.get("HEADER") is not None
+        ]
+
+
+def fetch_parallel(
+    email_session: Dict[str, str],
+    ids: Sequence[int],
+    items: str,
+    *,
+    mailbox: str = "INBOX",
+    uid: bool = True,
+    readonly: bool = True,
+    conexiones: int = BACKFILL_CONEXIONES,
+    chunk_size: int = imap_fetch.BODY_CHUNK_SIZE,
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Como ``imap_fetch.fetch_all`` pero repartido en varias conexiones.
+
+    ``ids`` se divide en rangos de ``chunk_size`` y la conexión ``i`` (de
+    ``conexiones``, como máximo :data:`MAX_CONEXIONES`) descarga los rangos
+    ``i``, ``i + conexiones``, ... Los mensajes salen en el orden de ``ids``:
+    cada conexión adelanta solo unos pocos lotes, así que la memoria no crece
+    con el rango y todas las conexiones trabajan sobre la parte del buzón
+    que el consumidor va a pedir a continuación.
+
+    Cada conexión es propia (no usa la de la sesión) y se cierra al terminar
+    o al cerrar el iterador. Un error en cualquiera de ellas se propaga al
+    consumidor.
+    """
+    chunk_size = max(1, int(chunk_size))
+    rangos = [list(ids[i:i + chunk_size]) for i in range(0, len(ids), chunk_size)]
+    conexiones = max(1, min(conexiones, MAX_CONEXIONES, len(rangos)))
+    if not rangos:
+        return
+    address, password = _credenciales(email_session)
+    colas: List[queue.Queue] = [queue.Queue(maxsize=_ADELANTO_LOTES) for _ in range(conexiones)]
+    parar = threading.Event()
+
+    def _entregar(cola: queue.Queue, valor: Any) -> bool:
+        while not parar.is_set():
+            try:
+                cola.put(valor, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _descargar(numero: int) -> None:
+        cola = colas[numero]
+        conexion = None
+        try:
+            conexion = imaplib.IMAP4_SSL(IMAP_HOST, IMAP_PORT)
+            conexion.login(address, password)
+            conexion.select(mailbox, readonly=readonly)
+            for rango in rangos[numero::conexiones]:
+                if parar.is_set():
+                    return
+                recibidos: List[Tuple[int, Dict[str, Any]]] = []
+                for lote in imap_fetch.fetch_chunks(
+                    conexion, rango, items, uid=uid, chunk_size=len(rango)
+                ):
+                    recibidos.extend(lote)
+                if not _entregar(cola, recibidos):
+                    return
+        except BaseException as exc:
+            _entregar(cola, exc)
+        finally:
+            if conexion is not None:
+                _logout(conexion)
+
+    hilos = [
+        threading.Thread(target=_descargar, args=(n,), name=f"imap-fetch-{n}", daemon=True)
+        for n in range(conexiones)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    try:
+        for posicion in range(len(rangos)):
+            recibidos = colas[posicion % conexiones].get()
+            if isinstance(recibidos, BaseException):
+                raise recibidos
+            yield from recibidos
+    finally:
+        parar.set()
+        for hilo in hilos:
+            hilo.join()
+
+
+def message_id(msg: Message) -> str:
+    """Encabezado ``Message-ID`` de ``msg`` (vacío si no tiene)."""
+    return (msg.get("Message-ID") or "").strip()
+
+
+def iter_extract(
+    conexion: imaplib.IMAP4,
+    pedidos: Sequence[Tuple[int, str]],
+    extractor: Extractor,
+    address: str,
+    *,
+    uid: bool = False,
+    items: str = "(RFC822)",
+    chunk_size: int = imap_fetch.BODY_CHUNK_SIZE,
+    parse_workers: int | None = None,
+    cache: MessageCache = cache,
+) -> Iterator[Tuple[int, Any]]:
+    """Produce ``(id, datos)`` para cada ``(id, message_id)`` de ``pedidos``.
+
+    Los resultados salen en el orden de ``pedidos``. Los mensajes cuyo
+    ``message_id`` ya está en la caché no se descargan; el resto se pide por
+    lotes a medida que el consumidor avanza y se parsea con ``extractor``
+    (en otros procesos si son muchos, ver :mod:`parse_pool`). Se omiten los
+    mensajes que el servidor no devuelve y aquellos en que el extractor no
+    obtuvo datos.
+    """
+    listos: Dict[int, Any] = {}
+    faltan: Dict[int, str] = {}
+    for msg_id, mid in pedidos:
+        datos = cache.get(address, extractor.nombre, mid)
+        if datos is None:
+            faltan[msg_id] = mid
+        else:
+            listos[msg_id] = datos
+    posicion = {msg_id: i for i, msg_id in enumerate(faltan)}
+    descargas = imap_fetch.fetch_all(conexion, list(faltan), items, uid=uid, chunk_size=chunk_size)
+    parseados = parse_pool.map_ordered(
+        extractor.parse,
+        ((descargado, item.get("RFC822"), address) for descargado, item in descargas),
+        workers=parse_pool.workers_para(len(faltan), parse_workers),
+    )
+    ultimo = -1
+    try:
+        for msg_id, _mid in pedidos:
+            if posicion.get(msg_id, -1) > ultimo:
+                for descargado, datos in parseados:
+                    ultimo = posicion[descargado]
+                    if datos is not None:
+                        listos[descargado] = datos
+                        cache.put(address, extractor.nombre, faltan[descargado], datos)
+                    # Si el servidor omitió este mensaje, no se sigue de largo.
+                    if ultimo >= posicion[msg_id]:
+                        break
+            datos = listos.pop(msg_id, None)
+            if datos is not None:
+                yield msg_id, datos
+    finally:
+        parseados.close()
+
+
+__all__ = [
+    "IMAP_HOST",
+    "IMAP_PORT",
+    "CACHE_MAX_MENSAJES",
+    "KEEPALIVE_SEGUNDOS",
+    "SESION_MAX_INACTIVA",
+    "BACKFILL_CONEXIONES",
+    "MAX_CONEXIONES",
+    "Extractor",
+    "MessageCache",
+    "cache",
+    "ImapSession",
+    "start_session",
+    "close_sessions",
+    "open_mailbox",
+    "uidvalidity",
+    "search",
+    "iter_headers",
+    "fetch_parallel",
+    "message_id",
+    "iter_extract",
+]
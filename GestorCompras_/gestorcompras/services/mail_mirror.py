@@ -0,0 +1,377 @@
+"""Espejo local e indexado del buzón IMAP.
+
+Es el único almacén persistente de correo: las búsquedas repetidas del
+diálogo de escaneo (rangos de fecha que se solapan, varias veces al día) se
+resuelven con consultas a SQLite en lugar de volver a descargar y parsear
+los mismos correos:
+
+* :func:`refresh` agrega al espejo los encabezados de los UIDs que aún no
+  tiene (y hace *backfill* si se pide un rango anterior a lo ya cubierto).
+  No descarga cuerpos ni adjuntos.
+* :func:`iter_search` / :func:`search` filtran localmente y devuelven
+  registros con la misma forma que :func:`email_task_scanner.scan_inbox`.
+  El mensaje completo se descarga (una sola vez) solo para los que
+  coinciden con los filtros.
+* :func:`evict` limita el espejo por antigüedad y por tamaño.
+* :func:`start_background_refresh` mantiene el espejo al día en un hilo
+  hasta :func:`stop_background_refresh`.
+"""
+from __future__ import annotations
+
+import email
+import imaplib
+import logging
+import threading
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta
+from email.message import Message
+from email.utils import parseaddr
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+from gestorcompras.data import mail_mirror_repo
+from gestorcompras.services import imap_fetch, mail_ingest, parse_pool
+from gestorcompras.services.email_task_scanner import (
+    CAMPOS_REGISTRO,
+    DEFAULT_TZ,
+    EXTRACTOR_TAREA,
+    FETCH_ENCABEZADOS,
+    header_info,
+    normalize_for_search,
+)
+
+logger = logging.getLogger(__name__)
+
+# Días hacia atrás que se sincronizan la primera vez si no se indica otro rango.
+REFRESCO_INICIAL_DIAS = 30
+# Política de expulsión: antigüedad máxima y tamaño máximo (datos + crudo comprimido).
+RETENCION_DIAS = 180
+MAX_BYTES = 256 * 1024 * 1024
+# Segundos entre refrescos del hilo en segundo plano.
+INTERVALO_REFRESCO = 300
+# Un *backfill* con al menos esta cantidad de mensajes se descarga por varias
+# conexiones en paralelo (ver ``mail_ingest.fetch_parallel``).
+BACKFILL_MIN_MENSAJES = 200
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+_hilos: Dict[str, threading.Event] = {}
+
+
+def _lock(cuenta: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(cuenta.lower(), threading.Lock())
+
+
+def _fila(uid: int, msg: Message) -> Dict[str, Any]:
+    datos = header_info(msg, DEFAULT_TZ)
+    return {
+        "uid": uid,
+        "message_id": datos["msgid"],
+        "fecha": datos["fecha"],
+        "remitente_email": parseaddr(datos["from"])[1].lower(),
+        "asunto_norm": normalize_for_search(datos["asunto"]),
+        "datos": datos,
+    }
+
+
+def refresh(
+    email_session: Dict[str, str],
+    desde: datetime | date | None = None,
+    *,
+    mailbox: str = "INBOX",
+    chunk_size: int = imap_fetch.DEFAULT_CHUNK_SIZE,
+    conexiones: int | None = None,
+) -> int:
+    """Agrega al espejo los encabezados de los mensajes nuevos; retorna cuántos.
+
+    Si ``desde`` es anterior a la fecha ya cubierta por el espejo, se
+    descargan también los mensajes faltantes desde esa fecha. Solo se piden
+    los encabezados (``BODY.PEEK[HEADER.FIELDS]``) sobre el buzón en solo
+    lectura, por lo que el refresco no marca correos como leídos ni baja
+    adjuntos. Desde :data:`BACKFILL_MIN_MENSAJES` mensajes la descarga se
+    reparte en ``conexiones`` conexiones IMAP (por defecto
+    ``mail_ingest.BACKFILL_CONEXIONES``; 1 = solo la conexión principal).
+    """
+    address = email_session.get("address", "")
+    if isinstance(desde, datetime):
+        desde = desde.astimezone(DEFAULT_TZ).date()
+
+    with _lock(address), mail_ingest.open_mailbox(
+        email_session, mailbox, readonly=True
+    ) as conexion:
+        uidvalidity = mail_ingest.uidvalidity(conexion, mailbox)
+        estado = mail_mirror_repo.get_state(address, mailbox)
+        if estado is not None and estado["uidvalidity"] != uidvalidity:
+            logger.info("UIDVALIDITY cambió; se reconstruye el espejo de %s", mailbox)
+            mail_mirror_repo.reset(address, mailbox)
+            estado = None
+        last_uid = estado["last_uid"] if estado else 0
+        cubierto = estado["cubierto_desde"] if estado else None
+        if desde is None:
+            desde = cubierto or (datetime.now(DEFAULT_TZ).date()
+                                 - timedelta(days=REFRESCO_INICIAL_DIAS))
+
+        backfill = cubierto is None or desde < cubierto
+        if backfill:
+            criterios = ["SINCE", desde.strftime("%d-%b-%Y")]
+        else:
+            criterios = ["UID", f"{last_uid + 1}:*"]
+        uids = mail_ingest.search(conexion, criterios, uid=True)
+        if backfill:
+            conocidos = mail_mirror_repo.known_uids(address, mailbox)
+            pendientes = [u for u in uids if u not in conocidos]
+            cubierto = desde
+        else:
+            # ``n:*`` siempre incluye el último mensaje aunque su UID sea menor.
+            pendientes = [u for u in uids if u > last_uid]
+        pendientes.reverse()
+        if conexiones is None:
+            conexiones = mail_ingest.BACKFILL_CONEXIONES
+        if backfill and conexiones > 1 and len(pendientes) >= BACKFILL_MIN_MENSAJES:
+            # Rangos de UID repartidos entre conexiones; el orden se conserva.
+            recibidos = mail_ingest.fetch_parallel(
+                email_session, pendientes, FETCH_ENCABEZADOS,
+                mailbox=mailbox, conexiones=conexiones, chunk_size=chunk_size,
+            )
+        else:
+            recibidos = imap_fetch.fetch_all(
+                conexion, pendientes, FETCH_ENCABEZADOS, uid=True, chunk_size=chunk_size
+            )
+        guardados = 0
+        filas: list[Dict[str, Any]] = []
+        for uid, item in recibidos:
+            if item.get("HEADER") is None:
+                continue
+            filas.append(_fila(uid, email.message_from_bytes(item["HEADER"])))
+            if len(filas) >= chunk_size:
+                guardados += mail_mirror_repo.save_headers(address, mailbox, filas)
+                filas = []
+        guardados += mail_mirror_repo.save_headers(address, mailbox, filas)
+        mail_mirror_repo.save_state(
+            address, mailbox, uidvalidity, max([last_uid, *uids]), cubierto
+        )
+        logger.info("Espejo %s/%s: %d mensajes nuevos", address, mailbox, guardados)
+        return guardados
+
+
+def _completar(
+    conexion: imaplib.IMAP4,
+    address: str,
+    mailbox: str,
+    filas: List[tuple[int, datetime, Dict[str, Any]]],
+    parse_workers: int | None,
+) -> None:
+    """Descarga y guarda el cuerpo de las ``filas`` que solo tienen encabezados.
+
+    Los datos del cuerpo se agregan a cada fila en el lugar; las que el
+    servidor ya no tiene se eliminan del espejo y quedan sin ``body``.
+    """
+    faltan = {uid: datos for uid, _fecha, datos in filas if "body" not in datos}
+    if not faltan:
+        return
+    crudos: Dict[int, bytes] = {}
+
+    def _descargas() -> Iterator[tuple[int, bytes, str]]:
+        for uid, item in imap_fetch.fetch_all(
+            conexion, list(faltan), "(BODY.PEEK[])", uid=True, chunk_size=len(faltan)
+        ):
+            raw = item.get("RFC822")
+            if raw is not None:
+                crudos[uid] = raw
+                yield uid, raw, address
+
+    completos: list[tuple[int, bytes, Dict[str, Any]]] = []
+    for uid, cuerpo in parse_pool.map_ordered(
+        EXTRACTOR_TAREA.parse, _descargas(),
+        workers=parse_pool.workers_para(len(faltan), parse_workers),
+    ):
+        datos = faltan.pop(uid)
+        # Mismo valor que ``EXTRACTOR_TAREA``; se comparte por ``mail_ingest.cache``.
+        mail_ingest.cache.put(address, EXTRACTOR_TAREA.nombre, datos.get("msgid"), cuerpo)
+        datos.update(cuerpo)
+        completos.append((uid, crudos.pop(uid), datos))
+    mail_mirror_repo.save_bodies(address, mailbox, completos)
+    if faltan:
+        mail_mirror_repo.delete(address, mailbox, faltan)
+
+
+def iter_search(
+    email_session: Dict[str, str],
+    desde: datetime,
+    hasta: datetime,
+    *,
+    task_numbers: Iterable[str] | None = None,
+    remitente: str = "",
+    asunto_contiene: str = "",
+    require_user_email: bool = False,
+    mailbox: str = "INBOX",
+    with_body: bool = True,
+    chunk_size: int = imap_fetch.BODY_CHUNK_SIZE,
+    parse_workers: int | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """Busca en el espejo con los mismos filtros y registros que ``scan_inbox``.
+
+    Llamar antes a :func:`refresh` para incluir el correo más reciente. Los
+    filtros se aplican sobre las columnas del espejo; de los mensajes que
+    coinciden y aún no tienen cuerpo guardado se descarga el mensaje completo
+    por lotes de ``chunk_size`` (parseados en ``parse_workers`` procesos, ver
+    :mod:`parse_pool`) y se guarda. Un ``remitente`` que es una dirección
+    completa se compara por igualdad con la dirección del remitente
+    (consulta indexada); cualquier otro texto se busca como subcadena del
+    encabezado ``From``.
+
+    Los registros se producen a medida que se leen. Con ``with_body=False``
+    no traen ``body``; obtenerlo con :func:`load_body` cuando haga falta.
+    """
+    address = email_session.get("address", "")
+    tz = desde.tzinfo or DEFAULT_TZ
+    remitente = remitente.strip()
+    es_direccion = "@" in remitente and parseaddr(remitente)[1] == remitente
+    filas = mail_mirror_repo.iter_search(
+        address,
+        mailbox,
+        desde,
+        hasta,
+        task_numbers=[t.strip() for t in task_numbers or () if t.strip()],
+        remitente_email=remitente if es_direccion else "",
+        remitente_contiene="" if es_direccion else remitente,
+        asunto_norm=normalize_for_search(asunto_contiene),
+    )
+    campos = CAMPOS_REGISTRO if with_body else [c for c in CAMPOS_REGISTRO if c != "body"]
+    with ExitStack() as pila:
+        pila.callback(filas.close)
+        conexion = None
+        while True:
+            lote = list(islice(filas, chunk_size))
+            if not lote:
+                return
+            if conexion is None and any("body" not in datos for _u, _f, datos in lote):
+                conexion = pila.enter_context(
+                    mail_ingest.open_mailbox(email_session, mailbox, readonly=True)
+                )
+                estado = mail_mirror_repo.get_state(address, mailbox)
+                if estado is None or estado["uidvalidity"] != mail_ingest.uidvalidity(conexion, mailbox):
+                    raise RuntimeError(
+                        "El buzón cambió desde la última sincronización; vuelva a buscar."
+                    )
+            if conexion is not None:
+                _completar(conexion, address, mailbox, lote, parse_workers)
+            for uid, fecha, datos in lote:
+                if "body" not in datos:
+                    continue
+                if require_user_email and not datos.get("correo_usuario_encontrado"):
+                    continue
+                datos["fecha"] = fecha.astimezone(tz)
+                registro: Dict[str, Any] = {"message_id": str(uid)}
+                registro.update((clave, datos.get(clave)) for clave in campos)
+                yield registro
+
+
+def search(
+    email_session: Dict[str, str],
+    desde: datetime,
+    hasta: datetime,
+    **filtros: Any,
+) -> List[Dict[str, Any]]:
+    """Como :func:`iter_search`, pero retorna la lista completa."""
+    return list(iter_search(email_session, desde, hasta, **filtros))
+
+
+def load_body(
+    email_session: Dict[str, str], registro: Dict[str, Any], *, mailbox: str = "INBOX"
+) -> str:
+    """Cuerpo de un registro obtenido con ``with_body=False`` (lectura local)."""
+    if registro.get("body") is not None:
+        return registro["body"]
+    cuerpo = mail_mirror_repo.get_body(
+        email_session.get("address", ""), mailbox, int(registro["message_id"])
+    )
+    return cuerpo or ""
+
+
+def evict(
+    cuenta: str,
+    *,
+    mailbox: str = "INBOX",
+    dias: int = RETENCION_DIAS,
+    max_bytes: int = MAX_BYTES,
+) -> int:
+    """Aplica la política de expulsión y ajusta la fecha cubierta por el espejo.
+
+    Tras expulsar, ``cubierto_desde`` avanza para que una búsqueda sobre el
+    rango eliminado vuelva a descargarlo desde el servidor.
+    """
+    with _lock(cuenta):
+        limite = datetime.now(DEFAULT_TZ) - timedelta(days=dias)
+        borrados, corte = mail_mirror_repo.evict(cuenta, mailbox, limite, max_bytes)
+        estado = mail_mirror_repo.get_state(cuenta, mailbox)
+        if estado is not None and estado["cubierto_desde"] is not None:
+            nuevo = max(estado["cubierto_desde"], limite.date() + timedelta(days=1))
+            if corte is not None:
+                nuevo = max(nuevo, corte.astimezone(DEFAULT_TZ).date() + timedelta(days=1))
+            if nuevo != estado["cubierto_desde"]:
+                mail_mirror_repo.save_state(
+                    cuenta, mailbox, estado["uidvalidity"], estado["last_uid"], nuevo
+                )
+        if borrados:
+            logger.info("Espejo %s/%s: %d mensajes expulsados", cuenta, mailbox, borrados)
+        return borrados
+
+
+def start_background_refresh(
+    email_session: Dict[str, str],
+    *,
+    mailbox: str = "INBOX",
+    intervalo: float = INTERVALO_REFRESCO,
+) -> threading.Event:
+    """Inicia (una sola vez por cuenta) un hilo que refresca y poda el espejo.
+
+    Retorna el ``Event`` que detiene el hilo al activarse (ya activado si la
+    sesión no tiene credenciales).
+    """
+    cuenta = email_session.get("address", "").lower()
+    if not cuenta or not email_session.get("password"):
+        parar = threading.Event()
+        parar.set()
+        return parar
+    with _locks_guard:
+        parar = _hilos.get(cuenta)
+        if parar is not None and not parar.is_set():
+            return parar
+        parar = _hilos[cuenta] = threading.Event()
+
+    def _ciclo() -> None:
+        while not parar.is_set():
+            try:
+                refresh(email_session, mailbox=mailbox)
+                evict(email_session.get("address", ""), mailbox=mailbox)
+            except Exception:
+                logger.exception("Error refrescando el espejo de correo")
+            parar.wait(intervalo)
+
+    threading.Thread(target=_ciclo, name=f"espejo-{cuenta}", daemon=True).start()
+    return parar
+
+
+def stop_background_refresh(cuenta: str | None = None) -> None:
+    """Detiene el hilo de refresco de ``cuenta`` (de todas si es ``None``)."""
+    with _locks_guard:
+        if cuenta is None:
+            parar = list(_hilos.values())
+            _hilos.clear()
+        else:
+            parar = [_hilos.pop(cuenta.lower())] if cuenta.lower() in _hilos else []
+    for evento in parar:
+        evento.set()
+
+
+__all__ = [
+    "refresh",
+    "iter_search",
+    "search",
+    "load_body",
+    "evict",
+    "start_background_refresh",
+    "stop_background_refresh",
+]
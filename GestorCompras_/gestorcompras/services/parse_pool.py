@@ -0,0 +1,76 @@
+"""Etapa de parseo en procesos para escaneos grandes de correo.
+
+Decodificar MIME, limpiar HTML y aplicar las expresiones de
+``core.mail_parse`` es trabajo de CPU en Python; en un *backfill* de varios
+meses domina el tiempo del escaneo. :func:`map_ordered` reparte ese trabajo
+en un ``ProcessPoolExecutor`` mientras el hilo que llama sigue leyendo de la
+red, y devuelve los resultados en el mismo orden de entrada.
+
+La cantidad de trabajos en vuelo está acotada (``ventana``), de modo que la
+memoria no crece con el tamaño del buzón. Con ``workers`` menor o igual a 1
+todo se ejecuta en el mismo proceso, sin crear procesos hijos.
+"""
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator
+
+# Procesos de parseo por defecto: deja un núcleo libre para la interfaz y la red.
+PARSE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+# Por debajo de esta cantidad de mensajes crear los procesos cuesta más de lo
+# que ahorra; se parsea en el mismo proceso.
+MIN_MENSAJES_POOL = 200
+# Trabajos en vuelo por proceso.
+VENTANA_POR_WORKER = 8
+
+
+def workers_para(cantidad: int, workers: int | None = None) -> int:
+    """Procesos a usar para parsear ``cantidad`` mensajes (0 = en serie)."""
+    workers = PARSE_WORKERS if workers is None else workers
+    if workers <= 1 or cantidad < MIN_MENSAJES_POOL:
+        return 0
+    return workers
+
+
+def map_ordered(
+    func: Callable[..., Any],
+    argumentos: Iterable[tuple],
+    *,
+    workers: int = 0,
+    ventana: int | None = None,
+) -> Iterator[Any]:
+    """Aplica ``func(*args)`` a cada tupla de ``argumentos`` y produce los
+    resultados en orden.
+
+    ``func`` debe ser una función de nivel de módulo (se envía por nombre a
+    los procesos hijos) y sus argumentos/resultados deben ser *pickleables*.
+    ``argumentos`` se consume a medida que hay lugar en la ventana, por lo
+    que puede ser un generador que descarga de la red.
+    """
+    if workers <= 1:
+        for args in argumentos:
+            yield func(*args)
+        return
+
+    ventana = max(workers, ventana or workers * VENTANA_POR_WORKER)
+    ejecutor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        en_vuelo: deque[Future] = deque()
+        for args in argumentos:
+            en_vuelo.append(ejecutor.submit(func, *args))
+            if len(en_vuelo) >= ventana:
+                yield en_vuelo.popleft().result()
+        while en_vuelo:
+            yield en_vuelo.popleft().result()
+    finally:
+        ejecutor.shutdown(wait=True, cancel_futures=True)
+
+
+__all__ = [
+    "PARSE_WORKERS",
+    "MIN_MENSAJES_POOL",
+    "workers_para",
+    "map_ordered",
+]
@@ -0,0 +1,206 @@
+"""Catálogo persistente de los PDF de OC en ``PDF_FOLDER``.
+
+``despacho_logic`` buscaba el PDF de cada OC con un ``os.walk`` completo de
+la carpeta (en SeaDrive, decenas de miles de archivos) y ``getctime`` de
+cada candidato, una vez por orden. El catálogo guarda en SQLite
+(``data.pdf_catalog_repo``) cada PDF con su ``ctime``, su carpeta y las
+secuencias de dígitos de su nombre, así que buscar un lote de OC es una
+consulta por índice.
+
+:func:`refresh` lo mantiene al día sin recorrer todo: el ``mtime`` de una
+carpeta cambia cuando se agregan, borran o renombran archivos directamente
+en ella, de modo que solo se listan (``os.scandir``) las carpetas cuyo
+``mtime`` difiere del guardado; de las demás basta un ``stat`` para bajar a
+sus subcarpetas ya conocidas. :func:`rebuild` lo vuelve a armar desde cero
+(botón en Configuración o ``python -m gestorcompras.services.pdf_catalog
+--reconstruir``).
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from gestorcompras.data import pdf_catalog_repo
+
+logger = logging.getLogger(__name__)
+
+# Segundos durante los que una búsqueda reutiliza el último refresco. Se
+# refresca igual si falta alguna OC o si cambió una carpeta con PDF de las
+# OC buscadas (p. ej. llegó una versión más nueva junto a la anterior).
+REFRESCO_MIN_SEGUNDOS = 60
+
+_RX_DIGITOS = re.compile(r"[0-9]+")
+_lock = threading.Lock()
+_ultimo_refresco: Dict[str, float] = {}
+
+
+def _base(base: str | os.PathLike) -> str:
+    return os.path.abspath(os.fspath(base))
+
+
+def _listar(ruta: str) -> Tuple[List[str], Dict[str, os.DirEntry]]:
+    subcarpetas: List[str] = []
+    pdfs: Dict[str, os.DirEntry] = {}
+    with os.scandir(ruta) as entradas:
+        for entrada in entradas:
+            try:
+                if entrada.is_dir(follow_symlinks=False):
+                    subcarpetas.append(entrada.path)
+                elif entrada.name.lower().endswith(".pdf") and entrada.is_file():
+                    pdfs[entrada.path] = entrada
+            except OSError:
+                continue
+    return subcarpetas, pdfs
+
+
+def refresh(base: str | os.PathLike, completo: bool = False) -> Dict[str, int]:
+    """Actualiza el catálogo de ``base`` listando solo las carpetas que cambiaron.
+
+    Con ``completo`` se listan todas. Retorna contadores: carpetas revisadas
+    y listadas, PDF nuevos y borrados.
+    """
+    base = _base(base)
+    with _lock:
+        conocidas = pdf_catalog_repo.carpetas(base)
+        hijas: Dict[str | None, List[str]] = {}
+        for ruta, (padre, _mtime) in conocidas.items():
+            hijas.setdefault(padre, []).append(ruta)
+
+        stats = {"revisadas": 0, "listadas": 0, "nuevos": 0, "borrados": 0}
+        vistas: List[Tuple[str, str | None, int]] = []
+        alcanzadas: set[str] = set()
+        nuevos: List[Tuple[str, str, float, List[str]]] = []
+        borrados: List[str] = []
+        pendientes: List[Tuple[str, str | None]] = [(base, None)]
+        while pendientes:
+            ruta, padre = pendientes.pop()
+            try:
+                mtime = os.stat(ruta).st_mtime_ns
+            except OSError:
+                continue
+            stats["revisadas"] += 1
+            alcanzadas.add(ruta)
+            previa = conocidas.get(ruta)
+            if not completo and previa == (padre, mtime):
+                pendientes.extend((hija, ruta) for hija in hijas.get(ruta, ()))
+                continue
+            try:
+                subcarpetas, pdfs = _listar(ruta)
+            except OSError as exc:
+                logger.warning("No se pudo listar %s: %s", ruta, exc)
+                continue
+            stats["listadas"] += 1
+            # El mtime leído antes de listar: un cambio durante el listado
+            # vuelve a marcar la carpeta en el próximo refresco.
+            vistas.append((ruta, padre, mtime))
+            guardados = set() if previa is None else pdf_catalog_repo.archivos_en(ruta)
+            for pdf in pdfs.keys() - guardados:
+                try:
+                    ctime = pdfs[pdf].stat().st_ctime
+                except OSError:
+                    continue
+                numeros = list(dict.fromkeys(_RX_DIGITOS.findall(pdfs[pdf].name)))
+                nuevos.append((pdf, ruta, ctime, numeros))
+            borrados.extend(guardados - pdfs.keys())
+            pendientes.extend((sub, ruta) for sub in subcarpetas)
+
+        stats["nuevos"], stats["borrados"] = len(nuevos), len(borrados)
+        pdf_catalog_repo.aplicar(
+            base, vistas, nuevos, borrados, [r for r in conocidas if r not in alcanzadas]
+        )
+        _ultimo_refresco[base] = time.monotonic()
+    logger.debug("Catálogo de PDF de %s: %s", base, stats)
+    return stats
+
+
+def rebuild(base: str | os.PathLike) -> Dict[str, int]:
+    """Descarta el catálogo de ``base`` y lo arma de nuevo listando todo."""
+    base = _base(base)
+    with _lock:
+        pdf_catalog_repo.borrar_base(base)
+    return refresh(base, completo=True)
+
+
+def _carpetas_cambiaron(carpetas: Iterable[str]) -> bool:
+    """``True`` si alguna carpeta ya no tiene el ``mtime`` con que se listó."""
+    carpetas = set(carpetas)
+    guardados = pdf_catalog_repo.mtimes(carpetas)
+    for carpeta in carpetas:
+        try:
+            if os.stat(carpeta).st_mtime_ns != guardados.get(carpeta):
+                return True
+        except OSError:
+            return True
+    return False
+
+
+def _elegir(candidatos: List[Tuple[str, str, float]]) -> Tuple[str, str] | None:
+    for ruta, carpeta, _ctime in candidatos:
+        # El más reciente que siga existiendo (pudo borrarse desde el refresco).
+        if os.path.exists(ruta):
+            return ruta, os.path.basename(carpeta)
+    return None
+
+
+def buscar(base: str | os.PathLike, ordenes: Iterable[str]) -> Dict[str, Tuple[str | None, str | None]]:
+    """El PDF más reciente de cada orden: ``{orden: (pdf_path, folder_name)}``.
+
+    Una orden coincide con un PDF cuando sus dígitos forman una secuencia
+    completa de dígitos en el nombre del archivo. Sin PDF, ``(None, None)``.
+    Dentro de ``REFRESCO_MIN_SEGUNDOS`` solo se revisan las carpetas de los
+    PDF encontrados; un PDF nuevo en otra carpeta se ve en el próximo
+    refresco.
+    """
+    base = _base(base)
+    claves = {orden: re.sub(r"\D", "", orden) for orden in ordenes}
+    ultimo = _ultimo_refresco.get(base)
+    refrescado = ultimo is None or time.monotonic() - ultimo >= REFRESCO_MIN_SEGUNDOS
+    if refrescado:
+        refresh(base)
+
+    def _resolver():
+        encontrados = pdf_catalog_repo.buscar(base, {c for c in claves.values() if c})
+        resultado = {
+            orden: _elegir(encontrados.get(clave, [])) or (None, None)
+            for orden, clave in claves.items()
+        }
+        carpetas = {carpeta for lista in encontrados.values() for _r, carpeta, _c in lista}
+        return resultado, carpetas
+
+    resultado, carpetas = _resolver()
+    if not refrescado and (
+        any(ruta is None for ruta, _ in resultado.values()) or _carpetas_cambiaron(carpetas)
+    ):
+        refresh(base)
+        resultado, _ = _resolver()
+    return resultado
+
+
+def main(argv: List[str] | None = None) -> None:
+    from gestorcompras.services import db
+
+    parser = argparse.ArgumentParser(description="Catálogo de los PDF de OC de despacho.")
+    parser.add_argument("carpeta", nargs="?", help="por defecto, PDF_FOLDER de la configuración")
+    parser.add_argument("--reconstruir", action="store_true", help="descarta el catálogo y lo arma de nuevo")
+    args = parser.parse_args(argv)
+    base = args.carpeta or db.get_config("PDF_FOLDER", "")
+    if not base:
+        parser.error("PDF_FOLDER no está configurado; indique la carpeta.")
+    inicio = time.perf_counter()
+    stats = rebuild(base) if args.reconstruir else refresh(base)
+    carpetas, pdfs = pdf_catalog_repo.contar(_base(base))
+    print(f"{pdfs} PDF en {carpetas} carpetas ({stats['listadas']} listadas, "
+          f"{stats['nuevos']} nuevos, {stats['borrados']} borrados) "
+          f"en {time.perf_counter() - inicio:.1f} s")
+
+
+__all__ = ["REFRESCO_MIN_SEGUNDOS", "buscar", "rebuild", "refresh"]
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,13 @@ from tkinter import messagebox, ttk
 from zoneinfo import ZoneInfo
 
 from gestorcompras import theme
-from gestorcompras.services import db
-from gestorcompras.services.email_task_scanner import scan_inbox
+from gestorcompras.services import db, mail_mirror
 from gestorcompras.ui.common import add_hover_effect
 
 TZ = ZoneInfo("America/Guayaquil")
 _DATE_FMT = "%Y-%m-%d %H:%M"
+# Filas que el hilo de búsqueda entrega juntas a la interfaz.
+_LOTE_FILAS = 50
 
 
 class ScanEmailDialog(tk.Toplevel):
@@ -29,6 +30,7 @@ class ScanEmailDialog(tk.Toplevel):
         self.result: list[dict] = []
         self._items: list[dict] = []
         self._selected: set[int] = set()
+        self._busqueda = 0
 
         ahora = datetime.now(TZ)
         hace_24h = ahora - timedelta(hours=24)
@@ -39,6 +41,12 @@ class ScanEmailDialog(tk.Toplevel):
         self.status_var = tk.StringVar(value="Ingrese filtros y presione Buscar.")
 
         self._build()
+        # Mantiene el espejo local al día mientras el diálogo está abierto.
+        mail_mirror.start_background_refresh(self.email_session)
+
+    def destroy(self) -> None:
+        mail_mirror.stop_background_refresh(self.email_session.get("address", ""))
+        super().destroy()
 
     def _build(self) -> None:
         wrapper = ttk.Frame(self, style="MyFrame.TFrame", padding=12)
@@ -150,30 +158,42 @@ class ScanEmailDialog(tk.Toplevel):
         raw_tasks = self.tasks_text.get("1.0", tk.END)
         task_numbers = [l.strip() for l in raw_tasks.splitlines() if l.strip()] or None
 
-        self.status_var.set("Buscando correos...")
+        self.status_var.set("Sincronizando con el servidor...")
         self.tree.delete(*self.tree.get_children())
-        self._items.clear()
+        self._items = []
         self._selected.clear()
+        self._busqueda += 1
+        busqueda = self._busqueda
 
         def _worker():
             try:
-                items = scan_inbox(
+                # Solo baja lo que falta en el espejo; la búsqueda es local.
+                mail_mirror.refresh(self.email_session, desde)
+                lote: list[dict] = []
+                for item in mail_mirror.iter_search(
                     self.email_session, desde, hasta,
                     task_numbers=task_numbers,
                     remitente=remitente,
                     asunto_contiene=asunto,
-                )
-                self.after(0, lambda: self._show_results(items))
+                    with_body=False,
+                ):
+                    lote.append(item)
+                    if len(lote) >= _LOTE_FILAS:
+                        self.after(0, lambda l=lote: self._append_results(busqueda, l))
+                        lote = []
+                self.after(0, lambda l=lote: self._append_results(busqueda, l, final=True))
             except Exception as exc:
                 self.after(0, lambda e=exc: self._on_error(e))
 
         threading.Thread(target=_worker, daemon=True).start()
 
-    def _show_results(self, items: list[dict]) -> None:
-        self._items = items
-        self.tree.delete(*self.tree.get_children())
-        self._selected.clear()
-        for idx, item in enumerate(items):
+    def _append_results(self, busqueda: int, items: list[dict], final: bool = False) -> None:
+        """Agrega filas a medida que llegan; ignora resultados de búsquedas anteriores."""
+        if busqueda != self._busqueda:
+            return
+        for item in items:
+            idx = len(self._items)
+            self._items.append(item)
             fecha = item.get("fecha")
             fecha_str = fecha.strftime("%Y-%m-%d %H:%M") if hasattr(fecha, "strftime") else str(fecha or "")
             self.tree.insert("", "end", iid=str(idx), values=(
@@ -181,7 +201,16 @@ class ScanEmailDialog(tk.Toplevel):
                 item.get("proveedor", ""), item.get("factura", ""),
                 item.get("oc", ""), item.get("asunto", ""),
             ))
-        self.status_var.set(f"{len(items)} correo(s) encontrado(s).")
+        if final:
+            self.status_var.set(f"{len(self._items)} correo(s) encontrado(s).")
+        else:
+            self.status_var.set(f"Buscando... {len(self._items)} correo(s) encontrado(s).")
+
+    def _body(self, item: dict) -> str:
+        """Carga el cuerpo desde el espejo local solo cuando se necesita."""
+        if item.get("body") is None:
+            item["body"] = mail_mirror.load_body(self.email_session, item)
+        return item["body"]
 
     def _on_error(self, exc: Exception) -> None:
         self.status_var.set("Error al buscar correos.")
@@ -209,7 +238,7 @@ class ScanEmailDialog(tk.Toplevel):
             return
         idx = int(sel[0])
         if 0 <= idx < len(self._items):
-            body = self._items[idx].get("body", "")
+            body = self._body(self._items[idx])
             self.preview.configure(state="normal")
             self.preview.delete("1.0", tk.END)
             self.preview.insert("1.0", body[:3000])
@@ -234,4 +263,6 @@ class ScanEmailDialog(tk.Toplevel):
             messagebox.showinfo("Escaneo", "Seleccione al menos un correo.", parent=self)
             return
         self.result = [self._items[i] for i in sorted(self._selected)]
+        for item in self.result:
+            self._body(item)
         self.destroy()
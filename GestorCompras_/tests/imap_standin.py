@@ -0,0 +1,435 @@
+"""Servidor IMAP mínimo en proceso para pruebas y benchmarks.
+
+Implementa el subconjunto del protocolo que usan los escáneres de correo
+(LOGIN, SELECT, SEARCH, FETCH, UID, STATUS, NOOP, LOGOUT) sobre un socket
+local, de modo que ``imaplib`` ejercita su parser real de respuestas. Cada
+comando recibido queda contabilizado en ``stats`` para medir round-trips.
+"""
+from __future__ import annotations
+
+import email
+import imaplib
+import re
+import socketserver
+import threading
+import time
+import unicodedata
+from collections import Counter
+from datetime import date, datetime, timezone
+from email.header import decode_header, make_header
+
+_MESES = {m: i for i, m in enumerate(
+    ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"), 1)}
+
+
+def _parse_imap_date(value: str) -> date:
+    dia, mes, anio = value.strip('"').split("-")
+    return date(int(anio), _MESES[mes.title()], int(dia))
+
+
+def _fold(value: str, accents: bool) -> str:
+    value = value.upper()
+    if accents:
+        value = "".join(
+            ch for ch in unicodedata.normalize("NFD", value) if not unicodedata.combining(ch)
+        )
+    return value
+
+
+def _tokenize(text: str) -> list:
+    """Divide argumentos IMAP respetando comillas y listas entre paréntesis."""
+    tokens: list = []
+    stack: list[list] = [tokens]
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch == " ":
+            i += 1
+        elif ch == "(":
+            nueva: list = []
+            stack[-1].append(nueva)
+            stack.append(nueva)
+            i += 1
+        elif ch == ")":
+            stack.pop()
+            i += 1
+        elif ch == '"':
+            j = i + 1
+            buf = []
+            while text[j] != '"':
+                if text[j] == "\\":
+                    j += 1
+                buf.append(text[j])
+                j += 1
+            stack[-1].append("".join(buf))
+            i = j + 1
+        else:
+            j = i
+            depth = 0
+            while j < len(text) and (depth or text[j] not in " ()"):
+                if text[j] == "[":
+                    depth += 1
+                elif text[j] == "]":
+                    depth -= 1
+                j += 1
+            stack[-1].append(text[i:j])
+            i = j
+    return tokens
+
+
+class StoredMessage:
+    def __init__(self, uid: int, raw: bytes, internaldate: datetime):
+        self.uid = uid
+        self.raw = raw
+        self.internaldate = internaldate
+        self._msg = email.message_from_bytes(raw)
+
+    def header(self, name: str) -> str:
+        value = self._msg.get(name, "")
+        try:
+            return str(make_header(decode_header(value)))
+        except Exception:
+            return value
+
+    @property
+    def header_bytes(self) -> bytes:
+        for sep in (b"\r\n\r\n", b"\n\n"):
+            pos = self.raw.find(sep)
+            if pos >= 0:
+                return self.raw[: pos + len(sep)]
+        return self.raw
+
+    def header_fields(self, names: list[str]) -> bytes:
+        wanted = {n.lower() for n in names}
+        lines: list[bytes] = []
+        keep = False
+        for line in self.header_bytes.splitlines():
+            if not line.strip():
+                break
+            if line[:1] in (b" ", b"\t"):
+                if keep:
+                    lines.append(line)
+                continue
+            keep = line.split(b":", 1)[0].decode("ascii", "ignore").lower() in wanted
+            if keep:
+                lines.append(line)
+        return b"\r\n".join(lines) + b"\r\n\r\n"
+
+
+class Mailbox:
+    """Buzón en memoria con UIDs estables y UIDVALIDITY configurable."""
+
+    def __init__(self, uidvalidity: int = 1):
+        self.uidvalidity = uidvalidity
+        self.messages: list[StoredMessage] = []
+        self.next_uid = 1
+        self.lock = threading.RLock()
+        self.changed = threading.Condition(self.lock)
+
+    def add(self, raw: bytes, internaldate: datetime | None = None) -> int:
+        with self.lock:
+            uid = self.next_uid
+            self.next_uid += 1
+            self.messages.append(
+                StoredMessage(uid, raw, internaldate or datetime.now(timezone.utc))
+            )
+            self.changed.notify_all()
+            return uid
+
+    def expunge_uid(self, uid: int) -> None:
+        with self.lock:
+            self.messages = [m for m in self.messages if m.uid != uid]
+
+    def reset(self, uidvalidity: int) -> None:
+        """Simula la recreación del buzón en el servidor (nuevo UIDVALIDITY)."""
+        with self.lock:
+            self.uidvalidity = uidvalidity
+            self.messages = []
+            self.next_uid = 1
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_TCPServer"
+    # Respuestas en buffer y un flush por comando (evita esperas de Nagle).
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def _send(self, data: bytes) -> None:
+        self.server.owner.stats["bytes_sent"] += len(data)
+        self.wfile.write(data)
+
+    def _line(self, text: str) -> None:
+        self._send(text.encode("utf-8") + b"\r\n")
+
+    def handle(self) -> None:
+        owner = self.server.owner
+        owner.stats["connections"] += 1
+        self._selected = False
+        self._line("* OK IMAP4rev1 stand-in listo")
+        while True:
+            self.wfile.flush()
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            if not line:
+                continue
+            tag, _, rest = line.partition(" ")
+            cmd, _, args = rest.partition(" ")
+            cmd = cmd.upper()
+            uid_mode = False
+            if cmd == "UID":
+                uid_mode = True
+                cmd, _, args = args.partition(" ")
+                cmd = cmd.upper()
+            owner.stats["commands"] += 1
+            owner.stats["by_command"][("UID " if uid_mode else "") + cmd] += 1
+            if owner.latency:
+                time.sleep(owner.latency)
+            handler = getattr(self, f"_cmd_{cmd.lower()}", None)
+            if handler is None:
+                self._line(f"{tag} BAD comando no soportado")
+                continue
+            if handler(tag, args, uid_mode) is False:
+                return
+
+    # -- comandos -----------------------------------------------------------
+    def _cmd_capability(self, tag, _args, _uid):
+        caps = "IMAP4rev1" + (" IDLE" if self.server.owner.idle_supported else "")
+        self._line(f"* CAPABILITY {caps}")
+        self._line(f"{tag} OK CAPABILITY completado")
+
+    def _cmd_login(self, tag, args, _uid):
+        owner = self.server.owner
+        parts = _tokenize(args)
+        if owner.password is not None and (len(parts) < 2 or parts[1] != owner.password):
+            self._line(f"{tag} NO [AUTHENTICATIONFAILED] credenciales inválidas")
+            return
+        owner.stats["logins"] += 1
+        self._line(f"{tag} OK LOGIN completado")
+
+    def _cmd_select(self, tag, _args, _uid):
+        box = self.server.owner.mailbox
+        with box.lock:
+            self._line(f"* {len(box.messages)} EXISTS")
+            self._line("* 0 RECENT")
+            self._line(f"* OK [UIDVALIDITY {box.uidvalidity}] UIDs válidos")
+            self._line(f"* OK [UIDNEXT {box.next_uid}] próximo UID")
+        self._selected = True
+        self._line(f"{tag} OK [READ-WRITE] SELECT completado")
+
+    _cmd_examine = _cmd_select
+
+    def _cmd_status(self, tag, args, _uid):
+        box = self.server.owner.mailbox
+        nombre = _tokenize(args)[0]
+        with box.lock:
+            self._line(
+                f"* STATUS {nombre} (MESSAGES {len(box.messages)} "
+                f"UIDNEXT {box.next_uid} UIDVALIDITY {box.uidvalidity})"
+            )
+        self._line(f"{tag} OK STATUS completado")
+
+    def _cmd_noop(self, tag, _args, _uid):
+        self._line(f"{tag} OK NOOP completado")
+
+    def _cmd_logout(self, tag, _args, _uid):
+        self._line("* BYE cerrando sesión")
+        self._line(f"{tag} OK LOGOUT completado")
+        return False
+
+    def _cmd_search(self, tag, args, uid_mode):
+        box = self.server.owner.mailbox
+        tokens = _tokenize(args)
+        if tokens and str(tokens[0]).upper() == "CHARSET":
+            tokens = tokens[2:]
+        with box.lock:
+            mensajes = list(enumerate(box.messages, 1))
+        encontrados = []
+        for seq, msg in mensajes:
+            if self._evaluar(list(tokens), seq, msg, len(mensajes)):
+                encontrados.append(str(msg.uid if uid_mode else seq))
+        self._line("* SEARCH" + ("" if not encontrados else " " + " ".join(encontrados)))
+        self._line(f"{tag} OK SEARCH completado")
+
+    def _cmd_fetch(self, tag, args, uid_mode):
+        box = self.server.owner.mailbox
+        conjunto, _, items_raw = args.partition(" ")
+        items = _tokenize(items_raw)
+        if items and isinstance(items[0], list):
+            items = items[0]
+        items = [str(i) for i in items]
+        if uid_mode and "UID" not in [i.upper() for i in items]:
+            items.insert(0, "UID")
+        with box.lock:
+            mensajes = list(enumerate(box.messages, 1))
+            maximo = (mensajes[-1][1].uid if uid_mode else len(mensajes)) if mensajes else 0
+        for seq, msg in mensajes:
+            clave = msg.uid if uid_mode else seq
+            if not _en_conjunto(clave, conjunto, maximo):
+                continue
+            self._enviar_fetch(seq, msg, items)
+        self.server.owner.stats["fetch_responses"] += 1
+        self._line(f"{tag} OK FETCH completado")
+
+    # -- helpers ------------------------------------------------------------
+    def _enviar_fetch(self, seq: int, msg: StoredMessage, items: list[str]) -> None:
+        simples: list[str] = []
+        literales: list[tuple[str, bytes]] = []
+        for item in items:
+            upper = item.upper()
+            if upper == "UID":
+                simples.append(f"UID {msg.uid}")
+            elif upper == "RFC822.SIZE":
+                simples.append(f"RFC822.SIZE {len(msg.raw)}")
+            elif upper == "FLAGS":
+                simples.append("FLAGS ()")
+            elif upper == "INTERNALDATE":
+                simples.append(
+                    'INTERNALDATE "' + msg.internaldate.strftime("%d-%b-%Y %H:%M:%S %z") + '"'
+                )
+            elif upper in ("RFC822", "BODY[]", "BODY.PEEK[]"):
+                nombre = "RFC822" if upper == "RFC822" else "BODY[]"
+                literales.append((nombre, msg.raw))
+            elif upper in ("RFC822.HEADER", "BODY[HEADER]", "BODY.PEEK[HEADER]"):
+                nombre = "RFC822.HEADER" if upper == "RFC822.HEADER" else "BODY[HEADER]"
+                literales.append((nombre, msg.header_bytes))
+            elif "HEADER.FIELDS" in upper:
+                seccion = item[item.index("[") + 1: item.rindex("]")]
+                campos = seccion[seccion.index("(") + 1: seccion.rindex(")")].split()
+                literales.append((f"BODY[{seccion}]", msg.header_fields(campos)))
+        cabecera = f"* {seq} FETCH (" + " ".join(simples)
+        if not literales:
+            self._line(cabecera + ")")
+            return
+        for idx, (nombre, datos) in enumerate(literales):
+            sep = " " if (idx or simples) else ""
+            prefijo = cabecera + sep if idx == 0 else " "
+            self._send(f"{prefijo}{nombre} {{{len(datos)}}}\r\n".encode("utf-8"))
+            self._send(datos)
+        self._send(b")\r\n")
+
+    def _evaluar(self, tokens: list, seq: int, msg: StoredMessage, total: int) -> bool:
+        """Evalúa la conjunción de criterios SEARCH consumiendo ``tokens``."""
+        resultado = True
+        while tokens:
+            resultado = self._criterio(tokens, seq, msg, total) and resultado
+        return resultado
+
+    def _criterio(self, tokens: list, seq: int, msg: StoredMessage, total: int) -> bool:
+        owner = self.server.owner
+        tok = tokens.pop(0)
+        if isinstance(tok, list):
+            return self._evaluar(list(tok), seq, msg, total)
+        clave = tok.upper()
+        fecha = msg.internaldate.date()
+        if clave == "ALL":
+            return True
+        if clave == "NOT":
+            return not self._criterio(tokens, seq, msg, total)
+        if clave == "OR":
+            a = self._criterio(tokens, seq, msg, total)
+            b = self._criterio(tokens, seq, msg, total)
+            return a or b
+        if clave == "SINCE":
+            return fecha >= _parse_imap_date(tokens.pop(0))
+        if clave == "BEFORE":
+            return fecha < _parse_imap_date(tokens.pop(0))
+        if clave == "ON":
+            return fecha == _parse_imap_date(tokens.pop(0))
+        if clave in ("FROM", "TO", "CC", "SUBJECT"):
+            valor = _fold(tokens.pop(0), owner.fold_accents)
+            campo = {"FROM": "From", "TO": "To", "CC": "Cc", "SUBJECT": "Subject"}[clave]
+            return valor in _fold(msg.header(campo), owner.fold_accents)
+        if clave == "UID":
+            maximo = owner.mailbox.next_uid - 1
+            return _en_conjunto(msg.uid, tokens.pop(0), maximo)
+        if re.fullmatch(r"[\d:*,]+", clave):
+            return _en_conjunto(seq, clave, total)
+        raise ValueError(f"criterio no soportado: {tok}")
+
+
+def _en_conjunto(valor: int, conjunto: str, maximo: int) -> bool:
+    for parte in conjunto.split(","):
+        if ":" in parte:
+            ini, fin = parte.split(":")
+            a = maximo if ini == "*" else int(ini)
+            b = maximo if fin == "*" else int(fin)
+            if min(a, b) <= valor <= max(a, b):
+                return True
+        elif (maximo if parte == "*" else int(parte)) == valor:
+            return True
+    return False
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    owner: "IMAPStandIn"
+
+
+class IMAPStandIn:
+    """Servidor IMAP local. Úsese como context manager.
+
+    ``latency`` agrega una espera artificial por comando para simular la
+    latencia de red; ``fold_accents`` hace que SEARCH compare sin tildes.
+    """
+
+    def __init__(
+        self,
+        *,
+        uidvalidity: int = 1,
+        password: str | None = None,
+        latency: float = 0.0,
+        fold_accents: bool = False,
+        idle_supported: bool = True,
+    ):
+        self.mailbox = Mailbox(uidvalidity)
+        self.password = password
+        self.latency = latency
+        self.fold_accents = fold_accents
+        self.idle_supported = idle_supported
+        self.stats: Counter = Counter()
+        self.stats["by_command"] = Counter()
+        self._server: _TCPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        assert self._server is not None
+        return self._server.server_address[1]
+
+    def add_message(self, raw: bytes, internaldate: datetime | None = None) -> int:
+        return self.mailbox.add(raw, internaldate)
+
+    def reset_stats(self) -> None:
+        self.stats.clear()
+        self.stats["by_command"] = Counter()
+
+    def connect(self, *_args, **_kwargs) -> imaplib.IMAP4:
+        """Fábrica compatible con ``imaplib.IMAP4_SSL(host, port)``."""
+        return imaplib.IMAP4("127.0.0.1", self.port)
+
+    def start(self) -> "IMAPStandIn":
+        self._server = _TCPServer(("127.0.0.1", 0), _Handler)
+        self._server.owner = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "IMAPStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+__all__ = ["IMAPStandIn", "Mailbox", "StoredMessage"]
@@ -53,3 +53,14 @@ def test_process_order_without_pdf(monkeypatch):
     assert '✅' in msg
     assert called['attachment'] is None
     assert called['cc_key'] == 'EMAIL_CC_SEGUIMIENTO'
+
+
+def test_extraer_info_de_pdf_acepta_tarea_en_texto(tmp_path, monkeypatch):
+    from gestorcompras.core import pdf_text
+    from tests.test_pdf_text import pdf_minimo
+
+    monkeypatch.setattr(pdf_text, 'CACHE_PATH', str(tmp_path / 'pdf_text.sqlite3'))
+    ruta = tmp_path / 'oc.pdf'
+    ruta.write_bytes(pdf_minimo('RUC 1790016919001 Tarea 12', 'OBS: TAREA #1234567// PEDIDO'))
+
+    assert despacho_logic.extraer_info_de_pdf(str(ruta)) == ('1790016919001', '12')
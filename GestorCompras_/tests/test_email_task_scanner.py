@@ -1,20 +1,25 @@
 """Tests para el módulo email_task_scanner."""
 import email
+import email.message
 from datetime import datetime, timedelta
-from unittest.mock import MagicMock, patch
 from zoneinfo import ZoneInfo
 
 import pytest
 
+from gestorcompras.services import db, email_task_scanner
 from gestorcompras.services.email_task_scanner import (
+    build_search_criteria,
     clean_html,
     decode_header_value,
     extract_text,
+    iter_scan_inbox,
+    load_body,
     normalize_for_search,
     parse_header_date,
     raw_hash,
     scan_inbox,
 )
+from tests.imap_standin import IMAPStandIn
 
 TZ = ZoneInfo("America/Guayaquil")
 
@@ -46,6 +51,59 @@ def test_extract_text_plain():
     assert "Body text here" in extract_text(msg)
 
 
+def _multipart(plain: str, html: str, *extra: str) -> email.message.Message:
+    partes = [
+        f"Content-Type: text/plain; charset=utf-8\n\n{plain}",
+        f"Content-Type: text/html; charset=utf-8\n\n{html}",
+        *extra,
+    ]
+    cuerpo = "".join(f"--b\n{parte}\n" for parte in partes)
+    return email.message_from_string(
+        f'Subject: T\nContent-Type: multipart/related; boundary="b"\n\n{cuerpo}--b--\n'
+    )
+
+
+def test_body_info_skips_html_when_plain_has_fields(monkeypatch):
+    msg = _multipart(
+        "Estimados MAVESA\n[X] OT MG-1 MANT\nuser@telconet.ec",
+        "<p>Estimados OTRO</p>",
+    )
+    monkeypatch.setattr(email_task_scanner, "clean_html", pytest.fail)
+
+    datos = email_task_scanner._body_info(msg, "user@telconet.ec")
+
+    assert datos["proveedor"] == "MAVESA"
+    assert datos["correo_usuario_encontrado"] is True
+    assert "OTRO" not in datos["body"]
+
+
+def test_body_info_falls_back_to_html_when_plain_is_incomplete():
+    msg = _multipart("Estimados MAVESA", "<p>OT MG-2 MANT</p><p>user@telconet.ec</p>")
+
+    datos = email_task_scanner._body_info(msg, "user@telconet.ec")
+
+    assert datos["proveedor"] == "MAVESA"
+    assert datos["inf_vehiculo"] == "OT MG-2 MANT user@telconet.ec"
+    assert datos["correo_usuario_encontrado"] is True
+
+
+def test_extract_text_skips_inline_images_and_oversized_parts(monkeypatch):
+    imagen = "Content-Type: image/png\nContent-Disposition: inline\nContent-Transfer-Encoding: base64\n\niVBORw0KGgo="
+    enorme = "Content-Type: text/plain\nContent-Length: 99999999\n\nvolcado"
+    msg = _multipart("Texto plano", "<p>Texto HTML</p>", imagen, enorme)
+
+    assert extract_text(msg) == "Texto plano"
+    monkeypatch.setattr(email_task_scanner, "MAX_PART_BYTES", 5)
+    assert extract_text(msg) == ""
+
+
+def test_extract_text_uses_html_without_plain_part():
+    msg = email.message_from_string(
+        "Subject: T\nContent-Type: text/html\n\n<p>Hola</p><style>p{}</style>"
+    )
+    assert extract_text(msg) == "Hola"
+
+
 def test_parse_header_date_valid():
     msg = email.message_from_string("Date: Thu, 01 Jan 2025 12:00:00 +0000\n\nBody")
     dt = parse_header_date(msg, TZ)
@@ -69,8 +127,7 @@ def _make_raw_email(subject: str, body: str, date_str: str, from_addr: str = "te
     ).encode("utf-8")
 
 
-@patch("gestorcompras.services.email_task_scanner.imaplib.IMAP4_SSL")
-def test_scan_inbox_filters_by_task_number(mock_imap_cls):
+def test_scan_inbox_filters_by_task_number(imap_server):
     ahora = datetime.now(TZ)
     hace_1h = ahora - timedelta(hours=1)
     date_str = ahora.strftime("%a, %d %b %Y %H:%M:%S %z")
@@ -85,16 +142,8 @@ def test_scan_inbox_filters_by_task_number(mock_imap_cls):
         "Otro correo sin datos relevantes",
         date_str,
     )
-
-    mock_conn = MagicMock()
-    mock_imap_cls.return_value = mock_conn
-    mock_conn.login.return_value = ("OK", [])
-    mock_conn.select.return_value = ("OK", [])
-    mock_conn.search.return_value = ("OK", [b"1 2"])
-    mock_conn.fetch.side_effect = [
-        ("OK", [(b"2", raw2)]),
-        ("OK", [(b"1", raw1)]),
-    ]
+    imap_server.add_message(raw1)
+    imap_server.add_message(raw2)
 
     results = scan_inbox(
         {"address": "user@telconet.ec", "password": "pass"},
@@ -108,20 +157,13 @@ def test_scan_inbox_filters_by_task_number(mock_imap_cls):
     assert results[0]["ruc"] == "1790016919001"
 
 
-@patch("gestorcompras.services.email_task_scanner.imaplib.IMAP4_SSL")
-def test_scan_inbox_returns_all_without_filter(mock_imap_cls):
+def test_scan_inbox_returns_all_without_filter(imap_server):
     ahora = datetime.now(TZ)
     hace_1h = ahora - timedelta(hours=1)
     date_str = ahora.strftime("%a, %d %b %Y %H:%M:%S %z")
 
     raw1 = _make_raw_email('TAREA: "111111"', "Body1", date_str)
-
-    mock_conn = MagicMock()
-    mock_imap_cls.return_value = mock_conn
-    mock_conn.login.return_value = ("OK", [])
-    mock_conn.select.return_value = ("OK", [])
-    mock_conn.search.return_value = ("OK", [b"1"])
-    mock_conn.fetch.return_value = ("OK", [(b"1", raw1)])
+    imap_server.add_message(raw1)
 
     results = scan_inbox(
         {"address": "user@telconet.ec", "password": "pass"},
@@ -131,6 +173,159 @@ def test_scan_inbox_returns_all_without_filter(mock_imap_cls):
     assert results[0]["task_number"] == "111111"
 
 
+def test_scan_inbox_batches_fetch_round_trips(imap_server):
+    for n in range(30):
+        _add(imap_server, f"5000{n:02d}")
+
+    ahora = datetime.now(TZ)
+    resultados = scan_inbox(SESSION, ahora - timedelta(hours=1), ahora + timedelta(minutes=5),
+                            chunk_size=10)
+
+    assert len(resultados) == 30
+    # 3 lotes de encabezados + 3 lotes de mensajes completos (10 c/u).
+    assert imap_server.stats["by_command"]["FETCH"] == 6
+
+
+def test_build_search_criteria_compiles_filters():
+    desde = datetime(2025, 1, 2, 8, 0, tzinfo=TZ)
+    hasta = datetime(2025, 3, 31, 23, 0, tzinfo=TZ)
+
+    criterios = build_search_criteria(
+        desde, hasta,
+        remitente="notificaciones@telconet.ec",
+        asunto_contiene='Aviso "urgente"',
+        task_numbers=["111111", "222222", "333333", "111111"],
+    )
+
+    # Por defecto el texto libre del asunto se filtra solo en cliente.
+    assert criterios == [
+        "SINCE", "02-Jan-2025", "BEFORE", "02-Apr-2025",
+        "FROM", '"notificaciones@telconet.ec"',
+        "OR", "OR", "SUBJECT", '"111111"', "SUBJECT", '"222222"', "SUBJECT", '"333333"',
+    ]
+    assert build_search_criteria(
+        desde, asunto_contiene='Aviso "urgente"', subject_pushdown=True
+    ) == ["SINCE", "02-Jan-2025", "SUBJECT", '"Aviso \\"urgente\\""']
+    # Un valor que no es solo dígitos quedaría fuera de la cadena OR.
+    assert build_search_criteria(desde, task_numbers=["111111", "N/D"]) == [
+        "SINCE", "02-Jan-2025",
+    ]
+    # Texto no ASCII no se puede enviar con imaplib: queda solo el filtro en cliente.
+    assert build_search_criteria(
+        desde, asunto_contiene="Notificación", subject_pushdown=True
+    ) == ["SINCE", "02-Jan-2025"]
+
+
+def test_subject_pushdown_flag_is_read_at_call_time(monkeypatch):
+    desde = datetime(2025, 1, 2, 8, 0, tzinfo=TZ)
+    monkeypatch.setattr(email_task_scanner, "SUBJECT_PUSHDOWN", True)
+    assert build_search_criteria(desde, asunto_contiene="Aviso")[-2:] == ["SUBJECT", '"Aviso"']
+    monkeypatch.setattr(email_task_scanner, "SUBJECT_PUSHDOWN", False)
+    assert build_search_criteria(desde, asunto_contiene="Aviso") == ["SINCE", "02-Jan-2025"]
+
+
+def test_scan_inbox_pushes_task_numbers_to_server(imap_server):
+    for n in range(40):
+        _add(imap_server, f"7000{n:02d}", body="Z" * 2_000)
+    # Fuera de rango para BEFORE: el servidor no lo devuelve.
+    imap_server.add_message(
+        _make_raw_email('TAREA: "700001"', "tarde", datetime.now(TZ).strftime(
+            "%a, %d %b %Y %H:%M:%S %z")),
+        internaldate=datetime.now(TZ) + timedelta(days=10),
+    )
+
+    ahora = datetime.now(TZ)
+    resultados = scan_inbox(
+        SESSION, ahora - timedelta(hours=1), ahora + timedelta(minutes=5),
+        task_numbers=["700001", "700017", "700033"],
+    )
+
+    assert sorted(r["task_number"] for r in resultados) == ["700001", "700017", "700033"]
+    # Solo 3 encabezados + 3 mensajes completos viajan desde el servidor.
+    assert imap_server.stats["bytes_sent"] < 9_000
+
+
+def test_scan_inbox_rechecks_subject_on_client(imap_server):
+    # El servidor de prueba compara con tildes: NOTIFICACIÓN no coincide con
+    # SUBJECT "notificacion", así que el asunto se filtra solo en cliente.
+    assert not imap_server.fold_accents
+    _add(imap_server, "800001")
+    date_str = datetime.now(TZ).strftime("%a, %d %b %Y %H:%M:%S %z")
+    imap_server.add_message(_make_raw_email(
+        "=?utf-8?q?Notificaci=C3=B3n_TAREA:_800002?=", "Estimados X", date_str))
+
+    ahora = datetime.now(TZ)
+    resultados = scan_inbox(SESSION, ahora - timedelta(hours=1), ahora + timedelta(minutes=5),
+                            asunto_contiene="notificacion")
+
+    assert [r["task_number"] for r in resultados] == ["800002"]
+
+
 def test_scan_inbox_raises_on_missing_credentials():
     with pytest.raises(ValueError, match="incompletas"):
         scan_inbox({}, datetime.now(TZ), datetime.now(TZ))
+
+
+# ---------------------------------------------------------------------------
+# Escaneo contra el servidor IMAP local
+# ---------------------------------------------------------------------------
+
+SESSION = {"address": "user@telconet.ec", "password": "pass"}
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    db.init_db()
+
+
+@pytest.fixture
+def imap_server(monkeypatch, temp_db):
+    with IMAPStandIn() as server:
+        monkeypatch.setattr(
+            "gestorcompras.services.mail_ingest.imaplib.IMAP4_SSL", server.connect
+        )
+        yield server
+
+
+def _add(server, task: str, body: str = "Estimados MAVESA\nOC: 1"):
+    date_str = datetime.now(TZ).strftime("%a, %d %b %Y %H:%M:%S %z")
+    return server.add_message(_make_raw_email(f'TAREA: "{task}"', body, date_str))
+
+
+def test_scan_downloads_full_message_only_for_header_matches(imap_server):
+    date_str = datetime.now(TZ).strftime("%a, %d %b %Y %H:%M:%S %z")
+    adjunto = "X" * 200_000
+    imap_server.add_message(_make_raw_email('TAREA: "400001"', f"Estimados A\n{adjunto}", date_str))
+    imap_server.add_message(_make_raw_email('TAREA: "400002"', "Estimados B\nOC: 42", date_str))
+
+    ahora = datetime.now(TZ)
+    resultados = scan_inbox(SESSION, ahora - timedelta(hours=1), ahora + timedelta(minutes=5),
+                            task_numbers=["400002"])
+
+    assert [r["oc"] for r in resultados] == ["42"]
+    assert imap_server.stats["bytes_sent"] < 10_000
+
+
+def test_iter_scan_inbox_yields_before_downloading_everything(imap_server):
+    for n in range(30):
+        _add(imap_server, f"6000{n:02d}", body="Estimados TALLER\n" + "Y" * 5_000)
+    ahora = datetime.now(TZ)
+    avances = []
+
+    registros = iter_scan_inbox(
+        SESSION, ahora - timedelta(hours=1), ahora + timedelta(minutes=5),
+        chunk_size=10, body_chars=100, on_progress=lambda *a: avances.append(a),
+    )
+    primero = next(registros)
+
+    # Encabezados completos, pero solo el primer lote de mensajes completos.
+    assert primero["task_number"] == "600029"
+    assert imap_server.stats["by_command"]["FETCH"] == 4
+    assert avances[-1] == (30, 1, 30)
+    assert len(primero["body"]) == 100 and primero["body_truncado"]
+
+    resto = list(registros)
+    assert [r["task_number"] for r in resto] == [f"6000{n:02d}" for n in range(28, -1, -1)]
+    assert avances[-1] == (30, 30, 30)
+    assert load_body(SESSION, primero["message_id"]).endswith("Y" * 5_000)
@@ -0,0 +1,36 @@
+"""Tests para la conversión de HTML de correos a texto."""
+from gestorcompras.core.html_text import html_to_text
+from gestorcompras.services.email_task_scanner import clean_html
+
+
+def test_descarta_script_y_style():
+    html = (
+        "<html><head><style>p { color: red }</style>"
+        "<script>var x = '</p>';</script></head>"
+        "<body><p>Visible</p></body></html>"
+    )
+    assert html_to_text(html).strip() == "Visible"
+
+
+def test_bloques_como_saltos_de_linea_y_entidades():
+    html = "<div>Proveedor:</div><p>ACME &amp; Cía</p>Línea<br>siguiente<table><tr><td>A</td><td>B</td></tr></table>"
+    lineas = [linea.strip() for linea in html_to_text(html).splitlines() if linea.strip()]
+    assert lineas == ["Proveedor:", "ACME & Cía", "Línea", "siguiente", "A B"]
+
+
+def test_texto_plano_se_conserva():
+    texto = "Fecha Autorizacion: 03/04/2024\r\nProveedor: ACME\r\nx < y"
+    assert html_to_text(texto) == texto
+
+
+def test_limite_de_caracteres():
+    parrafo = "<p>" + "x" * 100 + "</p>"
+    html = "<style>" + "a{}" * 1000 + "</style>" + parrafo * 10_000
+    texto = html_to_text(html, max_chars=500)
+    assert len(texto) == 500
+    assert len(html_to_text(html, max_chars=None)) > 1_000_000
+
+
+def test_clean_html_una_linea():
+    html = "<p>Estimados <b>MAVESA</b></p><style>td{}</style><p>OC: 1</p>"
+    assert clean_html(html) == "Estimados MAVESA OC: 1"
@@ -0,0 +1,53 @@
+"""Tests para el FETCH IMAP por lotes."""
+from gestorcompras.services import imap_fetch
+from tests.imap_standin import IMAPStandIn
+
+
+def test_compress_message_set_builds_ranges():
+    assert imap_fetch.compress_message_set([b"7", 1, "2", 3, 9, 10]) == "1:3,7,9:10"
+    assert imap_fetch.compress_message_set([5]) == "5"
+    assert imap_fetch.compress_message_set([]) == ""
+
+
+def test_parse_fetch_response_multiple_literals_and_trailing_items():
+    data = [
+        (b"1 (UID 10 RFC822.SIZE 30 BODY[HEADER.FIELDS (SUBJECT)] {12}", b"Subject: A\r\n"),
+        (b" RFC822 {5}", b"hola!"),
+        b")",
+        (b"2 (RFC822 {3}", b"abc"),
+        b" UID 11 FLAGS (\\Seen))",
+        b"3 (UID 12 RFC822.SIZE 99)",
+    ]
+
+    mensajes = imap_fetch.parse_fetch_response(data)
+
+    assert [seq for seq, _ in mensajes] == [1, 2, 3]
+    assert mensajes[0][1] == {
+        "UID": 10, "RFC822.SIZE": 30, "HEADER": b"Subject: A\r\n", "RFC822": b"hola!",
+    }
+    assert mensajes[1][1]["UID"] == 11
+    assert mensajes[1][1]["RFC822"] == b"abc"
+    assert mensajes[2][1] == {"UID": 12, "RFC822.SIZE": 99}
+
+
+def test_fetch_chunks_groups_ids_and_keeps_requested_order():
+    with IMAPStandIn() as server:
+        for n in range(12):
+            server.add_message(f"Subject: m{n}\r\n\r\ncuerpo {n}".encode())
+        server.mailbox.expunge_uid(5)
+        conexion = server.connect()
+        conexion.login("u", "p")
+        conexion.select("INBOX")
+        server.reset_stats()
+
+        pedidos = [12, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1]
+        lotes = list(imap_fetch.fetch_chunks(
+            conexion, pedidos, "(BODY.PEEK[HEADER.FIELDS (SUBJECT)])", uid=True, chunk_size=5
+        ))
+        conexion.logout()
+
+    assert server.stats["by_command"]["UID FETCH"] == 3
+    uids = [uid for lote in lotes for uid, _ in lote]
+    assert uids == [12, 11, 10, 9, 8, 7, 6, 4, 3, 2, 1]
+    primero = lotes[0][0][1]
+    assert primero["HEADER"].startswith(b"Subject: m11")
@@ -0,0 +1,204 @@
+"""Tests para la ingesta de correo compartida, su caché y la sesión IMAP."""
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from gestorcompras.services import db, mail_ingest, mail_mirror
+from gestorcompras.services.email_task_scanner import (
+    iter_scan_inbox,
+    load_body,
+    scan_inbox,
+    scan_reassignments,
+)
+from tests.imap_standin import IMAPStandIn
+
+TZ = ZoneInfo("America/Guayaquil")
+SESSION = {"address": "user@telconet.ec", "password": "pass"}
+
+
+@pytest.fixture
+def imap_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    db.init_db()
+    mail_ingest.cache.clear()
+    with IMAPStandIn() as server:
+        monkeypatch.setattr("gestorcompras.services.mail_ingest.imaplib.IMAP4_SSL", server.connect)
+        yield server
+        mail_ingest.close_sessions()
+    mail_ingest.cache.clear()
+
+
+def _add(server, task: str, *, body="Estimados MAVESA\nOC: 1\nuser@telconet.ec", message_id=True):
+    fecha = datetime.now(TZ)
+    raw = (
+        f"From: notificaciones@telconet.ec\r\n"
+        f'Subject: NOTIFICACION A PROVEEDOR: TAREA: "{task}"\r\n'
+        f"Date: {fecha.strftime('%a, %d %b %Y %H:%M:%S %z')}\r\n"
+        + (f"Message-ID: <{task}@telconet.ec>\r\n" if message_id else "")
+        + f"\r\n{body}"
+    ).encode("utf-8")
+    return server.add_message(raw, internaldate=fecha)
+
+
+def _rango():
+    ahora = datetime.now(TZ)
+    return ahora - timedelta(hours=1), ahora + timedelta(minutes=5)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = mail_ingest.MessageCache(max_mensajes=2)
+    cache.put("User@telconet.ec", "tarea", "<a>", {"oc": "1"})
+    cache.put("user@telconet.ec", "tarea", "<b>", {"oc": "2"})
+    assert cache.get("user@telconet.ec", "tarea", " <a> ") == {"oc": "1"}
+
+    cache.put("user@telconet.ec", "tarea", "<c>", {"oc": "3"})
+    cache.put("user@telconet.ec", "tarea", "", {"oc": "sin id"})
+
+    assert cache.get("user@telconet.ec", "tarea", "<b>") is None
+    assert cache.get("user@telconet.ec", "otro", "<a>") is None
+    assert len(cache) == 2
+
+
+def test_second_scan_reuses_parsed_messages(imap_server):
+    _add(imap_server, "100001")
+    _add(imap_server, "100002", message_id=False)
+    desde, hasta = _rango()
+    primera = scan_inbox(SESSION, desde, hasta)
+    imap_server.reset_stats()
+
+    segunda = scan_inbox(SESSION, desde, hasta, require_user_email=True)
+
+    assert [r["task_number"] for r in segunda] == ["100002", "100001"]
+    assert [r["oc"] for r in segunda] == [r["oc"] for r in primera]
+    # Encabezados + el único mensaje sin Message-ID.
+    assert imap_server.stats["by_command"]["FETCH"] == 2
+    assert imap_server.stats["bytes_sent"] < 1_500
+
+
+def test_scan_after_mirror_search_skips_full_download(imap_server):
+    _add(imap_server, "200001", body="Estimados TALLER\nOC: 7\n" + "Z" * 50_000)
+    desde, hasta = _rango()
+    mail_mirror.refresh(SESSION, desde)
+    mail_mirror.search(SESSION, desde, hasta)
+    imap_server.reset_stats()
+
+    resultados = scan_inbox(SESSION, desde, hasta)
+
+    assert [(r["task_number"], r["oc"]) for r in resultados] == [("200001", "7")]
+    assert imap_server.stats["by_command"]["FETCH"] == 1
+    assert imap_server.stats["bytes_sent"] < 5_000
+
+
+def test_scan_reassignments_reads_multipart_mail(imap_server):
+    fecha = datetime.now(TZ).strftime("%a, %d %b %Y %H:%M:%S %z")
+    texto = (
+        "Tarea: 123456 Reasignación a: BODEGA\r\n"
+        "Datos relacionados:\r\n"
+        "- OC 555 | MAVESA | FAC. 001-1 | INGR. 9\r\n"
+    )
+    raw = (
+        "From: omar777j@gmail.com\r\n"
+        "Subject: Reasignaciones\r\n"
+        f"Date: {fecha}\r\n"
+        "Message-ID: <reasig-1@gmail.com>\r\n"
+        'Content-Type: multipart/alternative; boundary="b"\r\n\r\n'
+        "--b\r\nContent-Type: text/plain; charset=utf-8\r\n"
+        f"Content-Transfer-Encoding: 8bit\r\n\r\n{texto}\r\n"
+        "--b\r\nContent-Type: text/html; charset=utf-8\r\n\r\n<p>ver texto</p>\r\n--b--\r\n"
+    ).encode("utf-8")
+    imap_server.add_message(raw)
+    _add(imap_server, "300001")
+
+    tareas = scan_reassignments(SESSION, datetime.now(TZ).date())
+    imap_server.reset_stats()
+    otra_vez = scan_reassignments(SESSION, datetime.now(TZ).date())
+
+    assert tareas == otra_vez == [{
+        "task_number": "123456",
+        "reasignacion": "BODEGA",
+        "details": [{"OC": "555", "Proveedor": "MAVESA", "Factura": "001-1", "Ingreso": "9"}],
+    }]
+    assert imap_server.stats["by_command"]["FETCH"] == 1
+
+
+def test_session_reuses_one_authenticated_connection(imap_server):
+    _add(imap_server, "400001")
+    mail_ingest.start_session(SESSION)
+    desde, hasta = _rango()
+
+    for _ in range(3):
+        assert [r["task_number"] for r in scan_inbox(SESSION, desde, hasta)] == ["400001"]
+
+    assert imap_server.stats["connections"] == 1
+    assert imap_server.stats["logins"] == 1
+    assert imap_server.stats["by_command"]["SELECT"] == 3
+    assert imap_server.stats["by_command"]["LOGOUT"] == 0
+
+
+def test_session_reconnects_after_server_drop(imap_server):
+    _add(imap_server, "500001")
+    sesion = mail_ingest.start_session(SESSION)
+    desde, hasta = _rango()
+    scan_inbox(SESSION, desde, hasta)
+    sesion._conexion.shutdown()  # el servidor cerró la conexión inactiva
+
+    resultados = scan_inbox(SESSION, desde, hasta)
+
+    assert [r["task_number"] for r in resultados] == ["500001"]
+    assert imap_server.stats["logins"] == 2
+
+
+def test_busy_session_uses_separate_connection(imap_server):
+    _add(imap_server, "600001", body="Estimados TALLER\ncuerpo completo")
+    _add(imap_server, "600002")
+    mail_ingest.start_session(SESSION)
+    desde, hasta = _rango()
+
+    registros = iter_scan_inbox(SESSION, desde, hasta)
+    primero = next(registros)  # la búsqueda retiene la conexión de la sesión
+    cuerpo = load_body(SESSION, "1")
+    resto = list(registros)
+
+    assert cuerpo.endswith("cuerpo completo")
+    assert [r["task_number"] for r in [primero, *resto]] == ["600002", "600001"]
+    assert imap_server.stats["connections"] == 2
+    assert imap_server.stats["logins"] == 2
+
+
+def test_keepalive_sends_noop_and_closes_idle_connection(imap_server):
+    sesion = mail_ingest.ImapSession(
+        SESSION["address"], SESSION["password"], keepalive=0.05, max_inactiva=0.3
+    )
+    try:
+        assert sesion.acquire("INBOX") is not None
+        sesion.release()
+        time.sleep(0.2)
+        assert imap_server.stats["by_command"]["NOOP"] >= 1
+        time.sleep(0.4)
+        assert sesion._conexion is None
+        assert imap_server.stats["by_command"]["LOGOUT"] == 1
+    finally:
+        sesion.close()
+
+
+def test_fetch_parallel_keeps_order_and_caps_connections(imap_server):
+    uids = [_add(imap_server, f"7000{n:02d}") for n in range(45)]
+    pedidos = list(reversed(uids))
+
+    recibidos = list(mail_ingest.fetch_parallel(
+        SESSION, pedidos, "(BODY.PEEK[])", conexiones=50, chunk_size=4
+    ))
+
+    assert [uid for uid, _item in recibidos] == pedidos
+    assert all(b"TAREA" in item["RFC822"] for _uid, item in recibidos)
+    assert imap_server.stats["connections"] == mail_ingest.MAX_CONEXIONES
+
+
+def test_fetch_parallel_propagates_connection_errors(imap_server):
+    _add(imap_server, "800001")
+    imap_server.password = "otra"
+
+    with pytest.raises(Exception, match="credenciales"):
+        list(mail_ingest.fetch_parallel(SESSION, [1], "(BODY.PEEK[])"))
@@ -0,0 +1,216 @@
+"""Tests para el espejo local del buzón."""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from gestorcompras.data import mail_mirror_repo
+from gestorcompras.services import db, mail_mirror
+from tests.imap_standin import IMAPStandIn
+
+TZ = ZoneInfo("America/Guayaquil")
+SESSION = {"address": "user@telconet.ec", "password": "pass"}
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    db.init_db()
+
+
+@pytest.fixture
+def imap_server(monkeypatch, temp_db):
+    with IMAPStandIn() as server:
+        monkeypatch.setattr("gestorcompras.services.mail_ingest.imaplib.IMAP4_SSL", server.connect)
+        yield server
+
+
+def _add(server, task: str, *, remitente="notificaciones@telconet.ec", dias=0, body="OC: 1"):
+    fecha = datetime.now(TZ) - timedelta(days=dias)
+    raw = (
+        f"From: Notificaciones <{remitente}>\r\n"
+        f'Subject: =?utf-8?q?Notificaci=C3=B3n?= TAREA: "{task}"\r\n'
+        f"Date: {fecha.strftime('%a, %d %b %Y %H:%M:%S %z')}\r\n"
+        f"Message-ID: <{task}@telconet.ec>\r\n"
+        f"\r\nEstimados MAVESA\r\n{body}"
+    ).encode("utf-8")
+    return server.add_message(raw, internaldate=fecha)
+
+
+def _rango(dias=1):
+    ahora = datetime.now(TZ)
+    return ahora - timedelta(days=dias), ahora + timedelta(minutes=5)
+
+
+def test_refresh_then_search_is_local(imap_server):
+    _add(imap_server, "100001")
+    _add(imap_server, "100002", remitente="otro@proveedor.com")
+    _add(imap_server, "100003", body="OC: 33")
+
+    desde, hasta = _rango()
+    assert mail_mirror.refresh(SESSION, desde) == 3
+    # La primera búsqueda baja los cuerpos; las siguientes son locales.
+    assert len(mail_mirror.search(SESSION, desde, hasta)) == 3
+    imap_server.reset_stats()
+
+    por_tarea = mail_mirror.search(SESSION, desde, hasta, task_numbers=["100003", "100001"])
+    por_remitente = mail_mirror.search(SESSION, desde, hasta, remitente="otro@proveedor.com")
+    por_asunto = mail_mirror.search(SESSION, desde, hasta, asunto_contiene="notificacion")
+
+    assert imap_server.stats["commands"] == 0
+    assert [(r["task_number"], r["oc"]) for r in por_tarea] == [("100003", "33"), ("100001", "1")]
+    assert [r["task_number"] for r in por_remitente] == ["100002"]
+    assert len(por_asunto) == 3
+    assert por_tarea[0]["fecha"].tzinfo == TZ
+
+
+def test_refresh_appends_only_new_mail_without_marking_seen(imap_server):
+    _add(imap_server, "200001")
+    desde, hasta = _rango()
+    mail_mirror.refresh(SESSION, desde)
+
+    _add(imap_server, "200002")
+    imap_server.reset_stats()
+    assert mail_mirror.refresh(SESSION) == 1
+
+    assert imap_server.stats["by_command"]["UID FETCH"] == 1
+    assert imap_server.stats["by_command"]["EXAMINE"] == 1
+    assert [r["task_number"] for r in mail_mirror.search(SESSION, desde, hasta)] == [
+        "200002", "200001",
+    ]
+
+
+def test_raw_message_kept_compressed_by_message_id(imap_server):
+    _add(imap_server, "300001", body="X" * 50_000)
+    desde, hasta = _rango()
+    mail_mirror.refresh(SESSION, desde)
+
+    [registro] = mail_mirror.search(SESSION, desde, hasta)
+    raw = mail_mirror_repo.get_raw(SESSION["address"], message_id="<300001@telconet.ec>")
+
+    assert raw.endswith(b"X" * 50_000)
+    assert mail_mirror_repo.get_raw(SESSION["address"], raw_hash=registro["raw_hash"]) == raw
+    _cantidad, total = mail_mirror_repo.total_size(SESSION["address"], "INBOX")
+    assert total < 5_000 + len(registro["body"])
+
+
+def test_evict_by_age_and_size_then_backfill(imap_server):
+    for dias in (40, 20, 10, 0):
+        _add(imap_server, f"40000{dias:02d}", dias=dias, body="Z" * 1_000)
+    desde, hasta = _rango(dias=45)
+    assert mail_mirror.refresh(SESSION, desde) == 4
+
+    # Antigüedad: fuera el de hace 40 días.
+    assert mail_mirror.evict(SESSION["address"], dias=30) == 1
+    # Tamaño: queda solo el más reciente.
+    _cantidad, total = mail_mirror_repo.total_size(SESSION["address"], "INBOX")
+    assert mail_mirror.evict(SESSION["address"], dias=30, max_bytes=total // 3) == 2
+    assert [r["task_number"] for r in mail_mirror.search(SESSION, desde, hasta)] == ["4000000"]
+
+    # Un rango anterior a lo cubierto vuelve a descargar lo expulsado.
+    imap_server.reset_stats()
+    assert mail_mirror.refresh(SESSION, desde) == 3
+    assert len(mail_mirror.search(SESSION, desde, hasta)) == 4
+
+
+def test_refresh_rebuilds_on_uidvalidity_change(imap_server):
+    _add(imap_server, "500001")
+    desde, hasta = _rango()
+    mail_mirror.refresh(SESSION, desde)
+
+    imap_server.mailbox.reset(uidvalidity=77)
+    _add(imap_server, "500002")
+    mail_mirror.refresh(SESSION)
+
+    assert [r["task_number"] for r in mail_mirror.search(SESSION, desde, hasta)] == ["500002"]
+    assert mail_mirror_repo.get_state(SESSION["address"], "INBOX")["uidvalidity"] == 77
+
+
+def test_iter_search_without_body_loads_it_on_demand(imap_server):
+    _add(imap_server, "600001", body="OC: 5\n" + "W" * 10_000)
+    desde, hasta = _rango()
+    mail_mirror.refresh(SESSION, desde)
+
+    [registro] = list(mail_mirror.iter_search(SESSION, desde, hasta, with_body=False))
+
+    assert "body" not in registro and registro["oc"] == "5"
+    assert mail_mirror.load_body(SESSION, registro).endswith("W" * 10_000)
+
+
+def test_large_backfill_spreads_uid_ranges_over_connections(imap_server, monkeypatch):
+    monkeypatch.setattr(mail_mirror, "BACKFILL_MIN_MENSAJES", 20)
+    for n in range(60):
+        _add(imap_server, f"7000{n:02d}", body=f"OC: {n}")
+    desde, hasta = _rango()
+
+    assert mail_mirror.refresh(SESSION, desde, chunk_size=10, conexiones=3) == 60
+
+    # Conexión principal (SEARCH) + 3 de descarga, 2 rangos de 10 UIDs cada una.
+    assert imap_server.stats["logins"] == 4
+    assert imap_server.stats["by_command"]["UID FETCH"] == 6
+    assert [(r["task_number"], r["oc"]) for r in mail_mirror.search(SESSION, desde, hasta)] == [
+        (f"7000{n:02d}", str(n)) for n in range(59, -1, -1)
+    ]
+
+
+def test_refresh_downloads_only_headers_and_search_only_matches(imap_server):
+    _add(imap_server, "800001", body="OC: 1\n" + "A" * 200_000)
+    _add(imap_server, "800002", body="OC: 2")
+    desde, hasta = _rango()
+
+    mail_mirror.refresh(SESSION, desde)
+    assert imap_server.stats["bytes_sent"] < 5_000
+
+    imap_server.reset_stats()
+    assert [r["oc"] for r in mail_mirror.search(SESSION, desde, hasta, task_numbers=["800002"])] == [
+        "2"
+    ]
+    # Solo el mensaje que coincide se descarga completo, y una sola vez.
+    assert imap_server.stats["bytes_sent"] < 5_000
+    imap_server.reset_stats()
+    mail_mirror.search(SESSION, desde, hasta, task_numbers=["800002"])
+    assert imap_server.stats["commands"] == 0
+
+    # Un mensaje que antes no coincidió se completa cuando otra búsqueda lo pide.
+    assert [r["task_number"] for r in mail_mirror.search(SESSION, desde, hasta)] == [
+        "800002", "800001",
+    ]
+    assert imap_server.stats["by_command"]["UID FETCH"] == 1
+
+
+def test_search_drops_messages_removed_from_server(imap_server):
+    uid = _add(imap_server, "810001")
+    _add(imap_server, "810002")
+    desde, hasta = _rango()
+    mail_mirror.refresh(SESSION, desde)
+
+    imap_server.mailbox.expunge_uid(uid)
+
+    assert [r["task_number"] for r in mail_mirror.search(SESSION, desde, hasta)] == ["810002"]
+    assert mail_mirror_repo.total_size(SESSION["address"], "INBOX")[0] == 1
+
+
+def test_same_message_in_two_mailboxes_keeps_both_rows(imap_server):
+    _add(imap_server, "820001")
+    desde, hasta = _rango()
+    for mailbox in ("INBOX", "Archivo"):
+        mail_mirror.refresh(SESSION, desde, mailbox=mailbox)
+        assert len(mail_mirror.search(SESSION, desde, hasta, mailbox=mailbox)) == 1
+
+    imap_server.reset_stats()
+    assert len(mail_mirror.search(SESSION, desde, hasta, mailbox="INBOX")) == 1
+    assert imap_server.stats["commands"] == 0
+
+
+def test_background_refresh_stops(monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(mail_mirror, "refresh", lambda *a, **k: llamadas.append(a))
+    monkeypatch.setattr(mail_mirror, "evict", lambda *a, **k: 0)
+
+    parar = mail_mirror.start_background_refresh(SESSION, intervalo=0.01)
+    assert mail_mirror.start_background_refresh(SESSION) is parar
+    mail_mirror.stop_background_refresh()
+
+    assert parar.is_set()
+    assert mail_mirror.start_background_refresh(SESSION, intervalo=60) is not parar
+    mail_mirror.stop_background_refresh(SESSION["address"].upper())
@@ -1,6 +1,13 @@
+import random
+
 import pytest
 
-from gestorcompras.core.mail_parse import parse_body, parse_subject
+from benchmarks.mail_parse_referencia import parse_body_secuencial
+from gestorcompras.core.mail_parse import (
+    parse_body,
+    parse_reassignments,
+    parse_subject,
+)
 
 
 @pytest.mark.parametrize(
@@ -144,3 +151,55 @@ def test_parse_body_multiples_campos_en_mismo_correo():
     assert parsed["mecanico_nombre"] == "Pedro Alvarado"
     assert parsed["mecanico_telefono"] == "0998765432"
     assert "OT" in parsed["inf_vehiculo"]
+
+
+_FRAGMENTOS = [
+    "Estimados ", "ESTIMADOS \"", "estimados\n", "coordinando el mantenimiento con ",
+    "Coordinando  el\nmantenimiento con \"", "(09-999-8888)", "(593 2 123)", ")\"",
+    "OT", "ot", "OT\"", "[GTI-1566]", " [107082] ", "[abc\n", "]", "nota ",
+    "FACTURA:", "Fac. ", "FAC#", "OC: ", "oc", "LOC 1", "INGRESO# ", "ingr.", "RUC ",
+    "ruc:", "1790016919001", "Fecha de Orden: ", "FECHA ORDEN", "15/03/2025", "12345",
+    "user@telconet.ec", "USER@Telconet.EC", "x@y.co", "@", "a@b", "“", "”", "‘", "’",
+    "Ã³", "Ã‘", "Ã±", "Ã", "ñ", "é", "İ", "ı", "ſ", "K", "\n", "\n\n", " ", "\t",
+    "\"", ".", ":", "#", "-", "9", "A", "z",
+]
+_CORREOS = ["user@telconet.ec", "USER@TELCONET.EC", "iuser@ska.ec", "ñandu@x.ec", ""]
+
+
+def test_parse_body_equivale_a_busqueda_por_campo():
+    rnd = random.Random(20260318)
+    for _ in range(4000):
+        cuerpo = "".join(rnd.choice(_FRAGMENTOS) for _ in range(rnd.randint(0, 40)))
+        correo = rnd.choice(_CORREOS)
+        assert parse_body(cuerpo, correo) == parse_body_secuencial(cuerpo, correo), (
+            cuerpo, correo,
+        )
+
+
+@pytest.mark.parametrize("correo", _CORREOS)
+def test_parse_body_equivale_en_casos_limite(correo):
+    for cuerpo in (
+        None, "", "iuser@SKA.EC", "İuser@ska.ec", "ıuser@ska.ec", "iuser@ſka.ec",
+        "İ iuser@ska.ec", "K user@telconet.ec", "ocuser@telconet.ec",
+        "\n\n [a\n b]  [c] OT\"\nx OT 1", "[x] sin nada\nLOTE 5", "FAC\nFACTURA 1",
+    ):
+        assert parse_body(cuerpo, correo) == parse_body_secuencial(cuerpo, correo)
+
+
+@pytest.mark.parametrize("final", ["\n", ""])
+def test_parse_reassignments_multiple_tasks(final):
+    body = (
+        "Tarea: 111111 Reasignación a: BODEGA\nDatos relacionados:\n"
+        "- OC 1 | MAVESA | FAC. 001-1 | INGR. 10\n"
+        "- OC 2 | TALLER X | FAC. 001-2 | INGR. 11\n"
+        "Tarea: 222222 Reasignación a: COMPRAS\nDatos relacionados:\n"
+        "- OC 3 | OTRO | FAC. 001-3 | INGR. 12" + final
+    )
+    tareas = parse_reassignments(body)
+    assert [(t["task_number"], t["reasignacion"]) for t in tareas] == [
+        ("111111", "BODEGA"), ("222222", "COMPRAS"),
+    ]
+    assert [d["OC"] for d in tareas[0]["details"]] == ["1", "2"]
+    assert tareas[1]["details"] == [
+        {"OC": "3", "Proveedor": "OTRO", "Factura": "001-3", "Ingreso": "12"}
+    ]
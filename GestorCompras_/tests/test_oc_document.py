@@ -0,0 +1,87 @@
+"""Tests para la extracción de campos del PDF de una OC."""
+import pytest
+
+from gestorcompras.core import oc_document, pdf_text
+from gestorcompras.core.oc_document import OCDocumentInfo
+from tests.test_pdf_text import pdf_minimo
+
+
+@pytest.fixture(autouse=True)
+def cache_tmp(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_text, "CACHE_PATH", str(tmp_path / "pdf_text.sqlite3"))
+
+
+def test_all_fields_in_a_single_read(tmp_path, monkeypatch):
+    lecturas = []
+    paginas = [
+        "ORDEN DE COMPRA No. 140000123\nFecha Orden: 04/06/2024\n"
+        "Fecha Autorizacion: 05/06/2024\nProveedor: Nombre: 004465 - MAVESA\nRUC: 1790016919001",
+        "Observacion: TAREA #1234567//PEDIDO:S/N",
+    ]
+
+    def _extraer(ruta):
+        lecturas.append(ruta)
+        return paginas
+
+    monkeypatch.setitem(pdf_text.EXTRACTORES, "pypdf", _extraer)
+    ruta = tmp_path / "oc.pdf"
+    ruta.write_bytes(b"%PDF-1.4")
+
+    info = oc_document.desde_pdf(ruta)
+    oc_document.desde_pdf(ruta, ("tarea",))
+
+    assert info == OCDocumentInfo(
+        numero="140000123",
+        tarea="1234567",
+        proveedor="004465 - MAVESA",
+        ruc="1790016919001",
+        fecha_orden="04/06/2024",
+        fecha_aut="05/06/2024",
+    )
+    assert len(lecturas) == 1
+    assert not hasattr(info, "__dict__")
+
+
+def test_walk_stops_once_requested_fields_are_found():
+    leidas = []
+
+    def paginas():
+        for texto in ("RUC 1790016919001", "Tarea 654321", "Proveedor: OTRO"):
+            leidas.append(texto)
+            yield texto
+
+    info = oc_document.desde_texto(paginas(), ("ruc", "tarea"), oc_document.TAREA_NAF_O_TEXTO)
+
+    assert (info.ruc, info.tarea, info.proveedor) == ("1790016919001", "654321", None)
+    assert len(leidas) == 2
+
+
+def test_task_prefers_naf_observation_on_the_same_page():
+    texto = "Tarea 12 de la ruta\nOBS: TAREA #7654321 // PEDIDO"
+    regla = oc_document.TAREA_NAF_O_TEXTO
+
+    assert oc_document.desde_texto([texto], ("tarea",), regla).tarea == "7654321"
+    assert oc_document.desde_texto(["Tarea 654321"], ("tarea",), regla).tarea == "654321"
+
+
+def test_default_task_rule_only_accepts_naf_observation():
+    paginas = ["Tarea 12 de la ruta", "OBS: TAREA #1234567// PEDIDO"]
+
+    assert oc_document.desde_texto(paginas, ("tarea",)).tarea == "1234567"
+    assert oc_document.desde_texto(["Tarea 654321"], ("tarea",)).tarea is None
+    con_texto = oc_document.desde_texto(paginas, ("tarea",), oc_document.TAREA_NAF_O_TEXTO)
+    assert con_texto.tarea == "12"
+
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(ValueError):
+        oc_document.desde_texto([], ("iva",))
+
+
+def test_real_pdf_with_pdfplumber(tmp_path):
+    ruta = tmp_path / "oc.pdf"
+    ruta.write_bytes(pdf_minimo("ORDEN DE COMPRA 140000001", "RUC 1790016919001 Tarea 111111"))
+
+    info = oc_document.desde_pdf(ruta, motor="pdfplumber", tarea=oc_document.TAREA_NAF_O_TEXTO)
+
+    assert (info.numero, info.ruc, info.tarea) == ("140000001", "1790016919001", "111111")
@@ -0,0 +1,21 @@
+"""Tests para la búsqueda de números de OC por lote."""
+from gestorcompras.core.oc_numeros import BuscadorNumerosOC
+
+
+def test_finds_every_number_in_batch_order():
+    buscador = BuscadorNumerosOC(["140000003", None, "140000001", "", "140000003", "OC-77"])
+
+    texto = "ORDEN 140000001 y 140000003; ref OC-77 / OC-778"
+
+    assert len(buscador) == 3
+    assert buscador.encontrar(texto) == ["140000003", "140000001", "OC-77"]
+    assert buscador.primero("copia de 140000001 (1).pdf") == "140000001"
+    assert buscador.primero(None) is None
+
+
+def test_digits_glued_to_other_digits_do_not_match():
+    buscador = BuscadorNumerosOC(["900169", "123456"])
+
+    assert buscador.encontrar("RUC 1790016919001 ORDEN 1234567.pdf") == []
+    assert buscador.encontrar("ORDEN_123456_v2.pdf") == ["123456"]
+
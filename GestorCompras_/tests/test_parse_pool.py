@@ -0,0 +1,57 @@
+"""Tests para la etapa de parseo en procesos."""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from gestorcompras.services import db, parse_pool
+from gestorcompras.services.email_task_scanner import scan_inbox
+from tests.imap_standin import IMAPStandIn
+
+TZ = ZoneInfo("America/Guayaquil")
+SESSION = {"address": "user@telconet.ec", "password": "pass"}
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_map_ordered_keeps_input_order(workers):
+    resultados = list(parse_pool.map_ordered(
+        divmod, ((n, 7) for n in range(100)), workers=workers, ventana=3
+    ))
+    assert resultados == [divmod(n, 7) for n in range(100)]
+
+
+def test_map_ordered_propagates_worker_errors():
+    with pytest.raises(ZeroDivisionError):
+        list(parse_pool.map_ordered(divmod, [(1, 1), (1, 0)], workers=2))
+
+
+def test_workers_para_uses_serial_path_for_small_scans(monkeypatch):
+    monkeypatch.setattr(parse_pool, "MIN_MENSAJES_POOL", 10)
+    assert parse_pool.workers_para(5, 4) == 0
+    assert parse_pool.workers_para(50, 1) == 0
+    assert parse_pool.workers_para(50, 4) == 4
+
+
+def test_scan_inbox_same_records_with_process_pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    db.init_db()
+    monkeypatch.setattr(parse_pool, "MIN_MENSAJES_POOL", 0)
+    with IMAPStandIn() as server:
+        monkeypatch.setattr(
+            "gestorcompras.services.mail_ingest.imaplib.IMAP4_SSL", server.connect
+        )
+        fecha = datetime.now(TZ).strftime("%a, %d %b %Y %H:%M:%S %z")
+        for n in range(40):
+            server.add_message((
+                f'From: notificaciones@telconet.ec\r\nSubject: TAREA: "{700000 + n}"\r\n'
+                f"Date: {fecha}\r\nContent-Type: text/html; charset=utf-8\r\n\r\n"
+                f"<p>Estimados TALLER {n}</p><br>OC: {n}<br>user@telconet.ec"
+            ).encode("utf-8"))
+        ahora = datetime.now(TZ)
+        rango = (ahora - timedelta(hours=1), ahora + timedelta(minutes=5))
+
+        en_serie = scan_inbox(SESSION, *rango, parse_workers=0)
+        en_procesos = scan_inbox(SESSION, *rango, parse_workers=2)
+
+    assert len(en_serie) == 40
+    assert en_procesos == en_serie
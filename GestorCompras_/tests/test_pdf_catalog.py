@@ -0,0 +1,113 @@
+"""Tests para el catálogo persistente de PDF de despacho."""
+import os
+
+import pytest
+
+from gestorcompras.data import pdf_catalog_repo
+from gestorcompras.logic import despacho_logic
+from gestorcompras.services import db, pdf_catalog
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "test.db"))
+    monkeypatch.setattr(pdf_catalog, "_ultimo_refresco", {})
+    db.init_db()
+
+
+@pytest.fixture
+def carpeta(tmp_path, temp_db, monkeypatch):
+    base = tmp_path / "pdfs"
+    base.mkdir()
+    monkeypatch.setattr(despacho_logic, "get_config", lambda clave, defecto=None: str(base))
+    return base
+
+
+def _pdf(ruta):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_bytes(b"%PDF-1.4")
+    return ruta
+
+
+def test_batch_lookup_returns_most_recent_pdf_per_order(carpeta):
+    viejo = _pdf(carpeta / "TAREA 1" / "ORDEN 140000001.pdf")
+    nuevo = _pdf(carpeta / "TAREA 2" / "ORDEN 140000001 (1).pdf")
+    otro = _pdf(carpeta / "TAREA 2" / "ORDEN 1400000012.pdf")
+    ctimes = {str(viejo): 1.0, str(nuevo): 3.0, str(otro): 2.0}
+    pdf_catalog.refresh(carpeta)
+    # ctime no se puede fijar desde Python; se ajusta en el catálogo.
+    conn = db.get_connection()
+    conn.executemany("UPDATE catalogo_pdf SET ctime=? WHERE ruta=?", [(c, r) for r, c in ctimes.items()])
+    conn.commit()
+    conn.close()
+
+    ubicaciones = despacho_logic.buscar_archivos_mas_recientes(["140000001", "OC 1400000012", "999"])
+
+    assert ubicaciones == {
+        "140000001": (str(nuevo), "TAREA 2"),
+        "OC 1400000012": (str(otro), "TAREA 2"),
+        "999": (None, None),
+    }
+    nuevo.unlink()
+    assert despacho_logic.buscar_archivo_mas_reciente("140000001") == (str(viejo), "TAREA 1")
+
+
+def test_refresh_only_lists_changed_folders(carpeta):
+    for n in range(3):
+        _pdf(carpeta / f"TAREA {n}" / "SUB" / f"ORDEN 14000000{n}.pdf")
+
+    primera = pdf_catalog.refresh(carpeta)
+    sin_cambios = pdf_catalog.refresh(carpeta)
+    _pdf(carpeta / "TAREA 1" / "SUB" / "ORDEN 140000009.pdf")
+    agregado = pdf_catalog.refresh(carpeta)
+    for archivo in (carpeta / "TAREA 2" / "SUB").iterdir():
+        archivo.unlink()
+    (carpeta / "TAREA 2" / "SUB").rmdir()
+    borrado = pdf_catalog.refresh(carpeta)
+
+    assert (primera["listadas"], primera["nuevos"]) == (7, 3)
+    assert (sin_cambios["revisadas"], sin_cambios["listadas"]) == (7, 0)
+    assert (agregado["listadas"], agregado["nuevos"]) == (1, 1)
+    assert borrado["listadas"] == 1
+    assert pdf_catalog_repo.contar(str(carpeta)) == (6, 3)
+    assert pdf_catalog.buscar(carpeta, ["140000002"]) == {"140000002": (None, None)}
+    assert pdf_catalog.buscar(carpeta, ["140000009"])["140000009"][1] == "SUB"
+
+
+def test_lookup_refreshes_when_an_order_is_missing(carpeta):
+    assert pdf_catalog.buscar(carpeta, ["140000001"]) == {"140000001": (None, None)}
+
+    ruta = _pdf(carpeta / "ORDEN 140000001.pdf")
+
+    assert pdf_catalog.buscar(carpeta, ["140000001"]) == {"140000001": (str(ruta), "pdfs")}
+
+
+def test_lookup_within_window_sees_newer_pdf_in_candidate_folder(carpeta):
+    viejo = _pdf(carpeta / "TAREA 1" / "ORDEN 140000001.pdf")
+    assert pdf_catalog.buscar(carpeta, ["140000001"]) == {"140000001": (str(viejo), "TAREA 1")}
+    conn = db.get_connection()
+    conn.execute("UPDATE catalogo_pdf SET ctime=1 WHERE ruta=?", (str(viejo),))
+    conn.commit()
+    conn.close()
+
+    nuevo = _pdf(carpeta / "TAREA 1" / "ORDEN 140000001 (1).pdf")
+    # Con timestamps gruesos el mtime podría no cambiar dentro de la prueba.
+    mtime = os.stat(nuevo.parent).st_mtime_ns + 1_000_000_000
+    os.utime(nuevo.parent, ns=(mtime, mtime))
+
+    assert pdf_catalog.buscar(carpeta, ["140000001"]) == {"140000001": (str(nuevo), "TAREA 1")}
+
+
+def test_rebuild_discards_stale_entries(carpeta, capsys):
+    _pdf(carpeta / "A" / "ORDEN 140000001.pdf")
+    pdf_catalog.refresh(carpeta)
+    conn = db.get_connection()
+    conn.execute("INSERT INTO catalogo_pdf (ruta, carpeta, ctime) VALUES (?, ?, 0)",
+                 (str(carpeta / "A" / "fantasma 140000002.pdf"), str(carpeta / "A")))
+    conn.commit()
+    conn.close()
+
+    pdf_catalog.main([str(carpeta), "--reconstruir"])
+
+    assert "1 PDF en 2 carpetas" in capsys.readouterr().out
+    assert pdf_catalog_repo.buscar(str(carpeta), ["140000002"]) == {}
@@ -0,0 +1,115 @@
+"""Tests para la caché de texto de PDF."""
+import os
+
+import pytest
+
+from gestorcompras.core import pdf_text
+from gestorcompras.logic import despacho_logic
+
+
+def pdf_minimo(*paginas: str) -> bytes:
+    """PDF válido con una línea de texto (Helvetica) por página."""
+    n = len(paginas)
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(n))
+    objetos = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {n} >>",
+    ]
+    fuente = 3 + 2 * n
+    for i, texto in enumerate(paginas):
+        contenido = f"BT /F1 12 Tf 72 720 Td ({texto}) Tj ET"
+        objetos.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {fuente} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        objetos.append(f"<< /Length {len(contenido)} >>\nstream\n{contenido}\nendstream")
+    objetos.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    salida = bytearray(b"%PDF-1.4\n")
+    posiciones = []
+    for numero, cuerpo in enumerate(objetos, start=1):
+        posiciones.append(len(salida))
+        salida += f"{numero} 0 obj\n{cuerpo}\nendobj\n".encode("latin-1")
+    xref = len(salida)
+    salida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    for posicion in posiciones:
+        salida += f"{posicion:010d} 00000 n \n".encode()
+    salida += (
+        f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(salida)
+
+
+@pytest.fixture
+def cache_tmp(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_text, "CACHE_PATH", str(tmp_path / "pdf_text.sqlite3"))
+    return pdf_text.cache()
+
+
+@pytest.fixture
+def contador(monkeypatch):
+    llamadas = []
+    for motor, extraer in list(pdf_text.EXTRACTORES.items()):
+        def _contar(ruta, _motor=motor, _extraer=extraer):
+            llamadas.append((_motor, os.path.basename(ruta)))
+            return _extraer(ruta)
+
+        monkeypatch.setitem(pdf_text.EXTRACTORES, motor, _contar)
+    return llamadas
+
+
+def test_pdf_is_extracted_once_per_engine(tmp_path, cache_tmp, contador):
+    ruta = tmp_path / "ORDEN 140000001.pdf"
+    ruta.write_bytes(pdf_minimo("RUC 1790016919001", "Tarea 123456"))
+
+    primera = pdf_text.paginas(ruta, "pdfplumber")
+    segunda = pdf_text.paginas(str(ruta), "pdfplumber")
+    pypdf = pdf_text.paginas(ruta)
+    pdf_text.paginas(ruta)
+
+    assert primera == segunda == ["RUC 1790016919001", "Tarea 123456"]
+    assert "Tarea 123456" in pypdf[1]
+    assert contador == [("pdfplumber", ruta.name), ("pypdf", ruta.name)]
+    assert len(cache_tmp) == 2
+
+
+def test_changed_file_is_extracted_again(tmp_path, cache_tmp, contador):
+    ruta = tmp_path / "oc.pdf"
+    ruta.write_bytes(pdf_minimo("Tarea 111111"))
+    assert pdf_text.paginas(ruta, "pdfplumber") == ["Tarea 111111"]
+
+    ruta.write_bytes(pdf_minimo("Tarea 2222222"))
+
+    assert pdf_text.paginas(ruta, "pdfplumber") == ["Tarea 2222222"]
+    assert len(contador) == 2
+    assert len(cache_tmp) == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    almacen = pdf_text.PdfTextCache(tmp_path / "cache.sqlite3", max_archivos=2)
+    almacen.put("/a.pdf", 1, 1, "pypdf", ["a"])
+    almacen.put("/b.pdf", 1, 1, "pypdf", ["b"])
+    assert almacen.get("/a.pdf", 1, 1, "pypdf") == ["a"]
+
+    almacen.put("/c.pdf", 1, 1, "pypdf", ["c"])
+
+    assert almacen.get("/b.pdf", 1, 1, "pypdf") is None
+    assert almacen.get("/a.pdf", 1, 1, "pypdf") == ["a"]
+    assert len(almacen) == 2
+
+
+def test_unreadable_pdf_is_not_cached(tmp_path, cache_tmp):
+    ruta = tmp_path / "roto.pdf"
+    ruta.write_bytes(b"no es un pdf")
+
+    assert despacho_logic.extraer_info_de_pdf(str(ruta)) == (None, None)
+    assert len(cache_tmp) == 0
+
+
+def test_despacho_reads_ruc_and_task_from_cache(tmp_path, cache_tmp, contador):
+    ruta = tmp_path / "oc.pdf"
+    ruta.write_bytes(pdf_minimo("Proveedor RUC 1790016919001", "Tarea 654321"))
+
+    assert despacho_logic.extraer_info_de_pdf(str(ruta)) == ("1790016919001", "654321")
+    assert despacho_logic.extraer_info_de_pdf(str(ruta)) == ("1790016919001", "654321")
+    assert len(contador) == 1
@@ -1,10 +1,17 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
 import pytest
 
 from gestorcompras.modules.reasignacion_gui import ServiciosReasignacion
+from gestorcompras.services.email_task_scanner import load_body, normalize_for_search
+from tests.imap_standin import IMAPStandIn
+
+TZ = ZoneInfo("America/Guayaquil")
 
 
 def test_normaliza_busqueda_sin_acentos():
-    normalizado = ServiciosReasignacion._normalize_for_search("Notificación a Proveedor: Tarea")
+    normalizado = normalize_for_search("Notificación a Proveedor: Tarea")
     assert "NOTIFICACION A PROVEEDOR" in normalizado
 
 
@@ -17,6 +24,86 @@ def test_normaliza_busqueda_sin_acentos():
     ],
 )
 def test_subcadena_detectada(subject):
-    patron = ServiciosReasignacion._normalize_for_search("NOTIFICACION A PROVEEDOR:")
-    sujeto = ServiciosReasignacion._normalize_for_search(subject)
+    patron = normalize_for_search("NOTIFICACION A PROVEEDOR:")
+    sujeto = normalize_for_search(subject)
     assert patron in sujeto
+
+
+def _raw(subject: str, body: str) -> bytes:
+    fecha = datetime.now(TZ).strftime("%a, %d %b %Y %H:%M:%S %z")
+    return (
+        f"From: notificaciones@telconet.ec\r\nSubject: {subject}\r\n"
+        f"Date: {fecha}\r\n\r\n{body}"
+    ).encode("utf-8")
+
+
+def test_buscar_correos_descarga_cuerpo_solo_de_candidatos(monkeypatch):
+    with IMAPStandIn() as server:
+        monkeypatch.setattr(
+            "gestorcompras.services.mail_ingest.imaplib.IMAP4_SSL", server.connect
+        )
+        server.add_message(_raw("Boletin semanal", "Z" * 200_000))
+        server.add_message(_raw(
+            'NOTIFICACION A PROVEEDOR: TAREA: "123456"',
+            'Estimados TALLER\nusuario@telconet.ec',
+        ))
+        ventana = ServiciosReasignacion.__new__(ServiciosReasignacion)
+        ahora = datetime.now(TZ)
+
+        resultados = ventana._buscar_correos(
+            "usuario@telconet.ec", "clave", "NOTIFICACION A PROVEEDOR:",
+            ahora - timedelta(hours=1), ahora + timedelta(minutes=5),
+        )
+
+        assert [r["task_number"] for r in resultados] == ["123456"]
+        assert resultados[0]["proveedor"] == "TALLER"
+        assert server.stats["bytes_sent"] < 10_000
+
+
+def test_buscar_correos_con_tildes_en_servidor_que_no_las_ignora(monkeypatch):
+    with IMAPStandIn() as server:
+        assert not server.fold_accents
+        monkeypatch.setattr(
+            "gestorcompras.services.mail_ingest.imaplib.IMAP4_SSL", server.connect
+        )
+        server.add_message(_raw(
+            '=?utf-8?q?NOTIFICACI=C3=93N_A_PROVEEDOR:_TAREA:_"654321"?=',
+            'Estimados TALLER\nusuario@telconet.ec',
+        ))
+        ventana = ServiciosReasignacion.__new__(ServiciosReasignacion)
+        ahora = datetime.now(TZ)
+
+        resultados = ventana._buscar_correos(
+            "usuario@telconet.ec", "clave", "NOTIFICACION A PROVEEDOR:",
+            ahora - timedelta(hours=1), ahora + timedelta(minutes=5),
+        )
+
+        assert [r["task_number"] for r in resultados] == ["654321"]
+
+
+def test_vista_previa_usa_uid_estable_tras_expunge(monkeypatch):
+    with IMAPStandIn() as server:
+        monkeypatch.setattr(
+            "gestorcompras.services.mail_ingest.imaplib.IMAP4_SSL", server.connect
+        )
+        # Un mensaje ya borrado: los UID dejan de coincidir con las secuencias.
+        server.mailbox.expunge_uid(server.add_message(_raw("Aviso", "x")))
+        primero = server.add_message(_raw(
+            'NOTIFICACION A PROVEEDOR: TAREA: "111111"', "Estimados UNO\nusuario@telconet.ec",
+        ))
+        server.add_message(_raw(
+            'NOTIFICACION A PROVEEDOR: TAREA: "222222"', "Estimados DOS\nusuario@telconet.ec",
+        ))
+        ventana = ServiciosReasignacion.__new__(ServiciosReasignacion)
+        ahora = datetime.now(TZ)
+        sesion = {"address": "usuario@telconet.ec", "password": "clave"}
+
+        resultados = ventana._buscar_correos(
+            sesion["address"], sesion["password"], "NOTIFICACION A PROVEEDOR:",
+            ahora - timedelta(hours=1), ahora + timedelta(minutes=5),
+        )
+        segundo = next(r for r in resultados if r["task_number"] == "222222")
+        # Al borrar el primero, el número de secuencia del segundo pasa a ser 1.
+        server.mailbox.expunge_uid(primero)
+
+        assert "Estimados DOS" in load_body(sesion, str(segundo["message_id"]), uid=True)